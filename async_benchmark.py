@@ -0,0 +1,114 @@
+"""
+동기/비동기 일괄 처리 벤치마크 - 모의 서버로 문자열 N개를 내려받고 → 번역하고 → 저장하는 시간 비교
+실제 API 키 없이 mock_servers의 모의 Paratranz/Gemini를 이 프로세스 안에서 띄워 사용
+
+- 동기: 페이지 4개 동시 (string_stream과 같은 수) → 배치 번역 스레드 N개 → 저장 워커 2개 (save_queue와 같은 수)
+- 비동기: fetch_all_strings_async → translate_strings_async → save_translations_async (이벤트 루프 하나)
+- 모의 Gemini는 요청마다 --gemini-latency초 뒤에 답함 (분당 한도는 벤치마크 동안 넉넉하게)
+
+사용:
+    python async_benchmark.py                                  # 2000개, 동기/비동기 모두
+    python async_benchmark.py --strings 500 --mode async
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mock_servers
+import paratranz_api_translator as translator_module
+
+PAGE_SIZE = 100
+FETCH_WORKERS = 4  # string_stream 페이지 동시 요청 수
+SAVE_WORKERS = 2  # save_queue 기본 워커 수
+
+
+def quiet():
+    """번역기의 배치별 로그 숨김"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def use_mock_servers(args):
+    """모의 서버를 띄우고 번역기가 그쪽으로 요청하게 함 → (Paratranz, Gemini) 모의 서버"""
+    paratranz = mock_servers.MockParatranz(port=0, strings=args.strings, latency=args.paratranz_latency).start()
+    gemini = mock_servers.MockGemini(port=0, latency=args.gemini_latency).start()
+    translator_module.PARATRANZ_BASE_URL = paratranz.base_url
+    translator_module.GEMINI_BASE_URL = gemini.base_url
+    translator_module.STRINGS_PAGE_SIZE = PAGE_SIZE
+    translator_module.STREAM_RESPONSES = False
+    unlimited = {'rpm': 10 ** 6, 'rpd': 10 ** 8, 'tpm': 10 ** 10}
+    translator_module.GEMINI_LIMITS = {model: dict(unlimited) for model in
+                                       [translator_module.MODEL_NAME] + list(translator_module.GEMINI_FALLBACK_MODELS)}
+    return paratranz, gemini
+
+
+def run_sync(tag: str, workers: int):
+    translator = translator_module.ParatranzAPITranslator(f'bench-p-{tag}', f'bench-g-{tag}')
+    t0 = time.perf_counter()
+    first = translator.fetch_strings_page(1, 0, 1, PAGE_SIZE)
+    with ThreadPoolExecutor(FETCH_WORKERS) as pool:
+        pages = list(pool.map(lambda page: translator.fetch_strings_page(1, 0, page, PAGE_SIZE),
+                              range(2, first['pageCount'] + 1)))
+    strings = first['results'] + [s for page in pages for s in page['results']]
+    t1 = time.perf_counter()
+
+    batches = translator.plan_batches(strings)
+    with quiet(), ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(lambda batch: translator.translate_batch_with_gemini(
+            [s['original'] for s in batch], ids=[s['id'] for s in batch]), batches))
+    pairs = [(s, result[i]) for batch, result in zip(batches, results) if result for i, s in enumerate(batch)]
+    t2 = time.perf_counter()
+
+    with quiet(), ThreadPoolExecutor(SAVE_WORKERS) as pool:
+        saved = sum(pool.map(lambda pair: bool(translator.save_translation(pair[0], pair[1][0])), pairs))
+    t3 = time.perf_counter()
+    return len(strings), len(batches), saved, t1 - t0, t2 - t1, t3 - t2
+
+
+async def run_async(tag: str):
+    translator = translator_module.ParatranzAPITranslator(f'bench-p-{tag}', f'bench-g-{tag}')
+    t0 = time.perf_counter()
+    strings = await translator.fetch_all_strings_async(1, 0)
+    t1 = time.perf_counter()
+    with quiet():
+        pairs = await translator.translate_strings_async(strings)
+    t2 = time.perf_counter()
+    statuses = await translator.save_translations_async([(s, pair[0]) for s, pair in pairs if pair])
+    t3 = time.perf_counter()
+    return len(strings), len(translator.plan_batches(strings)), sum(map(bool, statuses)), t1 - t0, t2 - t1, t3 - t2
+
+
+def show(name: str, result):
+    count, batches, saved, fetch, translate, save = result
+    print(f"   {name:<24} 문자열 {count}개, 배치 {batches}개, 저장 {saved}개 | "
+          f"내려받기 {fetch:.2f}초, 번역 {translate:.2f}초, 저장 {save:.2f}초 → 총 {fetch + translate + save:.2f}초")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='동기/비동기 일괄 처리 벤치마크 (모의 서버)')
+    parser.add_argument('--strings', type=int, default=2000, help='문자열 수')
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--sync-workers', type=int, default=4, help='동기 배치 번역 스레드 수')
+    parser.add_argument('--gemini-latency', type=float, default=1.0, help='모의 Gemini 응답 지연 (초)')
+    parser.add_argument('--paratranz-latency', type=float, default=0.05, help='모의 Paratranz 응답 지연 (초)')
+    args = parser.parse_args()
+
+    print(f"⏱️  일괄 처리 벤치마크: 문자열 {args.strings}개, Gemini 지연 {args.gemini_latency}초")
+    if args.mode in ('sync', 'both'):
+        paratranz, gemini = use_mock_servers(args)
+        show(f"동기 (번역 스레드 {args.sync_workers}개)", run_sync('sync', args.sync_workers))
+        paratranz.stop()
+        gemini.stop()
+    if args.mode in ('async', 'both'):
+        # 저장된 문자열은 단계가 바뀌므로 새 모의 서버로
+        paratranz, gemini = use_mock_servers(args)
+        show("비동기 (이벤트 루프 하나)", asyncio.run(run_async('async')))
+        paratranz.stop()
+        gemini.stop()
+
+
+if __name__ == '__main__':
+    main()
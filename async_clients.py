@@ -0,0 +1,327 @@
+"""
+비동기 Paratranz / Gemini 클라이언트 (asyncio + aiohttp)
+동기 클라이언트(requests)는 요청 하나가 응답을 받을 때까지 스레드 하나를 차지 → 페이지 내려받기/배치 번역/저장을
+동시에 많이 보내려면 스레드 풀이 필요하고, 한도 대기(time.sleep)도 스레드를 붙잡음
+→ 이벤트 루프 하나에서 요청을 동시에 보내고 동시 요청 수는 세마포어로 제한
+
+- AsyncParatranzClient: 파일 목록, 문자열 페이지, 모든 페이지 동시 내려받기, 번역 저장 (여러 개 동시)
+  - 반환 형식은 동기 함수(fetch_strings_page, put_translation)와 같음
+  - 429/5xx/네트워크 오류는 Retry-After 또는 지수 백오프로 재시도 (동기 세션의 urllib3 Retry와 같은 규칙)
+- AsyncGeminiClient: generateContent / streamGenerateContent(SSE) / cachedContents (GeminiClient와 같은 인자/예외)
+- aiohttp 세션은 이벤트 루프에 묶임 → async with로 열고 닫음 (asyncio.run 한 번 안에서 사용)
+- 웹 서버는 그대로 동기 메서드 사용, 일괄 작업/스크립트에서 번역기의 *_async 메서드로 선택
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from gemini_client import (DEFAULT_BASE_URL, GeminiError, GeminiResponse, build_cache_request, build_request,
+                           decode_body, error_for)
+
+# aiohttp 지원 (선택사항)
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+DEFAULT_PARATRANZ_CONCURRENCY = 16  # Paratranz 동시 요청 수 (페이지 + 저장)
+DEFAULT_GEMINI_CONCURRENCY = 8  # Gemini 동시 배치 요청 수
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def _require_aiohttp():
+    if not AIOHTTP_AVAILABLE:
+        raise RuntimeError("비동기 클라이언트에는 aiohttp가 필요합니다: pip install aiohttp")
+
+
+def _timeout(timeout) -> 'aiohttp.ClientTimeout':
+    """requests 형식 (연결, 읽기) 또는 숫자 → aiohttp 시간 제한"""
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+
+def strings_page(data, stage: Optional[int] = None) -> Dict:
+    """문자열 페이지 응답 → {'results', 'pageCount', 'rowCount'} (동기/비동기 공용)
+
+    results 또는 data 키에 문자열 배열이 있을 수 있음 (구버전 응답처럼 목록만 오면 pageCount/rowCount는 None)
+    """
+    if isinstance(data, dict):
+        results = data.get('results', data.get('data', []))
+        page_count = data.get('pageCount')
+        row_count = data.get('rowCount')
+    else:
+        results = data
+        page_count = row_count = None
+
+    # 서버가 stage 필터를 무시한 경우 대비
+    if stage is not None:
+        results = [s for s in results if s.get('stage') == stage]
+
+    return {'results': results, 'pageCount': page_count, 'rowCount': row_count}
+
+
+class AsyncParatranzClient:
+    """Paratranz REST 비동기 호출 (API 키 하나, 동시 요청 수는 concurrency개로 제한)"""
+
+    def __init__(self, api_key: str, base_url: str, project_id, concurrency: int = DEFAULT_PARATRANZ_CONCURRENCY,
+                 timeout=(5, 30), retries: int = 3, backoff: float = 0.5):
+        _require_aiohttp()
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.project_id = project_id
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._session: Optional['aiohttp.ClientSession'] = None
+
+    async def __aenter__(self) -> 'AsyncParatranzClient':
+        self._session = aiohttp.ClientSession(
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+            timeout=_timeout(self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt)
+
+    async def request(self, method: str, url: str, **kwargs) -> Tuple[int, str]:
+        """요청 하나 (재시도 포함) → (상태 코드, 본문)
+
+        재시도를 기다리는 동안은 동시 요청 자리를 비워 둠 (다른 요청이 먼저 나감)
+        """
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                async with self._semaphore:
+                    async with self._session.request(method, url, **kwargs) as response:
+                        body = await response.text()
+                        if response.status not in RETRY_STATUS or last:
+                            return response.status, body
+                        delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if last:
+                    raise
+                delay = self._retry_delay(attempt, None)
+            await asyncio.sleep(delay)
+
+    async def fetch_files(self) -> Optional[List[Dict]]:
+        """프로젝트의 파일 목록"""
+        try:
+            status, body = await self.request('GET', f"{self.base_url}/projects/{self.project_id}/files")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[ERROR] 파일 목록 가져오기 실패: {e}")
+            return None
+        if status != 200:
+            print(f"[ERROR] 파일 목록 가져오기 실패: {status}")
+            return None
+        return json.loads(body)
+
+    async def fetch_strings_page(self, file_id: int, stage: Optional[int] = None, page: int = 1,
+                                 page_size: int = 500) -> Optional[Dict]:
+        """문자열 한 페이지 (stage 필터는 서버에서 적용) → strings_page() 형식, 실패하면 None"""
+        params = {"file": file_id, "page": page, "pageSize": page_size}
+        if stage is not None:
+            params["stage"] = stage
+        try:
+            status, body = await self.request(
+                'GET', f"{self.base_url}/projects/{self.project_id}/strings", params=params
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[ERROR] {page}페이지 요청 실패: {e}")
+            return None
+        if status != 200:
+            print(f"[ERROR] API 요청 실패: {status}")
+            print(f"응답: {body[:200]}")
+            return None
+        return strings_page(json.loads(body), stage)
+
+    async def fetch_all_strings(self, file_id: int, stage: Optional[int] = None,
+                                page_size: int = 500) -> Optional[List[Dict]]:
+        """모든 페이지를 받아 순서대로 이어 붙인 문자열 목록 (한 페이지라도 실패하면 None)
+
+        첫 페이지에서 전체 페이지 수를 알면 나머지는 동시에 요청 (페이지 수를 모르는 구버전 응답은 차례로)
+        """
+        first = await self.fetch_strings_page(file_id, stage, 1, page_size)
+        if first is None:
+            return None
+        results = list(first['results'])
+        page_count = first['pageCount']
+
+        if page_count is None:
+            page, last = 1, first
+            while len(last['results']) >= page_size:
+                page += 1
+                last = await self.fetch_strings_page(file_id, stage, page, page_size)
+                if last is None:
+                    return None
+                results.extend(last['results'])
+            return results
+
+        pages = await asyncio.gather(*(
+            self.fetch_strings_page(file_id, stage, page, page_size) for page in range(2, page_count + 1)
+        ))
+        if any(page is None for page in pages):
+            return None
+        for page in pages:
+            results.extend(page['results'])
+        return results
+
+    async def put_translation(self, string_id, translation: str, as_review: bool = False) -> Optional[int]:
+        """번역 저장 → HTTP 상태 코드 (네트워크 오류 시 None), 404면 /strings/{id} 경로로 다시 시도"""
+        payload = {"translation": translation, "stage": 5 if as_review else 1}
+        try:
+            status, body = await self.request(
+                'PUT', f"{self.base_url}/projects/{self.project_id}/strings/{string_id}", json=payload
+            )
+            if status == 404:
+                status, body = await self.request('PUT', f"{self.base_url}/strings/{string_id}", json=payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[ERROR] {string_id} 저장 중 오류: {e}")
+            return None
+        if status not in (200, 204):
+            print(f"[ERROR] {string_id} 저장 실패: {status} {body[:200]}")
+        return status
+
+    async def save_many(self, items: Iterable[Tuple[object, str, bool]]) -> List[Optional[int]]:
+        """여러 번역을 동시에 저장 [(ID, 번역, 검토 여부), ...] → 항목별 상태 코드 (입력 순서)"""
+        return list(await asyncio.gather(*(
+            self.put_translation(string_id, translation, as_review) for string_id, translation, as_review in items
+        )))
+
+
+class AsyncStreamingResponse:
+    """streamGenerateContent 비동기 응답 - async for로 조각(GeminiResponse)을 받음 (StreamingResponse와 같은 속성)"""
+
+    def __init__(self, chunks: AsyncIterator[GeminiResponse], on_done: Optional[Callable] = None):
+        self._chunks = chunks
+        self._on_done = on_done
+        self._texts = []
+        self.usage_metadata = None
+        self.candidates = []
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._chunks:
+                if chunk.usage_metadata:
+                    self.usage_metadata = chunk.usage_metadata
+                if chunk.candidates:
+                    self.candidates = chunk.candidates
+                    self._texts.append(chunk.text)
+                yield chunk
+        finally:
+            if self._on_done:
+                on_done, self._on_done = self._on_done, None
+                on_done(self.usage_metadata)
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._texts)
+
+
+class AsyncGeminiClient:
+    """Gemini REST 비동기 호출 (API 키는 요청마다 지정, 연결 풀은 pool_size개)"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, pool_size: int = DEFAULT_GEMINI_CONCURRENCY,
+                 timeout=(5, 120)):
+        _require_aiohttp()
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session: Optional['aiohttp.ClientSession'] = None
+
+    async def __aenter__(self) -> 'AsyncGeminiClient':
+        self._session = aiohttp.ClientSession(
+            timeout=_timeout(self.timeout), connector=aiohttp.TCPConnector(limit=self.pool_size)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def _post(self, url: str, api_key: str, body: dict, params: Optional[dict] = None):
+        try:
+            return await self._session.post(url, json=body, headers={'x-goog-api-key': api_key}, params=params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise GeminiError(None, f"네트워크 오류: {e}")
+
+    @staticmethod
+    async def _raise_for_error(response: 'aiohttp.ClientResponse'):
+        if response.status != 200:
+            body = await response.text()
+            response.release()
+            raise error_for(response.status, response.headers, body)
+
+    async def generate(self, api_key: str, model: str, prompt: str, generation_config: Optional[dict] = None,
+                       stream: bool = False, on_done: Optional[Callable] = None,
+                       system_instruction: Optional[str] = None, cached_content: Optional[str] = None):
+        """generateContent 호출 → GeminiResponse (stream이면 AsyncStreamingResponse)
+
+        on_done(usage_metadata): 응답을 다 받았을 때 호출 (스트리밍이면 반복이 끝날 때)
+        """
+        body = build_request(prompt, generation_config, system_instruction, cached_content)
+        method = 'streamGenerateContent' if stream else 'generateContent'
+        response = await self._post(
+            f"{self.base_url}/models/{model}:{method}", api_key, body, {'alt': 'sse'} if stream else None
+        )
+        await self._raise_for_error(response)
+
+        if stream:
+            return AsyncStreamingResponse(self._iter_sse(response), on_done)
+        try:
+            result = GeminiResponse(decode_body(response.status, await response.text()))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise GeminiError(None, f"응답을 받는 중 연결 끊김: {e}")
+        finally:
+            response.release()
+        if on_done:
+            on_done(result.usage_metadata)
+        return result
+
+    async def create_cached_content(self, api_key: str, model: str, system_instruction: str, ttl: int) -> str:
+        """고정 지침을 서버 캐시로 만들고 이름(cachedContents/...) 반환"""
+        body = build_cache_request(model, system_instruction, ttl)
+        response = await self._post(f"{self.base_url}/cachedContents", api_key, body)
+        await self._raise_for_error(response)
+        try:
+            name = decode_body(response.status, await response.text()).get('name')
+        finally:
+            response.release()
+        if not name:
+            raise GeminiError(response.status, "캐시 이름이 없는 응답")
+        return name
+
+    @staticmethod
+    async def _iter_sse(response: 'aiohttp.ClientResponse') -> AsyncIterator[GeminiResponse]:
+        """SSE 줄("data: {...}") → 조각"""
+        try:
+            async for raw in response.content:
+                line = raw.decode('utf-8').strip()
+                if line.startswith('data:'):
+                    yield GeminiResponse(decode_body(response.status, line[5:]))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise GeminiError(None, f"스트리밍 중 연결 끊김: {e}")
+        finally:
+            response.release()
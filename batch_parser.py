@@ -0,0 +1,76 @@
+"""
+배치 번역 응답 파서 (증분)
+응답을 조각 단위로 받으면서 두 번역이 모두 나온 항목부터 바로 꺼냄
+
+- json: [{"id", "t1", "t2"}, ...] 배열 → id로 원문에 연결
+- lines: "1-1: 번역" / "1-2: 번역" 줄 형식 → 번호로 원문에 연결
+
+스트리밍이 아닌 응답도 전체 텍스트를 한 번에 feed()하면 같은 결과
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+from json_stream import JsonArrayStream
+
+LINE_PATTERN = re.compile(r'(\d+)-([12]):\s*(.+)')
+
+
+class BatchResponseParser:
+    """배치 응답 → 완성된 항목 (index, [번역1, 번역2])"""
+
+    def __init__(self, ids: List[str], output_format: str = 'json'):
+        self.count = len(ids)
+        self.output_format = output_format
+        self.results: Dict[int, list] = {}  # 지금까지 완성된 항목
+        self._index_of = {str(key): i for i, key in enumerate(ids)}
+        self._json = JsonArrayStream() if output_format == 'json' else None
+        self._line_buf = ''
+        self._partial = {}  # lines 형식에서 번역 하나만 나온 항목
+
+    def feed(self, chunk: str) -> List[Tuple[int, list]]:
+        """조각 추가 → 이번에 완성된 항목들"""
+        if self._json is not None:
+            return [ready for ready in map(self._accept_object, self._json.feed(chunk)) if ready]
+
+        self._line_buf += chunk or ''
+        *lines, self._line_buf = self._line_buf.split('\n')
+        return [ready for ready in map(self._accept_line, lines) if ready]
+
+    def finish(self) -> List[Tuple[int, list]]:
+        """응답 끝 (줄바꿈 없이 끝난 마지막 줄 처리)"""
+        if self._json is not None or not self._line_buf:
+            return []
+        line, self._line_buf = self._line_buf, ''
+        ready = self._accept_line(line)
+        return [ready] if ready else []
+
+    def _accept_object(self, item):
+        if not isinstance(item, dict):
+            return None
+        idx = self._index_of.get(str(item.get('id')))
+        t1, t2 = item.get('t1'), item.get('t2')
+        if idx is None or idx in self.results:
+            return None  # 모르는 id / 중복 응답
+        if not isinstance(t1, str) or not isinstance(t2, str) or not t1.strip() or not t2.strip():
+            return None
+        return self._complete(idx, [t1.strip(), t2.strip()])
+
+    def _accept_line(self, line: str):
+        match = LINE_PATTERN.match(line.strip())
+        if not match:
+            return None
+        idx = int(match.group(1)) - 1  # 0-based index
+        variant = int(match.group(2))  # 1 or 2
+        if not 0 <= idx < self.count or idx in self.results:
+            return None
+        pair = self._partial.setdefault(idx, [None, None])
+        pair[variant - 1] = match.group(3).strip()
+        if pair[0] and pair[1]:
+            del self._partial[idx]
+            return self._complete(idx, pair)
+        return None
+
+    def _complete(self, idx: int, pair: list):
+        self.results[idx] = pair
+        return idx, pair
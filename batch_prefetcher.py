@@ -0,0 +1,451 @@
+"""
+배치 프리페치 파이프라인
+리뷰어가 현재 배치를 작업하는 동안 다음 배치들을 백그라운드에서 미리 번역
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional
+
+from paratranz_api_translator import PREFETCH_DEPTH, PREFETCH_WORKERS
+from string_stream import StringStream
+from translation_memory import TranslationMemory, TM_MAX_EXAMPLES
+
+# 모든 세션이 공유하는 번역 스레드 풀 (Gemini 동시 호출 수 제한)
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='prefetch')
+
+
+class PreparedBatch:
+    """미리 준비된 배치 (잠금된 항목 + 번역 결과)
+    
+    번역이 끝나기 전에 넘겨받을 수 있고 (분당 한도 대기 중이어도),
+    translations[i]는 그 항목의 두 번역이 완성되는 즉시 채워짐 (그 전까지 None)
+    """
+
+    # status: ok / completed(더 이상 항목 없음) / all_locked(모두 다른 사용자가 작업 중) / failed / cancelled
+    def __init__(self, status: str, data: Optional[List[dict]] = None, translations: Optional[List[list]] = None,
+                 memory_hits: Optional[List[bool]] = None, similar: Optional[List[list]] = None,
+                 complete: bool = True):
+        self.status = status
+        self.data = data or []
+        self.translations = translations or []
+        self.memory_hits = memory_hits or [False] * len(self.data)  # 번역 메모리에서 가져온 항목
+        self.similar = similar or [[] for _ in self.data]  # 항목별 비슷한 과거 번역 [(원문, 번역, 유사도)]
+        self.complete = complete  # 모든 항목의 번역이 채워졌는지
+        self.served = False  # 세션에 넘겨졌는지
+        self.send_at = None  # 분당 한도로 미룬 Gemini 요청을 보낼 시각 (없으면 None)
+        self._watchers = []  # (on_item, on_finish) - 번역 도착/완료 알림 (이벤트 푸시용)
+        self._cond = threading.Condition()
+
+    def watch(self, on_item: Callable[[int, list], None], on_finish: Optional[Callable[[], None]] = None):
+        """이후 도착하는 번역마다 on_item(index, pair), 배치가 끝나면 on_finish() 호출"""
+        with self._cond:
+            finished = self.complete
+            if not finished:
+                self._watchers.append((on_item, on_finish))
+        if finished and on_finish:
+            on_finish()
+
+    def set_translation(self, index: int, pair: list):
+        with self._cond:
+            self.translations[index] = pair
+            self._cond.notify_all()
+            watchers = list(self._watchers)
+        for on_item, _ in watchers:
+            on_item(index, pair)
+
+    def finish(self):
+        with self._cond:
+            self.complete = True
+            self._cond.notify_all()
+            watchers, self._watchers = self._watchers, []
+        for _, on_finish in watchers:
+            if on_finish:
+                on_finish()
+
+    def fail_pending(self, originals: List[str]):
+        """번역이 오지 않은 항목을 실패 표시로 채우고 완료 (직접 번역할 수 있게, 콜백은 호출하지 않음)"""
+        with self._cond:
+            for i, pair in enumerate(self.translations):
+                if pair is None:
+                    failed = f"[번역 실패: {originals[i]}]"
+                    self.translations[i] = [failed, failed]
+            self.complete = True
+            self._cond.notify_all()
+            self._watchers = []
+
+    def set_wait(self, seconds: float):
+        """Gemini 요청이 분당 한도로 seconds초 뒤에 나감"""
+        self.send_at = time.time() + seconds
+
+    def eta(self) -> Optional[float]:
+        """미룬 요청을 보내기까지 남은 시간 (초, 대기 중이 아니면 None)"""
+        if self.send_at is None or self.complete:
+            return None
+        remaining = self.send_at - time.time()
+        return remaining if remaining > 0 else None
+
+    def wait_item(self, index: int, timeout: Optional[float] = None) -> bool:
+        """index 항목의 번역이 채워질 때까지 대기 (채워졌으면 True)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.complete or self.translations[index] is not None, timeout)
+            return self.translations[index] is not None
+
+    def mark_served(self) -> bool:
+        """세션에 넘기기 (이미 실패/취소된 배치면 False)"""
+        with self._cond:
+            if self.status != 'ok':
+                return False
+            self.served = True
+            return True
+
+    def abandon(self, status: str) -> bool:
+        """아직 넘기지 않은 배치를 실패/취소 처리 (이미 넘겼거나 이미 실패/취소됐으면 False)
+
+        True를 받은 쪽만 잠금을 해제 → 수집 스레드와 폐기 콜백이 함께 호출해도 한 번만 해제됨
+        """
+        with self._cond:
+            if self.served or self.status != 'ok':
+                return False
+            self.status = status
+            self.complete = True
+            self._cond.notify_all()
+            return True
+
+
+class BatchPrefetcher:
+    """세션 커서보다 N개 배치를 앞서서 수집/잠금/번역해 두는 프리페처"""
+
+    def __init__(self, translator, stream: StringStream, session_id: str,
+                 lock_fn: Callable[[List[int], str], List[int]], unlock_fn: Callable[[List[int], str], object],
+                 memory: Optional[TranslationMemory] = None,
+                 depth: int = PREFETCH_DEPTH, max_scan: Optional[int] = None):
+        self.translator = translator
+        self.stream = stream  # 번역할 문자열 공급 (병렬 다운로드)
+        self.memory = memory  # 번역 메모리 (같은 문장은 Gemini 호출 없이 재사용)
+        self.session_id = session_id
+        self.lock_fn = lock_fn  # 여러 항목 잠금 → 잠근 항목 ID
+        self.unlock_fn = unlock_fn  # 여러 항목 잠금 해제
+        self.depth = max(1, depth)
+        self.max_scan = max_scan  # 배치당 최대 건너뛰기 수 (None이면 배치 크기에 맞춰 계산)
+        self._carry = deque()  # 잠갔지만 아직 배치에 넣지 않은 (항목, 원문, 메모리 번역) (예산 초과분 포함)
+
+        self._pending = deque()  # 준비 중/완료된 (ticket, Future) (순서 유지)
+        self._queue_lock = threading.Lock()
+
+        # 티켓별로 넘겨줄 수 있게 된 배치 (스트리밍이면 번역 완료 전에 등록됨)
+        self._published = {}
+        self._publish_cond = threading.Condition()
+
+        # 수집 순서 보장용 티켓 (먼저 제출된 배치가 앞쪽 항목을 가져감)
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._collect_ticket = 0
+        self._valid_ticket = 0  # 이보다 작은 티켓은 폐기된 예약
+
+        self._stream_done = False  # 스트림 끝까지 꺼냄 (잠근 항목이 _carry에 남아 있을 수 있음)
+        self._exhausted = False  # 스트림 끝까지 수집 완료
+        self._closed = False
+
+    def start(self):
+        """프리페치 시작 (depth개 배치 예약)"""
+        self._fill()
+
+    def _fill(self):
+        """대기열을 depth개까지 채움"""
+        with self._queue_lock:
+            while len(self._pending) < self.depth and not self._exhausted and not self._closed:
+                ticket = self._next_ticket
+                self._next_ticket += 1
+                self._pending.append((ticket, _executor.submit(self._run_batch, ticket)))
+
+    def _run_batch(self, ticket: int) -> PreparedBatch:
+        """(워커 스레드) 배치 준비 후 결과 등록"""
+        batch = None
+        try:
+            batch = self._prepare_batch(ticket)
+            return batch
+        finally:
+            self._publish(ticket, batch or PreparedBatch('failed'))
+
+    def _publish(self, ticket: int, batch: PreparedBatch):
+        with self._publish_cond:
+            self._published.setdefault(ticket, batch)
+            self._publish_cond.notify_all()
+
+    def _wait_published(self, ticket: int) -> PreparedBatch:
+        with self._publish_cond:
+            while ticket not in self._published:
+                if self._closed:
+                    # 프리페치 중단 → 번역(한도 대기 포함)이 끝나기를 기다리지 않음
+                    return PreparedBatch('cancelled')
+                self._publish_cond.wait()
+            return self._published.pop(ticket)
+
+    def _prepare_batch(self, ticket: int) -> PreparedBatch:
+        """(워커 스레드) 배치 수집 + 잠금 + 번역"""
+        batch_data = []
+        with self._cond:
+            while self._collect_ticket != ticket and not self._closed:
+                self._cond.wait()
+            try:
+                if not self._is_discarded(ticket):
+                    batch_data, batch_originals, memory_translations, status = self._collect_batch()
+            finally:
+                self._collect_ticket += 1
+                self._cond.notify_all()
+
+        if self._is_discarded(ticket):
+            if self._closed:
+                # close()는 수집을 기다리지 않음 → _cond를 잡고 있어 close()가 못 한 정리를 여기서
+                with self._cond:
+                    carry = self._take_carry()
+                batch_data = batch_data + [string_data for string_data, _, _ in carry]
+            if batch_data:
+                self._release(batch_data)
+            return PreparedBatch('cancelled')
+        if not batch_data:
+            return PreparedBatch(status)
+
+        batch = None
+        try:
+            # 🔎 항목별 비슷한 과거 번역 (화면 표시 + 프롬프트 예시)
+            similar = [self.memory.similar(text) for text in batch_originals] if self.memory else None
+
+            memory_hits = [t is not None for t in memory_translations]
+            missing = [i for i, t in enumerate(memory_translations) if t is None]
+            batch = PreparedBatch('ok', batch_data, list(memory_translations), memory_hits, similar, complete=not missing)
+
+            # 번역 메모리에 없는 항목만 Gemini로 번역
+            if missing:
+                # 📡 번역 전에 미리 등록 → 세션은 분당 한도 대기/응답을 기다리지 않고 원문부터 받음
+                # (스트리밍이면 첫 항목이 완성되는 대로, 아니면 응답이 끝날 때 번역이 채워짐)
+                self._publish(ticket, batch)
+                texts = [batch_originals[i] for i in missing]
+                examples = self._similar_examples([similar[i] for i in missing]) if similar else None
+                ids = [batch_data[i].get('id') for i in missing]
+                translations = self.translator.translate_batch_with_gemini(
+                    texts, examples=examples, ids=ids,
+                    on_item=lambda j, pair: batch.set_translation(missing[j], pair),
+                    on_wait=batch.set_wait
+                )
+                if translations:
+                    for i, t in zip(missing, translations):
+                        if batch.translations[i] is None:  # 스트리밍으로 이미 채운 항목은 그대로
+                            batch.set_translation(i, t)
+                elif batch.abandon('failed'):
+                    # 번역 실패 → 다른 사용자가 가져갈 수 있도록 잠금 해제
+                    self._release(batch_data)
+                    return batch
+                else:
+                    # 이미 작업 중인 배치 → 남은 항목은 직접 번역할 수 있게 표시
+                    for i in missing:
+                        if batch.translations[i] is None:
+                            failed = f"[번역 실패: {batch_originals[i]}]"
+                            batch.set_translation(i, [failed, failed])
+            else:
+                print(f"📚 배치 {len(batch_data)}개 모두 번역 메모리에서 가져옴 (API 호출 없음)")
+        except Exception:
+            # 등록 후 콜백/번역 처리 중 오류 → 잠금이 남거나 세션이 번역을 영원히 기다리지 않게 정리
+            if batch is None or batch.abandon('failed'):
+                self._release(batch_data)
+            else:
+                # 이미 세션에 넘긴 배치 → 남은 항목은 직접 번역할 수 있게 표시 (잠금은 세션이 보유)
+                batch.fail_pending(batch_originals)
+            raise
+
+        batch.finish()
+        if self._is_discarded(ticket) and batch.abandon('cancelled'):
+            # 예약 폐기 → 다른 사용자가 가져갈 수 있도록 잠금 해제
+            self._release(batch_data)
+        return batch
+
+    @staticmethod
+    def _similar_examples(similar_lists: List[list]):
+        """번역할 원문들의 비슷한 과거 번역 → 프롬프트 예시 (중복 제거 후 유사도 높은 순)"""
+        examples = {}
+        for matches in similar_lists:
+            for src, dst, score in matches:
+                if src not in examples or examples[src][1] < score:
+                    examples[src] = (dst, score)
+        best = sorted(examples.items(), key=lambda x: -x[1][1])[:TM_MAX_EXAMPLES]
+        return [(src, dst) for src, (dst, _) in best] or None
+
+    def _is_discarded(self, ticket: int) -> bool:
+        return self._closed or ticket < self._valid_ticket
+
+    def _collect_batch(self):
+        """스트림에서 잠금 가능한 항목 수집 (_cond 보유 상태에서 호출)
+        
+        Gemini로 번역할 항목을 토큰 예산(입력/출력)이 찰 때까지 모음
+        (번역 메모리 적중 항목은 API 호출에 포함되지 않으므로 예산과 무관하게 추가)
+        """
+        batch_data = []
+        batch_originals = []
+        memory_translations = []  # 항목별 번역 메모리 결과 ([번역1, 번역2] 또는 None)
+        skipped_count = 0
+        glossary = (self.translator.glossary, self.translator.glossary_index)
+        plan = self.translator.token_budget.plan(self.translator.batch_prompt_overhead())
+        # 다른 사용자가 미리 잠가 둔 구간(현재 + 프리페치 배치)을 넘어갈 수 있을 만큼
+        max_scan = self.max_scan or max(100, plan.max_items * (self.depth + 1))
+
+        while not plan.full and len(batch_data) < plan.max_items and skipped_count < max_scan:
+            if not self._carry:
+                if self._stream_done:
+                    self._exhausted = True
+                    break
+                # 🔒 남은 자리만큼 한꺼번에 잠금 시도
+                skipped_count += self._lock_candidates(plan.max_items - len(batch_data), glossary)
+                if not self._carry:
+                    continue
+            # 지난 배치에서 예산 초과로 넘어온 항목이 먼저 (이미 잠금됨)
+            string_data, original, remembered = self._carry[0]
+            if not remembered and not plan.add(original):
+                # 토큰 예산 초과 → 다음 배치의 첫 항목으로
+                break
+            self._carry.popleft()
+            batch_data.append(string_data)
+            batch_originals.append(original)
+            memory_translations.append([remembered, remembered] if remembered else None)
+
+        if plan.count:
+            prompt_tokens, output_tokens = plan.estimate()
+            print(f"📦 배치 {plan.count}개 (예상 토큰: 입력 {prompt_tokens:,} / 출력 {output_tokens:,})")
+
+        if batch_data:
+            return batch_data, batch_originals, memory_translations, 'ok'
+        if skipped_count >= max_scan:
+            return batch_data, batch_originals, memory_translations, 'all_locked'
+        return batch_data, batch_originals, memory_translations, 'completed'
+
+    def _lock_candidates(self, count: int, glossary: tuple) -> int:
+        """스트림에서 항목 count개를 꺼내 한 번에 잠금 → 건너뛴 수 (_cond 보유 상태에서 호출)
+        
+        잠근 항목은 _carry 뒤에 붙음, glossary: (용어집, 검색 색인) - 번역 메모리 조회용
+        """
+        candidates = []
+        skipped = 0
+        while len(candidates) < count:
+            string_data = self.stream.next()
+            if string_data is None:
+                print("📄 더 이상 가져올 항목이 없습니다")
+                self._stream_done = True
+                break
+            original = string_data.get('original', string_data.get('key', ''))
+            if not original:
+                skipped += 1
+                continue
+            candidates.append((string_data, original))
+        if not candidates:
+            return skipped
+
+        acquired = set(self.lock_fn([string_data.get('id') for string_data, _ in candidates], self.session_id))
+        for string_data, original in candidates:
+            string_id = string_data.get('id')
+            if string_id not in acquired:
+                # 다른 사용자가 작업 중 → 건너뜀
+                print(f"⏭️  항목 {string_id} 건너뜀 (다른 사용자 작업 중)")
+                skipped += 1
+                continue
+            remembered = self.memory.lookup(original, *glossary) if self.memory else None
+            self._carry.append((string_data, original, remembered))
+        return skipped
+
+    def next_batch(self) -> PreparedBatch:
+        """다음 준비된 배치 반환 (수집/잠금이 끝났으면 번역이 오기 전이라도 반환)"""
+        with self._queue_lock:
+            entry = self._pending.popleft() if self._pending else None
+
+        if entry is None:
+            if self._exhausted:
+                return PreparedBatch('completed')
+            self._fill()
+            with self._queue_lock:
+                entry = self._pending.popleft() if self._pending else None
+            if entry is None:
+                return PreparedBatch('completed')
+
+        ticket, _ = entry
+        batch = self._wait_published(ticket)
+        batch.mark_served()
+
+        if batch.status == 'all_locked':
+            # 잠금은 일시적 → 남은 예약을 버리고 다음 요청 때 다시 스캔
+            self._discard_pending()
+        else:
+            self._fill()
+
+        if batch.status == 'ok':
+            self._renew_locks(batch)
+            if not batch.data:
+                # 대기하는 동안 잠금이 모두 만료되어 다른 사용자에게 넘어감
+                return self.next_batch()
+
+        return batch
+
+    def _renew_locks(self, batch: PreparedBatch):
+        """대기 중 만료된 잠금 갱신, 다른 사용자가 가져간 항목은 제외"""
+        acquired = set(self.lock_fn([string_data.get('id') for string_data in batch.data], self.session_id))
+        if not batch.complete:
+            # 번역이 채워지는 중인 배치는 항목 위치가 바뀌면 안 됨 (방금 수집한 배치라 만료될 일도 거의 없음)
+            return
+        kept = []
+        for item in zip(batch.data, batch.translations, batch.memory_hits, batch.similar):
+            if item[0].get('id') in acquired:
+                kept.append(item)
+            else:
+                print(f"⏭️  항목 {item[0].get('id')} 제외 (잠금 만료 후 다른 사용자가 가져감)")
+        batch.data = [item[0] for item in kept]
+        batch.translations = [item[1] for item in kept]
+        batch.memory_hits = [item[2] for item in kept]
+        batch.similar = [item[3] for item in kept]
+
+    def _discard_pending(self):
+        """예약된 배치를 모두 버리고 잠금 해제"""
+        with self._queue_lock:
+            entries = list(self._pending)
+            self._pending.clear()
+            self._valid_ticket = self._next_ticket
+        for ticket, future in entries:
+            future.add_done_callback(partial(self._release_future, ticket))
+
+    def _release_future(self, ticket: int, future):
+        """완료된 Future의 배치 잠금 해제"""
+        with self._publish_cond:
+            self._published.pop(ticket, None)
+        if future.cancelled() or future.exception():
+            return
+        batch = future.result()
+        if batch.status == 'ok' and batch.abandon('cancelled'):
+            self._release(batch.data)
+
+    def _release(self, batch_data: List[dict]):
+        self.unlock_fn([string_data.get('id') for string_data in batch_data], self.session_id)
+
+    def _take_carry(self) -> list:
+        """_carry 비우고 꺼낸 항목 반환 (_cond 보유 상태에서 호출)"""
+        carry, self._carry = list(self._carry), deque()
+        return carry
+
+    def close(self):
+        """프리페치 중단 (아직 전달되지 않은 배치의 잠금 해제)
+
+        수집 중인 워커는 스트림(페이지 내려받기)을 기다리며 _cond를 잡고 있을 수 있음
+        → 기다리지 않고, 그 워커가 수집을 마칠 때 _carry와 수집한 항목을 정리
+        """
+        self._closed = True
+        self.stream.close()
+        with self._publish_cond:
+            self._publish_cond.notify_all()
+        self._discard_pending()
+        if self._cond.acquire(blocking=False):
+            try:
+                self._cond.notify_all()
+                carry = self._take_carry()
+            finally:
+                self._cond.release()
+            if carry:
+                self._release([string_data for string_data, _, _ in carry])
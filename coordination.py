@@ -0,0 +1,709 @@
+"""
+공유 조정 백엔드 (잠금, 작업 대기열, 사용량)
+잠금이 프로세스 메모리에만 있으면 서버를 한 프로세스로만 띄울 수 있음
+→ 같은 잠금/사용량을 여러 서버 프로세스(또는 여러 호스트)가 함께 쓰도록 저장 위치를 고를 수 있게 함
+
+- memory: 기본값. 한 프로세스 안에서만 공유 (LockManager 그대로)
+- sqlite: 같은 호스트의 여러 프로세스가 WAL 모드 SQLite 파일 하나를 공유
+- redis: 여러 호스트가 Redis 하나를 공유 (redis 패키지 필요, "fakeredis://"는 로컬 테스트용)
+
+잠금 백엔드는 모두 LockManager와 같은 메서드를 가짐 (acquire/release/renew/owner/held)
+작업 대기열 백엔드는 모두 WorkQueue와 같은 메서드를 가짐 (add/lease/release/complete/reseed/renew/pending)
+사용량 장부는 memory/sqlite면 기존 SQLite 장부, redis면 Redis 해시에 누적
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from lock_manager import LockManager, DEFAULT_LOCK_TIMEOUT
+from work_queue import WorkQueue
+from usage_ledger import LedgerError, empty_usage, get_ledger, key_hash, usage_counts, utc_day
+
+# Redis 지원 (선택사항)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+BACKENDS = ('memory', 'sqlite', 'redis')
+DEFAULT_COORDINATION_DB = 'paratranz_coordination.db'
+DEFAULT_REDIS_URL = 'redis://localhost:6379/0'
+DEFAULT_PREFIX = 'paratranz'
+
+
+class SqliteLockManager(LockManager):
+    """SQLite(WAL) 파일에 기록하는 잠금 - 같은 파일을 여는 모든 프로세스가 공유"""
+
+    def __init__(self, db_path: str, timeout: float = DEFAULT_LOCK_TIMEOUT,
+                 on_change: Optional[Callable[[List, bool, int], None]] = None):
+        super().__init__(timeout, on_change)
+        # timeout: 다른 프로세스가 쓰는 중이면 잠시 기다림
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # string_id는 타입을 지정하지 않아 넣은 값(int/str) 그대로 돌려받음
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS locks (
+                    string_id PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS locks_expires ON locks (expires)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS locks_session ON locks (session_id)")
+
+    def _expire(self, now: float) -> List:
+        """만료된 잠금 삭제 → 풀린 항목 ID (트랜잭션 안에서 호출, 만료 시각 색인 사용)"""
+        return [row[0] for row in self._db.execute("DELETE FROM locks WHERE expires <= ? RETURNING string_id", (now,))]
+
+    def _total(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM locks").fetchone()[0]
+
+    def __len__(self):
+        with self._lock, self._db:
+            expired = self._expire(time.time())
+            total = self._total()
+        self._publish(expired, False, total)
+        return total
+
+    def acquire(self, ids: Iterable, session_id: str) -> List:
+        now = time.time()
+        expires = now + self.timeout
+        acquired, added = [], []
+        with self._lock, self._db:
+            expired = self._expire(now)
+            for string_id in ids:
+                row = self._db.execute("SELECT session_id FROM locks WHERE string_id = ?", (string_id,)).fetchone()
+                if row is None:
+                    self._db.execute(
+                        "INSERT INTO locks (string_id, session_id, expires) VALUES (?, ?, ?)",
+                        (string_id, session_id, expires)
+                    )
+                    added.append(string_id)
+                elif row[0] == session_id:
+                    self._db.execute("UPDATE locks SET expires = ? WHERE string_id = ?", (expires, string_id))
+                else:
+                    continue  # 다른 사용자가 작업 중
+                acquired.append(string_id)
+            total = self._total()
+        self._publish(expired, False, total)
+        self._publish(added, True, total)
+        return acquired
+
+    def release(self, ids: Iterable, session_id: str) -> List:
+        released = []
+        with self._lock, self._db:
+            expired = self._expire(time.time())
+            for string_id in ids:
+                if self._db.execute(
+                    "DELETE FROM locks WHERE string_id = ? AND session_id = ?", (string_id, session_id)
+                ).rowcount:
+                    released.append(string_id)
+            total = self._total()
+        self._publish(expired + released, False, total)
+        return released
+
+    def renew(self, session_id: str, ids: Optional[Iterable] = None) -> int:
+        now = time.time()
+        expires = now + self.timeout
+        with self._lock, self._db:
+            expired = self._expire(now)
+            if ids is None:
+                renewed = self._db.execute(
+                    "UPDATE locks SET expires = ? WHERE session_id = ?", (expires, session_id)
+                ).rowcount
+            else:
+                renewed = sum(self._db.execute(
+                    "UPDATE locks SET expires = ? WHERE string_id = ? AND session_id = ?",
+                    (expires, string_id, session_id)
+                ).rowcount for string_id in ids)
+            total = self._total()
+        self._publish(expired, False, total)
+        return renewed
+
+    def owner(self, string_id) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT session_id FROM locks WHERE string_id = ? AND expires > ?", (string_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def held(self, session_id: str) -> Set:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT string_id FROM locks WHERE session_id = ? AND expires > ?", (session_id, time.time())
+            ).fetchall()
+        return {row[0] for row in rows}
+
+
+def _decode_ids(values) -> List:
+    """Redis가 돌려준 항목 ID (문자열) → 숫자면 int로 (Paratranz 항목 ID는 정수)"""
+    ids = []
+    for value in values:
+        value = value.decode('utf-8') if isinstance(value, bytes) else value
+        ids.append(int(value) if value.lstrip('-').isdigit() else value)
+    return ids
+
+
+# Redis 스크립트 공통 - 건드리는 키는 모두 KEYS로 받음 (Redis Cluster에서도 같은 슬롯이 되도록 키 이름에 {해시 태그})
+# 두 값을 묶은 멤버("a\0b")를 점수 0인 정렬 집합에 넣고 ZRANGEBYLEX로 a가 같은 멤버만 꺼냄
+_REDIS_LEX = """
+local SEP = string.char(0)
+local function range(prefix)
+    return '[' .. prefix .. SEP, '(' .. prefix .. string.char(1)
+end
+"""
+
+# Redis 잠금 스크립트 (원자적으로 실행)
+# 키: 1 = 만료 시각 정렬 집합(항목 → 만료 시각), 2 = 소유자 해시(항목 → 세션), 3 = 세션별 보유(멤버 "세션\0항목")
+_REDIS_EXPIRE = _REDIS_LEX + """
+local expired = {}
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])) do
+    local owner = redis.call('HGET', KEYS[2], id)
+    if owner then
+        redis.call('ZREM', KEYS[3], owner .. SEP .. id)
+        redis.call('HDEL', KEYS[2], id)
+    end
+    redis.call('ZREM', KEYS[1], id)
+    table.insert(expired, id)
+end
+"""
+
+# ARGV: 현재 시각
+_REDIS_COUNT = _REDIS_EXPIRE + """
+return {expired, redis.call('HLEN', KEYS[2])}
+"""
+
+# ARGV: 현재 시각, 세션, 새 만료 시각, 항목...
+_REDIS_ACQUIRE = _REDIS_EXPIRE + """
+local acquired, added = {}, {}
+for i = 4, #ARGV do
+    local id = ARGV[i]
+    local owner = redis.call('HGET', KEYS[2], id)
+    if not owner or owner == ARGV[2] then
+        redis.call('HSET', KEYS[2], id, ARGV[2])
+        redis.call('ZADD', KEYS[1], ARGV[3], id)
+        redis.call('ZADD', KEYS[3], 0, ARGV[2] .. SEP .. id)
+        table.insert(acquired, id)
+        if not owner then table.insert(added, id) end
+    end
+end
+return {acquired, added, expired, redis.call('HLEN', KEYS[2])}
+"""
+
+# ARGV: 현재 시각, 세션, 항목...
+_REDIS_RELEASE = _REDIS_EXPIRE + """
+local released = {}
+for i = 3, #ARGV do
+    local id = ARGV[i]
+    if redis.call('HGET', KEYS[2], id) == ARGV[2] then
+        redis.call('HDEL', KEYS[2], id)
+        redis.call('ZREM', KEYS[1], id)
+        redis.call('ZREM', KEYS[3], ARGV[2] .. SEP .. id)
+        table.insert(released, id)
+    end
+end
+return {released, expired, redis.call('HLEN', KEYS[2])}
+"""
+
+# ARGV: 현재 시각, 세션, 새 만료 시각, 항목... (항목이 없으면 보유한 전부)
+_REDIS_RENEW = _REDIS_EXPIRE + """
+local ids = {}
+if #ARGV < 4 then
+    local min, max = range(ARGV[2])
+    for _, member in ipairs(redis.call('ZRANGEBYLEX', KEYS[3], min, max)) do
+        table.insert(ids, string.sub(member, #ARGV[2] + 2))
+    end
+else
+    for i = 4, #ARGV do table.insert(ids, ARGV[i]) end
+end
+local renewed = 0
+for _, id in ipairs(ids) do
+    if redis.call('HGET', KEYS[2], id) == ARGV[2] then
+        redis.call('ZADD', KEYS[1], ARGV[3], id)
+        renewed = renewed + 1
+    end
+end
+return {renewed, expired, redis.call('HLEN', KEYS[2])}
+"""
+
+
+def _lex_range(prefix: str):
+    """_REDIS_LEX의 range()와 같은 범위 (Python에서 ZRANGEBYLEX 호출용)"""
+    prefix = prefix.encode('utf-8')
+    return b'[' + prefix + b'\x00', b'(' + prefix + b'\x01'
+
+
+class RedisLockManager(LockManager):
+    """Redis에 기록하는 잠금 - 같은 Redis를 쓰는 모든 프로세스/호스트가 공유"""
+
+    def __init__(self, client, timeout: float = DEFAULT_LOCK_TIMEOUT,
+                 on_change: Optional[Callable[[List, bool, int], None]] = None, prefix: str = DEFAULT_PREFIX):
+        super().__init__(timeout, on_change)
+        self._redis = client
+        self._prefix = f"{{{prefix}:lock}}"
+        self._keys = [f"{self._prefix}:lease", f"{self._prefix}:owner", f"{self._prefix}:held"]
+        self._acquire = client.register_script(_REDIS_ACQUIRE)
+        self._release = client.register_script(_REDIS_RELEASE)
+        self._renew = client.register_script(_REDIS_RENEW)
+        self._count = client.register_script(_REDIS_COUNT)
+
+    def __len__(self):
+        expired, total = self._count(keys=self._keys, args=[time.time()])
+        self._publish(_decode_ids(expired), False, total)
+        return total
+
+    def acquire(self, ids: Iterable, session_id: str) -> List:
+        ids = list(ids)
+        if not ids:
+            return []
+        now = time.time()
+        acquired, added, expired, total = self._acquire(
+            keys=self._keys, args=[now, session_id, now + self.timeout, *ids]
+        )
+        self._publish(_decode_ids(expired), False, total)
+        self._publish(_decode_ids(added), True, total)
+        return _decode_ids(acquired)
+
+    def release(self, ids: Iterable, session_id: str) -> List:
+        ids = list(ids)
+        if not ids:
+            return []
+        released, expired, total = self._release(keys=self._keys, args=[time.time(), session_id, *ids])
+        released = _decode_ids(released)
+        self._publish(_decode_ids(expired) + released, False, total)
+        return released
+
+    def renew(self, session_id: str, ids: Optional[Iterable] = None) -> int:
+        now = time.time()
+        targets = [] if ids is None else list(ids)
+        if ids is not None and not targets:
+            return 0
+        renewed, expired, total = self._renew(
+            keys=self._keys, args=[now, session_id, now + self.timeout, *targets]
+        )
+        self._publish(_decode_ids(expired), False, total)
+        return renewed
+
+    def owner(self, string_id) -> Optional[str]:
+        lease = self._redis.zscore(self._keys[0], string_id)
+        if lease is None or lease <= time.time():
+            return None
+        owner = self._redis.hget(self._keys[1], string_id)
+        return owner.decode('utf-8') if isinstance(owner, bytes) else owner
+
+    def held(self, session_id: str) -> Set:
+        skip = len(session_id.encode('utf-8')) + 1
+        members = self._redis.zrangebylex(self._keys[2], *_lex_range(session_id))
+        return set(_decode_ids(member[skip:] for member in members))
+
+
+class SqliteWorkQueue(WorkQueue):
+    """SQLite(WAL) 파일에 기록하는 작업 대기열 - 같은 파일을 여는 모든 프로세스가 공유
+
+    만료된 임대는 원래 순서(seq)를 그대로 가지고 대기 상태로 돌아가므로 자연스럽게 앞쪽에서 다시 분배됨
+    """
+
+    def __init__(self, db_path: str, timeout: float = DEFAULT_LOCK_TIMEOUT):
+        super().__init__(timeout)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS work (
+                    queue_key TEXT NOT NULL,
+                    string_id NOT NULL,
+                    seq INTEGER NOT NULL,
+                    session_id TEXT,
+                    expires REAL,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (queue_key, string_id)
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS work_pending ON work (queue_key, done, session_id, seq)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS work_expires ON work (expires)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS work_session ON work (session_id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS work_id ON work (string_id)")
+            # 키별 마지막 분배 순서 (MAX(seq)를 매번 훑지 않도록) - 이전 파일은 기존 행에서 이어 받음
+            self._db.execute("CREATE TABLE IF NOT EXISTS work_seq (queue_key TEXT PRIMARY KEY, seq INTEGER NOT NULL)")
+            self._db.execute(
+                "INSERT OR IGNORE INTO work_seq (queue_key, seq) SELECT queue_key, MAX(seq) FROM work GROUP BY queue_key"
+            )
+
+    def _begin(self):
+        """쓰기 트랜잭션 시작 (다른 프로세스와 읽고-쓰기가 엇갈리지 않도록 처음부터 쓰기 잠금)"""
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def _expire(self, now: float):
+        self._db.execute(
+            "UPDATE work SET session_id = NULL, expires = NULL WHERE expires <= ? AND session_id IS NOT NULL", (now,)
+        )
+
+    def _next_seq(self, key: str, count: int = 1) -> int:
+        """분배 순서 count개 예약 → 첫 번호 (트랜잭션 안에서 호출)"""
+        self._db.execute(
+            "INSERT INTO work_seq (queue_key, seq) VALUES (?, ?) "
+            "ON CONFLICT (queue_key) DO UPDATE SET seq = seq + excluded.seq",
+            (key, count)
+        )
+        return self._db.execute("SELECT seq FROM work_seq WHERE queue_key = ?", (key,)).fetchone()[0] - count + 1
+
+    def add(self, key: str, ids: Iterable) -> int:
+        with self._lock, self._db:
+            self._begin()
+            ids = list(ids)
+            seq = self._next_seq(key, len(ids))
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO work (queue_key, string_id, seq) VALUES (?, ?, ?)",
+                [(key, string_id, seq + i) for i, string_id in enumerate(ids)]
+            )
+            return self._db.total_changes - before
+
+    def lease(self, key: str, session_id: str, count: int) -> List:
+        now = time.time()
+        with self._lock, self._db:
+            self._begin()
+            self._expire(now)
+            ids = [row[0] for row in self._db.execute(
+                "SELECT string_id FROM work WHERE queue_key = ? AND done = 0 AND session_id IS NULL ORDER BY seq LIMIT ?",
+                (key, count)
+            )]
+            self._db.executemany(
+                "UPDATE work SET session_id = ?, expires = ? WHERE queue_key = ? AND string_id = ?",
+                [(session_id, now + self.timeout, key, string_id) for string_id in ids]
+            )
+        return ids
+
+    def release(self, ids: Iterable, session_id: str) -> List:
+        released = []
+        with self._lock, self._db:
+            self._begin()
+            for string_id in ids:
+                row = self._db.execute(
+                    "SELECT queue_key FROM work WHERE string_id = ? AND session_id = ?", (string_id, session_id)
+                ).fetchone()
+                if row is None:
+                    continue
+                self._db.execute(
+                    "UPDATE work SET session_id = NULL, expires = NULL, seq = ? WHERE queue_key = ? AND string_id = ?",
+                    (self._next_seq(row[0]), row[0], string_id)
+                )
+                released.append(string_id)
+        return released
+
+    def complete(self, key: str, ids: Iterable):
+        # 아직 추가되지 않은 ID도 완료로 기록 (다른 프로세스가 나중에 add해도 분배되지 않게)
+        with self._lock, self._db:
+            self._begin()
+            self._db.executemany(
+                "INSERT INTO work (queue_key, string_id, seq, done) VALUES (?, ?, 0, 1) "
+                "ON CONFLICT (queue_key, string_id) DO UPDATE SET done = 1, session_id = NULL, expires = NULL",
+                [(key, string_id) for string_id in ids]
+            )
+
+    def reseed(self, key: str):
+        with self._lock, self._db:
+            self._begin()
+            self._db.execute("DELETE FROM work WHERE queue_key = ? AND done = 1", (key,))
+
+    def renew(self, session_id: str) -> int:
+        now = time.time()
+        with self._lock, self._db:
+            self._begin()
+            self._expire(now)
+            return self._db.execute(
+                "UPDATE work SET expires = ? WHERE session_id = ?", (now + self.timeout, session_id)
+            ).rowcount
+
+    def pending(self, key: str) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM work WHERE queue_key = ? AND done = 0 AND (session_id IS NULL OR expires <= ?)",
+                (key, time.time())
+            ).fetchone()[0]
+
+
+# Redis 작업 대기열 스크립트 (원자적으로 실행) - 대기열 키(K)가 여러 개여도 Redis 키는 아래 8개로 고정 (모두 KEYS로 전달)
+# 1 leases      임대 ID → 만료 시각                    2 lease_key / 3 lease_owner  임대 ID → K / 세션
+# 4 held        세션이 임대 중인 ID ("세션\0ID")       5 pending  대기 ID ("K\0분배 순서 16자리\0ID", 사전순 = 분배 순서)
+# 6 order       "K\0ID" → 분배 순서 (반납하면 맨 뒤)   7 done     저장 완료 ("K\0ID")    8 seq  순서 카운터
+_REDIS_WORK_COMMON = _REDIS_LEX + """
+local function entry(key, seq, id)
+    return key .. SEP .. string.format('%016d', tonumber(seq)) .. SEP .. id
+end
+local function is_done(key, id)
+    return redis.call('ZSCORE', KEYS[7], key .. SEP .. id) ~= false
+end
+local function enqueue(key, id)
+    local seq = redis.call('INCR', KEYS[8])
+    redis.call('HSET', KEYS[6], key .. SEP .. id, seq)
+    redis.call('ZADD', KEYS[5], 0, entry(key, seq, id))
+end
+local function drop(id)
+    local key = redis.call('HGET', KEYS[2], id)
+    local owner = redis.call('HGET', KEYS[3], id)
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('HDEL', KEYS[2], id)
+    redis.call('HDEL', KEYS[3], id)
+    if owner then redis.call('ZREM', KEYS[4], owner .. SEP .. id) end
+    return key
+end
+local function expire(now)
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+        local key = drop(id)
+        if key and not is_done(key, id) then
+            redis.call('ZADD', KEYS[5], 0, entry(key, redis.call('HGET', KEYS[6], key .. SEP .. id), id))
+        end
+    end
+end
+"""
+
+# ARGV: 키, ID...
+_REDIS_WORK_ADD = _REDIS_WORK_COMMON + """
+local key = ARGV[1]
+local added = 0
+for i = 2, #ARGV do
+    local id = ARGV[i]
+    local seq = redis.call('INCR', KEYS[8])
+    if redis.call('HSETNX', KEYS[6], key .. SEP .. id, seq) == 1 and not is_done(key, id) then
+        redis.call('ZADD', KEYS[5], 0, entry(key, seq, id))
+        added = added + 1
+    end
+end
+return added
+"""
+
+# ARGV: 현재 시각, 키, 세션, 새 만료 시각, 개수
+_REDIS_WORK_LEASE = _REDIS_WORK_COMMON + """
+expire(ARGV[1])
+local key, session = ARGV[2], ARGV[3]
+local min, max = range(key)
+local leased = {}
+while #leased < tonumber(ARGV[5]) do
+    local head = redis.call('ZRANGEBYLEX', KEYS[5], min, max, 'LIMIT', 0, 1)
+    if #head == 0 then break end
+    redis.call('ZREM', KEYS[5], head[1])
+    local id = string.sub(head[1], #key + 19)
+    if not is_done(key, id) then
+        redis.call('ZADD', KEYS[1], ARGV[4], id)
+        redis.call('HSET', KEYS[2], id, key)
+        redis.call('HSET', KEYS[3], id, session)
+        redis.call('ZADD', KEYS[4], 0, session .. SEP .. id)
+        table.insert(leased, id)
+    end
+end
+return leased
+"""
+
+# ARGV: 세션, ID...
+_REDIS_WORK_RELEASE = _REDIS_WORK_COMMON + """
+local released = {}
+for i = 2, #ARGV do
+    local id = ARGV[i]
+    if redis.call('HGET', KEYS[3], id) == ARGV[1] then
+        enqueue(drop(id), id)
+        table.insert(released, id)
+    end
+end
+return released
+"""
+
+# ARGV: 키, ID...
+_REDIS_WORK_COMPLETE = _REDIS_WORK_COMMON + """
+local key = ARGV[1]
+for i = 2, #ARGV do
+    local id = ARGV[i]
+    redis.call('ZADD', KEYS[7], 0, key .. SEP .. id)
+    local seq = redis.call('HGET', KEYS[6], key .. SEP .. id)
+    if seq then redis.call('ZREM', KEYS[5], entry(key, seq, id)) end
+    if redis.call('HGET', KEYS[2], id) == key then drop(id) end
+end
+return #ARGV - 1
+"""
+
+# ARGV: 키 - 완료 표시를 비우고 분배 순서에서도 빼서 다시 add되면 새 항목으로
+_REDIS_WORK_RESEED = _REDIS_LEX + """
+local min, max = range(ARGV[1])
+local done = redis.call('ZRANGEBYLEX', KEYS[7], min, max)
+for _, member in ipairs(done) do
+    redis.call('HDEL', KEYS[6], member)
+end
+redis.call('ZREMRANGEBYLEX', KEYS[7], min, max)
+return #done
+"""
+
+# ARGV: 현재 시각, 세션, 새 만료 시각
+_REDIS_WORK_RENEW = _REDIS_WORK_COMMON + """
+expire(ARGV[1])
+local min, max = range(ARGV[2])
+local held = redis.call('ZRANGEBYLEX', KEYS[4], min, max)
+for _, member in ipairs(held) do
+    redis.call('ZADD', KEYS[1], ARGV[3], string.sub(member, #ARGV[2] + 2))
+end
+return #held
+"""
+
+# ARGV: 현재 시각, 키
+_REDIS_WORK_PENDING = _REDIS_WORK_COMMON + """
+expire(ARGV[1])
+local min, max = range(ARGV[2])
+return redis.call('ZLEXCOUNT', KEYS[5], min, max)
+"""
+
+
+class RedisWorkQueue(WorkQueue):
+    """Redis에 기록하는 작업 대기열 - 같은 Redis를 쓰는 모든 프로세스/호스트가 공유"""
+
+    def __init__(self, client, timeout: float = DEFAULT_LOCK_TIMEOUT, prefix: str = DEFAULT_PREFIX):
+        super().__init__(timeout)
+        self._prefix = f"{{{prefix}:work}}"
+        self._keys = [f"{self._prefix}:{name}" for name in
+                      ('leases', 'lease_key', 'lease_owner', 'held', 'pending', 'order', 'done', 'seq')]
+        self._add = client.register_script(_REDIS_WORK_ADD)
+        self._lease = client.register_script(_REDIS_WORK_LEASE)
+        self._release = client.register_script(_REDIS_WORK_RELEASE)
+        self._complete = client.register_script(_REDIS_WORK_COMPLETE)
+        self._reseed = client.register_script(_REDIS_WORK_RESEED)
+        self._renew = client.register_script(_REDIS_WORK_RENEW)
+        self._pending_count = client.register_script(_REDIS_WORK_PENDING)
+
+    def add(self, key: str, ids: Iterable) -> int:
+        ids = list(ids)
+        return self._add(keys=self._keys, args=[key, *ids]) if ids else 0
+
+    def lease(self, key: str, session_id: str, count: int) -> List:
+        now = time.time()
+        return _decode_ids(self._lease(keys=self._keys, args=[now, key, session_id, now + self.timeout, count]))
+
+    def release(self, ids: Iterable, session_id: str) -> List:
+        ids = list(ids)
+        return _decode_ids(self._release(keys=self._keys, args=[session_id, *ids])) if ids else []
+
+    def complete(self, key: str, ids: Iterable):
+        ids = list(ids)
+        if ids:
+            self._complete(keys=self._keys, args=[key, *ids])
+
+    def reseed(self, key: str):
+        self._reseed(keys=self._keys, args=[key])
+
+    def renew(self, session_id: str) -> int:
+        now = time.time()
+        return self._renew(keys=self._keys, args=[now, session_id, now + self.timeout])
+
+    def pending(self, key: str) -> int:
+        return self._pending_count(keys=self._keys, args=[time.time(), key])
+
+
+class RedisUsageLedger:
+    """Redis 해시에 누적하는 사용량 장부 (UsageLedger와 같은 메서드)"""
+
+    def __init__(self, client, prefix: str = DEFAULT_PREFIX):
+        self._redis = client
+        self._prefix = f"{prefix}:usage"
+
+    def _key(self, api_key: str, model: str, day: str) -> str:
+        return f"{self._prefix}:{day}:{key_hash(api_key)}:{model}"
+
+    @staticmethod
+    def _decode(row: Dict) -> Dict[str, int]:
+        usage = empty_usage()
+        for field, value in row.items():
+            field = field.decode('utf-8') if isinstance(field, bytes) else field
+            if field in usage:
+                usage[field] = int(value)
+        return usage
+
+    def record(self, api_key: str, model: str, usage=None, requests: int = 1,
+               quota_errors: int = 0, day: Optional[str] = None) -> Dict[str, int]:
+        key = self._key(api_key, model, day or utc_day())
+        pipe = self._redis.pipeline()  # MULTI/EXEC로 한 번에 적용
+        for field, value in usage_counts(usage, requests, quota_errors).items():
+            if value:
+                pipe.hincrby(key, field, value)
+        pipe.hgetall(key)
+        try:
+            return self._decode(pipe.execute()[-1])
+        except redis.RedisError as e:
+            raise LedgerError(str(e)) from e
+
+    def get(self, api_key: str, model: str, day: Optional[str] = None) -> Dict[str, int]:
+        try:
+            return self._decode(self._redis.hgetall(self._key(api_key, model, day or utc_day())))
+        except redis.RedisError as e:
+            raise LedgerError(str(e)) from e
+
+    def totals(self, pairs: Iterable[tuple], day: Optional[str] = None) -> Dict[str, int]:
+        totals = empty_usage()
+        for api_key, model in pairs:
+            for field, value in self.get(api_key, model, day).items():
+                totals[field] += value
+        return totals
+
+    def close(self):
+        pass
+
+
+# URL → Redis 클라이언트 - 잠금과 사용량이 같은 연결 풀을 씀
+_clients: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis(url: str):
+    """Redis 클라이언트 ("fakeredis://"는 프로세스 안의 가짜 Redis - 테스트용)"""
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            if url.startswith('fakeredis://'):
+                import fakeredis
+                client = fakeredis.FakeRedis()
+            elif not REDIS_AVAILABLE:
+                raise RuntimeError("redis 백엔드를 쓰려면 redis 패키지가 필요합니다 (pip install redis)")
+            else:
+                client = redis.Redis.from_url(url)
+            _clients[url] = client
+        return client
+
+
+def _backend(settings: dict) -> str:
+    backend = settings.get('backend', 'memory')
+    if backend not in BACKENDS:
+        raise ValueError(f"알 수 없는 coordination.backend: {backend} (가능: {', '.join(BACKENDS)})")
+    return backend
+
+
+def create_lock_manager(settings: dict, timeout: float = DEFAULT_LOCK_TIMEOUT,
+                        on_change: Optional[Callable[[List, bool, int], None]] = None) -> LockManager:
+    """설정(coordination 섹션)에 맞는 잠금 관리자"""
+    backend = _backend(settings)
+    if backend == 'sqlite':
+        return SqliteLockManager(settings.get('db_file', DEFAULT_COORDINATION_DB), timeout, on_change)
+    if backend == 'redis':
+        return RedisLockManager(
+            get_redis(settings.get('redis_url', DEFAULT_REDIS_URL)), timeout, on_change,
+            prefix=settings.get('prefix', DEFAULT_PREFIX)
+        )
+    return LockManager(timeout, on_change)
+
+
+def create_work_queue(settings: dict, timeout: float = DEFAULT_LOCK_TIMEOUT) -> WorkQueue:
+    """설정(coordination 섹션)에 맞는 작업 대기열"""
+    backend = _backend(settings)
+    if backend == 'sqlite':
+        return SqliteWorkQueue(settings.get('db_file', DEFAULT_COORDINATION_DB), timeout)
+    if backend == 'redis':
+        return RedisWorkQueue(
+            get_redis(settings.get('redis_url', DEFAULT_REDIS_URL)), timeout, prefix=settings.get('prefix', DEFAULT_PREFIX)
+        )
+    return WorkQueue(timeout)
+
+
+def create_usage_ledger(settings: dict, db_path: str):
+    """설정(coordination 섹션)에 맞는 사용량 장부 (memory/sqlite는 db_path의 SQLite 장부)"""
+    if _backend(settings) == 'redis':
+        return RedisUsageLedger(get_redis(settings.get('redis_url', DEFAULT_REDIS_URL)), settings.get('prefix', DEFAULT_PREFIX))
+    return get_ledger(db_path)
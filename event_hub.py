@@ -0,0 +1,119 @@
+"""
+서버 → 브라우저 이벤트 푸시 (Server-Sent Events)
+요청/응답 폴링 대신 준비된 항목, 잠금 변경, 진행 통계, 저장 결과를 바로 보내줌
+
+- 세션마다 여러 구독자(탭) 가능, 구독자마다 대기열 하나
+- 대기열이 가득 찬 (느린) 구독자는 끊음 → 브라우저가 다시 연결하고 /api/current로 상태를 맞춤
+- 일정 시간 보낼 이벤트가 없으면 주석 줄(ping)로 연결 유지
+"""
+
+import itertools
+import json
+import queue
+import threading
+from collections import defaultdict
+from typing import Iterator, Optional
+
+QUEUE_SIZE = 1000  # 구독자당 보내지 못한 이벤트 최대 수
+_CLOSE = object()  # 구독 종료 신호
+
+
+class Subscriber:
+    """브라우저 연결 하나"""
+
+    def __init__(self, session_id: Optional[str]):
+        self.session_id = session_id
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.closed = False
+
+    def push(self, message) -> bool:
+        """이벤트 추가 (대기열이 가득 차면 False)"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+
+class EventHub:
+    """세션별 구독자 관리 + 이벤트 발행"""
+
+    def __init__(self, heartbeat: float = 15):
+        self.heartbeat = heartbeat  # ping 간격 (초)
+        self._subscribers = defaultdict(set)  # session_id → {Subscriber}
+        self._ids = itertools.count(1)  # 이벤트 번호 (전체 공용)
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id: Optional[str]) -> Subscriber:
+        subscriber = Subscriber(session_id)
+        with self._lock:
+            self._subscribers[session_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subs = self._subscribers.get(subscriber.session_id)
+            if subs is not None:
+                subs.discard(subscriber)
+                if not subs:
+                    del self._subscribers[subscriber.session_id]
+        subscriber.closed = True
+
+    def subscribed(self, session_id: str) -> bool:
+        """이 세션에 연결된 브라우저가 있는지"""
+        with self._lock:
+            return session_id in self._subscribers
+
+    def publish(self, session_id: str, event: str, data: dict):
+        """한 세션의 모든 탭에 이벤트 전송"""
+        with self._lock:
+            targets = list(self._subscribers.get(session_id, ()))
+        self._send(targets, event, data)
+
+    def broadcast(self, event: str, data: dict):
+        """모든 연결에 이벤트 전송"""
+        with self._lock:
+            targets = [s for subs in self._subscribers.values() for s in subs]
+        self._send(targets, event, data)
+
+    def _send(self, targets, event: str, data: dict):
+        if not targets:
+            return
+        message = self._format(event, data)
+        for subscriber in targets:
+            if not subscriber.push(message):
+                # 너무 느린 연결 → 끊고 재연결 유도 (다음 ping 때 종료)
+                self.unsubscribe(subscriber)
+
+    def _format(self, event: str, data: dict) -> str:
+        payload = json.dumps(data, ensure_ascii=False)
+        return f"id: {next(self._ids)}\nevent: {event}\ndata: {payload}\n\n"
+
+    def stream(self, subscriber: Subscriber) -> Iterator[str]:
+        """SSE 응답 본문 (연결이 끊기면 구독 해제)"""
+        try:
+            yield "retry: 2000\n\n"  # 끊기면 2초 후 재연결
+            while not subscriber.closed:
+                try:
+                    message = subscriber.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if message is _CLOSE:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def close(self):
+        """모든 연결 종료"""
+        with self._lock:
+            targets = [s for subs in self._subscribers.values() for s in subs]
+            self._subscribers.clear()
+        for subscriber in targets:
+            subscriber.closed = True
+            subscriber.push(_CLOSE)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
@@ -0,0 +1,95 @@
+"""
+유사 문장 검색용 n-gram 색인 (메모리)
+번역 메모리 전체를 매번 비교하지 않고, 글자 3-gram을 많이 공유하는 후보만 골라 유사도 계산
+
+- 너무 흔한 3-gram(많은 문장에 등장)은 후보 선정에서 제외 → 조회 비용이 전체 크기에 거의 비례하지 않음
+- 최종 점수는 difflib 유사도 (이전 선형 검색과 같은 기준)
+"""
+
+import threading
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Iterable, List, Tuple
+
+NGRAM_SIZE = 3
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    """앞뒤 공백을 붙인 글자 n-gram 집합"""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NgramIndex:
+    """문장 → 3-gram 역색인"""
+
+    def __init__(self, max_df_ratio: float = 0.05, candidates: int = 20):
+        self.max_df_ratio = max_df_ratio  # 전체 문장 중 이 비율보다 많이 등장하는 gram은 흔한 gram
+        self.candidates = candidates  # 정밀 비교할 후보 수
+        self._docs = []  # doc_id → 문장
+        self._ids = {}  # 문장 → doc_id
+        self._postings = defaultdict(list)  # gram → [doc_id]
+        self._lock = threading.Lock()
+
+    def add(self, text: str):
+        with self._lock:
+            self._add(text)
+
+    def add_all(self, texts: Iterable[str]):
+        with self._lock:
+            for text in texts:
+                self._add(text)
+
+    def _add(self, text: str):
+        if not text or text in self._ids:
+            return
+        doc_id = len(self._docs)
+        self._docs.append(text)
+        self._ids[text] = doc_id
+        for gram in ngrams(text):
+            self._postings[gram].append(doc_id)
+
+    def search(self, text: str, limit: int, min_score: float) -> List[Tuple[str, float]]:
+        """비슷한 문장 [(문장, 유사도)] (자기 자신 제외, 유사도 높은 순)"""
+        if not text:
+            return []
+        grams = ngrams(text)
+        lo, hi = len(text) * min_score, len(text) / min_score if min_score > 0 else float('inf')
+
+        with self._lock:
+            if not self._docs:
+                return []
+            max_df = max(100, int(len(self._docs) * self.max_df_ratio))
+            postings = sorted((p for p in (self._postings.get(g) for g in grams) if p), key=len)
+            # 드문 gram만으로 후보 선정 (모두 흔하면 가장 드문 3개 사용)
+            selective = [p for p in postings if len(p) <= max_df] or postings[:3]
+            counts = Counter()
+            for posting in selective:
+                counts.update(posting)
+            # 공유 gram이 많은 순으로, 길이 차이가 큰 문장은 제외
+            candidates = []
+            for doc_id, _ in counts.most_common(self.candidates * 4):
+                doc = self._docs[doc_id]
+                if lo <= len(doc) <= hi and doc != text:
+                    candidates.append(doc)
+                    if len(candidates) >= self.candidates:
+                        break
+
+        scored = []
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(text)  # 질의 문장 쪽 전처리는 한 번만
+        for cand in candidates:
+            matcher.set_seq1(cand)
+            if matcher.quick_ratio() < min_score:
+                continue
+            score = matcher.ratio()
+            if score >= min_score:
+                scored.append((cand, score))
+        scored.sort(key=lambda x: -x[1])
+        return scored[:limit]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._docs)
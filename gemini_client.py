@@ -0,0 +1,283 @@
+"""
+Gemini REST 클라이언트
+google-generativeai SDK의 genai.configure()는 프로세스 전체에 API 키 하나만 설정하므로,
+여러 사용자/여러 키가 동시에 호출하면 서로의 키를 덮어씀
+→ 요청마다 API 키를 헤더로 보내는 REST 호출로 대체 (연결 풀은 모든 키가 공유)
+
+- generateContent / streamGenerateContent(SSE) 지원
+- 고정 지침은 systemInstruction으로 따로 보내거나, 미리 만든 캐시(cachedContents)를 참조
+- 응답 객체는 SDK와 같은 이름(text, usage_metadata, candidates[0].finish_reason)으로 접근
+- 429는 QuotaExceeded (재시도 가능 시각 포함)
+"""
+
+import json
+import re
+import threading
+from types import SimpleNamespace
+from typing import Callable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_RETRY_AFTER = 60  # 응답에 재시도 시각이 없을 때 (초)
+
+
+class GeminiError(Exception):
+    """Gemini API 오류 (HTTP 상태 코드 포함, 네트워크 오류는 status None)"""
+
+    def __init__(self, status: Optional[int], message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status} {message}" if status else message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class QuotaExceeded(GeminiError):
+    """429 - 키/모델의 요청 또는 토큰 한도 초과"""
+
+
+def _usage(data: dict):
+    usage = data.get('usageMetadata') or {}
+    return SimpleNamespace(
+        prompt_token_count=usage.get('promptTokenCount', 0),
+        candidates_token_count=usage.get('candidatesTokenCount', 0),
+        total_token_count=usage.get('totalTokenCount', 0),
+        cached_content_token_count=usage.get('cachedContentTokenCount', 0)
+    )
+
+
+class GeminiResponse:
+    """generateContent 응답 (스트리밍이면 조각 하나)"""
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.usage_metadata = _usage(data) if data.get('usageMetadata') else None
+        self.candidates = [
+            SimpleNamespace(finish_reason=c.get('finishReason'), content=c.get('content') or {})
+            for c in data.get('candidates') or []
+        ]
+
+    @property
+    def text(self) -> str:
+        """첫 후보의 텍스트 (후보가 없으면 - 차단 등 - ValueError, SDK와 같은 동작)"""
+        if not self.candidates:
+            reason = (self.data.get('promptFeedback') or {}).get('blockReason', '응답 없음')
+            raise ValueError(f"응답에 텍스트가 없습니다 ({reason})")
+        parts = self.candidates[0].content.get('parts') or []
+        return ''.join(part.get('text', '') for part in parts)
+
+
+class StreamingResponse:
+    """streamGenerateContent 응답 - 반복하면 조각(GeminiResponse)이 도착하는 대로 나옴
+
+    반복이 끝나면 text(전체), usage_metadata, candidates는 마지막 정보로 채워짐
+    """
+
+    def __init__(self, chunks: Iterator[GeminiResponse], on_done: Optional[Callable] = None):
+        self._chunks = chunks
+        self._on_done = on_done  # on_done(usage_metadata) - 스트림이 끝나거나 중단될 때 한 번
+        self._texts = []
+        self.usage_metadata = None
+        self.candidates = []
+
+    def __iter__(self):
+        try:
+            for chunk in self._chunks:
+                if chunk.usage_metadata:
+                    self.usage_metadata = chunk.usage_metadata
+                if chunk.candidates:
+                    self.candidates = chunk.candidates
+                    self._texts.append(chunk.text)
+                yield chunk
+        finally:
+            self._done()
+
+    def _done(self):
+        if self._on_done:
+            on_done, self._on_done = self._on_done, None
+            on_done(self.usage_metadata)
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._texts)
+
+
+def _rest_schema(schema):
+    """응답 스키마 dict → REST 형식 (type은 대문자 enum)"""
+    if isinstance(schema, dict):
+        return {k: (v.upper() if k == 'type' and isinstance(v, str) else _rest_schema(v)) for k, v in schema.items()}
+    if isinstance(schema, list):
+        return [_rest_schema(v) for v in schema]
+    return schema
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split('_')
+    return head + ''.join(word.title() for word in rest)
+
+
+def _system_part(text: str) -> dict:
+    return {'parts': [{'text': text}]}
+
+
+def build_request(prompt: str, generation_config: Optional[dict] = None,
+                  system_instruction: Optional[str] = None, cached_content: Optional[str] = None) -> dict:
+    """generateContent 요청 본문
+
+    cached_content(캐시 이름)가 있으면 고정 지침은 캐시에서 가져오고, 없으면 system_instruction을 함께 보냄
+    """
+    body = {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+    if cached_content:
+        body['cachedContent'] = cached_content
+    elif system_instruction:
+        body['systemInstruction'] = _system_part(system_instruction)
+    if generation_config:
+        config = {_camel(k): v for k, v in generation_config.items()}
+        if 'responseSchema' in config:
+            config['responseSchema'] = _rest_schema(config['responseSchema'])
+        body['generationConfig'] = config
+    return body
+
+
+def build_cache_request(model: str, system_instruction: str, ttl: int) -> dict:
+    """cachedContents 생성 요청 본문"""
+    return {
+        'model': f"models/{model}",
+        'systemInstruction': _system_part(system_instruction),
+        'ttl': f"{int(ttl)}s"
+    }
+
+
+def parse_retry_after(headers, error: dict) -> float:
+    """429 응답의 재시도 대기 시간 (RetryInfo → Retry-After 헤더 → 메시지 → 기본값)"""
+    for detail in error.get('details') or []:
+        delay = detail.get('retryDelay')
+        if delay:
+            try:
+                return float(str(delay).rstrip('s'))
+            except ValueError:
+                pass
+    header = headers.get('Retry-After')
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    match = re.search(r'retry in (\d+(?:\.\d+)?)', error.get('message', ''), re.IGNORECASE)
+    return float(match.group(1)) if match else DEFAULT_RETRY_AFTER
+
+
+def error_for(status: int, headers, body: str) -> GeminiError:
+    """오류 응답(상태 코드, 헤더, 본문) → 예외 (429는 QuotaExceeded) - 동기/비동기 클라이언트 공용"""
+    try:
+        error = json.loads(body).get('error') or {}
+    except (ValueError, AttributeError):
+        error = {}
+    message = error.get('message') or body[:200]
+    if status == 429:
+        return QuotaExceeded(429, message, parse_retry_after(headers, error))
+    return GeminiError(status, message)
+
+
+def decode_body(status: int, body: str) -> dict:
+    """성공 응답 본문 → dict (JSON이 아니면 - 프록시 오류 페이지 등 - GeminiError) - 동기/비동기 클라이언트 공용"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        raise GeminiError(status, f"JSON이 아닌 응답: {body[:200]}")
+    return data
+
+
+def raise_for_error(response: requests.Response):
+    if response.status_code != 200:
+        raise error_for(response.status_code, response.headers, response.text)
+
+
+class GeminiClient:
+    """Gemini REST 호출 (API 키는 요청마다 지정 → 동시에 여러 키 사용 가능)"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, pool_size: int = 10, timeout=(5, 120)):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.http = requests.Session()
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+
+    def generate(self, api_key: str, model: str, prompt: str, generation_config: Optional[dict] = None,
+                 stream: bool = False, on_done: Optional[Callable] = None,
+                 system_instruction: Optional[str] = None, cached_content: Optional[str] = None):
+        """generateContent 호출 → GeminiResponse (stream이면 StreamingResponse)
+
+        on_done(usage_metadata): 응답을 다 받았을 때 호출 (스트리밍이면 반복이 끝날 때)
+        """
+        body = build_request(prompt, generation_config, system_instruction, cached_content)
+        method = 'streamGenerateContent' if stream else 'generateContent'
+        url = f"{self.base_url}/models/{model}:{method}"
+        try:
+            response = self.http.post(
+                url, json=body, headers={'x-goog-api-key': api_key},
+                params={'alt': 'sse'} if stream else None, stream=stream, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise GeminiError(None, f"네트워크 오류: {e}")
+
+        if not stream:
+            raise_for_error(response)
+            result = GeminiResponse(decode_body(response.status_code, response.text))
+            if on_done:
+                on_done(result.usage_metadata)
+            return result
+
+        if response.status_code != 200:
+            response.content  # 오류 본문 읽고 연결 반환
+            raise_for_error(response)
+        return StreamingResponse(self._iter_sse(response), on_done)
+
+    def create_cached_content(self, api_key: str, model: str, system_instruction: str, ttl: int) -> str:
+        """고정 지침을 서버 캐시로 만들고 이름(cachedContents/...) 반환
+
+        캐시는 API 키(프로젝트)와 모델마다 따로 만들어야 함 (너무 짧은 지침은 400 - 모델별 최소 토큰 수)
+        """
+        body = build_cache_request(model, system_instruction, ttl)
+        try:
+            response = self.http.post(
+                f"{self.base_url}/cachedContents", json=body,
+                headers={'x-goog-api-key': api_key}, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise GeminiError(None, f"네트워크 오류: {e}")
+        raise_for_error(response)
+        name = decode_body(response.status_code, response.text).get('name')
+        if not name:
+            raise GeminiError(response.status_code, "캐시 이름이 없는 응답")
+        return name
+
+    @staticmethod
+    def _iter_sse(response: requests.Response) -> Iterator[GeminiResponse]:
+        """SSE 줄("data: {...}") → 조각"""
+        response.encoding = 'utf-8'
+        try:
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if line and line.startswith('data:'):
+                    yield GeminiResponse(decode_body(response.status_code, line[5:]))
+        except requests.RequestException as e:
+            raise GeminiError(None, f"스트리밍 중 연결 끊김: {e}")
+        finally:
+            response.close()
+
+
+# 모든 번역기가 공유하는 클라이언트 (연결 풀 재사용)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str = DEFAULT_BASE_URL, **options) -> GeminiClient:
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = GeminiClient(base_url, **options)
+        return client
@@ -0,0 +1,475 @@
+"""
+Gemini 다중 키/모델 분배기
+여러 API 키와 모델(키 × 모델 = 슬롯)의 사용량을 추적하고, 배치마다 여유가 가장 많은 슬롯으로 보냄
+
+- 슬롯 사용량(분당 요청/토큰, 하루 요청)은 프로세스 전체에서 공유
+  → 같은 키를 쓰는 사용자끼리도 한도를 함께 계산
+- 하루 사용량은 사용량 장부(UsageLedger)에 기록 → 재시작/다른 서버 프로세스와도 이어서 계산
+- 분당 요청/토큰은 토큰 버킷으로 미리 예약 → 한도에 닿기 전에 보낼 시각을 정하고 그때까지 대기
+  (대기는 호출한 스레드 - 프리페치 워커 - 에서 한 번, 웹 요청은 기다리지 않음)
+- 429가 오면 그 슬롯만 쉬게 하고 바로 다른 슬롯으로 재요청
+- 모든 슬롯이 하루 한도를 다 썼거나 대기가 max_wait를 넘을 때만 QuotaExceeded
+- models 순서 = 선호 순서 (앞 모델의 슬롯이 모두 막혔을 때만 다음 모델 사용)
+- 고정 지침은 systemInstruction으로 분리, context_cache면 키/모델/지침 버전별 서버 캐시(cachedContents)로 재사용
+- generate_content_async: 같은 규칙의 비동기판 (AsyncGeminiClient로 요청, 한도 대기는 asyncio.sleep)
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from gemini_client import GeminiClient, GeminiError, QuotaExceeded
+from rate_limiter import DEFAULT_BURST, MinuteLimit
+from usage_ledger import LedgerError, UsageLedger, empty_usage, utc_day
+
+# 모델별 기본 한도 (rpm: 분당 요청, rpd: 하루 요청, tpm: 분당 토큰) - 설정에서 덮어쓸 수 있음
+DEFAULT_MODEL_LIMITS = {
+    "gemini-2.0-flash-exp": {"rpm": 10, "rpd": 50, "tpm": 250000},
+    "gemini-2.5-pro": {"rpm": 5, "rpd": 50, "tpm": 250000},
+    "gemini-1.5-pro": {"rpm": 2, "rpd": 50, "tpm": 32000},
+    "gemini-1.5-flash": {"rpm": 15, "rpd": 1500, "tpm": 1000000},
+    "gemini-2.5-flash-lite": {"rpm": 15, "rpd": 1500, "tpm": 250000},
+    "gemini-2.5-flash": {"rpm": 10, "rpd": 1500, "tpm": 250000},
+}
+FALLBACK_LIMITS = {"rpm": 10, "rpd": 1500, "tpm": 250000}
+DEFAULT_MAX_WAIT = 300  # 이보다 오래 기다려야 하면 대기하지 않고 QuotaExceeded (초)
+MAX_QUOTA_RETRIES = 3  # 슬롯을 한 바퀴 돈 뒤에도 429가 오면 더 시도할 횟수
+LEDGER_SYNC_INTERVAL = 30  # 다른 프로세스의 사용량을 장부에서 다시 읽는 간격 (초)
+DEFAULT_CONTEXT_TTL = 3600  # 고정 지침 캐시 유지 시간 (초)
+
+
+def mask_key(api_key: str) -> str:
+    """로그/화면 표시용 키 (앞 4자리 + 뒤 4자리)"""
+    return f"{api_key[:4]}…{api_key[-4:]}" if len(api_key) > 8 else "…"
+
+
+class KeySlot:
+    """API 키 + 모델 하나의 한도와 사용량 (_lock 보유 상태에서만 변경)"""
+
+    def __init__(self, api_key: str, model: str, limits: dict, burst: float = DEFAULT_BURST,
+                 ledger: Optional[UsageLedger] = None):
+        now = time.time()
+        self.api_key = api_key
+        self.model = model
+        self.rpm = limits.get('rpm', FALLBACK_LIMITS['rpm'])
+        self.rpd = limits.get('rpd', FALLBACK_LIMITS['rpd'])
+        self.tpm = limits.get('tpm', FALLBACK_LIMITS['tpm'])
+        self.requests = MinuteLimit(self.rpm, burst, now) if self.rpm else None  # 분당 요청
+        self.tokens = MinuteLimit(self.tpm, burst, now) if self.tpm else None  # 분당 토큰
+        self.day = utc_day()
+        self.requests_today = 0
+        self.tokens_today = 0
+        self.in_flight = 0  # 예약 후 응답을 기다리는 요청 수
+        self.cooldown_until = 0.0  # 429 이후 쉬는 시각
+        self.quota_errors = 0
+        self.ledger = ledger
+        self.synced_at = 0.0  # 장부에서 하루 사용량을 읽은 시각
+        if ledger:
+            self.sync(ledger.get(api_key, model))
+
+    def sync(self, usage: dict, day: Optional[str] = None):
+        """장부의 하루 누적으로 맞춤 (다른 프로세스/재시작 전 사용량 포함, 하루 안에서는 줄어들지 않음)"""
+        if (day or utc_day()) != self.day:
+            return
+        self.requests_today = max(self.requests_today, usage['requests'])
+        self.tokens_today = max(self.tokens_today, usage['total_tokens'])
+        self.synced_at = time.time()
+
+    @property
+    def label(self) -> str:
+        return f"{mask_key(self.api_key)}/{self.model}"
+
+    def _roll(self):
+        """날짜가 바뀌면 하루 사용량 초기화"""
+        today = utc_day()
+        if today != self.day:
+            self.day = today
+            self.requests_today = 0
+            self.tokens_today = 0
+            self.synced_at = 0.0
+
+    def load(self, now: float) -> float:
+        """한도 대비 사용률 (분당 요청/토큰, 하루 요청 중 가장 높은 값)"""
+        self._roll()
+        return max(
+            1 - self.requests.available(now) if self.requests else 0,
+            1 - self.tokens.available(now) if self.tokens else 0,
+            (self.requests_today + self.in_flight) / self.rpd if self.rpd else 0
+        )
+
+    def delay(self, now: float, tokens: int = 0) -> float:
+        """tokens 크기의 요청을 보낼 수 있을 때까지 남은 시간 (초, 오늘 한도 소진이면 inf)"""
+        self._roll()
+        if self.rpd and self.requests_today + self.in_flight >= self.rpd:
+            return float('inf')
+        return max(
+            self.cooldown_until - now,
+            self.requests.delay(1, now) if self.requests else 0,
+            self.tokens.delay(tokens, now) if self.tokens and tokens else 0,
+            0.0
+        )
+
+    def reserve(self, now: float, tokens: int = 0) -> float:
+        """요청 하나 예약 → 보내기까지 기다릴 시간 (초)"""
+        wait = max(
+            self.cooldown_until - now,
+            self.requests.delay(1, now) if self.requests else 0,
+            self.tokens.delay(tokens, now) if self.tokens and tokens else 0,
+            0.0
+        )
+        if self.requests:
+            self.requests.reserve(1, now, wait)
+        if self.tokens and tokens:
+            self.tokens.reserve(tokens, now, wait)
+        self.in_flight += 1
+        return wait
+
+    def finish(self, now: float, tokens: int, estimated: int = 0, counted: bool = True):
+        """요청 완료 - 예상 토큰과 실제 토큰의 차이를 버킷에 반영
+
+        counted=False면 한도에 잡히지 않은 요청 (네트워크 오류) → 예약 전부 반환
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+        if not counted:
+            if self.requests:
+                self.requests.refund(1, now)
+            if self.tokens and estimated:
+                self.tokens.refund(estimated, now)
+            return
+        self._roll()
+        self.requests_today += 1
+        self.tokens_today += tokens
+        if self.tokens and tokens:
+            self.tokens.refund(estimated - tokens, now)
+
+    def stats(self, now: float) -> dict:
+        return {
+            'key': mask_key(self.api_key),
+            'model': self.model,
+            'requests_today': self.requests_today,
+            'rpd': self.rpd,
+            'tokens_today': self.tokens_today,
+            'load': round(self.load(now), 3),
+            'in_flight': self.in_flight,
+            'wait': round(min(self.delay(now), 86400), 1),
+            'cooldown': max(0, round(self.cooldown_until - now, 1))
+        }
+
+
+# (키, 모델) → 슬롯 - 모든 번역기/세션이 공유
+_slots: Dict[tuple, KeySlot] = {}
+_lock = threading.Lock()
+
+
+def get_slot(api_key: str, model: str, limits: dict, burst: float = DEFAULT_BURST,
+             ledger: Optional[UsageLedger] = None) -> KeySlot:
+    with _lock:
+        slot = _slots.get((api_key, model))
+        if slot is None:
+            slot = _slots[(api_key, model)] = KeySlot(api_key, model, limits, burst, ledger)
+        elif slot.ledger is None and ledger is not None:
+            slot.ledger = ledger
+            slot.sync(ledger.get(api_key, model))
+        return slot
+
+
+# (키, 모델, 지침 버전) → (캐시 이름 - 만들 수 없었으면 None, 다시 만들 시각) - 모든 번역기가 공유
+_contexts: Dict[tuple, tuple] = {}
+_context_lock = threading.Lock()  # _contexts/_context_creating 조회용 (네트워크 호출은 이 잠금 밖에서)
+_context_creating: Dict[tuple, threading.Lock] = {}  # 키별 생성 잠금 - 같은 캐시를 한 번만 만들고 다른 키는 막지 않음
+
+
+def split_keys(value) -> List[str]:
+    """키 목록 (쉼표/공백/줄바꿈으로 구분한 문자열 또는 리스트)"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace(',', ' ').split()
+    keys = []
+    for key in value:
+        key = key.strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class GeminiDispatcher:
+    """키 × 모델 슬롯 중 가장 먼저 보낼 수 있는 곳으로 요청 예약 + 429 시 다른 슬롯으로 전환"""
+
+    def __init__(self, client: GeminiClient, api_keys: List[str], models: List[str],
+                 limits: Optional[Dict[str, dict]] = None, burst: float = DEFAULT_BURST,
+                 max_wait: float = DEFAULT_MAX_WAIT, ledger: Optional[UsageLedger] = None,
+                 context_cache: bool = False, context_ttl: int = DEFAULT_CONTEXT_TTL):
+        if not api_keys:
+            raise ValueError("Gemini API 키가 필요합니다")
+        self.client = client
+        self.models = list(dict.fromkeys(models))
+        self.max_wait = max_wait
+        self.ledger = ledger
+        self.context_cache = context_cache  # 고정 지침을 서버 캐시로 만들어 참조 (False면 요청마다 systemInstruction)
+        self.context_ttl = context_ttl
+        limits = limits or {}
+        self.slots = [
+            get_slot(key, model, limits.get(model) or DEFAULT_MODEL_LIMITS.get(model, FALLBACK_LIMITS),
+                     burst, ledger)
+            for model in self.models for key in api_keys
+        ]
+        self._rank = {model: i for i, model in enumerate(self.models)}
+
+    def _acquire(self, tokens: int, exclude: set):
+        """보낼 슬롯 예약 → (슬롯, 기다릴 시간)
+
+        지금 보낼 수 있는 슬롯이 있으면 선호 모델 → 사용률 낮은 순,
+        없으면 가장 먼저 풀리는 슬롯에 예약 (max_wait 초과/하루 한도 소진이면 QuotaExceeded)
+        """
+        with _lock:
+            now = time.time()
+            candidates = [s for s in self.slots if id(s) not in exclude] or self.slots
+            delays = {id(s): s.delay(now, tokens) for s in candidates}
+            slot = min(candidates, key=lambda s: (0, self._rank[s.model], s.load(now)) if delays[id(s)] == 0
+                       else (1, delays[id(s)], self._rank[s.model]))
+            wait = delays[id(slot)]
+            if wait == float('inf'):
+                raise QuotaExceeded(429, "모든 키의 오늘 요청 한도를 사용했습니다", None)
+            if wait > self.max_wait:
+                raise QuotaExceeded(429, f"모든 키가 한도에 걸렸습니다 ({int(wait)}초 후 가능)", wait)
+            return slot, slot.reserve(now, tokens)
+
+    def _release(self, slot: KeySlot, usage=None, estimated: int = 0, counted: bool = True):
+        tokens = getattr(usage, 'total_token_count', 0) if usage else 0
+        day = utc_day()
+        with _lock:
+            slot.finish(time.time(), tokens, estimated, counted)
+        if counted and self.ledger:
+            self._record(slot, day, usage=usage)
+
+    def _cooldown(self, slot: KeySlot, retry_after: Optional[float]):
+        day = utc_day()
+        with _lock:
+            slot.in_flight = max(0, slot.in_flight - 1)
+            slot.cooldown_until = time.time() + (retry_after or 60)
+            slot.quota_errors += 1
+        if self.ledger:
+            self._record(slot, day, requests=0, quota_errors=1)
+
+    def _record(self, slot: KeySlot, day: str, **values):
+        """장부에 기록 (디스크 쓰기는 _lock 밖에서) → 다른 프로세스 사용량까지 반영된 누적으로 슬롯 갱신"""
+        try:
+            usage = self.ledger.record(slot.api_key, slot.model, day=day, **values)
+        except (sqlite3.Error, LedgerError) as e:
+            print(f"   ⚠️  사용량 장부 기록 실패: {e}")
+            return
+        with _lock:
+            slot.sync(usage, day)
+
+    def _sync_stale(self):
+        """오래전에 읽은 슬롯의 하루 사용량을 장부에서 다시 읽음 (다른 서버 프로세스 사용분)"""
+        if not self.ledger:
+            return
+        now = time.time()
+        for slot in self.slots:
+            if now - slot.synced_at >= LEDGER_SYNC_INTERVAL:
+                day = utc_day()
+                try:
+                    usage = self.ledger.get(slot.api_key, slot.model, day)
+                except (sqlite3.Error, LedgerError):
+                    continue
+                with _lock:
+                    slot.sync(usage, day)
+
+    def _cached_content(self, slot: KeySlot, system_instruction: Optional[tuple]) -> Optional[str]:
+        """슬롯(키/모델)의 고정 지침 캐시 이름 (없으면 만들고, 만들 수 없으면 None → systemInstruction으로 보냄)"""
+        if not self.context_cache or not system_instruction:
+            return None
+        version, text = system_instruction
+        key = (slot.api_key, slot.model, version)
+        with _context_lock:
+            entry = _contexts.get(key)
+            if entry and entry[1] > time.time():
+                return entry[0]
+            creating = _context_creating.setdefault(key, threading.Lock())
+        # 같은 (키, 모델, 버전)만 생성이 끝나기를 기다림 - 다른 키/모델의 요청은 그대로 진행
+        with creating:
+            with _context_lock:
+                entry = _contexts.get(key)
+            if entry and entry[1] > time.time():
+                return entry[0]  # 기다리는 동안 다른 스레드가 만듦
+            try:
+                name = self.client.create_cached_content(slot.api_key, slot.model, text, self.context_ttl)
+                print(f"   🗃️  {slot.label} 고정 지침 캐시 생성 (버전 {version})")
+            except GeminiError as e:
+                name = None
+                print(f"   🗃️  {slot.label} 고정 지침 캐시를 만들 수 없음 → 요청마다 지침 전송 ({e})")
+            # 만료 1분 전에 새로 만듦 (만들지 못했으면 TTL 동안 다시 시도하지 않음)
+            with _context_lock:
+                _contexts[key] = (name, time.time() + max(self.context_ttl - 60, 60))
+            return name
+
+    @staticmethod
+    def _drop_context(slot: KeySlot, version: str):
+        with _context_lock:
+            _contexts.pop((slot.api_key, slot.model, version), None)
+
+    def next_ready(self, tokens: int = 0) -> Optional[float]:
+        """가장 먼저 요청을 보낼 수 있을 때까지 남은 시간 (초, 오늘 한도를 다 썼으면 None)"""
+        with _lock:
+            now = time.time()
+            wait = min(slot.delay(now, tokens) for slot in self.slots)
+        return None if wait == float('inf') else wait
+
+    def generate_content(self, prompt: str, stream: bool = False, generation_config: Optional[dict] = None,
+                         estimated_tokens: int = 0, on_wait: Optional[Callable[[float], None]] = None,
+                         max_retries: int = MAX_QUOTA_RETRIES, system_instruction: Optional[tuple] = None):
+        """예약한 시각에 generateContent (응답 객체에 사용한 슬롯은 .slot)
+
+        estimated_tokens: 예상 토큰 (입력 + 출력) - 분당 토큰 예약용, 응답을 받으면 실제 값으로 보정
+        on_wait(seconds): 한도 때문에 기다려야 할 때 보내기 전에 한 번 호출 (화면 ETA 표시용)
+        system_instruction: (버전, 고정 지침) - 버전이 같으면 같은 캐시를 재사용
+        """
+        attempts = _Attempts(self, estimated_tokens, on_wait, max_retries, system_instruction)
+        while True:
+            slot, wait = attempts.next_slot()
+            if wait > 0:
+                time.sleep(wait)
+            cached = None
+            try:
+                if attempts.wants_cache:
+                    cached = self._cached_content(slot, system_instruction)
+                response = self.client.generate(
+                    slot.api_key, slot.model, prompt, generation_config, stream=stream,
+                    on_done=attempts.on_done(slot), system_instruction=attempts.system_text, cached_content=cached
+                )
+            except BaseException as e:
+                if attempts.retry(slot, e, cached):
+                    continue
+                raise
+            response.slot = slot
+            return response
+
+    async def generate_content_async(self, client, prompt: str, stream: bool = False,
+                                     generation_config: Optional[dict] = None, estimated_tokens: int = 0,
+                                     on_wait: Optional[Callable[[float], None]] = None,
+                                     max_retries: int = MAX_QUOTA_RETRIES, system_instruction: Optional[tuple] = None):
+        """generate_content의 비동기판 - 같은 슬롯 예약/전환 규칙, 요청은 client(AsyncGeminiClient)로
+
+        한도 대기는 asyncio.sleep → 기다리는 동안 같은 이벤트 루프의 다른 배치/저장 요청이 계속 진행
+        고정 지침 캐시 생성은 드문 일이라 동기 클라이언트로 (별도 스레드에서)
+        """
+        attempts = _Attempts(self, estimated_tokens, on_wait, max_retries, system_instruction)
+        while True:
+            slot, wait = attempts.next_slot()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            cached = None
+            try:
+                if attempts.wants_cache:
+                    cached = await asyncio.to_thread(self._cached_content, slot, system_instruction)
+                response = await client.generate(
+                    slot.api_key, slot.model, prompt, generation_config, stream=stream,
+                    on_done=attempts.on_done(slot), system_instruction=attempts.system_text, cached_content=cached
+                )
+            except BaseException as e:
+                if attempts.retry(slot, e, cached):
+                    continue
+                raise
+            response.slot = slot
+            return response
+
+    @property
+    def model_name(self) -> str:
+        return self.models[0]
+
+    def daily_limit(self) -> int:
+        """모든 슬롯의 하루 요청 한도 합"""
+        return sum(slot.rpd for slot in self.slots)
+
+    def requests_today(self) -> int:
+        with _lock:
+            for slot in self.slots:
+                slot._roll()
+            return sum(slot.requests_today for slot in self.slots)
+
+    def usage_today(self) -> Dict[str, int]:
+        """이 분배기의 모든 슬롯 오늘 누적 (장부가 있으면 입력/출력/캐시 토큰 포함)"""
+        if self.ledger:
+            return self.ledger.totals((slot.api_key, slot.model) for slot in self.slots)
+        usage = empty_usage()
+        with _lock:
+            for slot in self.slots:
+                slot._roll()
+                usage['requests'] += slot.requests_today
+                usage['total_tokens'] += slot.tokens_today
+                usage['quota_errors'] += slot.quota_errors
+        return usage
+
+    def stats(self) -> List[dict]:
+        with _lock:
+            now = time.time()
+            return [slot.stats(now) for slot in self.slots]
+
+
+class _Attempts:
+    """요청 하나의 슬롯 선택/실패 처리 - generate_content와 비동기판 공용 (대기와 요청 I/O만 호출한 쪽에서)
+
+    - next_slot(): 아직 시도하지 않은 슬롯 우선으로 예약 → (슬롯, 기다릴 시간)
+    - retry(): 실패한 요청의 예약 정리 → 다른 슬롯/지침 직접 전송으로 다시 보낼지
+    """
+
+    def __init__(self, dispatcher: 'GeminiDispatcher', estimated_tokens: int,
+                 on_wait: Optional[Callable[[float], None]], max_retries: int, system_instruction: Optional[tuple]):
+        self.dispatcher = dispatcher
+        self.estimated_tokens = estimated_tokens
+        self.on_wait = on_wait
+        self.max_retries = max_retries
+        self.system_instruction = system_instruction
+        self.system_text = system_instruction[1] if system_instruction else None
+        self.tried = set()
+        self.quota_errors = 0
+        self.use_cache = True
+        dispatcher._sync_stale()
+
+    @property
+    def wants_cache(self) -> bool:
+        """고정 지침 캐시를 쓸지 (캐시 사용이 한 번 실패하면 이 요청은 지침을 직접 보냄)"""
+        return self.use_cache and self.dispatcher.context_cache and bool(self.system_instruction)
+
+    def next_slot(self):
+        slot, wait = self.dispatcher._acquire(self.estimated_tokens, self.tried)
+        self.tried.add(id(slot))
+        if wait > 0:
+            # ⏳ 예약한 시각까지 대기 (429를 받고 기다리는 것보다 먼저, 한 번만)
+            print(f"   ⏳ {slot.label} 한도 대기 → {wait:.1f}초 후 전송 (예약)")
+            if self.on_wait:
+                self.on_wait(wait)
+        return slot, wait
+
+    def on_done(self, slot: KeySlot) -> Callable:
+        """응답을 다 받았을 때 실제 사용량으로 예약 정리"""
+        return lambda usage: self.dispatcher._release(slot, usage, self.estimated_tokens)
+
+    def retry(self, slot: KeySlot, error: BaseException, cached: Optional[str]) -> bool:
+        """요청 실패 → 슬롯 예약 정리 후 다시 보낼지 (False면 호출한 쪽에서 오류를 그대로 올림)"""
+        dispatcher = self.dispatcher
+        if isinstance(error, QuotaExceeded):
+            # 🔀 이 슬롯만 쉬게 하고 다른 슬롯으로 (모두 시도했으면 쉬는 시간이 가장 짧은 슬롯에 예약)
+            dispatcher._cooldown(slot, error.retry_after)
+            self.quota_errors += 1
+            if self.quota_errors > len(dispatcher.slots) + self.max_retries:
+                return False
+            print(f"   🔀 {slot.label} 한도 초과 (429) → {int(error.retry_after or 60)}초 쉬고 다른 키/모델로 전환")
+            return True
+        if isinstance(error, GeminiError):
+            # 네트워크 오류는 한도에 잡히지 않음, 그 외 오류는 요청으로 계산
+            dispatcher._release(slot, estimated=self.estimated_tokens, counted=error.status is not None)
+            if cached and error.status in (400, 403, 404):
+                # 캐시가 만료/삭제됨 → 버리고 이번 요청은 지침을 직접 보내 다시 시도
+                dispatcher._drop_context(slot, self.system_instruction[0])
+                self.use_cache = False
+                print(f"   🗃️  {slot.label} 고정 지침 캐시 사용 실패 ({error.status}) → 지침을 직접 보내 재요청")
+                return True
+            return False
+        # 예상하지 못한 오류 → 예약 반환 (슬롯이 계속 바빠 보이지 않게)
+        dispatcher._release(slot, estimated=self.estimated_tokens, counted=False)
+        return False
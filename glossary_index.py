@@ -0,0 +1,132 @@
+"""
+용어집 검색 색인 (Aho–Corasick)
+용어가 수천 개가 되면 프롬프트마다 전체 용어집을 넣는 비용이 커짐
+→ 배치 원문에 실제로 등장하는 용어만 찾아서 넣음
+
+- 원문 길이에 비례하는 한 번의 훑기로 모든 용어를 동시에 찾음 (용어 수와 무관)
+- 대소문자 무시, 단어 경계 확인 ("Pass"는 "Passenger"에 걸리지 않음, 복수형 "Brakes"는 "Brake"로 인정)
+- 용어 추가/삭제는 트라이에 바로 반영하고, 실패 링크는 다음 검색 때 한 번만 다시 계산
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+PLURAL_SUFFIXES = ('s', 'es')  # 단어 끝 경계로 인정하는 복수형 어미
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class GlossaryIndex:
+    """용어집 키(영문) 검색 색인"""
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self._goto: List[Dict[str, int]] = [{}]  # 노드 → {문자: 다음 노드}
+        self._fail: List[int] = [0]  # 실패 링크
+        self._term: List[str] = ['']  # 이 노드에서 끝나는 용어 (소문자, 없으면 '')
+        self._report: List[int] = [0]  # 실패 링크를 따라가며 만나는 가장 가까운 용어 노드 (없으면 0)
+        self._originals: Dict[str, Set[str]] = {}  # 소문자 용어 → 원래 표기들
+        self._dirty = False
+        self._lock = threading.Lock()
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._originals)
+
+    def add(self, term: str):
+        """용어 추가 (트라이에 바로 반영)"""
+        folded = term.casefold()
+        if not folded:
+            return
+        with self._lock:
+            node = 0
+            for ch in folded:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._term.append('')
+                    self._report.append(0)
+                node = nxt
+            self._term[node] = folded
+            self._originals.setdefault(folded, set()).add(term)
+            self._dirty = True
+
+    def remove(self, term: str):
+        """용어 삭제 (같은 소문자 표기가 남아 있으면 노드는 유지)"""
+        folded = term.casefold()
+        with self._lock:
+            originals = self._originals.get(folded)
+            if not originals:
+                return
+            originals.discard(term)
+            if originals:
+                return
+            del self._originals[folded]
+            node = 0
+            for ch in folded:
+                node = self._goto[node][ch]
+            self._term[node] = ''
+            self._dirty = True
+
+    def _build(self):
+        """실패 링크/출력 링크 재계산 (BFS, _lock 보유 상태에서 호출)"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._report[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fail_node = self._fail[child]
+                self._report[child] = fail_node if self._term[fail_node] else self._report[fail_node]
+                queue.append(child)
+        self._dirty = False
+
+    @staticmethod
+    def _bounded(text: str, start: int, end: int, term: str) -> bool:
+        """용어 앞뒤가 단어 경계인지 (용어 끝이 글자면 복수형 어미 허용)"""
+        if _is_word(term[0]) and start > 0 and _is_word(text[start - 1]):
+            return False
+        if not _is_word(term[-1]) or end == len(text) or not _is_word(text[end]):
+            return True
+        if term[-1].isalpha():
+            for suffix in PLURAL_SUFFIXES:
+                stop = end + len(suffix)
+                if text.startswith(suffix, end) and (stop == len(text) or not _is_word(text[stop])):
+                    return True
+        return False
+
+    def find(self, texts: Iterable[str]) -> Set[str]:
+        """원문들에 등장하는 용어 (원래 표기)"""
+        found = set()
+        with self._lock:
+            if self._dirty:
+                self._build()
+            goto, fail, terms, report = self._goto, self._fail, self._term, self._report
+            for text in texts:
+                folded = (text or '').casefold()
+                node = 0
+                for i, ch in enumerate(folded):
+                    while node and ch not in goto[node]:
+                        node = fail[node]
+                    node = goto[node].get(ch, 0)
+                    hit = node if terms[node] else report[node]
+                    while hit:
+                        term = terms[hit]
+                        if term not in found and self._bounded(folded, i + 1 - len(term), i + 1, term):
+                            found.add(term)
+                        hit = report[hit]
+            return {original for term in found for original in self._originals.get(term, ())}
@@ -0,0 +1,162 @@
+"""
+용어집 저장소 (SQLite)
+용어를 추가할 때마다 JSON 파일 전체를 다시 쓰던 방식은 Flask 스레드끼리 동시에 고치면 서로 덮어쓰고,
+쓰는 도중 종료되면 파일이 깨짐 → 용어 단위로 트랜잭션 기록
+
+- 추가/수정/삭제는 용어 하나씩 원자적으로 기록 + 버전 번호 1 증가 (캐시는 버전으로 구분)
+- 모든 세션/번역기가 같은 저장소를 공유 → 다른 작업자가 추가한 용어도 바로 프롬프트에 반영
+- 다른 서버 프로세스가 바꾼 내용은 읽을 때 DB 변경 번호(data_version)를 확인해 다시 불러옴
+- 변경 알림: subscribe(fn) → fn(version, action, en, ko) (브라우저 이벤트 푸시용, 이 프로세스의 변경만)
+- 처음 만들 때 기존 JSON 용어집(없으면 설정의 기본 용어집)을 가져옴
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from glossary_index import GlossaryIndex
+
+
+class GlossaryStore:
+    """용어 단위로 기록하는 공유 용어집"""
+
+    def __init__(self, db_path: str, seed: Optional[Dict[str, str]] = None, legacy_file: Optional[str] = None):
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._lock = threading.RLock()
+        self._listeners: List[Callable] = []
+        self.index = GlossaryIndex()  # 원문에 등장하는 용어 검색 (용어가 바뀔 때마다 함께 갱신)
+        self._terms: Dict[str, str] = {}
+        self.version = 0
+        self._data_version = None
+
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS glossary (
+                    en TEXT PRIMARY KEY,
+                    ko TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE TABLE IF NOT EXISTS glossary_meta (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)")
+            created = self._db.execute(
+                "INSERT OR IGNORE INTO glossary_meta (id, version) VALUES (1, 0)"
+            ).rowcount
+            if created:
+                initial = self._load_legacy(legacy_file) or dict(seed or {})
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO glossary (en, ko, updated_at) VALUES (?, ?, ?)",
+                    [(en, ko, now) for en, ko in initial.items()]
+                )
+                if initial:
+                    print(f"📚 용어집 {len(initial)}개를 저장소로 가져옴")
+        self._reload()
+
+    @staticmethod
+    def _load_legacy(path: Optional[str]) -> Dict[str, str]:
+        """이전 버전의 JSON 용어집 (없거나 깨졌으면 빈 dict)"""
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {str(en): str(ko) for en, ko in data.items()} if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _reload(self):
+        """DB에서 전체를 다시 읽어 메모리 사본/색인 교체"""
+        with self._lock:
+            rows = self._db.execute("SELECT en, ko FROM glossary ORDER BY rowid").fetchall()
+            self.version = self._db.execute("SELECT version FROM glossary_meta WHERE id = 1").fetchone()[0]
+            self._data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            terms = dict(rows)
+            for en in self._terms.keys() - terms.keys():
+                self.index.remove(en)
+            for en in terms.keys() - self._terms.keys():
+                self.index.add(en)
+            self._terms = terms
+
+    def _check_external(self):
+        """다른 프로세스가 DB를 바꿨으면 다시 읽음"""
+        with self._lock:
+            data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._reload()
+
+    def terms(self) -> Dict[str, str]:
+        """현재 용어집 (읽기 전용 사본 - 바뀌면 새 dict로 교체되므로 그대로 순회해도 안전)"""
+        self._check_external()
+        return self._terms
+
+    def get(self, en: str) -> Optional[str]:
+        return self.terms().get(en)
+
+    def set(self, en: str, ko: str) -> int:
+        """용어 추가/수정 → 새 버전"""
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO glossary (en, ko, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (en) DO UPDATE SET ko = excluded.ko, updated_at = excluded.updated_at",
+                    (en, ko, time.time())
+                )
+                version = self._bump()
+            action = 'update' if en in self._terms else 'add'
+            self._terms = {**self._terms, en: ko}
+            self.index.add(en)
+        self._notify(version, action, en, ko)
+        return version
+
+    def delete(self, en: str) -> Optional[int]:
+        """용어 삭제 → 새 버전 (없는 용어면 None)"""
+        with self._lock:
+            with self._db:
+                if not self._db.execute("DELETE FROM glossary WHERE en = ?", (en,)).rowcount:
+                    return None
+                version = self._bump()
+            terms = dict(self._terms)
+            terms.pop(en, None)
+            self._terms = terms
+            self.index.remove(en)
+        self._notify(version, 'delete', en, None)
+        return version
+
+    def _bump(self) -> int:
+        """버전 1 증가 (트랜잭션 안에서 호출)"""
+        self._db.execute("UPDATE glossary_meta SET version = version + 1 WHERE id = 1")
+        self.version = self._db.execute("SELECT version FROM glossary_meta WHERE id = 1").fetchone()[0]
+        return self.version
+
+    def subscribe(self, listener: Callable[[int, str, str, Optional[str]], None]):
+        """변경 알림 등록 - listener(version, action, en, ko)"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, version: int, action: str, en: str, ko: Optional[str]):
+        for listener in list(self._listeners):
+            try:
+                listener(version, action, en, ko)
+            except Exception as e:
+                print(f"⚠️  용어집 변경 알림 실패: {e}")
+
+    def __len__(self):
+        return len(self.terms())
+
+
+# db 경로 → 저장소 - 모든 번역기가 공유
+_stores: Dict[str, GlossaryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_glossary_store(db_path: str, seed: Optional[Dict[str, str]] = None,
+                       legacy_file: Optional[str] = None) -> GlossaryStore:
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = GlossaryStore(db_path, seed, legacy_file)
+        return store
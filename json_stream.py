@@ -0,0 +1,79 @@
+"""
+스트리밍 JSON 배열 파서
+응답을 조각 단위로 받으면서, 최상위 배열의 원소가 완성되는 즉시 하나씩 꺼냄
+
+- 문자열 안의 괄호/쉼표/줄바꿈/이스케이프는 구조로 취급하지 않음
+- 배열 앞의 군더더기(```json 등)는 무시
+- 깨진 원소는 건너뛰고 errors에 개수만 기록
+"""
+
+import json
+from typing import Any, List
+
+
+class JsonArrayStream:
+    """최상위 JSON 배열 → 완성된 원소 목록 (feed할 때마다)"""
+
+    def __init__(self):
+        self.errors = 0  # 파싱하지 못한 원소 수
+        self.done = False  # 배열이 닫혔는지
+        self._buf = []  # 현재 원소의 글자
+        self._depth = 0  # 0: 배열 시작 전, 1: 최상위 배열 안
+        self._started = False
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """조각 추가 → 이번에 완성된 원소들"""
+        items = []
+        for ch in chunk or '':
+            if self.done:
+                break
+            if not self._started:
+                if ch == '[':
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._buf.append(ch)
+            elif ch in '{[':
+                self._depth += 1
+                self._buf.append(ch)
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    # 최상위 배열 끝
+                    self._flush(items)
+                    self.done = True
+                    continue
+                self._buf.append(ch)
+                if self._depth == 1:
+                    self._flush(items)
+            elif ch == ',' and self._depth == 1:
+                self._flush(items)
+            else:
+                self._buf.append(ch)
+        return items
+
+    def _flush(self, items: List[Any]):
+        text = ''.join(self._buf).strip()
+        self._buf = []
+        if not text:
+            return
+        try:
+            items.append(json.loads(text))
+        except ValueError:
+            self.errors += 1
+
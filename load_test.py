@@ -0,0 +1,189 @@
+"""
+부하 테스트 - 작업자 N명이 동시에 검토하는 상황 흉내
+실행 중인 서버에 작업자마다 세션을 만들고 브라우저처럼 요청해서 초당 요청 수와 지연 시간(p50/p95/p99)을 측정
+
+- 작업자 하나: /api/session → /api/start → (/api/window → 항목마다 /api/save 또는 건너뛰기) 반복
+- 브라우저처럼 이벤트 스트림(/api/events)도 열어 둠 (서버 스레드를 하나씩 차지) - --no-events로 끔
+- 번역이 아직 도착하지 않은 항목은 잠시 뒤 창을 다시 받음 (브라우저는 'translation' 이벤트를 기다림)
+
+사용 (모의 서버로):
+    python mock_servers.py --strings 2000 --gemini-latency 1
+    python web_translator.py --mode waitress --no-browser   (paratranz/gemini base_url을 모의 서버로)
+    python load_test.py --reviewers 20 --duration 60
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import requests
+
+DEFAULT_URL = 'http://127.0.0.1:5000'
+
+
+class Stats:
+    """엔드포인트별 지연 시간 / 오류 수집"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.saved = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def count(self, saved: int = 0, skipped: int = 0):
+        with self._lock:
+            self.saved += saved
+            self.skipped += skipped
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class Reviewer(threading.Thread):
+    """작업자 한 명 (세션 하나)"""
+
+    def __init__(self, n: int, args, stats: Stats, deadline: float):
+        super().__init__(daemon=True, name=f'reviewer-{n}')
+        self.args = args
+        self.stats = stats
+        self.deadline = deadline
+        self.http = requests.Session()
+        # 작업자마다 자기 API 키 (Gemini 분당 한도는 키마다 따로)
+        self.http.headers.update({
+            'X-Paratranz-Key': f"{args.paratranz_key}-{n}",
+            'X-Gemini-Key': f"{args.gemini_key}-{n}",
+            'X-Gemini-Model': args.model
+        })
+        self.done = threading.Event()
+
+    def call(self, method: str, endpoint: str, **kwargs):
+        """요청 하나 (지연 시간 기록) → JSON (실패하면 None)"""
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.args.url + endpoint, timeout=self.args.timeout, **kwargs)
+            data = response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            data = None
+        ok = data is not None and (data.get('success', True) or data.get('out_of_sync'))
+        self.stats.record(endpoint.split('?')[0], time.perf_counter() - started, bool(ok))
+        return data
+
+    def listen(self, session_id: str):
+        """이벤트 스트림 연결 유지 (내용은 읽고 버림)"""
+        try:
+            with requests.get(f"{self.args.url}/api/events", params={'session_id': session_id},
+                              stream=True, timeout=self.args.timeout) as response:
+                for _ in response.iter_lines():
+                    if self.done.is_set():
+                        break
+        except requests.RequestException:
+            pass
+
+    def run(self):
+        try:
+            session = self.call('GET', '/api/session')
+            if not session:
+                return
+            self.http.headers['X-Session-ID'] = session['session_id']
+            if not self.args.no_events:
+                threading.Thread(target=self.listen, args=(session['session_id'],), daemon=True).start()
+
+            if not self.call('POST', '/api/start', json={'file_id': self.args.file_id, 'stage': self.args.stage}):
+                return
+            while time.time() < self.deadline:
+                window = self.call('GET', '/api/window')
+                if not window or window.get('completed') or 'items' not in window:
+                    if window and window.get('completed'):
+                        return
+                    time.sleep(0.5)
+                    continue
+                self.review(window['items'])
+        finally:
+            self.done.set()
+
+    def review(self, items: list):
+        """창의 항목을 차례로 처리 (번역 도착 전 항목을 만나면 반환 → 창 다시 받기)"""
+        for item in items:
+            if time.time() >= self.deadline:
+                return
+            if item['pending']:
+                time.sleep(0.2)
+                return
+            time.sleep(random.uniform(0, 2 * self.args.think))  # 읽고 고르는 시간
+            if random.random() < self.args.skip_rate:
+                result = self.call('POST', '/api/select', json={'choice': 5, 'id': item['id'], 'queue': True})
+                self.stats.count(skipped=1 if result and result.get('success') else 0)
+            else:
+                result = self.call('POST', '/api/save', json={
+                    'translation': item['translations'][0], 'save_type': 1, 'id': item['id'], 'queue': True
+                })
+                self.stats.count(saved=1 if result and result.get('success') else 0)
+            if not result or not result.get('success'):
+                return
+
+
+def report(stats: Stats, elapsed: float, reviewers: int):
+    total = sum(len(v) for v in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    every = [t for values in stats.latencies.values() for t in values]
+    print()
+    print("=" * 72)
+    print(f"📊 작업자 {reviewers}명, {elapsed:.1f}초")
+    print("=" * 72)
+    print(f"{'엔드포인트':<20}{'요청':>8}{'초당':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'오류':>7}")
+    for endpoint in sorted(stats.latencies):
+        values = stats.latencies[endpoint]
+        print(f"{endpoint:<20}{len(values):>8}{len(values) / elapsed:>9.1f}"
+              f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 95) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}{stats.errors.get(endpoint, 0):>7}")
+    print("-" * 72)
+    print(f"{'전체':<20}{total:>8}{total / elapsed:>9.1f}"
+          f"{percentile(every, 50) * 1000:>10.1f}{percentile(every, 95) * 1000:>10.1f}"
+          f"{percentile(every, 99) * 1000:>10.1f}{errors:>7}")
+    print(f"💾 저장 {stats.saved}개, 건너뛰기 {stats.skipped}개")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='웹 번역기 부하 테스트')
+    parser.add_argument('--url', default=DEFAULT_URL)
+    parser.add_argument('--reviewers', type=int, default=10, help='동시 작업자 수')
+    parser.add_argument('--duration', type=float, default=30, help='측정 시간 (초)')
+    parser.add_argument('--think', type=float, default=0.2, help='항목당 평균 고민 시간 (초)')
+    parser.add_argument('--skip-rate', type=float, default=0.1, help='건너뛰는 항목 비율')
+    parser.add_argument('--file-id', type=int, default=1)
+    parser.add_argument('--stage', type=int, default=0)
+    parser.add_argument('--paratranz-key', default='load-test')
+    parser.add_argument('--gemini-key', default='load-test')
+    parser.add_argument('--model', default='gemini-2.5-flash-lite')
+    parser.add_argument('--timeout', type=float, default=60, help='요청 시간 제한 (초)')
+    parser.add_argument('--no-events', action='store_true', help='이벤트 스트림을 열지 않음')
+    args = parser.parse_args()
+
+    stats = Stats()
+    started = time.time()
+    deadline = started + args.duration
+    reviewers = [Reviewer(n, args, stats, deadline) for n in range(args.reviewers)]
+    print(f"🚀 작업자 {args.reviewers}명으로 {args.duration:.0f}초 동안 부하 테스트: {args.url}")
+    for reviewer in reviewers:
+        reviewer.start()
+    for reviewer in reviewers:
+        reviewer.join()
+    report(stats, time.time() - started, args.reviewers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+잠금 관리자 벤치마크 - 항목 N개(기본 10만)를 잠그고/연장하고/만료시키고/해제하는 시간 측정
+서버 없이 잠금 백엔드(memory/sqlite/redis)만 직접 호출
+
+- 동시 잠금: 스레드 여러 개가 서로 다른 배치를 잠금 (옛 방식 - 전역 dict에 항목마다 잠금 - 과 비교)
+- 한 번에 N개 잠금, 이미 잠긴 항목에 다른 세션이 시도, 전부 연장
+- 전부 만료된 뒤 다음 호출 (만료 정리 포함), 세션 종료 시 전부 해제, owner() 조회
+
+사용:
+    python lock_benchmark.py                                # memory, 10만 개
+    python lock_benchmark.py --backend sqlite --ids 20000
+    python lock_benchmark.py --backend redis --redis-url fakeredis:// --ids 2000
+    (fakeredis는 Lua 스크립트가 돌려주는 큰 목록을 변환하는 데 항목 수의 제곱만큼 걸림 → 수치는 실제 Redis로)
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Callable, List
+
+from coordination import BACKENDS, DEFAULT_REDIS_URL, create_lock_manager
+
+
+class LegacyLocks:
+    """옛 잠금 (전역 dict + 잠금 하나, 항목마다 임계 구역, 만료는 다시 건드릴 때만) - 비교용"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.locked = {}
+        self.mutex = threading.Lock()
+
+    def lock(self, string_id, session_id: str) -> bool:
+        with self.mutex:
+            now = time.time()
+            info = self.locked.get(string_id)
+            if info is not None and now - info['locked_at'] <= self.timeout:
+                if info['user'] != session_id:
+                    return False
+            self.locked[string_id] = {'user': session_id, 'locked_at': now}
+            return True
+
+
+def timed(label: str, fn: Callable[[], object], results: List[tuple]):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    results.append((label, elapsed))
+    print(f"   {label:<44} {elapsed * 1000:10.1f} ms")
+    return elapsed
+
+
+def run_threads(count: int, target: Callable[[int], None]):
+    threads = [threading.Thread(target=target, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def batches(ids: list, size: int) -> List[list]:
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='잠금 관리자 벤치마크')
+    parser.add_argument('--backend', choices=BACKENDS, default='memory')
+    parser.add_argument('--ids', type=int, default=100_000, help='항목 수')
+    parser.add_argument('--threads', type=int, default=64, help='동시 잠금 스레드 수')
+    parser.add_argument('--batch', type=int, default=50, help='배치 크기')
+    parser.add_argument('--lookups', type=int, default=10_000, help='owner() 조회 횟수')
+    parser.add_argument('--redis-url', default=DEFAULT_REDIS_URL, help='redis 백엔드 주소 (fakeredis://는 프로세스 안)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='lock-bench-')
+
+    def new_manager(timeout: float = 300):
+        # 측정마다 빈 잠금 저장소 (sqlite는 새 파일, redis는 새 접두사)
+        settings = {
+            'backend': args.backend,
+            'db_file': os.path.join(workdir, f'{uuid.uuid4().hex}.db'),
+            'redis_url': args.redis_url,
+            'prefix': f'lock-bench:{uuid.uuid4().hex}'
+        }
+        return create_lock_manager(settings, timeout)
+
+    ids = list(range(args.ids))
+    chunks = batches(ids, args.batch)
+    results = []
+    print(f"🔒 잠금 벤치마크: {args.backend}, 항목 {args.ids:,}개, 스레드 {args.threads}개, 배치 {args.batch}개")
+
+    # 1) 동시 잠금 - 스레드마다 서로 다른 배치
+    legacy = LegacyLocks(300)
+
+    def legacy_worker(n):
+        for chunk in chunks[n::args.threads]:
+            for string_id in chunk:
+                legacy.lock(string_id, f'session-{n}')
+
+    timed(f"옛 방식: 항목마다 잠금 ({args.threads}스레드)", lambda: run_threads(args.threads, legacy_worker), results)
+
+    manager = new_manager()
+
+    def worker(n):
+        for chunk in chunks[n::args.threads]:
+            manager.acquire(chunk, f'session-{n}')
+
+    timed(f"배치 잠금 ({args.threads}스레드 × 배치 {args.batch})", lambda: run_threads(args.threads, worker), results)
+    assert len(manager) == args.ids
+
+    # 2) 다른 세션이 이미 잠긴 항목을 시도 (모두 실패해야 함)
+    def foreign():
+        for chunk in chunks[:args.threads]:
+            assert manager.acquire(chunk, 'intruder') == []
+
+    timed(f"잠긴 항목에 다른 세션 시도 ({args.threads}배치)", foreign, results)
+
+    # 3) owner() 조회
+    step = max(1, args.ids // args.lookups)
+    probe = ids[::step][:args.lookups]
+    elapsed = timed(f"owner() 조회 {len(probe):,}번", lambda: [manager.owner(i) for i in probe], results)
+    print(f"   {'':<44} {elapsed / max(1, len(probe)) * 1e6:10.1f} us/회")
+
+    # 4) 한 세션이 한 번에 전부 잠금 → 전부 연장 → 세션 종료 시 전부 해제
+    single = new_manager()
+    timed(f"한 번에 {args.ids:,}개 잠금", lambda: single.acquire(ids, 'solo'), results)
+    timed(f"{args.ids:,}개 전부 연장", lambda: single.renew('solo'), results)
+    timed(f"세션 종료 ({args.ids:,}개 해제)", lambda: single.release(single.held('solo'), 'solo'), results)
+    assert len(single) == 0
+
+    # 5) 전부 만료된 뒤 다음 호출 (만료 정리 포함)
+    expiring = new_manager(timeout=1)
+    expiring.acquire(ids, 'gone')
+    time.sleep(1.1)
+    expiring.timeout = 300  # 새로 잡는 잠금은 측정 도중 만료되지 않게
+    timed(f"{args.ids:,}개 만료 후 다음 잠금 호출", lambda: expiring.acquire([0], 'next'), results)
+    assert len(expiring) == 1
+
+    print(f"\n✅ 완료 (총 {sum(elapsed for _, elapsed in results):.2f}초)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+문자열 잠금 관리자
+전역 dict + 잠금 하나로 관리하던 잠금은 만료된 항목이 누가 다시 건드릴 때까지 남아 계속 쌓이고,
+배치를 모을 때 항목마다 잠금을 따로 잡음 → 만료 힙 + 여러 항목 한 번에 처리
+
+- 잠금(임대)은 timeout초 뒤 만료, 같은 세션이 다시 잡거나 renew()하면 연장
+- 만료 시각 최소 힙으로 만료된 잠금을 O(log n)에 정리 (모든 호출 시작 시 만료분만 꺼냄)
+- acquire()/release()/renew()는 항목 여러 개를 한 번의 임계 구역에서 처리
+- 세션별 보유 목록 → 세션 종료 시 O(보유 수)로 전부 해제
+- 변경 알림: on_change(ids, locked, total) - 만료로 풀린 항목도 알림 (잠금 밖에서 호출)
+"""
+
+import heapq
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_LOCK_TIMEOUT = 300  # 잠금 유지 시간 (초)
+HEAP_SLACK = 1024  # 연장으로 남은 옛 힙 항목이 이만큼 + 잠금 수보다 많아지면 힙 재구성
+
+
+class LockManager:
+    """항목 ID → (세션, 만료 시각) 임대 잠금"""
+
+    def __init__(self, timeout: float = DEFAULT_LOCK_TIMEOUT,
+                 on_change: Optional[Callable[[List, bool, int], None]] = None):
+        self.timeout = timeout
+        self.on_change = on_change
+        self._owners: Dict[object, Tuple[str, float]] = {}  # 항목 ID → (세션, 만료 시각)
+        self._sessions: Dict[str, Set] = {}  # 세션 → 보유 항목 ID
+        self._heap: List[Tuple[float, object]] = []  # (만료 시각, 항목 ID) - 연장 전 항목은 꺼낼 때 무시
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            expired = self._expire(time.time())
+            total = len(self._owners)
+        self._publish(expired, False, total)
+        return total
+
+    def _expire(self, now: float) -> List:
+        """만료된 잠금 정리 → 풀린 항목 ID (_lock 보유 상태에서 호출)"""
+        expired = []
+        heap, owners = self._heap, self._owners
+        while heap and heap[0][0] <= now:
+            expires, string_id = heapq.heappop(heap)
+            owner = owners.get(string_id)
+            if owner is None or owner[1] != expires:
+                continue  # 이미 해제됐거나 연장된 잠금의 옛 항목
+            del owners[string_id]
+            self._forget(owner[0], string_id)
+            expired.append(string_id)
+        return expired
+
+    def _forget(self, session_id: str, string_id):
+        held = self._sessions.get(session_id)
+        if held is not None:
+            held.discard(string_id)
+            if not held:
+                del self._sessions[session_id]
+
+    def _grant(self, string_id, session_id: str, expires: float):
+        """잠금 등록/연장 (_lock 보유 상태에서 호출)"""
+        self._owners[string_id] = (session_id, expires)
+        self._sessions.setdefault(session_id, set()).add(string_id)
+        heapq.heappush(self._heap, (expires, string_id))
+
+    def _compact(self):
+        """연장으로 쌓인 옛 힙 항목 정리 (_lock 보유 상태에서 호출)"""
+        if len(self._heap) > 2 * len(self._owners) + HEAP_SLACK:
+            self._heap = [(expires, string_id) for string_id, (_, expires) in self._owners.items()]
+            heapq.heapify(self._heap)
+
+    def acquire(self, ids: Iterable, session_id: str) -> List:
+        """여러 항목 잠금 시도 → 잠근 항목 ID (이미 이 세션이 잡고 있던 항목은 연장)"""
+        now = time.time()
+        expires = now + self.timeout
+        acquired, added = [], []
+        with self._lock:
+            expired = self._expire(now)
+            for string_id in ids:
+                owner = self._owners.get(string_id)
+                if owner is not None and owner[0] != session_id:
+                    continue  # 다른 사용자가 작업 중
+                self._grant(string_id, session_id, expires)
+                acquired.append(string_id)
+                if owner is None:
+                    added.append(string_id)
+            self._compact()
+            total = len(self._owners)
+        self._publish(expired, False, total)
+        self._publish(added, True, total)
+        return acquired
+
+    def release(self, ids: Iterable, session_id: str) -> List:
+        """여러 항목 잠금 해제 (본인 것만) → 해제한 항목 ID"""
+        released = []
+        with self._lock:
+            expired = self._expire(time.time())
+            for string_id in ids:
+                owner = self._owners.get(string_id)
+                if owner is None or owner[0] != session_id:
+                    continue
+                del self._owners[string_id]
+                self._forget(session_id, string_id)
+                released.append(string_id)
+            total = len(self._owners)
+        self._publish(expired + released, False, total)
+        return released
+
+    def release_session(self, session_id: str) -> List:
+        """세션이 잡고 있는 잠금 전부 해제"""
+        return self.release(self.held(session_id), session_id)
+
+    def renew(self, session_id: str, ids: Optional[Iterable] = None) -> int:
+        """활동 중인 세션의 잠금 연장 (ids가 없으면 보유한 전부) → 연장한 수"""
+        now = time.time()
+        expires = now + self.timeout
+        renewed = 0
+        with self._lock:
+            expired = self._expire(now)
+            targets = list(self._sessions.get(session_id, ())) if ids is None else ids
+            for string_id in targets:
+                owner = self._owners.get(string_id)
+                if owner is not None and owner[0] == session_id:
+                    self._grant(string_id, session_id, expires)
+                    renewed += 1
+            self._compact()
+            total = len(self._owners)
+        self._publish(expired, False, total)
+        return renewed
+
+    def owner(self, string_id) -> Optional[str]:
+        """누가 잠금했는지 (없거나 만료됐으면 None)"""
+        with self._lock:
+            expired = self._expire(time.time())
+            owner = self._owners.get(string_id)
+            total = len(self._owners)
+        self._publish(expired, False, total)
+        return owner[0] if owner else None
+
+    def held(self, session_id: str) -> Set:
+        """세션이 잡고 있는 항목 ID"""
+        with self._lock:
+            return set(self._sessions.get(session_id, ()))
+
+    def _publish(self, ids: List, locked: bool, total: int):
+        if ids and self.on_change:
+            try:
+                self.on_change(ids, locked, total)
+            except Exception as e:
+                print(f"⚠️  잠금 변경 알림 실패: {e}")
@@ -0,0 +1,302 @@
+"""
+Paratranz / Gemini 모의 서버 (부하 테스트/클라이언트 검증용)
+실제 API 키와 할당량 없이 서버 전체 흐름을 돌려보기 위해, 번역기가 쓰는 엔드포인트만 흉내 냄
+
+- Paratranz: 파일 목록, 문자열 페이지 (file/stage/page/pageSize), 번역 저장 (PUT)
+  - 저장하면 문자열의 stage가 바뀌어 stage 필터 목록에서 빠짐
+- Gemini: generateContent / streamGenerateContent(SSE), cachedContents
+  - 프롬프트의 JSON 원문 목록을 읽어 id마다 t1/t2 번역을 돌려줌 (JSON 배치 형식만)
+- latency: 요청마다 응답 전 대기 (초) - 느린 외부 API 흉내 (Gemini 스트리밍은 조각마다 나눠서 대기)
+- GET /_stats: 엔드포인트별 요청 수
+
+사용: python mock_servers.py --strings 2000 --gemini-latency 2
+     → translator_config.json의 paratranz.base_url / gemini.base_url을 출력된 주소로
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PARATRANZ_PORT = 5101
+DEFAULT_GEMINI_PORT = 5102
+STREAM_CHUNK = 200  # 스트리밍 응답 조각 크기 (문자)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """요청을 모의 서버 객체(server.mock)로 넘김"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+    def send_json(self, status: int, data):
+        out = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def do_GET(self):
+        self.server.mock.handle(self, 'GET', None)
+
+    def do_POST(self):
+        self.server.mock.handle(self, 'POST', self._body())
+
+    def do_PUT(self):
+        self.server.mock.handle(self, 'PUT', self._body())
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # 부하 테스트 중 연결이 몰려도 거절하지 않도록
+
+
+class MockServer:
+    """모의 서버 공통 (스레드 HTTP 서버 + 요청 수 집계)"""
+
+    def __init__(self, port: int, latency: float = 0.0, host: str = '127.0.0.1'):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._server: Optional[_HTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        raise NotImplementedError
+
+    def start(self) -> 'MockServer':
+        self._server = _HTTPServer((self.host, self.port), _Handler)
+        self._server.mock = self
+        self.port = self._server.server_address[1]  # port=0이면 빈 포트
+        threading.Thread(target=self._server.serve_forever, daemon=True, name=type(self).__name__).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def count(self, endpoint: str):
+        with self._stats_lock:
+            self.stats[endpoint] += 1
+
+    def handle(self, handler: _Handler, method: str, body: Optional[dict]):
+        path = urlparse(handler.path).path
+        if method == 'GET' and path == '/_stats':
+            with self._stats_lock:
+                handler.send_json(200, dict(self.stats))
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        self.route(handler, method, path, body)
+
+    def route(self, handler: _Handler, method: str, path: str, body: Optional[dict]):
+        raise NotImplementedError
+
+
+class MockParatranz(MockServer):
+    """Paratranz API 모의 서버 (프로젝트 하나, 메모리에 문자열 보관)"""
+
+    def __init__(self, port: int = DEFAULT_PARATRANZ_PORT, files: int = 1, strings: int = 1000,
+                 latency: float = 0.0, host: str = '127.0.0.1'):
+        super().__init__(port, latency, host)
+        self.files: List[dict] = []
+        self.strings: Dict[int, dict] = {}
+        self.saves: List[tuple] = []  # (문자열 ID, 번역, stage) 저장 순서
+        self._lock = threading.Lock()
+        string_id = 1
+        for file_id in range(1, files + 1):
+            self.files.append({'id': file_id, 'name': f'mock/file_{file_id}.json', 'total': strings, 'translated': 0,
+                               'modifiedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())})
+            for n in range(strings):
+                self.strings[string_id] = {
+                    'id': string_id, 'file': file_id, 'key': f'line_{n}',
+                    'original': f'Mock line {n} of file {file_id}: press Brake to stop.',
+                    'translation': '', 'stage': 0, 'context': ''
+                }
+                string_id += 1
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}/api'
+
+    def route(self, handler: _Handler, method: str, path: str, body: Optional[dict]):
+        match = re.fullmatch(r'/api/projects/\d+/(files|strings)(?:/(\d+))?', path)
+        if not match:
+            handler.send_json(404, {'message': 'not found'})
+            return
+        resource, string_id = match.groups()
+        if resource == 'files' and method == 'GET':
+            self.count('files')
+            with self._lock:
+                handler.send_json(200, list(self.files))
+        elif resource == 'strings' and string_id is None and method == 'GET':
+            self.count('strings')
+            handler.send_json(200, self.page(parse_qs(urlparse(handler.path).query)))
+        elif resource == 'strings' and string_id is not None and method == 'PUT':
+            self.count('save')
+            saved = self.save(int(string_id), body or {})
+            handler.send_json(200 if saved else 404, saved or {'message': 'string not found'})
+        else:
+            handler.send_json(405, {'message': 'method not allowed'})
+
+    def page(self, query: dict) -> dict:
+        file_id = int(query.get('file', ['0'])[0])
+        stage = int(query['stage'][0]) if 'stage' in query else None
+        page = max(1, int(query.get('page', ['1'])[0]))
+        page_size = max(1, int(query.get('pageSize', ['50'])[0]))
+        with self._lock:
+            rows = [dict(s) for s in self.strings.values()
+                    if s['file'] == file_id and (stage is None or s['stage'] == stage)]
+        start = (page - 1) * page_size
+        return {
+            'results': rows[start:start + page_size],
+            'page': page,
+            'pageSize': page_size,
+            'rowCount': len(rows),
+            'pageCount': (len(rows) + page_size - 1) // page_size
+        }
+
+    def save(self, string_id: int, body: dict) -> Optional[dict]:
+        with self._lock:
+            string_data = self.strings.get(string_id)
+            if string_data is None:
+                return None
+            string_data['translation'] = body.get('translation', string_data['translation'])
+            string_data['stage'] = body.get('stage', 1)
+            self.saves.append((string_id, string_data['translation'], string_data['stage']))
+            return dict(string_data)
+
+
+class MockGemini(MockServer):
+    """Gemini API 모의 서버 (JSON 배치 프롬프트에 t1/t2 번역 배열로 답함)"""
+
+    def __init__(self, port: int = DEFAULT_GEMINI_PORT, latency: float = 0.0, host: str = '127.0.0.1'):
+        super().__init__(port, latency, host)
+        self.caches = 0
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}/v1beta'
+
+    def handle(self, handler: _Handler, method: str, body: Optional[dict]):
+        # 스트리밍은 조각마다 나눠서 대기하므로 공통 대기는 건너뜀
+        if urlparse(handler.path).path.endswith(':streamGenerateContent'):
+            self.route(handler, method, urlparse(handler.path).path, body)
+            return
+        super().handle(handler, method, body)
+
+    def route(self, handler: _Handler, method: str, path: str, body: Optional[dict]):
+        if method != 'POST':
+            handler.send_json(405, {'error': {'code': 405, 'message': 'method not allowed'}})
+        elif not handler.headers.get('x-goog-api-key'):
+            handler.send_json(403, {'error': {'code': 403, 'message': 'API key missing'}})
+        elif path == '/v1beta/cachedContents':
+            self.count('cachedContents')
+            self.caches += 1
+            handler.send_json(200, {'name': f'cachedContents/mock{self.caches}'})
+        elif re.fullmatch(r'/v1beta/models/[^/:]+:generateContent', path):
+            self.count('generateContent')
+            text = self.answer(body)
+            handler.send_json(200, self._response(text, len(text)))
+        elif re.fullmatch(r'/v1beta/models/[^/:]+:streamGenerateContent', path):
+            self.count('streamGenerateContent')
+            self._stream(handler, self.answer(body))
+        else:
+            handler.send_json(404, {'error': {'code': 404, 'message': 'not found'}})
+
+    @staticmethod
+    def _prompt(body: dict) -> str:
+        return ''.join(part.get('text', '') for content in body.get('contents', [])
+                       for part in content.get('parts', []))
+
+    def answer(self, body: dict) -> str:
+        """프롬프트의 원문 목록 → 응답 JSON 배열 문자열"""
+        items = []
+        for line in self._prompt(body).splitlines():
+            line = line.strip().rstrip(',')
+            if line.startswith('{"id"'):
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    pass
+        return json.dumps([
+            {'id': item['id'], 't1': f"[번역1] {item.get('text', '')}", 't2': f"[번역2] {item.get('text', '')}"}
+            for item in items
+        ], ensure_ascii=False)
+
+    @staticmethod
+    def _response(text: str, output_chars: Optional[int] = None) -> dict:
+        """응답 (조각) - output_chars를 주면 마지막 조각 (종료 사유 + 사용량)"""
+        candidate = {'content': {'role': 'model', 'parts': [{'text': text}]}}
+        data = {'candidates': [candidate]}
+        if output_chars is not None:
+            candidate['finishReason'] = 'STOP'
+            data['usageMetadata'] = {
+                'promptTokenCount': 100, 'candidatesTokenCount': output_chars // 3,
+                'totalTokenCount': 100 + output_chars // 3
+            }
+        return data
+
+    def _stream(self, handler: _Handler, text: str):
+        chunks = [text[i:i + STREAM_CHUNK] for i in range(0, len(text), STREAM_CHUNK)] or ['']
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+        handler.close_connection = True
+        for i, chunk in enumerate(chunks):
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            data = self._response(chunk, len(text) if i == len(chunks) - 1 else None)
+            handler.wfile.write(f"data: {json.dumps(data, ensure_ascii=False)}\r\n\r\n".encode('utf-8'))
+            handler.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Paratranz / Gemini 모의 서버')
+    parser.add_argument('--paratranz-port', type=int, default=DEFAULT_PARATRANZ_PORT)
+    parser.add_argument('--gemini-port', type=int, default=DEFAULT_GEMINI_PORT)
+    parser.add_argument('--files', type=int, default=1, help='파일 수')
+    parser.add_argument('--strings', type=int, default=1000, help='파일당 문자열 수')
+    parser.add_argument('--paratranz-latency', type=float, default=0.05, help='Paratranz 응답 지연 (초)')
+    parser.add_argument('--gemini-latency', type=float, default=1.0, help='Gemini 응답 지연 (초)')
+    args = parser.parse_args()
+
+    paratranz = MockParatranz(args.paratranz_port, args.files, args.strings, args.paratranz_latency).start()
+    gemini = MockGemini(args.gemini_port, args.gemini_latency).start()
+
+    print("=" * 60)
+    print("🧪 모의 서버 실행 중")
+    print("=" * 60)
+    print(f"   Paratranz: {paratranz.base_url} (파일 {args.files}개 × 문자열 {args.strings}개)")
+    print(f"   Gemini:    {gemini.base_url}")
+    print()
+    print("translator_config.json:")
+    print(f'   "paratranz": {{"base_url": "{paratranz.base_url}", ...}}')
+    print(f'   "gemini": {{"base_url": "{gemini.base_url}", ...}}')
+    print("⏹️  종료: Ctrl+C")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        paratranz.stop()
+        gemini.stop()
+
+
+if __name__ == '__main__':
+    main()
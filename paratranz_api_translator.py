@@ -9,16 +9,31 @@ Paratranz API 자동 번역 도구 (완전 자동화, 브라우저 불필요)
 5. 다음 항목 자동 로드
 
 사용 전 준비:
-1. pip install requests google-generativeai
+1. pip install requests
 2. translator_config.json 파일 수정 (API 키 입력)
 """
 
+import asyncio
 import json
 import os
 import sys
+import threading
 import requests
-import google.generativeai as genai
-from typing import Optional, List, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import deque
+from typing import Optional, List, Dict, Tuple
+
+from async_clients import (DEFAULT_GEMINI_CONCURRENCY, DEFAULT_PARATRANZ_CONCURRENCY, AsyncGeminiClient,
+                           AsyncParatranzClient, strings_page)
+from batch_parser import BatchResponseParser
+from gemini_client import DEFAULT_BASE_URL as GEMINI_DEFAULT_BASE_URL, QuotaExceeded, get_client
+from glossary_index import GlossaryIndex
+from glossary_store import GlossaryStore, get_glossary_store
+from gemini_dispatcher import DEFAULT_CONTEXT_TTL, DEFAULT_MAX_WAIT, GeminiDispatcher, split_keys
+from rate_limiter import DEFAULT_BURST
+from coordination import create_usage_ledger
+from token_budget import TokenBudget
 
 # ===== UTF-8 인코딩 설정 (이모지 표시용) =====
 if sys.platform == 'win32':
@@ -82,13 +97,52 @@ PARATRANZ_API_KEY = config['paratranz'].get('api_key', None)  # 웹에서 입력
 PROJECT_ID = config['paratranz']['project_id']
 
 # Gemini 설정
-GEMINI_API_KEY = config['gemini'].get('api_key', None)  # 웹에서 입력받음
+GEMINI_API_KEY = config['gemini'].get('api_key', None)  # 웹에서 입력받음 (쉼표로 여러 개 가능)
 MODEL_NAME = config['gemini']['model']
+GEMINI_FALLBACK_MODELS = config['gemini'].get('fallback_models', [])  # 기본 모델의 모든 키가 막히면 사용할 모델 (순서대로)
+GEMINI_LIMITS = config['gemini'].get('limits', {})  # 모델별 한도 덮어쓰기 {"모델": {"rpm", "rpd", "tpm"}}
+GEMINI_BASE_URL = config['gemini'].get('base_url', GEMINI_DEFAULT_BASE_URL)
+GEMINI_TIMEOUT = (config['gemini'].get('connect_timeout', 5), config['gemini'].get('read_timeout', 120))
+GEMINI_RATE_BURST = config['gemini'].get('rate_burst', DEFAULT_BURST)  # 분당 한도 중 한꺼번에 보낼 수 있는 비율
+GEMINI_MAX_WAIT = config['gemini'].get('max_wait', DEFAULT_MAX_WAIT)  # 한도 대기가 이보다 길면 배치 실패 처리 (초)
+GEMINI_CONTEXT_CACHE = config['gemini'].get('context_cache', False)  # 고정 지침을 서버 캐시(cachedContents)로 재사용
+GEMINI_CONTEXT_TTL = config['gemini'].get('context_cache_ttl', DEFAULT_CONTEXT_TTL)
+USAGE_DB = config.get('usage_ledger', {}).get('db_file', 'paratranz_usage.db')  # 키/모델/날짜별 사용량 장부
+COORDINATION = config.get('coordination', {})  # 여러 서버 프로세스가 공유하는 잠금/사용량 저장 위치
 
 # 번역 설정
 SOURCE_LANG = config['translation']['source_lang']
 TARGET_LANG = config['translation']['target_lang']
 BATCH_SIZE = config['translation'].get('batch_size', 20)
+PREFETCH_DEPTH = config['translation'].get('prefetch_batches', 2)  # 미리 번역해 둘 배치 수
+PREFETCH_WORKERS = config['translation'].get('prefetch_workers', 4)  # 동시 배치 번역 스레드 수
+
+# 배치 크기 자동 조정 (토큰 예산에 맞춰 채움, false면 batch_size 고정)
+ADAPTIVE_BATCH = config['translation'].get('adaptive_batch', True)
+MAX_BATCH_SIZE = config['translation'].get('max_batch_size', 60)
+BATCH_PROMPT_TOKENS = config['translation'].get('batch_prompt_tokens', 8000)  # 배치당 입력 토큰 목표
+BATCH_OUTPUT_TOKENS = config['translation'].get('batch_output_tokens', 4000)  # 배치당 출력 토큰 목표
+RETRY_UNPARSED_ROUNDS = config['translation'].get('retry_unparsed_rounds', 1)  # 파싱 실패 항목 재요청 횟수
+
+# 배치 응답 형식: json(응답 스키마로 id별 객체) / lines(기존 "1-1: 번역" 줄 형식)
+OUTPUT_FORMAT = config['translation'].get('output_format', 'json')
+BATCH_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            "t1": {"type": "string"},
+            "t2": {"type": "string"}
+        },
+        "required": ["id", "t1", "t2"]
+    }
+}
+STREAM_RESPONSES = config['translation'].get('stream_responses', True)  # 응답을 받는 대로 항목 단위로 전달
+JSON_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": BATCH_RESPONSE_SCHEMA
+}
 
 TRANSLATION_STYLE = {
     "game_genre": config['translation']['game_genre'],
@@ -97,24 +151,257 @@ TRANSLATION_STYLE = {
     "target_audience": config['translation']['target_audience'],
 }
 
-# 용어집 파일
+# 용어집 저장소 (이전 버전의 JSON 파일은 처음 한 번 가져옴)
 GLOSSARY_FILE = "paratranz_glossary.json"
+GLOSSARY_DB = config.get('glossary_store', {}).get('db_file', 'paratranz_glossary.db')
 
 # 기본 용어집 (config에서 로드)
 DEFAULT_GLOSSARY = config.get('glossary', {})
+# 용어집이 이보다 크면 프롬프트에 원문에 등장하는 용어만 넣음 (작으면 전체를 고정 지침에 넣어 캐시)
+GLOSSARY_INLINE_MAX = config['translation'].get('glossary_inline_max', 50)
+
+# Paratranz API 베이스 URL (테스트용 로컬 스텁 서버로 바꿀 수 있음)
+PARATRANZ_BASE_URL = config['paratranz'].get('base_url', "https://paratranz.cn/api")
+
+# 문자열 목록 다운로드 설정
+STRINGS_PAGE_SIZE = config['paratranz'].get('page_size', 500)  # 페이지당 문자열 수
+FETCH_WORKERS = config['paratranz'].get('fetch_workers', 4)  # 동시에 내려받을 페이지 수
+
+# HTTP 연결 설정 (keep-alive 연결 풀 + 타임아웃 + 재시도)
+HTTP_CONFIG = config.get('http', {})
+HTTP_POOL_SIZE = HTTP_CONFIG.get('pool_size', 10)
+HTTP_TIMEOUT = (HTTP_CONFIG.get('connect_timeout', 5), HTTP_CONFIG.get('read_timeout', 30))
+HTTP_RETRIES = HTTP_CONFIG.get('retries', 3)
+HTTP_BACKOFF = HTTP_CONFIG.get('backoff_factor', 0.5)  # 0.5초, 1초, 2초... 간격으로 재시도
+
+# 비동기 I/O (*_async 메서드) 동시 요청 수
+ASYNC_CONFIG = config.get('async_io', {})
+ASYNC_PARATRANZ_CONCURRENCY = ASYNC_CONFIG.get('paratranz_concurrency', DEFAULT_PARATRANZ_CONCURRENCY)
+ASYNC_GEMINI_CONCURRENCY = ASYNC_CONFIG.get('gemini_concurrency', DEFAULT_GEMINI_CONCURRENCY)
+
+# API 키별 공유 HTTP 세션
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+
+def get_http_session(api_key: str) -> requests.Session:
+    """API 키별 공유 HTTP 세션 (TCP/TLS 연결 재사용, 5xx/429 자동 재시도)"""
+    with _http_sessions_lock:
+        session = _http_sessions.get(api_key)
+        if session is None:
+            retry = Retry(
+                total=HTTP_RETRIES,
+                backoff_factor=HTTP_BACKOFF,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET', 'PUT'],
+                respect_retry_after_header=True,
+                raise_on_status=False  # 재시도 후에도 실패하면 응답 그대로 반환
+            )
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            })
+            _http_sessions[api_key] = session
+        return session
+
+
+def put_translation(http: requests.Session, string_id, translation: str, as_review: bool = False) -> Optional[int]:
+    """Paratranz API로 번역 저장 (HTTP 상태 코드 반환, 네트워크 오류 시 None)"""
+    print(f"\n💾 저장 중...")
+    
+    try:
+        url = f"{PARATRANZ_BASE_URL}/projects/{PROJECT_ID}/strings/{string_id}"
+        
+        payload = {
+            "translation": translation,
+            "stage": 5 if as_review else 1
+        }
+        
+        response = http.put(url, json=payload, timeout=HTTP_TIMEOUT)
+        
+        if response.status_code in [200, 204]:
+            status = "검토로" if as_review else "저장"
+            print(f"✅ {status} 저장 완료!")
+            return response.status_code
+        
+        print(f"[ERROR] 저장 실패: {response.status_code}")
+        print(f"응답: {response.text}")
+        
+        # 대안 시도: /strings/{id} (project 없이)
+        if response.status_code == 404:
+            alt_url = f"{PARATRANZ_BASE_URL}/strings/{string_id}"
+            
+            alt_response = http.put(alt_url, json=payload, timeout=HTTP_TIMEOUT)
+            
+            if alt_response.status_code in [200, 204]:
+                status = "검토로" if as_review else "저장"
+                print(f"✅ {status} 저장 완료! (대안 경로)")
+            else:
+                print(f"[ERROR] 대안도 실패: {alt_response.status_code}")
+                print(f"응답: {alt_response.text}")
+            return alt_response.status_code
+        
+        return response.status_code
+        
+    except Exception as e:
+        print(f"[ERROR] 저장 중 오류: {e}")
+        return None
+
+
+def _default_ids(count: int) -> List[str]:
+    """id를 따로 주지 않았을 때 쓰는 순번 id ("1", "2", ...)"""
+    return [str(i + 1) for i in range(count)]
+
+
+def _batch_keys(texts: list, ids: Optional[list]) -> List[str]:
+    """배치 항목 id (중복/누락된 id는 순번으로 대체)"""
+    keys = [str(key) for key in ids] if ids else _default_ids(len(texts))
+    return keys if len(set(keys)) == len(texts) else _default_ids(len(texts))
+
+
+def _batch_results(texts: list, parsed: Dict[int, list]) -> List[list]:
+    """파싱된 항목 → 원문 순서의 [번역1, 번역2] 목록 (다시 요청해도 실패한 항목은 기본값)"""
+    return [parsed[i] if i in parsed else [f"[번역 실패: {texts[i]}]", f"[번역 실패: {texts[i]}]"]
+            for i in range(len(texts))]
+
 
-# Paratranz API 베이스 URL
-PARATRANZ_BASE_URL = "https://paratranz.cn/api"
+class _BatchRounds:
+    """배치 번역의 요청 순서 (첫 요청 → 형식이 맞지 않아 빠진 항목만 재요청) - 동기/비동기 공용
+
+    requests()가 내주는 요청을 호출한 쪽이 보내고 결과를 receive()로 넘김 (요청 I/O만 호출한 쪽에서)
+    """
+
+    def __init__(self, translator, texts: list, ids: Optional[list], on_item):
+        self.translator = translator
+        self.texts = texts
+        self.keys = _batch_keys(texts, ids)
+        self.on_item = on_item
+        self.parsed = None  # {index: [번역1, 번역2]} (첫 요청이 실패하면 None)
+        self.first_pass = 0
+        self.rounds = 0
+        self.missing = []
+        self.failed = False
+
+    def requests(self):
+        """보낼 요청 {'texts', 'ids', 'on_item'} - 다음 요청은 앞 요청의 결과를 receive()한 뒤에 정해짐"""
+        yield {'texts': self.texts, 'ids': self.keys, 'on_item': self.on_item}
+        # 🔁 파싱 실패한 항목만 다시 번역
+        while not self.failed and self.missing and self.rounds < RETRY_UNPARSED_ROUNDS:
+            self.rounds += 1
+            missing = self.missing
+            print(f"   🔁 받지 못한 {len(missing)}개만 다시 번역 ({self.rounds}/{RETRY_UNPARSED_ROUNDS})")
+            yield {
+                'texts': [self.texts[i] for i in missing],
+                'ids': [self.keys[i] for i in missing],
+                'on_item': self._remap_on_item(missing)
+            }
+
+    def receive(self, result: Optional[Dict[int, list]]):
+        """요청 결과 반영 (None이면 요청 실패 → 더 요청하지 않음)"""
+        if result is None:
+            self.failed = True
+            return
+        if self.parsed is None:
+            self.parsed = result
+            self.first_pass = len(result)
+        else:
+            for j, i in enumerate(self.missing):
+                if j in result:
+                    self.parsed[i] = result[j]
+        self.missing = [i for i in range(len(self.texts)) if i not in self.parsed]
+
+    def result(self) -> Optional[List[list]]:
+        """원문 순서의 [번역1, 번역2] 목록 (첫 요청이 실패했으면 None)"""
+        if self.parsed is None:
+            return None
+        self.translator._record_parse(len(self.texts), self.first_pass, len(self.parsed), self.rounds)
+        return _batch_results(self.texts, self.parsed)
+
+    def _remap_on_item(self, positions: List[int]):
+        """재요청(부분 배치)의 index → 원래 배치의 index로 바꿔 전달"""
+        on_item = self.on_item
+        if on_item is None:
+            return None
+        return lambda idx, pair: on_item(positions[idx], pair)
+
+
+class _BatchCall:
+    """Gemini 호출 1번의 준비/파싱/마무리 - 동기/비동기 공용 (요청과 응답 읽기만 호출한 쪽에서)
+
+    on_item(index, [번역1, 번역2]): 항목이 완성될 때마다 호출 (스트리밍이면 응답이 끝나기 전에)
+    """
+
+    def __init__(self, translator, texts: list, ids: Optional[List[str]], on_item):
+        self.translator = translator
+        self.texts = texts
+        self.ids = ids or _default_ids(len(texts))
+        self.on_item = on_item
+        self.stream = bool(STREAM_RESPONSES and on_item)  # 📡 스트리밍: 두 번역이 모두 나온 항목부터 바로 전달
+        self.system = self.prompt = None
+        self.parser = None
+
+    def prepare(self, examples, on_wait, max_retries) -> dict:
+        """프롬프트 준비 → 분배기 옵션 (stream 포함)"""
+        self.system, self.prompt, options = self.translator._batch_request(
+            self.texts, examples, self.ids, on_wait, max_retries
+        )
+        self.parser = BatchResponseParser(self.ids, OUTPUT_FORMAT)
+        return dict(options, stream=self.stream)
+
+    def feed(self, text: str):
+        """응답 텍스트 (스트리밍이면 조각 하나) → 완성된 항목 전달"""
+        self._deliver(self.parser.feed(text))
+
+    def finish(self, response) -> Dict[int, list]:
+        """응답 끝 → 남은 항목 전달 + 사용량 표시 → 파싱된 항목 {index: [번역1, 번역2]}"""
+        self._deliver(self.parser.finish())
+        return self.translator._finish_request(self.texts, self.system, self.prompt, response, self.parser.results)
+
+    def fail(self, error: Exception) -> Optional[Dict[int, list]]:
+        """요청이 실패 → 이미 완성되어 전달한 항목 (없으면 None), 나머지는 호출한 쪽에서 다시 요청"""
+        if isinstance(error, QuotaExceeded):
+            # 모든 키/모델이 하루 한도를 다 썼거나 대기가 너무 김 (키 하나만 막힌 경우는 분배기가 다른 키로 전환)
+            print(f"\n⚠️  API 쿼터 초과 (모든 키): {error.message}")
+            return None
+        if self.parser is None or not self.parser.results:
+            print(f"\n[ERROR] 번역 실패: {error}")
+            return None
+        print(f"\n⚠️  응답이 중간에 끊김 ({error}) → 받은 {len(self.parser.results)}개는 유지, 나머지만 다시 요청")
+        return dict(self.parser.results)
+
+    def _deliver(self, items):
+        if self.on_item:
+            for idx, pair in items:
+                self.on_item(idx, pair)
 
 
 class ParatranzAPITranslator:
     def __init__(self, paratranz_key=None, gemini_key=None, model_name=None):
-        self.glossary = self.load_glossary()
+        self.glossary_store: GlossaryStore = get_glossary_store(GLOSSARY_DB, DEFAULT_GLOSSARY, GLOSSARY_FILE)
+        self._system_instruction = None  # (용어집 버전, 고정 지침)
         self.translation_count = 0
         self.current_strings = []
         self.current_index = 0
-        self.total_tokens_used = 0  # 사용한 토큰 수 추적
-        self.request_count = 0  # 오늘 사용한 API 호출 횟수 추적
+        self.session_requests = 0  # 이 번역기로 보낸 API 호출 수 (오늘 누적은 request_count - 사용량 장부)
+        self.items_translated = 0  # Gemini로 번역한 항목 수 (호출당 항목 수 계산용)
+        
+        # 배치 응답 파싱 통계 (처음 응답에서 바로 파싱된 비율 / 재요청으로 복구한 수)
+        self.parse_stats = {'batches': 0, 'items': 0, 'first_pass': 0, 'recovered': 0, 'failed': 0, 'followups': 0}
+        self.recent_parse_rates = deque(maxlen=50)
+        self._stats_lock = threading.Lock()
+        
+        # 배치 크기 조정용 토큰 예산 (호출 결과로 계속 보정)
+        self.token_budget = TokenBudget(
+            adaptive=ADAPTIVE_BATCH,
+            batch_size=BATCH_SIZE,
+            max_batch_size=MAX_BATCH_SIZE,
+            prompt_tokens=BATCH_PROMPT_TOKENS,
+            output_tokens=BATCH_OUTPUT_TOKENS
+        )
         
         # API 키 결정 (인자로 받으면 우선 사용, 아니면 config에서)
         paratranz_api_key = paratranz_key if paratranz_key else PARATRANZ_API_KEY
@@ -126,38 +413,73 @@ class ParatranzAPITranslator:
             "Authorization": f"Bearer {paratranz_api_key}",
             "Content-Type": "application/json"
         }
+        # 같은 키를 쓰는 번역기끼리 연결 풀 공유
+        self.paratranz_key = paratranz_api_key
+        self.http = get_http_session(paratranz_api_key)
         
-        # Gemini 초기화
-        genai.configure(api_key=gemini_api_key)
-        self.model = genai.GenerativeModel(model_name_to_use)
+        # Gemini 초기화 (키 × 모델 슬롯 중 여유 있는 곳으로 분배, 키는 요청마다 지정 → 사용자끼리 섞이지 않음)
+        client = get_client(GEMINI_BASE_URL, pool_size=HTTP_POOL_SIZE, timeout=GEMINI_TIMEOUT)
+        self.gemini = GeminiDispatcher(
+            client,
+            api_keys=split_keys(gemini_api_key),
+            models=[model_name_to_use] + list(GEMINI_FALLBACK_MODELS),
+            limits=GEMINI_LIMITS,
+            burst=GEMINI_RATE_BURST,
+            max_wait=GEMINI_MAX_WAIT,
+            ledger=create_usage_ledger(COORDINATION, USAGE_DB),
+            context_cache=GEMINI_CONTEXT_CACHE,
+            context_ttl=GEMINI_CONTEXT_TTL
+        )
         self.model_name = model_name_to_use
         
-        # Request 한도 (모델별)
-        self.request_limits = {
-            "gemini-2.0-flash-exp": 50,
-            "gemini-2.5-pro": 50,
-            "gemini-1.5-pro": 50,
-            "gemini-1.5-flash": 1500,
-            "gemini-2.5-flash-lite": 1500,
-            "gemini-2.5-flash": 1500,
-        }
-        self.daily_limit = self.request_limits.get(model_name_to_use, 1500)
+        # Request 한도 (모든 키/모델의 하루 요청 한도 합)
+        self.daily_limit = self.gemini.daily_limit()
+    
+    @property
+    def request_count(self) -> int:
+        """오늘(UTC) 이 키/모델들로 보낸 API 호출 수 (사용량 장부 - 재시작/다른 작업자 포함)"""
+        return self.gemini.usage_today()['requests']
+    
+    @property
+    def total_tokens_used(self) -> int:
+        """오늘(UTC) 사용한 토큰 수 (사용량 장부)"""
+        return self.gemini.usage_today()['total_tokens']
+    
+    def usage_today(self) -> dict:
+        """오늘 사용량 (호출 수, 입력/출력/캐시/전체 토큰, 429 횟수)"""
+        return self.gemini.usage_today()
         
-    def load_glossary(self):
-        """용어집 로드"""
-        if os.path.exists(GLOSSARY_FILE):
-            try:
-                with open(GLOSSARY_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return DEFAULT_GLOSSARY.copy()
-        return DEFAULT_GLOSSARY.copy()
+    @property
+    def glossary(self) -> Dict[str, str]:
+        """현재 용어집 (모든 세션이 공유하는 저장소의 읽기 전용 사본)"""
+        return self.glossary_store.terms()
     
-    def save_glossary(self):
-        """용어집 저장"""
-        with open(GLOSSARY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.glossary, f, ensure_ascii=False, indent=2)
-        print(f"💾 용어집 저장됨: {GLOSSARY_FILE}")
+    @property
+    def glossary_index(self) -> GlossaryIndex:
+        return self.glossary_store.index
+    
+    def set_glossary_term(self, en: str, ko: str):
+        """용어 추가/수정 (저장소에 바로 기록 + 검색 색인 갱신)"""
+        self.glossary_store.set(en, ko)
+    
+    def delete_glossary_term(self, en: str) -> bool:
+        """용어 삭제 (없는 용어면 False)"""
+        return self.glossary_store.delete(en) is not None
+    
+    def filters_glossary(self) -> bool:
+        """용어집이 커서 배치마다 등장하는 용어만 넣는지"""
+        return len(self.glossary) > GLOSSARY_INLINE_MAX
+    
+    def prompt_glossary(self, texts: list) -> Dict[str, str]:
+        """프롬프트에 넣을 용어 (큰 용어집이면 원문에 등장하는 용어만)"""
+        if not self.filters_glossary():
+            return self.glossary
+        found = self.glossary_index.find(texts)
+        return {en: self.glossary[en] for en in sorted(found) if en in self.glossary}
+    
+    @staticmethod
+    def _glossary_items(glossary: Dict[str, str]) -> str:
+        return "\n".join([f"  • {en} → {ko}" for en, ko in glossary.items()])
     
     def fetch_files(self) -> Optional[List[Dict]]:
         """프로젝트의 파일 목록 가져오기"""
@@ -165,7 +487,7 @@ class ParatranzAPITranslator:
         
         try:
             url = f"{PARATRANZ_BASE_URL}/projects/{PROJECT_ID}/files"
-            response = requests.get(url, headers=self.headers)
+            response = self.http.get(url, timeout=HTTP_TIMEOUT)
             
             if response.status_code == 200:
                 files = response.json()
@@ -261,73 +583,66 @@ class ParatranzAPITranslator:
             except KeyboardInterrupt:
                 return None
     
+    def fetch_strings_page(self, file_id: int, stage: Optional[int] = None, page: int = 1,
+                           page_size: int = None) -> Optional[Dict]:
+        """문자열 한 페이지 가져오기 (stage 필터는 서버에서 적용)
+        
+        반환: {'results': [...], 'pageCount': 전체 페이지 수, 'rowCount': 전체 개수}
+        (구버전 응답처럼 목록만 오면 pageCount/rowCount는 None)
+        """
+        url = f"{PARATRANZ_BASE_URL}/projects/{PROJECT_ID}/strings"
+        
+        # 쿼리 파라미터
+        params = {
+            "file": file_id,
+            "page": page,
+            "pageSize": page_size or STRINGS_PAGE_SIZE
+        }
+        
+        # 스테이지 필터 (서버에서 걸러서 번역된 항목은 아예 내려받지 않음)
+        if stage is not None:
+            params["stage"] = stage
+        
+        response = self.http.get(url, params=params, timeout=HTTP_TIMEOUT)
+        
+        if response.status_code != 200:
+            print(f"[ERROR] API 요청 실패: {response.status_code}")
+            print(f"응답: {response.text}")
+            return None
+        
+        return strings_page(response.json(), stage)
+    
     def fetch_strings(self, file_id: int, stage: Optional[int] = None, page: int = 1) -> bool:
         """Paratranz에서 번역할 문자열 가져오기"""
         print(f"\n📥 Paratranz에서 원문 가져오는 중... (페이지 {page})")
         
         try:
-            # API 엔드포인트
-            url = f"{PARATRANZ_BASE_URL}/projects/{PROJECT_ID}/strings"
+            data = self.fetch_strings_page(file_id, stage, page)
+            if data is None:
+                return False
             
-            # 쿼리 파라미터
-            params = {
-                "file": file_id,
-                "page": page,
-                "pageSize": 20  # 한 페이지당 20개씩
-            }
+            self.current_strings = data['results']
             
-            # 스테이지 필터 (선택사항)
-            if stage is not None:
-                params["stage"] = stage
+            stage_names = {0: "미번역", 1: "번역됨", 5: "검토 완료"}
+            if stage in stage_names:
+                print(f"✅ {stage_names[stage]} {len(self.current_strings)}개 로드 완료")
+            else:  # 전체 (stage=None)
+                stage_counts = {}
+                for s in self.current_strings:
+                    st = s.get('stage', 'N/A')
+                    stage_counts[st] = stage_counts.get(st, 0) + 1
+                
+                print(f"✅ {len(self.current_strings)}개 항목 로드됨")
+                print(f"   📊 Stage 0 (미번역): {stage_counts.get(0, 0)}개")
+                print(f"   📊 Stage 1 (번역됨): {stage_counts.get(1, 0)}개")
+                print(f"   📊 Stage 5 (검토완료): {stage_counts.get(5, 0)}개")
+                if len(stage_counts) > 3:
+                    print(f"   📊 기타: {stage_counts}")
             
-            response = requests.get(url, headers=self.headers, params=params)
+            if len(self.current_strings) == 0:
+                print("\n💡 조건에 맞는 항목이 없습니다!")
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # results 또는 data 키에 문자열 배열이 있을 수 있음
-                if isinstance(data, dict):
-                    all_strings = data.get('results', data.get('data', []))
-                elif isinstance(data, list):
-                    all_strings = data
-                
-                total_loaded = len(all_strings)
-                
-                # stage 값으로 필터링
-                if stage == 0:  # 미번역만 (stage=0)
-                    self.current_strings = [s for s in all_strings if s.get('stage') == 0]
-                    print(f"✅ 미번역 {len(self.current_strings)}개 로드 완료")
-                        
-                elif stage == 1:  # 번역됨만 (stage=1)
-                    self.current_strings = [s for s in all_strings if s.get('stage') == 1]
-                    print(f"✅ 번역됨 {len(self.current_strings)}개 로드 완료")
-                    
-                elif stage == 5:  # 검토 완료만 (stage=5)
-                    self.current_strings = [s for s in all_strings if s.get('stage') == 5]
-                    print(f"✅ 검토 완료 {len(self.current_strings)}개 로드 완료")
-                    
-                else:  # 전체 (stage=None)
-                    self.current_strings = all_strings
-                    stage_counts = {}
-                    for s in all_strings:
-                        st = s.get('stage', 'N/A')
-                        stage_counts[st] = stage_counts.get(st, 0) + 1
-                    
-                    print(f"✅ {total_loaded}개 항목 로드됨")
-                    print(f"   📊 Stage 0 (미번역): {stage_counts.get(0, 0)}개")
-                    print(f"   📊 Stage 1 (번역됨): {stage_counts.get(1, 0)}개")
-                    print(f"   📊 Stage 5 (검토완료): {stage_counts.get(5, 0)}개")
-                    if len(stage_counts) > 3:
-                        print(f"   📊 기타: {stage_counts}")
-                
-                if len(self.current_strings) == 0:
-                    print("\n💡 조건에 맞는 항목이 없습니다!")
-                
-                return True
-            else:
-                print(f"[ERROR] API 요청 실패: {response.status_code}")
-                print(f"응답: {response.text}")
-                return False
+            return True
                 
         except Exception as e:
             print(f"[ERROR] 원문 가져오기 실패: {e}")
@@ -341,7 +656,7 @@ class ParatranzAPITranslator:
     
     def create_translation_prompt(self, text):
         """번역 프롬프트 생성"""
-        glossary_items = "\n".join([f"  • {en} → {ko}" for en, ko in self.glossary.items()])
+        glossary_items = self._glossary_items(self.prompt_glossary([text]))
         
         prompt = f"""당신은 전문 게임 로컬라이제이션 번역가입니다.
 
@@ -373,18 +688,23 @@ class ParatranzAPITranslator:
 """
         return prompt
     
-    def translate_batch_with_gemini(self, texts: list, retry_count=0, max_retries=3):
-        """여러 개의 텍스트를 한 번에 번역 (API 호출 1번)"""
-        print(f"\n🤖 AI 배치 번역 중... ({len(texts)}개)")
+    def system_instruction(self) -> Tuple[str, str]:
+        """배치 번역의 고정 지침 → (버전, 텍스트)
         
-        try:
-            # 배치 프롬프트 생성
-            glossary_items = "\n".join([f"  • {en} → {ko}" for en, ko in self.glossary.items()])
-            
-            # 원문 목록 생성
-            originals = "\n".join([f"원문 {i+1}: {text}" for i, text in enumerate(texts)])
-            
-            prompt = f"""당신은 전문 게임 로컬라이제이션 번역가입니다.
+        역할/번역 컨텍스트/지침/용어집은 배치마다 같으므로 한 번만 만들어 systemInstruction(또는 캐시)으로 보내고,
+        용어집이 바뀌면 버전(저장소 버전 번호)이 바뀌어 다시 만듦
+        큰 용어집은 여기 넣지 않고 배치마다 등장하는 용어만 build_batch_prompt()에 넣음
+        """
+        inline = not self.filters_glossary()
+        version = f"g{self.glossary_store.version}" if inline else 'filtered'
+        cached = self._system_instruction
+        if cached is None or cached[0] != version:
+            cached = self._system_instruction = (version, self._build_system_instruction(inline))
+        return cached
+
+    def _build_system_instruction(self, inline_glossary: bool) -> str:
+        glossary_section = f"\n\n【용어집】\n{self._glossary_items(self.glossary)}" if inline_glossary else ""
+        return f"""당신은 전문 게임 로컬라이제이션 번역가입니다.
 
 【번역 컨텍스트】
 - 게임 장르: {TRANSLATION_STYLE["game_genre"]}
@@ -396,152 +716,45 @@ class ParatranzAPITranslator:
 1. 게임 UI/메뉴 텍스트이므로 간결하고 직관적으로 번역
 2. 고유명사(지명, 코스명 등)는 반드시 한글로 음차
 3. 기술 용어도 음차 우선 (예: Saturation → 세추레이션)
-4. 형식 지정자(%s, %d 등)는 그대로 유지
-
-【용어집】
-{glossary_items}
-
-【원문 목록】
-{originals}
-
-각 원문에 대해 2가지 번역을 제공하세요:
-1-1: [원문1의 번역1]
-1-2: [원문1의 번역2]
-2-1: [원문2의 번역1]
-2-2: [원문2의 번역2]
-...
-{len(texts)}-1: [원문{len(texts)}의 번역1]
-{len(texts)}-2: [원문{len(texts)}의 번역2]
-
-정확히 위 형식으로 {len(texts)*2}개의 번역을 제공하세요."""
+4. 형식 지정자(%s, %d, {{0}} 등)는 그대로 유지
+5. HTML 태그 그대로 유지{glossary_section}"""
 
-            response = self.model.generate_content(prompt)
-            
-            # Request 카운트 증가
-            self.request_count += 1
-            remaining = self.daily_limit - self.request_count
-            percentage = (self.request_count / self.daily_limit) * 100
-            
-            # 토큰 사용량 추적
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                usage = response.usage_metadata
-                prompt_tokens = getattr(usage, 'prompt_token_count', 0)
-                completion_tokens = getattr(usage, 'candidates_token_count', 0)
-                total_tokens = getattr(usage, 'total_token_count', 0)
-                
-                self.total_tokens_used += total_tokens
-                
-                print(f"   📊 토큰 사용: {prompt_tokens} (입력) + {completion_tokens} (출력) = {total_tokens} (총)")
-                print(f"   📊 누적 토큰: {self.total_tokens_used:,}")
-            
-            # Request 한도 정보
-            print(f"   🎯 API 호출: {self.request_count}/{self.daily_limit} ({percentage:.1f}%) | 남은 횟수: {remaining}")
-            print(f"   💰 절약: {len(texts)-1}번의 API 호출 절약!")
-            
-            # 경고 표시
-            if remaining <= 10:
-                print(f"   ⚠️  경고: 남은 호출 횟수가 {remaining}개입니다!")
-            elif remaining <= 50:
-                print(f"   💡 알림: 남은 호출 횟수 {remaining}개")
-            
-            # 응답 파싱
-            lines = response.text.strip().split('\n')
-            translations_dict = {}  # {index: [translation1, translation2]}
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 형식: "1-1: 번역" 또는 "1-2: 번역"
-                import re
-                match = re.match(r'(\d+)-([12]):\s*(.+)', line)
-                if match:
-                    idx = int(match.group(1)) - 1  # 0-based index
-                    variant = int(match.group(2))  # 1 or 2
-                    translation = match.group(3).strip()
-                    
-                    if idx not in translations_dict:
-                        translations_dict[idx] = [None, None]
-                    
-                    translations_dict[idx][variant-1] = translation
-            
-            # 결과 리스트로 변환
-            results = []
-            for i in range(len(texts)):
-                if i in translations_dict and translations_dict[i][0] and translations_dict[i][1]:
-                    results.append(translations_dict[i])
-                else:
-                    # 파싱 실패 시 기본값
-                    results.append([f"[번역 실패: {texts[i]}]", f"[번역 실패: {texts[i]}]"])
-            
-            return results
-            
-        except Exception as e:
-            error_str = str(e)
-            
-            # 429 에러 (쿼터 초과) 체크
-            if '429' in error_str and retry_count < max_retries:
-                print(f"\n⚠️  API 쿼터 초과 (429 에러)")
-                
-                # retry_delay 파싱
-                import re
-                import time
-                
-                retry_match = re.search(r'retry in (\d+(?:\.\d+)?)', error_str, re.IGNORECASE)
-                if retry_match:
-                    wait_time = float(retry_match.group(1))
-                else:
-                    wait_time = 60
-                
-                print(f"⏳ {int(wait_time)}초 후 자동 재시도... ({retry_count + 1}/{max_retries})")
-                print(f"   (Ctrl+C로 취소 가능)")
-                
-                try:
-                    for remaining in range(int(wait_time), 0, -1):
-                        print(f"\r   ⏱️  {remaining}초 남음...", end='', flush=True)
-                        time.sleep(1)
-                    print("\r   ✅ 대기 완료!           ")
-                    
-                    return self.translate_batch_with_gemini(texts, retry_count + 1, max_retries)
-                    
-                except KeyboardInterrupt:
-                    print("\n\n❌ 사용자가 취소했습니다.")
-                    return None
-            
-            print(f"\n[ERROR] 번역 실패: {e}")
-            return None
-    
-    def translate_batch_with_gemini(self, texts: list, retry_count=0, max_retries=3):
-        """배치 번역: 여러 개의 텍스트를 한 번에 번역 (API 호출 1번)"""
-        print(f"\n🤖 AI 배치 번역 중... ({len(texts)}개)")
+    def build_batch_prompt(self, texts: list, examples=None, ids: Optional[list] = None) -> str:
+        """배치별 프롬프트 (참고 번역 + 원문 목록 + 출력 형식) - 고정 지침은 system_instruction()
         
-        try:
-            # 배치 프롬프트 생성
-            glossary_items = "\n".join([f"  • {en} → {ko}" for en, ko in self.glossary.items()])
-            
-            # 원문 목록 생성
-            originals = "\n".join([f"원문 {i+1}: {text}" for i, text in enumerate(texts)])
-            
-            prompt = f"""당신은 전문 게임 로컬라이제이션 번역가입니다.
+        ids: JSON 형식에서 응답을 원문에 다시 연결할 키
+        """
+        # 이 배치에 등장하는 용어 (큰 용어집만 - 작으면 고정 지침에 전체가 있음)
+        glossary_section = ""
+        if self.filters_glossary():
+            relevant = self.prompt_glossary(texts)
+            if relevant:
+                glossary_section = f"""【용어집】 (이 원문들에 등장하는 용어)
+{self._glossary_items(relevant)}
 
-【번역 컨텍스트】
-- 게임 장르: {TRANSLATION_STYLE["game_genre"]}
-- 톤앤매너: {TRANSLATION_STYLE["tone"]}
-- 말투: {TRANSLATION_STYLE["formality"]}
-- 타겟 유저: {TRANSLATION_STYLE["target_audience"]}
-
-【중요 지침】
-1. 게임 UI/메뉴 텍스트이므로 간결하고 직관적으로 번역
-2. 고유명사(지명, 코스명 등)는 반드시 한글로 음차
-3. 기술 용어도 음차 우선 (예: Saturation → 세추레이션)
-4. 형식 지정자(%s, %d, {{0}} 등)는 그대로 유지
-5. HTML 태그 그대로 유지
+"""
+        
+        # 참고 번역 (이전에 저장한 비슷한 문장)
+        examples_section = ""
+        if examples:
+            example_items = "\n".join([f"  • {src} → {dst}" for src, dst in examples])
+            examples_section = f"""【참고 번역】 (이전에 저장된 비슷한 문장 - 표현과 용어를 일관되게 맞추세요)
+{example_items}
 
-【용어집】
-{glossary_items}
+"""
+        
+        # 원문 목록 + 출력 형식
+        if OUTPUT_FORMAT == 'json':
+            body = self._batch_prompt_body_json(texts, ids)
+        else:
+            body = self._batch_prompt_body_lines(texts)
+        return glossary_section + examples_section + body
 
-【원문 목록】
+    @staticmethod
+    def _batch_prompt_body_lines(texts: list) -> str:
+        """줄 형식 ("1-1: 번역") 원문 목록 + 지시"""
+        originals = "\n".join([f"원문 {i+1}: {text}" for i, text in enumerate(texts)])
+        return f"""【원문 목록】
 {originals}
 
 각 원문에 대해 2가지 번역을 제공하세요.
@@ -557,115 +770,197 @@ class ParatranzAPITranslator:
 
 정확히 {len(texts)*2}개의 번역을 제공하세요."""
 
-            response = self.model.generate_content(prompt)
-            
-            # Request 카운트 증가
-            self.request_count += 1
-            remaining = self.daily_limit - self.request_count
-            percentage = (self.request_count / self.daily_limit) * 100
-            
-            # 토큰 사용량 추적
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                usage = response.usage_metadata
-                prompt_tokens = getattr(usage, 'prompt_token_count', 0)
-                completion_tokens = getattr(usage, 'candidates_token_count', 0)
-                total_tokens = getattr(usage, 'total_token_count', 0)
-                
-                self.total_tokens_used += total_tokens
-                
-                print(f"   📊 토큰 사용: {prompt_tokens} (입력) + {completion_tokens} (출력) = {total_tokens} (총)")
-                print(f"   📊 누적 토큰: {self.total_tokens_used:,}")
-            
-            # Request 한도 정보
-            print(f"   🎯 API 호출: {self.request_count}/{self.daily_limit} ({percentage:.1f}%) | 남은 횟수: {remaining}")
-            print(f"   💰 절약: {len(texts)-1}번의 API 호출 절약!")
-            
-            # 경고 표시
-            if remaining <= 10:
-                print(f"   ⚠️  경고: 남은 호출 횟수가 {remaining}개입니다!")
-            elif remaining <= 50:
-                print(f"   💡 알림: 남은 호출 횟수 {remaining}개")
-            
-            # 응답 파싱
-            import re
-            lines = response.text.strip().split('\n')
-            translations_dict = {}  # {index: [translation1, translation2]}
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 형식: "1-1: 번역" 또는 "1-2: 번역"
-                match = re.match(r'(\d+)-([12]):\s*(.+)', line)
-                if match:
-                    idx = int(match.group(1)) - 1  # 0-based index
-                    variant = int(match.group(2))  # 1 or 2
-                    translation = match.group(3).strip()
-                    
-                    if idx not in translations_dict:
-                        translations_dict[idx] = [None, None]
-                    
-                    translations_dict[idx][variant-1] = translation
-            
-            # 결과 리스트로 변환
-            results = []
-            for i in range(len(texts)):
-                if i in translations_dict and translations_dict[i][0] and translations_dict[i][1]:
-                    results.append(translations_dict[i])
-                else:
-                    # 파싱 실패 시 기본값
-                    results.append([f"[번역 실패: {texts[i]}]", f"[번역 실패: {texts[i]}]"])
-            
-            return results
-            
+    @staticmethod
+    def _batch_prompt_body_json(texts: list, ids: Optional[list]) -> str:
+        """JSON 형식 원문 목록 + 지시 (응답 스키마와 함께 사용)"""
+        items = [{"id": key, "text": text} for key, text in zip(ids or _default_ids(len(texts)), texts)]
+        # 원문 하나당 한 줄 (들여쓰기 없이 토큰 절약)
+        originals = "[\n" + ",\n".join(json.dumps(item, ensure_ascii=False) for item in items) + "\n]"
+        return f"""【원문 목록】 (JSON)
+{originals}
+
+각 원문에 대해 2가지 번역을 제공하세요.
+원문 하나당 객체 하나로, id는 원문의 id를 그대로 쓰고 t1/t2에 번역 2가지를 넣은 JSON 배열로만 답하세요.
+원문의 줄바꿈은 번역에서도 그대로 유지하세요."""
+
+    def batch_prompt_overhead(self) -> int:
+        """원문을 뺀 배치 프롬프트 길이 (고정 지침 + 출력 형식) - 배치 크기 계산용
+        
+        고정 지침도 입력 토큰에 포함됨 (캐시된 부분은 요금만 할인)
+        """
+        return len(self.system_instruction()[1]) + len(self.build_batch_prompt([]))
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """스트리밍 조각의 텍스트 (사용량만 담긴 마지막 조각 등은 빈 문자열)"""
+        try:
+            return chunk.text
+        except (ValueError, AttributeError, IndexError):
+            return ''
+
+    @staticmethod
+    def _response_truncated(response) -> bool:
+        """출력 토큰 한도로 응답이 끊겼는지"""
+        try:
+            reason = response.candidates[0].finish_reason
+        except (AttributeError, IndexError):
+            return False
+        return getattr(reason, 'name', str(reason)) == 'MAX_TOKENS'
+
+    def items_per_request(self) -> float:
+        """Gemini 호출 1번당 번역한 항목 수"""
+        return self.items_translated / self.session_requests if self.session_requests else 0.0
+
+    def translate_batch_with_gemini(self, texts: list, max_retries=3, examples=None, ids=None,
+                                    on_item=None, on_wait=None):
+        """배치 번역: 여러 개의 텍스트를 한 번에 번역 (API 호출 1번)
+        
+        응답에서 형식이 맞지 않아 빠진 항목 (스트리밍 응답이 중간에 끊겨 받지 못한 항목 포함)은
+        그 항목만 모아 다시 요청 (최대 RETRY_UNPARSED_ROUNDS번)
+        examples: 번역 메모리에서 찾은 비슷한 문장 [(원문, 번역), ...] - 프롬프트 참고용
+        ids: 원문별 고유 키 (JSON 형식에서 응답을 순서가 아닌 id로 연결, 없으면 순번)
+        on_item(index, [번역1, 번역2]): 항목별 완성 알림 (스트리밍 응답이면 배치가 끝나기 전에 호출)
+        on_wait(seconds): 분당 한도 때문에 요청을 미뤄야 할 때 호출 (화면 ETA 표시용)
+        """
+        print(f"\n🤖 AI 배치 번역 중... ({len(texts)}개)")
+        
+        rounds = _BatchRounds(self, texts, ids, on_item)
+        for request in rounds.requests():
+            rounds.receive(self._request_batch(examples=examples, on_wait=on_wait, max_retries=max_retries, **request))
+        return rounds.result()
+    
+    def _record_parse(self, total: int, first_pass: int, final: int, followups: int):
+        """배치별 파싱 성공률 기록"""
+        with self._stats_lock:
+            stats = self.parse_stats
+            stats['batches'] += 1
+            stats['items'] += total
+            stats['first_pass'] += first_pass
+            stats['recovered'] += final - first_pass
+            stats['failed'] += total - final
+            stats['followups'] += followups
+            self.recent_parse_rates.append(first_pass / total if total else 1.0)
+        if first_pass < total:
+            print(f"   🧩 파싱 성공: {first_pass}/{total} → 재요청 후 {final}/{total}")
+    
+    def parse_success_stats(self) -> dict:
+        """파싱 성공률 (화면 표시용)"""
+        with self._stats_lock:
+            stats = dict(self.parse_stats)
+            recent = list(self.recent_parse_rates)
+        items = stats['items']
+        stats['first_pass_rate'] = round(stats['first_pass'] / items * 100, 1) if items else 100.0
+        stats['final_rate'] = round((items - stats['failed']) / items * 100, 1) if items else 100.0
+        stats['last_batch_rate'] = round(recent[-1] * 100, 1) if recent else 100.0
+        return stats
+    
+    def _request_batch(self, texts: list, examples=None, ids: Optional[List[str]] = None,
+                       on_item=None, on_wait=None, max_retries=3) -> Optional[Dict[int, list]]:
+        """Gemini 호출 1번 → 파싱된 항목 {index: [번역1, 번역2]} (요청 실패 시 None)
+        
+        on_item(index, [번역1, 번역2]): 항목이 완성될 때마다 호출 (스트리밍이면 응답이 끝나기 전에)
+        분당 한도는 분배기가 보내기 전에 예약 → 필요하면 이 스레드에서 한 번 대기 (429 후 재시도 루프 없음)
+        """
+        call = _BatchCall(self, texts, ids, on_item)
+        try:
+            options = call.prepare(examples, on_wait, max_retries)
+            response = self.gemini.generate_content(call.prompt, **options)
+            if call.stream:
+                for chunk in response:
+                    call.feed(self._chunk_text(chunk))
+            else:
+                call.feed(response.text)
+            return call.finish(response)
         except Exception as e:
-            error_str = str(e)
-            
-            # 429 에러 (쿼터 초과) 체크
-            if '429' in error_str and retry_count < max_retries:
-                print(f"\n⚠️  API 쿼터 초과 (429 에러)")
-                
-                # retry_delay 파싱
-                import re
-                import time
-                
-                retry_match = re.search(r'retry in (\d+(?:\.\d+)?)', error_str, re.IGNORECASE)
-                if retry_match:
-                    wait_time = float(retry_match.group(1))
-                else:
-                    wait_time = 60
-                
-                print(f"⏳ {int(wait_time)}초 후 자동 재시도... ({retry_count + 1}/{max_retries})")
-                print(f"   (Ctrl+C로 취소 가능)")
-                
-                try:
-                    for remaining_time in range(int(wait_time), 0, -1):
-                        print(f"\r   ⏱️  {remaining_time}초 남음...", end='', flush=True)
-                        time.sleep(1)
-                    print("\r   ✅ 대기 완료!           ")
-                    
-                    return self.translate_batch_with_gemini(texts, retry_count + 1, max_retries)
-                    
-                except KeyboardInterrupt:
-                    print("\n\n❌ 사용자가 취소했습니다.")
-                    return None
+            return call.fail(e)
+    
+    def _batch_request(self, texts: list, examples, ids: List[str], on_wait, max_retries) -> Tuple[tuple, str, dict]:
+        """배치 요청 준비 → (고정 지침, 프롬프트, 분배기 옵션) - 동기/비동기 공용"""
+        system = self.system_instruction()
+        prompt = self.build_batch_prompt(texts, examples, ids)
+        options = {
+            'estimated_tokens': self._estimate_tokens(len(system[1]) + len(prompt), texts),
+            'on_wait': on_wait,
+            'max_retries': max_retries,
+            'system_instruction': system
+        }
+        if OUTPUT_FORMAT == 'json':
+            options['generation_config'] = JSON_GENERATION_CONFIG
+        return system, prompt, options
+    
+    def _finish_request(self, texts: list, system: tuple, prompt: str, response,
+                        translations_dict: Dict[int, list]) -> Dict[int, list]:
+        """응답을 받은 뒤 사용량 표시 + 배치 크기 보정 → 파싱된 항목 그대로 반환"""
+        # Request 카운트 (사용량 장부의 오늘 누적 - 재시작 전/다른 작업자의 호출 포함)
+        self.session_requests += 1
+        request_count = self.request_count
+        remaining = self.daily_limit - request_count
+        percentage = (request_count / self.daily_limit) * 100
+        
+        # 토큰 사용량 추적
+        prompt_tokens = completion_tokens = 0
+        if hasattr(response, 'usage_metadata') and response.usage_metadata:
+            usage = response.usage_metadata
+            prompt_tokens = getattr(usage, 'prompt_token_count', 0)
+            completion_tokens = getattr(usage, 'candidates_token_count', 0)
+            total_tokens = getattr(usage, 'total_token_count', 0)
+            cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
             
-            print(f"\n[ERROR] 번역 실패: {e}")
-            return None
+            print(f"   📊 토큰 사용: {prompt_tokens} (입력) + {completion_tokens} (출력) = {total_tokens} (총)")
+            if cached_tokens and prompt_tokens:
+                # 🗃️ 고정 지침이 캐시에서 처리된 만큼 입력 요금 할인
+                print(f"   🗃️  캐시된 입력 토큰: {cached_tokens} ({cached_tokens / prompt_tokens * 100:.0f}%)")
+            print(f"   📊 오늘 누적 토큰: {self.total_tokens_used:,}")
+        
+        # Request 한도 정보
+        self.items_translated += len(texts)
+        print(f"   🎯 API 호출: {request_count}/{self.daily_limit} ({percentage:.1f}%) | 남은 횟수: {remaining}")
+        print(f"   💰 절약: {len(texts)-1}번의 API 호출 절약! (호출당 평균 {self.items_per_request():.1f}개)")
+        
+        # 경고 표시
+        if remaining <= 10:
+            print(f"   ⚠️  경고: 남은 호출 횟수가 {remaining}개입니다!")
+        elif remaining <= 50:
+            print(f"   💡 알림: 남은 호출 횟수 {remaining}개")
+        
+        # 📦 다음 배치 크기 보정 (출력이 잘렸으면 배치를 줄임)
+        truncated = self._response_truncated(response) or (
+            len(texts) > 1 and translations_dict and (len(texts) - 1) not in translations_dict
+        )
+        if truncated:
+            print(f"   ✂️  출력이 잘린 것 같습니다 → 다음 배치 크기를 줄입니다")
+        self.token_budget.observe(
+            prompt_chars=len(system[1]) + len(prompt),
+            source_chars=sum(len(t) for t in texts),
+            items=len(texts),
+            prompt_tokens=prompt_tokens,
+            output_tokens=completion_tokens,
+            truncated=bool(truncated)
+        )
+        
+        return translations_dict
+    
+    def _estimate_tokens(self, prompt_chars: int, texts: list) -> int:
+        """요청 하나의 예상 토큰 (입력 + 출력) - 분당 토큰 한도 예약용"""
+        source_chars = sum(len(t) for t in texts)
+        prompt_tokens, output_tokens = self.token_budget.estimate(prompt_chars - source_chars, source_chars, len(texts))
+        return prompt_tokens + output_tokens
     
-    def translate_with_gemini(self, text, retry_count=0, max_retries=3):
-        """Gemini로 2개 번역 생성 (자동 재시도 포함) - 개별 번역용"""
+    def translate_with_gemini(self, text, max_retries=3):
+        """Gemini로 2개 번역 생성 (분당 한도는 분배기가 예약) - 개별 번역용"""
         print("\n🤖 AI 번역 중...")
         
         try:
             prompt = self.create_translation_prompt(text)
-            response = self.model.generate_content(prompt)
+            response = self.gemini.generate_content(
+                prompt, estimated_tokens=self._estimate_tokens(len(prompt), [text]), max_retries=max_retries
+            )
             
-            # Request 카운트 증가
-            self.request_count += 1
-            remaining = self.daily_limit - self.request_count
-            percentage = (self.request_count / self.daily_limit) * 100
+            # Request 카운트 (사용량 장부의 오늘 누적 - 재시작 전/다른 작업자의 호출 포함)
+            self.session_requests += 1
+            request_count = self.request_count
+            remaining = self.daily_limit - request_count
+            percentage = (request_count / self.daily_limit) * 100
             
             # 토큰 사용량 추적
             if hasattr(response, 'usage_metadata') and response.usage_metadata:
@@ -674,13 +969,11 @@ class ParatranzAPITranslator:
                 completion_tokens = getattr(usage, 'candidates_token_count', 0)
                 total_tokens = getattr(usage, 'total_token_count', 0)
                 
-                self.total_tokens_used += total_tokens
-                
                 print(f"   📊 토큰 사용: {prompt_tokens} (입력) + {completion_tokens} (출력) = {total_tokens} (총)")
-                print(f"   📊 누적 토큰: {self.total_tokens_used:,}")
+                print(f"   📊 오늘 누적 토큰: {self.total_tokens_used:,}")
             
             # Request 한도 정보
-            print(f"   🎯 API 호출: {self.request_count}/{self.daily_limit} ({percentage:.1f}%) | 남은 횟수: {remaining}")
+            print(f"   🎯 API 호출: {request_count}/{self.daily_limit} ({percentage:.1f}%) | 남은 횟수: {remaining}")
             
             # 경고 표시
             if remaining <= 10:
@@ -704,41 +997,10 @@ class ParatranzAPITranslator:
             
             return translations[:2]
             
+        except QuotaExceeded as e:
+            print(f"\n⚠️  API 쿼터 초과 (모든 키): {e.message}")
+            return None
         except Exception as e:
-            error_str = str(e)
-            
-            # 429 에러 (쿼터 초과) 체크
-            if '429' in error_str and retry_count < max_retries:
-                print(f"\n⚠️  API 쿼터 초과 (429 에러)")
-                
-                # retry_delay 파싱
-                import re
-                import time
-                
-                retry_match = re.search(r'retry in (\d+(?:\.\d+)?)', error_str, re.IGNORECASE)
-                if retry_match:
-                    wait_time = float(retry_match.group(1))
-                else:
-                    # 기본 대기 시간
-                    wait_time = 60
-                
-                print(f"⏳ {int(wait_time)}초 후 자동 재시도... ({retry_count + 1}/{max_retries})")
-                print(f"   (Ctrl+C로 취소 가능)")
-                
-                try:
-                    # 카운트다운
-                    for remaining in range(int(wait_time), 0, -1):
-                        print(f"\r   ⏱️  {remaining}초 남음...", end='', flush=True)
-                        time.sleep(1)
-                    print("\r   ✅ 대기 완료!           ")
-                    
-                    # 재시도
-                    return self.translate_with_gemini(text, retry_count + 1, max_retries)
-                    
-                except KeyboardInterrupt:
-                    print("\n\n❌ 사용자가 취소했습니다.")
-                    return None
-            
             print(f"\n[ERROR] 번역 실패: {e}")
             return None
     
@@ -814,15 +1076,12 @@ class ParatranzAPITranslator:
                 en = input("영어 용어: ").strip()
                 ko = input("한글 번역: ").strip()
                 if en and ko:
-                    self.glossary[en] = ko
-                    self.save_glossary()
+                    self.set_glossary_term(en, ko)
                     print(f"✅ 추가됨: {en} → {ko}")
             
             elif action == '2':
                 en = input("삭제할 영어 용어: ").strip()
-                if en in self.glossary:
-                    del self.glossary[en]
-                    self.save_glossary()
+                if self.delete_glossary_term(en):
                     print(f"✅ 삭제됨: {en}")
                 else:
                     print("❌ 없는 용어입니다")
@@ -832,8 +1091,7 @@ class ParatranzAPITranslator:
                 if en in self.glossary:
                     ko = input(f"새 번역 (현재: {self.glossary[en]}): ").strip()
                     if ko:
-                        self.glossary[en] = ko
-                        self.save_glossary()
+                        self.set_glossary_term(en, ko)
                         print(f"✅ 수정됨: {en} → {ko}")
                 else:
                     print("❌ 없는 용어입니다")
@@ -845,48 +1103,102 @@ class ParatranzAPITranslator:
     
     def save_translation(self, string_data, translation, as_review=False) -> bool:
         """Paratranz API로 번역 저장"""
-        print(f"\n💾 저장 중...")
-        
+        string_id = string_data.get('id', string_data.get('key'))
+        return put_translation(self.http, string_id, translation, as_review) in [200, 204]
+    
+    # ===== 비동기 I/O (일괄 작업용) =====
+    # 이벤트 루프 하나에서 페이지 내려받기 / 배치 번역 / 저장을 동시에 (동시 요청 수는 세마포어로 제한)
+    # 예: asyncio.run(translator.fetch_all_strings_async(file_id, stage))
+    
+    def paratranz_async(self, concurrency: int = None) -> AsyncParatranzClient:
+        """이 번역기의 키로 비동기 Paratranz 클라이언트 (async with로 사용)"""
+        return AsyncParatranzClient(
+            self.paratranz_key, PARATRANZ_BASE_URL, PROJECT_ID,
+            concurrency=concurrency or ASYNC_PARATRANZ_CONCURRENCY,
+            timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF
+        )
+    
+    def gemini_async(self, concurrency: int = None) -> AsyncGeminiClient:
+        """비동기 Gemini 클라이언트 (async with로 사용, 키/모델 분배는 self.gemini가 그대로 담당)"""
+        return AsyncGeminiClient(GEMINI_BASE_URL, pool_size=concurrency or ASYNC_GEMINI_CONCURRENCY,
+                                 timeout=GEMINI_TIMEOUT)
+    
+    async def fetch_all_strings_async(self, file_id: int, stage: Optional[int] = None) -> Optional[List[Dict]]:
+        """파일의 모든 문자열 (첫 페이지 뒤 나머지 페이지를 동시에 요청, 실패하면 None)"""
+        async with self.paratranz_async() as paratranz:
+            return await paratranz.fetch_all_strings(file_id, stage, STRINGS_PAGE_SIZE)
+    
+    async def _request_batch_async(self, gemini: AsyncGeminiClient, texts: list, examples=None,
+                                   ids: Optional[List[str]] = None, on_item=None,
+                                   max_retries=3) -> Optional[Dict[int, list]]:
+        """_request_batch의 비동기판 (한도 대기도 이벤트 루프에서)"""
+        call = _BatchCall(self, texts, ids, on_item)
         try:
-            string_id = string_data.get('id', string_data.get('key'))
-            project_id = PROJECT_ID
-            
-            url = f"{PARATRANZ_BASE_URL}/projects/{project_id}/strings/{string_id}"
-            
-            payload = {
-                "translation": translation,
-                "stage": 5 if as_review else 1
-            }
-            
-            response = requests.put(url, headers=self.headers, json=payload)
-            
-            if response.status_code in [200, 204]:
-                status = "검토로" if as_review else "저장"
-                print(f"✅ {status} 저장 완료!")
-                return True
+            options = call.prepare(examples, None, max_retries)
+            response = await self.gemini.generate_content_async(gemini, call.prompt, **options)
+            if call.stream:
+                async for chunk in response:
+                    call.feed(self._chunk_text(chunk))
             else:
-                print(f"[ERROR] 저장 실패: {response.status_code}")
-                print(f"응답: {response.text}")
-                
-                # 대안 시도: /strings/{id} (project 없이)
-                if response.status_code == 404:
-                    alt_url = f"{PARATRANZ_BASE_URL}/strings/{string_id}"
-                    
-                    alt_response = requests.put(alt_url, headers=self.headers, json=payload)
-                    
-                    if alt_response.status_code in [200, 204]:
-                        status = "검토로" if as_review else "저장"
-                        print(f"✅ {status} 저장 완료! (대안 경로)")
-                        return True
-                    else:
-                        print(f"[ERROR] 대안도 실패: {alt_response.status_code}")
-                        print(f"응답: {alt_response.text}")
-                
-                return False
-                
+                call.feed(response.text)
+            return call.finish(response)
         except Exception as e:
-            print(f"[ERROR] 저장 중 오류: {e}")
-            return False
+            return call.fail(e)
+    
+    async def translate_batch_async(self, gemini: AsyncGeminiClient, texts: list, max_retries=3, examples=None,
+                                    ids=None, on_item=None) -> Optional[List[list]]:
+        """translate_batch_with_gemini의 비동기판 (형식이 맞지 않은 항목 재요청 포함)"""
+        print(f"\n🤖 AI 배치 번역 중... ({len(texts)}개)")
+        
+        rounds = _BatchRounds(self, texts, ids, on_item)
+        for request in rounds.requests():
+            rounds.receive(await self._request_batch_async(gemini, examples=examples, max_retries=max_retries, **request))
+        return rounds.result()
+    
+    def plan_batches(self, strings: List[Dict]) -> List[List[Dict]]:
+        """문자열 목록을 토큰 예산에 맞는 배치로 나눔 (원문 없는 항목은 제외)"""
+        batches, current = [], []
+        plan = self.token_budget.plan(self.batch_prompt_overhead())
+        for string_data in strings:
+            original = string_data.get('original', string_data.get('key', ''))
+            if not original:
+                continue
+            if not plan.add(original):
+                batches.append(current)
+                current = []
+                plan = self.token_budget.plan(self.batch_prompt_overhead())
+                plan.add(original)
+            current.append(string_data)
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def translate_strings_async(self, strings: List[Dict],
+                                      concurrency: int = None) -> List[Tuple[Dict, Optional[list]]]:
+        """문자열 목록을 배치로 나눠 동시에 번역 → [(문자열, [번역1, 번역2] 또는 실패 시 None), ...] (입력 순서)"""
+        batches = self.plan_batches(strings)
+        semaphore = asyncio.Semaphore(concurrency or ASYNC_GEMINI_CONCURRENCY)
+        
+        async def translate(gemini, batch):
+            async with semaphore:
+                texts = [s.get('original', s.get('key', '')) for s in batch]
+                return await self.translate_batch_async(gemini, texts, ids=[s.get('id') for s in batch])
+        
+        async with self.gemini_async(concurrency) as gemini:
+            results = await asyncio.gather(*(translate(gemini, batch) for batch in batches))
+        return [
+            (string_data, translations[i] if translations else None)
+            for batch, translations in zip(batches, results) for i, string_data in enumerate(batch)
+        ]
+    
+    async def save_translations_async(self, items: List[Tuple[Dict, str]], as_review=False) -> List[bool]:
+        """여러 번역을 동시에 저장 [(문자열, 번역), ...] → 항목별 성공 여부 (입력 순서)"""
+        async with self.paratranz_async() as paratranz:
+            statuses = await paratranz.save_many(
+                (string_data.get('id', string_data.get('key')), translation, as_review)
+                for string_data, translation in items
+            )
+        return [status in (200, 204) for status in statuses]
     
     def run(self):
         """메인 루프"""
@@ -1076,8 +1388,8 @@ class ParatranzAPITranslator:
             print(f"   ⭐ 남은 횟수: {self.daily_limit - self.request_count}")
             
             # 절약 계산 (배치 번역으로 절약한 호출 수)
-            if self.translation_count > self.request_count:
-                saved = self.translation_count - self.request_count
+            if self.translation_count > self.session_requests:
+                saved = self.translation_count - self.session_requests
                 print(f"   💰 절약한 API 호출: {saved}번! (배치 번역 효과)")
             
         except KeyboardInterrupt:
@@ -1089,8 +1401,8 @@ class ParatranzAPITranslator:
             print(f"   ⭐ 남은 횟수: {self.daily_limit - self.request_count}")
             
             # 절약 계산
-            if self.translation_count > self.request_count:
-                saved = self.translation_count - self.request_count
+            if self.translation_count > self.session_requests:
+                saved = self.translation_count - self.session_requests
                 print(f"   💰 절약한 API 호출: {saved}번! (배치 번역 효과)")
         except Exception as e:
             print(f"\n[ERROR] {e}")
@@ -0,0 +1,146 @@
+"""
+분당 한도 예약 (슬라이딩 윈도 + 토큰 버킷)
+429를 받고 나서 기다리는 대신, 보내기 전에 분당 요청/토큰 한도를 계산해 보낼 시각을 정함
+
+- SlidingWindow: 최근 60초 동안 보낸 양의 합이 한도를 넘지 않게 함 (어느 1분 구간에서도 한도 이하)
+- TokenBucket: 초당 per_minute/60씩 채워지고 per_minute × burst까지 쌓임 → 한꺼번에 몰리는 양만 제한
+- MinuteLimit = 둘 다 만족하는 가장 이른 시각 → 오래 보내면 분당 한도를 다 쓰면서도 한도를 넘지 않음
+  (버킷만 쓰면 순간 허용량 + 60초 동안 채워지는 양만큼 1분에 보낼 수 있어 한도를 넘고,
+   순간 허용량을 빼고 채우면 계속 보낼 때 한도의 (1 - burst)밖에 못 씀)
+- reserve()는 지금 여유가 없어도 예약을 받고 기다릴 시간을 돌려줌 → 먼저 예약한 요청부터 순서대로 보내짐
+"""
+
+from collections import deque
+from typing import Optional
+
+DEFAULT_BURST = 0.5  # 분당 한도 중 한꺼번에 보낼 수 있는 비율
+WINDOW = 60.0  # 한도 구간 (초)
+
+
+class TokenBucket:
+    """순간 허용량 제한 (초당 per_minute/60씩 채워짐, capacity까지) - 호출하는 쪽의 잠금 안에서만 사용"""
+
+    def __init__(self, per_minute: float, burst: float = DEFAULT_BURST, now: float = 0.0):
+        burst = min(max(burst, 0.0), 1.0)
+        self.per_minute = per_minute
+        self.capacity = max(1.0, per_minute * burst)
+        self.rate = max(per_minute, 1.0) / WINDOW  # 초당 채워지는 양
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """amount를 쓸 수 있을 때까지 남은 시간 (초, 지금 가능하면 0)
+
+        capacity보다 큰 요청은 버킷이 가득 찼을 때 보냄 (수위가 음수가 되어 다음 요청이 그만큼 늦어짐)
+        """
+        self._refill(now)
+        need = min(amount, self.capacity)
+        if self.level >= need:
+            return 0.0
+        return (need - self.level) / self.rate
+
+    def reserve(self, amount: float, now: float) -> float:
+        """amount 예약 → 보내기까지 기다릴 시간 (초)"""
+        wait = self.delay(amount, now)
+        self.level -= amount
+        return wait
+
+    def refund(self, amount: float, now: Optional[float] = None):
+        """예약보다 덜 썼으면 돌려받고 (amount > 0), 더 썼으면 추가로 차감 (amount < 0)"""
+        if now is not None:
+            self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def available(self, now: float) -> float:
+        """남은 여유 비율 (0~1, 예약이 밀려 있으면 0)"""
+        self._refill(now)
+        return max(0.0, self.level) / self.capacity
+
+
+class SlidingWindow:
+    """최근 WINDOW초 동안 보낸 양의 합 ≤ limit (예약은 보낼 시각에 기록, 예약 순서대로)"""
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self._entries = deque()  # [보낼 시각, 양] (시각 순)
+
+    def _trim(self, now: float):
+        while self._entries and self._entries[0][0] <= now - WINDOW:
+            self._entries.popleft()
+
+    def delay(self, amount: float, now: float) -> float:
+        """amount를 보내도 구간 합이 limit 이하가 되는 가장 이른 시각까지 남은 시간 (초)
+
+        앞선 예약보다 먼저 보내지는 않음, limit보다 큰 요청은 구간이 비었을 때 보냄
+        """
+        self._trim(now)
+        at = max(now, self._entries[-1][0]) if self._entries else now
+        need = min(amount, self.limit)
+        total = sum(entry[1] for entry in self._entries)
+        for sent, used in self._entries:
+            if total + need <= self.limit:
+                break
+            total -= used
+            at = max(at, sent + WINDOW)  # 이 항목이 구간에서 빠지는 시각
+        return at - now
+
+    def record(self, amount: float, at: float):
+        self._entries.append([at, amount])
+
+    def adjust(self, amount: float, now: float):
+        """가장 최근에 보낸 항목의 양을 amount만큼 줄임 (음수면 늘림) - 예상과 실제 사용량 차이"""
+        target = None
+        for entry in reversed(self._entries):
+            target = entry
+            if entry[0] <= now:
+                break
+        if target is not None:
+            target[1] = max(0.0, target[1] - amount)
+
+    def used(self, now: float) -> Optional[float]:
+        """지금 구간에 든 양 (아직 보내지 않은 예약이 있으면 None)"""
+        self._trim(now)
+        if self._entries and self._entries[-1][0] > now:
+            return None
+        return sum(entry[1] for entry in self._entries)
+
+
+class MinuteLimit:
+    """분당 한도 하나 (요청 수 또는 토큰 수) = 슬라이딩 윈도 + 순간 허용량 버킷 - 호출하는 쪽의 잠금 안에서만 사용"""
+
+    def __init__(self, per_minute: float, burst: float = DEFAULT_BURST, now: float = 0.0):
+        self.per_minute = per_minute
+        self.bucket = TokenBucket(per_minute, burst, now)
+        self.window = SlidingWindow(per_minute)
+
+    def delay(self, amount: float, now: float) -> float:
+        """amount를 쓸 수 있을 때까지 남은 시간 (초, 지금 가능하면 0)"""
+        return max(self.bucket.delay(amount, now), self.window.delay(amount, now))
+
+    def reserve(self, amount: float, now: float, wait: float = 0.0) -> float:
+        """amount 예약 → 보내기까지 기다릴 시간 (초)
+
+        wait: 다른 한도 때문에 이미 정해진 최소 대기 (요청 수/토큰 수 한도를 같은 시각으로 기록)
+        """
+        # 구간 합은 시간이 갈수록 줄기만 하므로 늦은 시각이면 두 조건 모두 만족
+        wait = max(wait, self.delay(amount, now))
+        self.bucket.reserve(amount, now)
+        self.window.record(amount, now + wait)
+        return wait
+
+    def refund(self, amount: float, now: Optional[float] = None):
+        """예약보다 덜 썼으면 돌려받고 (amount > 0), 더 썼으면 추가로 차감 (amount < 0)"""
+        self.bucket.refund(amount, now)
+        self.window.adjust(amount, now if now is not None else float('inf'))
+
+    def available(self, now: float) -> float:
+        """남은 여유 비율 (0~1, 예약이 밀려 있으면 0)"""
+        used = self.window.used(now)
+        if used is None:
+            return 0.0
+        return min(self.bucket.available(now), max(0.0, 1 - used / self.per_minute))
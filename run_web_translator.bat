@@ -14,7 +14,7 @@ echo.
 
 REM Install required packages
 echo [1/2] Installing packages...
-pip install -q flask requests google-generativeai colorama pyngrok
+pip install -q flask requests colorama pyngrok waitress
 if %errorlevel% neq 0 (
     echo      Failed to install packages
     pause
@@ -0,0 +1,285 @@
+"""
+저장 대기열 (write-behind)
+/api/save는 로컬 SQLite 저널에 기록만 하고 즉시 다음 항목으로 넘어가며,
+백그라운드 워커가 Paratranz에 PUT (실패 시 재시도)
+
+- 서버가 재시작되어도 보내지 못한 저장은 저널에 남아 있다가 다시 전송됨
+- API 키는 디스크에 저장하지 않음 (키 해시만 기록)
+  → 재시작 후에는 같은 키로 접속한 사용자가 있어야 전송 재개
+- 같은 저널을 여러 프로세스가 열어도 됨: 작업은 한 번의 UPDATE로 가져가며 (소유자 + 임대 만료 시각 기록)
+  임대가 만료된 '전송 중' 작업만 다시 대기 상태로 돌림 (다른 프로세스가 보내는 중인 작업은 건드리지 않음)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from paratranz_api_translator import config, get_http_session, put_translation
+from usage_ledger import key_hash
+
+SAVE_QUEUE_CONFIG = config.get('save_queue', {})
+SAVE_QUEUE_DB = SAVE_QUEUE_CONFIG.get('db_file', 'paratranz_save_queue.db')
+SAVE_WORKERS = SAVE_QUEUE_CONFIG.get('workers', 2)
+SAVE_MAX_ATTEMPTS = SAVE_QUEUE_CONFIG.get('max_attempts', 5)
+SAVE_RETRY_DELAY = SAVE_QUEUE_CONFIG.get('retry_delay', 2)  # 재시도 간격 (시도마다 2배)
+SAVE_LEASE = SAVE_QUEUE_CONFIG.get('lease', 120)  # 전송 중 작업의 임대 시간 (초, 전송 타임아웃보다 길게)
+
+
+class SaveJob:
+    """저장 작업 한 건"""
+
+    def __init__(self, row):
+        self.id, self.key_hash, self.string_id, payload, self.session_id, self.attempts = row
+        payload = json.loads(payload)
+        self.translation = payload['translation']
+        self.as_review = payload['as_review']
+        self.original = payload.get('original')  # 번역 메모리 기록용
+        self.glossary_key = payload.get('glossary_key')
+        self.queue_key = payload.get('queue_key')  # 작업 대기열 키 (파일, 단계) - 완료 표시용
+        self.error = None  # 최종 실패 사유
+
+
+class SaveQueue:
+    """SQLite 저널 기반 저장 대기열 + 전송 워커"""
+
+    def __init__(self, db_path: str = SAVE_QUEUE_DB, workers: int = SAVE_WORKERS,
+                 max_attempts: int = SAVE_MAX_ATTEMPTS, retry_delay: float = SAVE_RETRY_DELAY,
+                 on_result: Optional[Callable[[SaveJob, bool], None]] = None, lease: float = SAVE_LEASE):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.on_result = on_result  # 전송 확정/최종 실패 시 호출 (job, success)
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"  # 이 대기열 인스턴스
+
+        # timeout: 다른 프로세스가 쓰는 중이면 잠시 기다림
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._db_lock = threading.Lock()
+        self._keys = {}  # key_hash → API 키 (메모리에만 보관)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+        with self._db_lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS saves (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key_hash TEXT NOT NULL,
+                    string_id INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    session_id TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    owner TEXT,
+                    lease_expires REAL
+                )
+            """)
+            # 이전 버전 저널에는 소유자/임대 열이 없음
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(saves)")}
+            if 'owner' not in columns:
+                self._db.execute("ALTER TABLE saves ADD COLUMN owner TEXT")
+                self._db.execute("ALTER TABLE saves ADD COLUMN lease_expires REAL")
+            self._db.execute("CREATE INDEX IF NOT EXISTS saves_status ON saves (status, next_attempt_at)")
+            # 전송 도중 종료된 작업 (임대 만료) 만 다시 대기 상태로 - 다른 프로세스가 보내는 중인 작업은 그대로
+            self._expire(time.time())
+            pending = self._db.execute("SELECT COUNT(*) FROM saves WHERE status = 'pending'").fetchone()[0]
+
+        if pending:
+            print(f"💾 저장 대기열: 재전송할 항목 {pending}개 (같은 API 키로 접속 시 전송)")
+
+        self._workers = [
+            threading.Thread(target=self._worker, daemon=True, name=f'save-worker-{i}')
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def register_key(self, api_key: str) -> str:
+        """API 키 등록 (이 키로 쌓인 저장을 전송할 수 있게 됨)"""
+        h = key_hash(api_key)
+        if h not in self._keys:
+            self._keys[h] = api_key
+            self._wakeup.set()
+        return h
+
+    def enqueue(self, api_key: str, string_id, translation: str, as_review: bool, session_id: str,
+                original: Optional[str] = None, glossary_key: Optional[str] = None,
+                queue_key: Optional[str] = None) -> int:
+        """저장 작업 추가 (즉시 반환)"""
+        h = self.register_key(api_key)
+        payload = json.dumps({
+            'translation': translation,
+            'as_review': as_review,
+            'original': original,
+            'glossary_key': glossary_key,
+            'queue_key': queue_key
+        }, ensure_ascii=False)
+        now = time.time()
+        with self._db_lock, self._db:
+            cur = self._db.execute(
+                "INSERT INTO saves (key_hash, string_id, payload, session_id, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (h, string_id, payload, session_id, now, now)
+            )
+        self._wakeup.set()
+        return cur.lastrowid
+
+    def counts(self, session_id: Optional[str] = None) -> dict:
+        """대기/실패 건수"""
+        query = "SELECT status, COUNT(*) FROM saves"
+        params = ()
+        if session_id is not None:
+            query += " WHERE session_id = ?"
+            params = (session_id,)
+        query += " GROUP BY status"
+        with self._db_lock:
+            rows = dict(self._db.execute(query, params).fetchall())
+        return {
+            'pending': rows.get('pending', 0) + rows.get('sending', 0),
+            'failed': rows.get('failed', 0)
+        }
+
+    def retry_failed(self, session_id: Optional[str] = None, string_id=None) -> int:
+        """실패한 저장 다시 시도 (string_id를 주면 그 항목만)"""
+        query = "UPDATE saves SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'failed'"
+        params = [time.time()]
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params.append(session_id)
+        if string_id is not None:
+            query += " AND string_id = ?"
+            params.append(string_id)
+        with self._db_lock, self._db:
+            count = self._db.execute(query, params).rowcount
+        self._wakeup.set()
+        return count
+
+    def _expire(self, now: float):
+        """임대가 만료된 전송 중 작업 → 대기 상태 (트랜잭션 안에서 호출, 임대 열이 없던 행도 만료로 봄)"""
+        self._db.execute(
+            "UPDATE saves SET status = 'pending', owner = NULL, lease_expires = NULL "
+            "WHERE status = 'sending' AND (lease_expires IS NULL OR lease_expires <= ?)",
+            (now,)
+        )
+
+    def _claim(self) -> Optional[SaveJob]:
+        """전송할 작업 하나 가져오기 (같은 문자열은 순서대로 하나씩)
+
+        고르기와 표시를 UPDATE ... RETURNING 한 문장으로, 처음부터 쓰기 잠금을 잡고 실행
+        → 같은 저널을 쓰는 다른 프로세스와 같은 작업을 두 번 가져가지 않음
+        """
+        if not self._keys:
+            return None
+        known = list(self._keys)
+        placeholders = ','.join('?' * len(known))
+        now = time.time()
+        with self._db_lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._expire(now)
+            row = self._db.execute(
+                "UPDATE saves SET status = 'sending', owner = ?, lease_expires = ? WHERE id = ("
+                "SELECT id FROM saves "
+                f"WHERE status = 'pending' AND next_attempt_at <= ? AND key_hash IN ({placeholders}) "
+                "AND string_id NOT IN (SELECT string_id FROM saves WHERE status = 'sending') "
+                "ORDER BY id LIMIT 1"
+                ") RETURNING id, key_hash, string_id, payload, session_id, attempts",
+                [self.owner, now + self.lease, now] + known
+            ).fetchone()
+        return SaveJob(row) if row else None
+
+    def _worker(self):
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+            self._send(job)
+
+    def _send(self, job: SaveJob):
+        http = get_http_session(self._keys[job.key_hash])
+        status_code = put_translation(http, job.string_id, job.translation, job.as_review)
+
+        if status_code in [200, 204]:
+            with self._db_lock, self._db:
+                # 임대가 만료되어 다른 워커가 다시 보냈다면 그쪽에서 이미 지웠음 → 결과 알림도 한 번만
+                deleted = self._db.execute("DELETE FROM saves WHERE id = ?", (job.id,)).rowcount
+            if deleted:
+                self._notify(job, True)
+            return
+
+        attempts = job.attempts + 1
+        # 4xx(429 제외)는 다시 보내도 실패 → 바로 실패 처리
+        permanent = status_code is not None and 400 <= status_code < 500 and status_code not in [408, 429]
+        error = f"HTTP {status_code}" if status_code is not None else "네트워크 오류"
+
+        failed = permanent or attempts >= self.max_attempts
+        with self._db_lock, self._db:
+            # 임대를 잃었으면 (만료 후 다른 워커가 가져감) 결과를 기록하지 않음
+            if failed:
+                owned = self._db.execute(
+                    "UPDATE saves SET status = 'failed', attempts = ?, last_error = ?, owner = NULL, lease_expires = NULL "
+                    "WHERE id = ? AND owner = ? AND status = 'sending'",
+                    (attempts, error, job.id, self.owner)
+                ).rowcount
+            else:
+                delay = self.retry_delay * (2 ** (attempts - 1))
+                owned = self._db.execute(
+                    "UPDATE saves SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ?, "
+                    "owner = NULL, lease_expires = NULL WHERE id = ? AND owner = ? AND status = 'sending'",
+                    (attempts, error, time.time() + delay, job.id, self.owner)
+                ).rowcount
+        if not owned:
+            return
+
+        if failed:
+            print(f"❌ 항목 {job.string_id} 저장 최종 실패 ({error}, {attempts}회 시도)")
+            job.error = error
+            self._notify(job, False)
+        else:
+            print(f"🔁 항목 {job.string_id} 저장 재시도 예정 ({error}, {attempts}/{self.max_attempts})")
+
+    def _notify(self, job: SaveJob, success: bool):
+        if self.on_result:
+            try:
+                self.on_result(job, success)
+            except Exception as e:
+                print(f"[ERROR] 저장 결과 처리 실패: {e}")
+
+    def drain(self, timeout: float) -> int:
+        """종료 전 전송 - 보낼 수 있는 저장(등록된 키)이 없어지거나 timeout초가 지날 때까지 대기 → 남은 건수
+        (남은 저장은 저널에 그대로 있다가 재시작 후 전송)"""
+        deadline = time.time() + timeout
+        while True:
+            remaining = self._sendable()
+            if not remaining or time.time() >= deadline:
+                return remaining
+            self._wakeup.set()
+            time.sleep(0.1)
+
+    def _sendable(self) -> int:
+        """이 프로세스가 전송할 수 있는 대기/전송 중 건수"""
+        known = list(self._keys)
+        if not known:
+            return 0
+        placeholders = ','.join('?' * len(known))
+        with self._db_lock:
+            return self._db.execute(
+                f"SELECT COUNT(*) FROM saves WHERE status IN ('pending', 'sending') AND key_hash IN ({placeholders})",
+                known
+            ).fetchone()[0]
+
+    def stop(self, wait: float = 0):
+        """워커 중지 (wait초까지 전송 중인 작업이 끝나기를 기다림)"""
+        self._stop.set()
+        self._wakeup.set()
+        deadline = time.time() + wait
+        for worker in self._workers:
+            worker.join(max(0, deadline - time.time()))
@@ -0,0 +1,217 @@
+"""
+세션 레지스트리
+X-Session-ID별로 번역기/커서/배치를 따로 보관 (동시 작업자끼리 상태가 섞이지 않도록)
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from paratranz_api_translator import ParatranzAPITranslator
+
+
+class SessionLimitError(Exception):
+    """최대 세션 수에 도달했고 모든 세션이 작업 중 (정리할 수 있는 세션이 없음)"""
+
+
+class ReviewSession:
+    """작업자 한 명의 번역 상태"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.translator = None
+        self.translator_keys = None  # (paratranz_key, gemini_key, model) - 바뀔 때만 번역기 재생성
+        self.prefetcher = None  # BatchPrefetcher
+        self.work_key = None  # 작업 중인 대기열 키 (파일, 단계)
+        self.batch_data = []
+        self.batch_translations = []
+        self.batch_memory_hits = []  # 항목별 번역 메모리 적중 여부
+        self.batch_similar = []  # 항목별 비슷한 과거 번역
+        self.batch_source = None  # PreparedBatch (스트리밍 중인 번역 대기용)
+        self.item_index = 0
+        self.items_served = 0  # 지금까지 받은 항목 수
+        self.memory_hits = 0  # 그중 번역 메모리에서 가져온 수
+        self.response_seq = 0  # 항목 응답 번호 (HTTP 응답과 푸시 이벤트 중복 표시 방지)
+        self.last_active = time.time()
+        self.mutex = threading.RLock()  # 같은 세션의 요청만 직렬화
+
+    def get_translator(self, paratranz_key: str, gemini_key: str, model_name: str) -> ParatranzAPITranslator:
+        """API 키가 같으면 기존 번역기 재사용"""
+        keys = (paratranz_key, gemini_key, model_name)
+        if self.translator is None or self.translator_keys != keys:
+            self.translator = ParatranzAPITranslator(
+                paratranz_key=paratranz_key,
+                gemini_key=gemini_key,
+                model_name=model_name
+            )
+            self.translator_keys = keys
+        return self.translator
+
+    def set_batch(self, batch_data, batch_translations, memory_hits=None, similar=None, source=None):
+        self.batch_data = batch_data
+        self.batch_translations = batch_translations  # 스트리밍 중이면 아직 None인 항목이 있음
+        self.batch_source = source
+        self.batch_memory_hits = memory_hits or [False] * len(batch_data)
+        self.batch_similar = similar or [[] for _ in batch_data]
+        self.item_index = 0
+        self.items_served += len(batch_data)
+        self.memory_hits += sum(self.batch_memory_hits)
+
+    def wait_translation(self, timeout: float) -> bool:
+        """현재 항목의 번역이 도착할 때까지 대기 (스트리밍 응답)
+
+        Gemini 요청이 분당 한도로 미뤄져 있으면 기다리지 않음 → 화면에 ETA 표시
+        """
+        if self.batch_translations[self.item_index] is not None:
+            return True
+        if self.batch_source is None or self.batch_source.eta() is not None:
+            return False
+        return self.batch_source.wait_item(self.item_index, timeout)
+
+    def translation_eta(self) -> Optional[int]:
+        """현재 배치의 Gemini 요청을 보내기까지 남은 시간 (초, 대기 중이 아니면 None)"""
+        eta = self.batch_source.eta() if self.batch_source is not None else None
+        return int(eta) + 1 if eta is not None else None
+
+    @property
+    def busy(self) -> bool:
+        """번역 작업 중 (프리페치 중이거나 아직 처리하지 않은 항목이 있음) → 한도 초과로 정리하지 않음"""
+        return self.prefetcher is not None or self.item_index < len(self.batch_data)
+
+    def next_seq(self) -> int:
+        self.response_seq += 1
+        return self.response_seq
+
+    def current_item(self):
+        """현재 항목 (배치를 다 썼으면 None)"""
+        if self.item_index >= len(self.batch_data):
+            return None
+        return self.batch_data[self.item_index]
+
+    def close(self, unlock_fn: Callable[[List[int], str], object]):
+        """세션 정리: 프리페치 중단 + 저장되지 않은 항목 잠금 해제"""
+        with self.mutex:
+            if self.prefetcher:
+                self.prefetcher.close()
+                self.prefetcher = None
+            unlock_fn([string_data.get('id') for string_data in self.batch_data[self.item_index:]], self.session_id)
+            self.batch_data = []
+            self.batch_translations = []
+            self.batch_source = None
+            self.item_index = 0
+
+
+class SessionRegistry:
+    """세션 보관소 (유휴 세션 자동 정리 + 최대 세션 수 제한)
+
+    세션 정리(프리페치 중단, 잠금 반납)는 요청 스레드가 아니라 정리 스레드에서 실행
+    - 유휴 세션은 sweep_interval마다 찾아서 정리
+    - 한도에 도달하면 작업 중이 아닌 세션 중 가장 오래 안 쓴 세션을 정리 대기열로 (없으면 SessionLimitError)
+    """
+
+    def __init__(self, unlock_fn: Callable[[List[int], str], object], idle_timeout: float = 1800,
+                 max_sessions: int = 100, sweep_interval: float = 60):
+        self.unlock_fn = unlock_fn
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()  # 최근 사용 순 (LRU)
+        self._mutex = threading.Lock()
+        self._closing = queue.Queue()  # 정리할 세션 (None은 정리 스레드 깨우기용)
+        self._stop = threading.Event()
+        self._sweeper = threading.Thread(target=self._sweep_loop, daemon=True, name='session-sweeper')
+        self._sweeper.start()
+
+    def get(self, session_id: str) -> ReviewSession:
+        """세션 가져오기 (없으면 생성, 한도에 도달했는데 모든 세션이 작업 중이면 SessionLimitError)"""
+        with self._mutex:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions and not self._evict_one():
+                    raise SessionLimitError(f"동시 작업자가 최대 {self.max_sessions}명입니다. 잠시 후 다시 시도하세요.")
+                session = ReviewSession(session_id)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_active = time.time()
+        return session
+
+    def find(self, session_id: str) -> Optional[ReviewSession]:
+        """세션 조회 (없으면 None, 새로 만들지 않음)"""
+        with self._mutex:
+            return self._sessions.get(session_id)
+
+    def _evict_one(self) -> bool:
+        """작업 중이 아닌 세션 중 가장 오래 안 쓴 세션을 정리 스레드로 넘김 (_mutex 보유 상태에서 호출)"""
+        for sid, session in self._sessions.items():
+            if not session.busy:
+                del self._sessions[sid]
+                self._closing.put(session)
+                return True
+        return False
+
+    def sweep(self) -> int:
+        """유휴 세션 정리 (정리 스레드가 sweep_interval마다 호출) → 정리한 세션 수"""
+        with self._mutex:
+            now = time.time()
+            idle = [sid for sid, s in self._sessions.items() if now - s.last_active > self.idle_timeout]
+            evicted = [self._sessions.pop(sid) for sid in idle]
+        for session in evicted:
+            print(f"🧹 세션 {session.session_id[:8]} 정리 (유휴)")
+            self._close(session)
+        return len(evicted)
+
+    def close_all(self):
+        """모든 세션 정리 (서버 종료 시) - 정리 스레드를 멈추고 남은 세션을 바로 정리"""
+        self._stop.set()
+        self._closing.put(None)
+        self._sweeper.join(5)
+        with self._mutex:
+            closing = list(self._sessions.values())
+            self._sessions.clear()
+        for session in closing + self._drain():
+            self._close(session)
+        return len(closing)
+
+    def _sweep_loop(self):
+        next_sweep = time.time() + self.sweep_interval
+        while not self._stop.is_set():
+            wait = next_sweep - time.time()
+            if wait <= 0:
+                self.sweep()
+                next_sweep = time.time() + self.sweep_interval
+                continue
+            try:
+                session = self._closing.get(timeout=wait)
+            except queue.Empty:
+                continue
+            if session is not None:
+                print(f"🧹 세션 {session.session_id[:8]} 정리 (한도 초과)")
+                self._close(session)
+
+    def _drain(self) -> List[ReviewSession]:
+        """정리 대기열에 남은 세션 꺼내기"""
+        sessions = []
+        while True:
+            try:
+                session = self._closing.get_nowait()
+            except queue.Empty:
+                return sessions
+            if session is not None:
+                sessions.append(session)
+
+    def _close(self, session: ReviewSession):
+        try:
+            prefetcher = session.prefetcher
+            if prefetcher:
+                # 배치를 기다리는 요청(세션 mutex를 잡고 있음)부터 깨움
+                prefetcher.close()
+            session.close(self.unlock_fn)
+        except Exception as e:
+            print(f"⚠️ 세션 {session.session_id[:8]} 정리 실패: {e}")
+
+    def __len__(self):
+        with self._mutex:
+            return len(self._sessions)
@@ -0,0 +1,224 @@
+"""
+로컬 문자열 캐시 (SQLite)
+프로젝트의 파일/문자열을 로컬에 보관하고, 바뀐 파일만 다시 받아오는 증분 동기화
+
+- 파일 목록 1회 요청으로 각 파일의 변경 여부 확인 (수정 시각 + 문자열 수 비교)
+- 바뀌지 않은 파일은 API 요청 없이 캐시에서 바로 시작
+- 우리가 저장한 번역은 저장 확인 시점에 캐시에도 반영
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from paratranz_api_translator import config, PROJECT_ID
+from string_stream import RelayStringStream, StringStream
+
+CACHE_CONFIG = config.get('cache', {})
+CACHE_DB = CACHE_CONFIG.get('db_file', 'paratranz_cache.db')
+FILES_TTL = CACHE_CONFIG.get('files_ttl', 60)  # 파일 목록 화면용 캐시 유효 시간 (초)
+START_CHECK_AGE = CACHE_CONFIG.get('start_check_age', 10)  # 번역 시작 시 이보다 오래된 목록이면 다시 확인 (초)
+
+# 파일이 바뀌었는지 판단할 때 비교하는 필드
+# (번역/검토 진행 카운터는 우리 저장으로도 바뀜 → 비교하면 작업 중인 파일을 매번 다시 받게 됨)
+SIGNATURE_FIELDS = ['modifiedAt', 'updatedAt', 'total', 'hidden']
+
+
+def file_signature(file: dict) -> str:
+    return json.dumps({k: file.get(k) for k in SIGNATURE_FIELDS}, sort_keys=True)
+
+
+class StringCache:
+    """프로젝트별 파일/문자열 캐시"""
+
+    def __init__(self, db_path: str = CACHE_DB, project_id: int = PROJECT_ID):
+        self.project_id = project_id
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._files_fetched_at = 0
+        self._refreshing = set()  # 갱신 중인 file_id
+        self._refresh_lock = threading.Lock()
+
+        with self._db_lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    project_id INTEGER NOT NULL,
+                    file_id INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    signature TEXT NOT NULL,
+                    synced_signature TEXT,
+                    synced_at REAL,
+                    PRIMARY KEY (project_id, file_id)
+                )
+            """)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS strings (
+                    project_id INTEGER NOT NULL,
+                    string_id INTEGER NOT NULL,
+                    file_id INTEGER NOT NULL,
+                    key TEXT,
+                    original TEXT,
+                    translation TEXT,
+                    stage INTEGER,
+                    context TEXT,
+                    updated_at TEXT,
+                    PRIMARY KEY (project_id, string_id)
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS strings_file_stage ON strings (project_id, file_id, stage, string_id)")
+
+    # ===== 파일 목록 =====
+
+    def get_files(self, translator, max_age: float = FILES_TTL) -> Optional[List[Dict]]:
+        """파일 목록 (max_age초 안에 받아온 적 있으면 캐시 사용)"""
+        if time.time() - self._files_fetched_at > max_age:
+            files = translator.fetch_files()
+            if files is None:
+                cached = self._cached_files()
+                return cached or None
+            self._store_files(files)
+            self._files_fetched_at = time.time()
+            return files
+        return self._cached_files()
+
+    def _store_files(self, files: List[Dict]):
+        with self._db_lock, self._db:
+            for file in files:
+                self._db.execute(
+                    "INSERT INTO files (project_id, file_id, data, signature) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (project_id, file_id) DO UPDATE SET data = excluded.data, signature = excluded.signature",
+                    (self.project_id, file.get('id'), json.dumps(file, ensure_ascii=False), file_signature(file))
+                )
+
+    def _cached_files(self) -> List[Dict]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT data FROM files WHERE project_id = ? ORDER BY file_id", (self.project_id,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # ===== 문자열 =====
+
+    def is_fresh(self, file_id) -> bool:
+        """캐시된 문자열이 현재 파일 상태와 일치하는지"""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT signature, synced_signature FROM files WHERE project_id = ? AND file_id = ?",
+                (self.project_id, file_id)
+            ).fetchone()
+        return row is not None and row[0] == row[1]
+
+    def refresh_file(self, translator, file_id) -> bool:
+        """파일의 전체 문자열 다시 받아오기 (병렬 페이지 다운로드)"""
+        if not self._begin_refresh(file_id):
+            return False
+        return self._refresh(translator, file_id)
+
+    def refresh_file_async(self, translator, file_id):
+        threading.Thread(target=self.refresh_file, args=(translator, file_id), daemon=True).start()
+
+    def refresh_stream(self, translator, file_id, stage: Optional[int]) -> Optional[RelayStringStream]:
+        """파일 전체를 다시 받아 캐시에 넣으면서 그중 stage 항목을 바로 넘겨주는 스트림 (이미 갱신 중이면 None)"""
+        if not self._begin_refresh(file_id):
+            return None
+        relay = RelayStringStream(stage)
+        threading.Thread(target=self._refresh, args=(translator, file_id, relay), daemon=True).start()
+        return relay
+
+    def _begin_refresh(self, file_id) -> bool:
+        with self._refresh_lock:
+            if file_id in self._refreshing:
+                return False
+            self._refreshing.add(file_id)
+            return True
+
+    def _refresh(self, translator, file_id, relay: Optional[RelayStringStream] = None) -> bool:
+        """(_begin_refresh 후) 전체 문자열을 받아 캐시 교체, relay가 있으면 받는 대로 넘겨줌"""
+        failed = True
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT signature FROM files WHERE project_id = ? AND file_id = ?",
+                    (self.project_id, file_id)
+                ).fetchone()
+            signature = row[0] if row else None
+
+            print(f"🗄️  파일 {file_id} 캐시 갱신 중...")
+            stream = StringStream(translator, file_id, None)
+            stream.start()
+            strings = []
+            while True:
+                string_data = stream.next()
+                if string_data is None:
+                    break
+                strings.append(string_data)
+                if relay is not None:
+                    relay.put(string_data)
+
+            failed = stream.failed
+            if failed:
+                print(f"[ERROR] 파일 {file_id} 캐시 갱신 실패")
+                return False
+
+            with self._db_lock, self._db:
+                self._db.execute(
+                    "DELETE FROM strings WHERE project_id = ? AND file_id = ?", (self.project_id, file_id)
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO strings "
+                    "(project_id, string_id, file_id, key, original, translation, stage, context, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (self.project_id, s.get('id'), file_id, s.get('key'), s.get('original'),
+                         s.get('translation'), s.get('stage'), s.get('context'), s.get('updatedAt'))
+                        for s in strings
+                    ]
+                )
+                self._db.execute(
+                    "UPDATE files SET synced_signature = ?, synced_at = ? WHERE project_id = ? AND file_id = ?",
+                    (signature, time.time(), self.project_id, file_id)
+                )
+            print(f"🗄️  파일 {file_id} 캐시 갱신 완료 ({len(strings)}개)")
+            return True
+        finally:
+            if relay is not None:
+                relay.finish(failed)
+            with self._refresh_lock:
+                self._refreshing.discard(file_id)
+
+    def load_strings(self, file_id, stage: Optional[int] = None) -> List[Dict]:
+        """캐시된 문자열 (Paratranz 응답과 같은 형태)"""
+        query = ("SELECT string_id, key, original, translation, stage, context, updated_at FROM strings "
+                 "WHERE project_id = ? AND file_id = ?")
+        params = [self.project_id, file_id]
+        if stage is not None:
+            query += " AND stage = ?"
+            params.append(stage)
+        query += " ORDER BY string_id"
+        with self._db_lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [
+            {'id': r[0], 'key': r[1], 'original': r[2], 'translation': r[3],
+             'stage': r[4], 'context': r[5], 'updatedAt': r[6]}
+            for r in rows
+        ]
+
+    def stage_counts(self, file_id) -> Dict[int, int]:
+        """단계별 문자열 수 (캐시 기준)"""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT stage, COUNT(*) FROM strings WHERE project_id = ? AND file_id = ? GROUP BY stage",
+                (self.project_id, file_id)
+            ).fetchall()
+        return dict(rows)
+
+    def update_string(self, string_id, translation: str, stage: int):
+        """저장 확인된 번역을 캐시에 반영"""
+        with self._db_lock, self._db:
+            self._db.execute(
+                "UPDATE strings SET translation = ?, stage = ? WHERE project_id = ? AND string_id = ?",
+                (translation, stage, self.project_id, string_id)
+            )
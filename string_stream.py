@@ -0,0 +1,217 @@
+"""
+파일 전체 문자열 스트림
+첫 페이지를 받자마자 항목을 내보내고, 나머지 페이지는 병렬로 내려받아 순서대로 이어 붙임
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+from paratranz_api_translator import STRINGS_PAGE_SIZE, FETCH_WORKERS
+
+_FAILED = object()  # 다운로드 실패한 페이지 표시
+
+
+class StringStream:
+    """파일의 (stage 필터된) 문자열을 페이지 순서대로 하나씩 꺼내는 스트림"""
+
+    def __init__(self, translator, file_id, stage, page_size: int = STRINGS_PAGE_SIZE,
+                 workers: int = FETCH_WORKERS):
+        self.translator = translator
+        self.file_id = file_id
+        self.stage = stage
+        self.page_size = page_size
+        self.workers = max(1, workers)
+
+        self.total = None  # 전체 항목 수 (첫 페이지 응답 후 확정)
+        self.page_count = None  # 전체 페이지 수 (모르면 빈 페이지가 나올 때까지)
+        self.failed = False
+
+        self._pages = {}  # page → 문자열 목록 (소비한 페이지는 삭제)
+        self._cond = threading.Condition()
+        self._next_page = 1  # 소비 중인 페이지
+        self._pos = 0  # 소비 중인 페이지 안의 위치
+        self._closed = False
+
+    def start(self):
+        """백그라운드 다운로드 시작"""
+        threading.Thread(target=self._download, daemon=True, name='string-stream').start()
+
+    def _fetch(self, page: int):
+        try:
+            return self.translator.fetch_strings_page(self.file_id, self.stage, page, self.page_size)
+        except Exception as e:
+            print(f"[ERROR] 페이지 {page} 가져오기 실패: {e}")
+            return None
+
+    def _store(self, page: int, results):
+        with self._cond:
+            if self._closed:
+                return
+            self._pages[page] = results
+            self._cond.notify_all()
+
+    def _download(self):
+        first = self._fetch(1)
+        if first is None:
+            with self._cond:
+                self.failed = True
+                self.page_count = 0
+                self._cond.notify_all()
+            return
+
+        with self._cond:
+            self.total = first['rowCount']
+            self.page_count = first['pageCount']
+        self._store(1, first['results'])
+        print(f"📥 첫 페이지 {len(first['results'])}개 로드 (전체 {self.total if self.total is not None else '?'}개)")
+
+        if self.page_count is None:
+            self._download_sequential(first['results'])
+        elif self.page_count > 1:
+            self._download_parallel()
+
+    def _download_parallel(self):
+        """2페이지부터 끝까지 동시에 내려받기"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='string-fetch') as executor:
+            futures = {
+                executor.submit(self._fetch, page): page
+                for page in range(2, self.page_count + 1)
+            }
+            for future in as_completed(futures):
+                data = future.result()
+                if data is None:
+                    self.failed = True
+                    self._store(futures[future], _FAILED)
+                else:
+                    self._store(futures[future], data['results'])
+        print(f"📥 전체 {self.page_count}페이지 다운로드 완료")
+
+    def _download_sequential(self, results):
+        """페이지 수를 알 수 없는 응답: 빈 페이지가 나올 때까지 차례로"""
+        page = 1
+        while results and not self._closed:
+            page += 1
+            data = self._fetch(page)
+            if data is None:
+                self.failed = True
+                results = []
+            else:
+                results = data['results']
+            self._store(page, results if data is not None else _FAILED)
+        with self._cond:
+            self.page_count = page
+            self._cond.notify_all()
+
+    def next(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """다음 문자열 (더 이상 없으면 None)"""
+        with self._cond:
+            while not self._closed:
+                if self.page_count is not None and self._next_page > self.page_count:
+                    return None
+                if self._next_page not in self._pages:
+                    # 아직 다운로드 중
+                    if not self._cond.wait(timeout):
+                        return None
+                    continue
+                results = self._pages[self._next_page]
+                if results is _FAILED:
+                    print(f"[ERROR] 페이지 {self._next_page} 다운로드 실패 → 여기서 중단")
+                    return None
+                if self._pos < len(results):
+                    item = results[self._pos]
+                    self._pos += 1
+                    return item
+                # 페이지 소진 → 메모리 해제 후 다음 페이지
+                del self._pages[self._next_page]
+                self._next_page += 1
+                self._pos = 0
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._pages.clear()
+            self._cond.notify_all()
+
+
+class ListStringStream:
+    """이미 가지고 있는 문자열 목록(로컬 캐시)을 StringStream과 같은 방식으로 꺼내는 스트림"""
+
+    def __init__(self, strings):
+        self._items = deque(strings)
+        self.total = len(self._items)
+        self.page_count = 1
+        self.failed = False
+
+    def start(self):
+        pass
+
+    def next(self, timeout: Optional[float] = None) -> Optional[dict]:
+        try:
+            return self._items.popleft()
+        except IndexError:
+            return None
+
+    def close(self):
+        self._items.clear()
+
+
+class RelayStringStream:
+    """다른 스레드가 넣어 주는 문자열을 StringStream과 같은 방식으로 꺼내는 스트림
+
+    캐시 갱신이 파일 전체를 내려받는 동안 그중 stage 항목만 바로 넘겨받음 (같은 파일을 두 번 받지 않도록)
+    """
+
+    def __init__(self, stage=None):
+        self.stage = stage
+        self.total = None  # 넘겨받은 항목 수 (끝나야 확정)
+        self.page_count = None
+        self.failed = False
+
+        self._items = deque()
+        self._count = 0
+        self._cond = threading.Condition()
+        self._done = False
+        self._closed = False
+
+    def start(self):
+        pass
+
+    def put(self, string_data: dict):
+        """(갱신 스레드) 받은 문자열 하나 - stage가 다르면 버림"""
+        if self.stage is not None and string_data.get('stage') != self.stage:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            self._items.append(string_data)
+            self._count += 1
+            self._cond.notify_all()
+
+    def finish(self, failed: bool = False):
+        """(갱신 스레드) 다운로드 끝"""
+        with self._cond:
+            self.failed = failed
+            self.total = self._count
+            self.page_count = 1
+            self._done = True
+            self._cond.notify_all()
+
+    def next(self, timeout: Optional[float] = None) -> Optional[dict]:
+        with self._cond:
+            while not self._closed:
+                if self._items:
+                    return self._items.popleft()
+                if self._done:
+                    return None
+                if not self._cond.wait(timeout):
+                    return None
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._cond.notify_all()
@@ -0,0 +1,8 @@
+"""테스트 공통 - 저장소 루트의 모듈과 설정 파일을 불러올 수 있게"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # translator_config.json은 현재 디렉터리에서 읽음
@@ -0,0 +1,190 @@
+"""비동기 Paratranz/Gemini 클라이언트 - 모의 서버(mock_servers)에 실제 HTTP로 요청"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from async_clients import AsyncGeminiClient, AsyncParatranzClient
+from gemini_client import GeminiError
+from mock_servers import MockGemini, MockParatranz
+
+STRINGS = 250
+PAGE_SIZE = 100
+
+
+class FlakyParatranz(MockParatranz):
+    """처음 fail번의 요청은 503으로 답하는 모의 Paratranz"""
+
+    def __init__(self, fail: int, **kwargs):
+        super().__init__(**kwargs)
+        self.fail = fail
+
+    def route(self, handler, method, path, body):
+        with self._lock:
+            failing = self.fail > 0
+            self.fail -= 1
+        if failing:
+            self.count('503')
+            handler.send_json(503, {'message': 'busy'})
+            return
+        super().route(handler, method, path, body)
+
+
+@pytest.fixture
+def paratranz():
+    server = MockParatranz(port=0, files=1, strings=STRINGS).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope='module')
+def gemini():
+    server = MockGemini(port=0).start()
+    yield server
+    server.stop()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def paratranz_client(server, **kwargs):
+    return AsyncParatranzClient('test-key', server.base_url, 1, **kwargs)
+
+
+def test_fetch_files(paratranz):
+    async def scenario():
+        async with paratranz_client(paratranz) as client:
+            return await client.fetch_files()
+
+    files = run(scenario())
+    assert [f['id'] for f in files] == [1]
+
+
+def test_fetch_all_strings_keeps_page_order(paratranz):
+    async def scenario():
+        async with paratranz_client(paratranz) as client:
+            return await client.fetch_all_strings(1, 0, PAGE_SIZE)
+
+    strings = run(scenario())
+    assert [s['id'] for s in strings] == list(range(1, STRINGS + 1))
+    assert paratranz.stats['strings'] == 3  # 첫 페이지 + 나머지 2페이지
+
+
+def test_fetch_page_filters_stage(paratranz):
+    paratranz.strings[1]['stage'] = 1
+
+    async def scenario():
+        async with paratranz_client(paratranz) as client:
+            return await client.fetch_strings_page(1, 0, 1, PAGE_SIZE)
+
+    page = run(scenario())
+    assert page['rowCount'] == STRINGS - 1
+    assert page['pageCount'] == 3
+    assert page['results'][0]['id'] == 2
+
+
+def test_save_many_returns_statuses_in_order(paratranz):
+    async def scenario():
+        async with paratranz_client(paratranz, concurrency=4) as client:
+            return await client.save_many([(i, f'번역 {i}', i % 2 == 0) for i in range(1, 41)] + [(99999, 'x', False)])
+
+    statuses = run(scenario())
+    assert statuses == [200] * 40 + [404]
+    assert len(paratranz.saves) == 40
+    assert paratranz.strings[2]['stage'] == 5  # 검토 저장
+    assert (paratranz.strings[3]['translation'], paratranz.strings[3]['stage']) == ('번역 3', 1)
+
+
+def test_retries_busy_responses():
+    server = FlakyParatranz(fail=2, port=0, files=1, strings=10).start()
+    try:
+        async def scenario():
+            async with paratranz_client(server, retries=3, backoff=0.01) as client:
+                return await client.fetch_strings_page(1, 0, 1, PAGE_SIZE)
+
+        page = run(scenario())
+        assert len(page['results']) == 10
+        assert server.stats['503'] == 2
+    finally:
+        server.stop()
+
+
+def test_gives_up_after_retries():
+    server = FlakyParatranz(fail=10, port=0, files=1, strings=10).start()
+    try:
+        async def scenario():
+            async with paratranz_client(server, retries=1, backoff=0.01) as client:
+                return await client.fetch_strings_page(1, 0, 1, PAGE_SIZE)
+
+        assert run(scenario()) is None
+        assert server.stats['503'] == 2
+    finally:
+        server.stop()
+
+
+def batch_prompt(items):
+    return '\n'.join(json.dumps({'id': key, 'text': text}, ensure_ascii=False) + ',' for key, text in items)
+
+
+def test_generate(gemini):
+    usage = []
+
+    async def scenario():
+        async with AsyncGeminiClient(gemini.base_url) as client:
+            return await client.generate('key', 'gemini-test', batch_prompt([('1', 'Brake'), ('2', 'Gear')]),
+                                         on_done=usage.append)
+
+    response = run(scenario())
+    assert [item['id'] for item in json.loads(response.text)] == ['1', '2']
+    assert json.loads(response.text)[0]['t1'] == '[번역1] Brake'
+    assert usage and usage[0] is response.usage_metadata
+
+
+def test_generate_stream(gemini):
+    usage = []
+    items = [(str(i), f'Mock line {i}') for i in range(30)]
+
+    async def scenario():
+        async with AsyncGeminiClient(gemini.base_url) as client:
+            response = await client.generate('key', 'gemini-test', batch_prompt(items), stream=True,
+                                             on_done=usage.append)
+            chunks = [chunk.text async for chunk in response]
+            return response, chunks
+
+    response, chunks = run(scenario())
+    assert len(chunks) > 1  # 조각 여러 개로 도착
+    assert ''.join(chunks) == response.text
+    assert [item['id'] for item in json.loads(response.text)] == [key for key, _ in items]
+    assert usage == [response.usage_metadata] and usage[0] is not None
+
+
+def test_create_cached_content(gemini):
+    async def scenario():
+        async with AsyncGeminiClient(gemini.base_url) as client:
+            return await client.create_cached_content('key', 'gemini-test', '고정 지침', 600)
+
+    assert run(scenario()).startswith('cachedContents/')
+
+
+def test_error_status_raises(gemini):
+    async def scenario():
+        async with AsyncGeminiClient(gemini.base_url) as client:
+            await client.generate('', 'gemini-test', 'prompt')
+
+    with pytest.raises(GeminiError) as error:
+        run(scenario())
+    assert error.value.status == 403
+
+
+def test_network_error_raises():
+    async def scenario():
+        async with AsyncGeminiClient('http://127.0.0.1:9/v1beta', timeout=(1, 1)) as client:
+            await client.generate('key', 'gemini-test', 'prompt')
+
+    with pytest.raises(GeminiError) as error:
+        run(scenario())
+    assert error.value.status is None
@@ -0,0 +1,122 @@
+"""json_stream / batch_parser - 응답을 여러 조각으로 나눠 넣어도 같은 항목이 같은 시점에 나오는지"""
+
+import json
+
+import pytest
+
+from batch_parser import BatchResponseParser
+from json_stream import JsonArrayStream
+
+ITEMS = [
+    {'id': '1', 't1': '안녕, [세계]', 't2': '{중괄호} "따옴표"'},
+    {'id': '2', 't1': '줄\n바꿈', 't2': '역슬래시 \\ 끝'},
+    {'id': '3', 't1': '쉼표, 쉼표,', 't2': ']닫는 괄호['},
+]
+RESPONSE = '```json\n' + json.dumps(ITEMS, ensure_ascii=False, indent=2) + '\n```'
+
+
+def feed_all(stream, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(stream.feed(chunk))
+    return items
+
+
+def split_at(text, *points):
+    bounds = [0, *points, len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_whole_response():
+    stream = JsonArrayStream()
+    assert stream.feed(RESPONSE) == ITEMS
+    assert stream.done and stream.errors == 0
+
+
+def test_every_two_way_split():
+    for point in range(len(RESPONSE) + 1):
+        stream = JsonArrayStream()
+        assert feed_all(stream, split_at(RESPONSE, point)) == ITEMS, point
+
+
+def test_one_character_at_a_time():
+    stream = JsonArrayStream()
+    assert feed_all(stream, RESPONSE) == ITEMS
+
+
+def test_item_is_emitted_when_it_closes():
+    text = json.dumps(ITEMS, ensure_ascii=False)
+    first_end = text.index('}, {') + 1  # 첫 원소의 닫는 중괄호 (문자열 안의 } 말고)
+    stream = JsonArrayStream()
+    assert stream.feed(text[:first_end - 1]) == []  # 닫는 중괄호 전에는 아무것도 나오지 않음
+    assert stream.feed(text[first_end - 1:first_end]) == [ITEMS[0]]
+    assert stream.feed(text[first_end:]) == ITEMS[1:]
+
+
+def test_truncated_response_keeps_finished_items():
+    text = json.dumps(ITEMS, ensure_ascii=False)
+    cut = text.index('"id": "3"')
+    stream = JsonArrayStream()
+    assert stream.feed(text[:cut]) == ITEMS[:2]
+    assert not stream.done
+
+
+def test_broken_item_is_skipped():
+    stream = JsonArrayStream()
+    assert stream.feed('[{"id": "1", "t1": "a", "t2": "b"}, {"id": 2 oops}, {"id": "3", "t1": "c", "t2": "d"}]') == [
+        {'id': '1', 't1': 'a', 't2': 'b'}, {'id': '3', 't1': 'c', 't2': 'd'}
+    ]
+    assert stream.errors == 1
+
+
+def test_text_after_array_is_ignored():
+    stream = JsonArrayStream()
+    assert stream.feed('[{"id": "1"}] [{"id": "2"}]') == [{'id': '1'}]
+    assert stream.feed('{"id": "3"}') == []
+
+
+@pytest.mark.parametrize('point', range(0, 40, 3))
+def test_escape_split_across_chunks(point):
+    text = '[{"t1": "a\\"b\\\\"}, {"t1": "c"}]'
+    stream = JsonArrayStream()
+    assert feed_all(stream, split_at(text, min(point, len(text)))) == [{'t1': 'a"b\\'}, {'t1': 'c'}]
+
+
+def json_parser():
+    return BatchResponseParser(['1', '2', '3'], 'json')
+
+
+def test_json_parser_maps_ids_to_positions():
+    response = json.dumps([ITEMS[2], ITEMS[0], ITEMS[1]], ensure_ascii=False)
+    parser = json_parser()
+    ready = feed_all(parser, [response[i:i + 7] for i in range(0, len(response), 7)])
+    assert [idx for idx, _ in ready] == [2, 0, 1]
+    assert parser.results[1] == [ITEMS[1]['t1'].strip(), ITEMS[1]['t2'].strip()]
+
+
+def test_json_parser_drops_unknown_duplicate_and_empty():
+    parser = json_parser()
+    ready = parser.feed(json.dumps([
+        {'id': '9', 't1': 'x', 't2': 'y'},
+        {'id': '1', 't1': 'a', 't2': 'b'},
+        {'id': '1', 't1': 'again', 't2': 'again'},
+        {'id': '2', 't1': 'a', 't2': '  '},
+        {'id': '3', 't1': 'c'},
+    ]))
+    assert ready == [(0, ['a', 'b'])]
+    assert set(parser.results) == {0}
+
+
+def test_lines_parser_across_chunks():
+    parser = BatchResponseParser(['1', '2'], 'lines')
+    assert parser.feed('1-1: 첫 번') == []
+    assert parser.feed('역\n1-2: 둘째') == []  # 1-2 줄이 아직 끝나지 않음
+    assert parser.feed(' 번역\n2-2: 나') == [(0, ['첫 번역', '둘째 번역'])]
+    assert parser.feed('중\n2-1: 먼저') == []
+    assert parser.finish() == [(1, ['먼저', '나중'])]
+
+
+def test_lines_parser_ignores_out_of_range_and_noise():
+    parser = BatchResponseParser(['1'], 'lines')
+    assert parser.feed('설명 문장\n3-1: 범위 밖\n1-1: a\n1-1: 덮어씀\n1-2: b\n') == [(0, ['덮어씀', 'b'])]
+    assert parser.feed('1-1: 다시\n1-2: 다시\n') == []
@@ -0,0 +1,108 @@
+"""BatchPrefetcher - 배치 준비 중 오류가 나도 잠금이 남거나 세션이 번역을 영원히 기다리지 않는지"""
+
+import threading
+
+import pytest
+
+from batch_prefetcher import BatchPrefetcher
+from glossary_index import GlossaryIndex
+from token_budget import TokenBudget
+
+
+class ListStream:
+    def __init__(self, count: int):
+        self.items = [{'id': i, 'original': f"text {i}"} for i in range(1, count + 1)]
+
+    def next(self, timeout=None):
+        return self.items.pop(0) if self.items else None
+
+    def close(self):
+        pass
+
+
+class Translator:
+    """translate(texts, on_item) 로 동작을 바꾸는 가짜 번역기"""
+    glossary = {}
+    glossary_index = GlossaryIndex()
+
+    def __init__(self, translate):
+        self.token_budget = TokenBudget()
+        self.translate = translate
+
+    def batch_prompt_overhead(self) -> int:
+        return 0
+
+    def translate_batch_with_gemini(self, texts, on_item=None, **kwargs):
+        return self.translate(texts, on_item)
+
+
+class BrokenMemory:
+    def similar(self, text):
+        raise RuntimeError('memory')
+
+    def lookup(self, original, glossary, index):
+        return None
+
+
+def make_prefetcher(translate, count=3, memory=None):
+    released = []
+    prefetcher = BatchPrefetcher(
+        Translator(translate), ListStream(count), 'a', lock_fn=lambda ids, session: list(ids),
+        unlock_fn=lambda ids, session: released.extend(ids), memory=memory, depth=1
+    )
+    return prefetcher, released
+
+
+def wait_prepared(prefetcher):
+    """첫 예약 배치의 준비(워커)가 끝날 때까지"""
+    _, future = prefetcher._pending[0]
+    with pytest.raises(RuntimeError):
+        future.result(2)
+
+
+def test_translator_error_releases_locks():
+    def translate(texts, on_item):
+        raise RuntimeError('gemini')
+
+    prefetcher, released = make_prefetcher(translate)
+    prefetcher.start()
+    wait_prepared(prefetcher)
+    assert sorted(released) == [1, 2, 3]
+    batch = prefetcher.next_batch()
+    assert batch.status == 'failed' and batch.complete
+    prefetcher.close()
+
+
+def test_error_before_publish_releases_locks():
+    prefetcher, released = make_prefetcher(lambda texts, on_item: None, memory=BrokenMemory())
+    prefetcher.start()
+    wait_prepared(prefetcher)
+    assert sorted(released) == [1, 2, 3]
+    assert prefetcher.next_batch().status == 'failed'
+    prefetcher.close()
+
+
+def test_served_batch_is_finished_when_callback_fails():
+    gate = threading.Event()
+
+    def translate(texts, on_item):
+        gate.wait(2)
+        on_item(0, ['a', 'b'])  # 세션의 on_item 콜백이 오류를 냄
+        return [[t, t] for t in texts]
+
+    prefetcher, released = make_prefetcher(translate)
+    prefetcher.start()
+    batch = prefetcher.next_batch()
+    assert batch.served and not batch.complete
+
+    def broken(index, pair):
+        raise RuntimeError('push')
+
+    batch.watch(broken)
+    gate.set()
+    assert batch.wait_item(2, timeout=2)
+    assert batch.complete
+    assert batch.translations[0] == ['a', 'b']
+    assert batch.translations[2] == ['[번역 실패: text 3]'] * 2
+    assert released == []  # 세션이 작업 중인 항목은 잠금 유지
+    prefetcher.close()
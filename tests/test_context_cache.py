@@ -0,0 +1,68 @@
+"""gemini_dispatcher 고정 지침 캐시 - 생성 중인 키가 다른 키의 요청을 막지 않는지"""
+
+import threading
+import uuid
+
+from gemini_dispatcher import GeminiDispatcher
+
+
+class SlowClient:
+    """create_cached_content가 gate가 열릴 때까지 걸리는 키가 있는 가짜 클라이언트"""
+
+    def __init__(self, slow_key):
+        self.slow_key = slow_key
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+        self.created = []
+
+    def create_cached_content(self, api_key, model, text, ttl):
+        self.created.append(api_key)
+        if api_key == self.slow_key:
+            self.entered.set()
+            self.gate.wait(5)
+        return f'cachedContents/{api_key}'
+
+
+def make_dispatcher(client, keys):
+    return GeminiDispatcher(client, keys, ['gemini-test'], context_cache=True)
+
+
+def test_slow_creation_does_not_block_other_keys():
+    slow, fast = f'slow-{uuid.uuid4().hex}', f'fast-{uuid.uuid4().hex}'
+    client = SlowClient(slow)
+    dispatcher = make_dispatcher(client, [slow, fast])
+    slow_slot, fast_slot = dispatcher.slots
+    instruction = ('v1', '고정 지침')
+
+    waiting = threading.Thread(target=dispatcher._cached_content, args=(slow_slot, instruction))
+    waiting.start()
+    assert client.entered.wait(5)
+    try:
+        result = {}
+        other = threading.Thread(target=lambda: result.update(name=dispatcher._cached_content(fast_slot, instruction)))
+        other.start()
+        other.join(2)
+        assert result.get('name') == f'cachedContents/{fast}'
+    finally:
+        client.gate.set()
+        waiting.join(5)
+
+
+def test_same_key_is_created_once():
+    key = f'key-{uuid.uuid4().hex}'
+    client = SlowClient(key)
+    dispatcher = make_dispatcher(client, [key])
+    slot = dispatcher.slots[0]
+    instruction = ('v1', '고정 지침')
+
+    names = []
+    threads = [threading.Thread(target=lambda: names.append(dispatcher._cached_content(slot, instruction)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    assert client.entered.wait(5)
+    client.gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert client.created == [key]
+    assert names == [f'cachedContents/{key}'] * 5
@@ -0,0 +1,83 @@
+"""이벤트 푸시 (SSE) - 세션별 전달, ping, 느린 구독자 끊기, 종료"""
+
+import json
+
+import event_hub
+import web_translator
+from event_hub import EventHub
+
+
+def parse(message):
+    """SSE 메시지 → (id, event, data)"""
+    fields = dict(line.split(': ', 1) for line in message.strip().splitlines())
+    return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+
+def test_publish_reaches_only_that_session():
+    hub = EventHub()
+    a1, a2, b = hub.subscribe('a'), hub.subscribe('a'), hub.subscribe('b')
+    hub.publish('a', 'item', {'id': 1, 'text': '한글'})
+    assert parse(a1.queue.get_nowait())[1:] == ('item', {'id': 1, 'text': '한글'})
+    assert parse(a2.queue.get_nowait())[1:] == ('item', {'id': 1, 'text': '한글'})
+    assert b.queue.empty()
+    assert hub.subscribed('a') and not hub.subscribed('c')
+
+
+def test_broadcast_reaches_everyone_with_increasing_ids():
+    hub = EventHub()
+    a, b = hub.subscribe('a'), hub.subscribe('b')
+    hub.broadcast('lock', {'ids': [1], 'locked': True})
+    hub.broadcast('lock', {'ids': [1], 'locked': False})
+    first, second = parse(a.queue.get_nowait()), parse(a.queue.get_nowait())
+    assert first[0] < second[0]
+    assert parse(b.queue.get_nowait())[2] == {'ids': [1], 'locked': True}
+
+
+def test_stream_sends_retry_events_and_pings():
+    hub = EventHub(heartbeat=0.01)
+    subscriber = hub.subscribe('a')
+    stream = hub.stream(subscriber)
+    assert next(stream) == "retry: 2000\n\n"
+    assert next(stream) == ": ping\n\n"  # 보낼 이벤트가 없으면 연결 유지용 주석
+    hub.publish('a', 'stats', {'done': 3})
+    assert parse(next(stream))[1:] == ('stats', {'done': 3})
+    stream.close()  # 브라우저 연결 끊김
+    assert not hub.subscribed('a') and len(hub) == 0
+
+
+def test_slow_subscriber_is_dropped(monkeypatch):
+    monkeypatch.setattr(event_hub, 'QUEUE_SIZE', 2)
+    hub = EventHub()
+    slow, fast = hub.subscribe('a'), hub.subscribe('b')
+    for n in range(3):
+        hub.publish('a', 'item', {'n': n})
+        hub.publish('b', 'item', {'n': n})
+        fast.queue.get_nowait()
+    assert slow.closed and not hub.subscribed('a')
+    assert hub.subscribed('b')
+    stream = hub.stream(slow)
+    assert next(stream) == "retry: 2000\n\n"
+    assert list(stream) == []  # 재연결 유도
+
+
+def test_close_ends_open_streams():
+    hub = EventHub(heartbeat=5)
+    stream = hub.stream(hub.subscribe('a'))
+    next(stream)
+    hub.close()
+    assert list(stream) == []
+    assert len(hub) == 0
+
+
+def test_events_endpoint_streams_session_events():
+    client = web_translator.app.test_client()
+    response = client.get('/api/events?session_id=sse-test', buffered=False)
+    try:
+        assert response.mimetype == 'text/event-stream'
+        body = iter(response.response)
+        assert next(body) == b"retry: 2000\n\n"
+        web_translator.events.publish('sse-test', 'save', {'id': 5, 'success': True})
+        assert parse(next(body).decode('utf-8'))[1:] == ('save', {'id': 5, 'success': True})
+    finally:
+        response.close()
+    assert not web_translator.events.subscribed('sse-test')
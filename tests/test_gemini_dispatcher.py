@@ -0,0 +1,132 @@
+"""Gemini 분배기 - 429 전환, 오류 시 슬롯 예약 반환, JSON이 아닌 응답 처리"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from gemini_client import GeminiClient, GeminiError, QuotaExceeded
+from gemini_dispatcher import GeminiDispatcher
+from mock_servers import MockGemini
+
+MODEL = 'gemini-test'
+LIMITS = {MODEL: {'rpm': 100, 'rpd': 1000, 'tpm': 10 ** 6}, 'gemini-spare': {'rpm': 100, 'rpd': 1000, 'tpm': 10 ** 6}}
+
+
+class FakeClient:
+    """키(또는 (키, 모델))마다 동작을 정하는 가짜 클라이언트 ('ok' / 'quota' / 'network' / 예외 객체)"""
+
+    def __init__(self, behaviors):
+        self.behaviors = behaviors
+        self.calls = []
+
+    def generate(self, api_key, model, prompt, generation_config=None, stream=False, on_done=None,
+                 system_instruction=None, cached_content=None):
+        self.calls.append((api_key, model))
+        behavior = self.behaviors.get((api_key, model), self.behaviors.get(api_key, 'ok'))
+        if behavior == 'quota':
+            raise QuotaExceeded(429, 'quota', 30)
+        if behavior == 'network':
+            raise GeminiError(None, 'network')
+        if isinstance(behavior, Exception):
+            raise behavior
+        usage = SimpleNamespace(total_token_count=50)
+        if on_done:
+            on_done(usage)
+        return SimpleNamespace(text='[]', usage_metadata=usage)
+
+
+class FakeAsyncClient(FakeClient):
+    """FakeClient의 비동기판 (AsyncGeminiClient 자리)"""
+
+    async def generate(self, *args, **kwargs):
+        return FakeClient.generate(self, *args, **kwargs)
+
+
+class HtmlGemini(MockGemini):
+    """프록시 오류 페이지처럼 200 + HTML로 답하는 모의 Gemini"""
+
+    def route(self, handler, method, path, body):
+        out = b'<html>bad gateway</html>'
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/html')
+        handler.send_header('Content-Length', str(len(out)))
+        handler.end_headers()
+        handler.wfile.write(out)
+
+
+def keys(*names):
+    """테스트마다 새 키 (슬롯은 프로세스 전체가 공유)"""
+    tag = uuid.uuid4().hex[:8]
+    return [f"{name}-{tag}" for name in names]
+
+
+def in_flight(dispatcher):
+    return [slot.in_flight for slot in dispatcher.slots]
+
+
+def test_quota_error_fails_over_to_next_key():
+    busy, spare = keys('busy', 'spare')
+    client = FakeClient({busy: 'quota'})
+    dispatcher = GeminiDispatcher(client, [busy, spare], [MODEL], limits=LIMITS)
+    response = dispatcher.generate_content('prompt', estimated_tokens=10)
+    assert response.slot.api_key == spare
+    assert client.calls == [(busy, MODEL), (spare, MODEL)]
+    busy_slot = dispatcher.slots[0]
+    assert busy_slot.quota_errors == 1 and busy_slot.cooldown_until > 0
+    assert in_flight(dispatcher) == [0, 0]
+
+
+def test_quota_error_fails_over_to_fallback_model():
+    (key,) = keys('only')
+    client = FakeClient({(key, MODEL): 'quota'})
+    dispatcher = GeminiDispatcher(client, [key], [MODEL, 'gemini-spare'], limits=LIMITS)
+    assert dispatcher.generate_content('prompt').slot.model == 'gemini-spare'
+    assert client.calls == [(key, MODEL), (key, 'gemini-spare')]
+
+
+def test_async_quota_error_fails_over_like_sync():
+    busy, spare = keys('busy', 'spare')
+    client = FakeAsyncClient({(busy, MODEL): 'quota', (spare, MODEL): 'quota'})
+    dispatcher = GeminiDispatcher(FakeClient({}), [busy, spare], [MODEL, 'gemini-spare'], limits=LIMITS)
+    response = asyncio.run(dispatcher.generate_content_async(client, 'prompt', estimated_tokens=10))
+    assert (response.slot.api_key, response.slot.model) == (busy, 'gemini-spare')
+    assert client.calls == [(busy, MODEL), (spare, MODEL), (busy, 'gemini-spare')]
+    assert in_flight(dispatcher) == [0, 0, 0, 0]
+
+
+def test_network_error_refunds_the_reservation():
+    (key,) = keys('net')
+    dispatcher = GeminiDispatcher(FakeClient({key: 'network'}), [key], [MODEL], limits=LIMITS)
+    with pytest.raises(GeminiError):
+        dispatcher.generate_content('prompt', estimated_tokens=10)
+    slot = dispatcher.slots[0]
+    assert slot.in_flight == 0 and slot.requests_today == 0
+
+
+def test_unexpected_error_releases_the_slot():
+    (key,) = keys('broken')
+    dispatcher = GeminiDispatcher(FakeClient({key: RuntimeError('boom')}), [key], [MODEL], limits=LIMITS)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            dispatcher.generate_content('prompt', estimated_tokens=10)
+    assert in_flight(dispatcher) == [0]
+
+
+def test_non_json_response_is_a_client_error():
+    server = HtmlGemini(port=0).start()
+    try:
+        client = GeminiClient(server.base_url)
+        with pytest.raises(GeminiError) as error:
+            client.generate('key', MODEL, 'prompt')
+        assert error.value.status == 200
+
+        (key,) = keys('proxy')
+        dispatcher = GeminiDispatcher(client, [key], [MODEL], limits=LIMITS)
+        with pytest.raises(GeminiError):
+            dispatcher.generate_content('prompt', estimated_tokens=10)
+        slot = dispatcher.slots[0]
+        assert slot.in_flight == 0 and slot.requests_today == 1  # 서버가 받은 요청이므로 사용량에 포함
+    finally:
+        server.stop()
@@ -0,0 +1,73 @@
+"""용어집 검색 색인 - 단어 경계/복수형/겹치는 용어, 추가·삭제 반영, 배치 프롬프트에는 등장 용어만"""
+
+import random
+import re
+
+import paratranz_api_translator
+from glossary_index import GlossaryIndex
+from glossary_store import GlossaryStore
+from paratranz_api_translator import ParatranzAPITranslator
+
+
+def test_word_boundaries_and_plurals():
+    index = GlossaryIndex(['Pass', 'Brake', 'Box'])
+    assert index.find(['Passenger seat']) == set()
+    assert index.find(['Brakes and boxes']) == {'Brake', 'Box'}
+    assert index.find(['Brakesystem', 'Bypass']) == set()
+    assert index.find(['(Pass)']) == {'Pass'}
+
+
+def test_case_is_ignored_and_original_spelling_returned():
+    index = GlossaryIndex(['Pit Lane', 'DRS'])
+    assert index.find(['enter the PIT LANE with drs open']) == {'Pit Lane', 'DRS'}
+
+
+def test_overlapping_and_nested_terms():
+    index = GlossaryIndex(['Brake', 'Brake Pad', 'Pad', 'he', 'she', 'hers'])
+    assert index.find(['Brake Pad wear']) == {'Brake', 'Brake Pad', 'Pad'}
+    assert index.find(['she said hers']) == {'she', 'hers'}  # "he"는 단어 안쪽이라 제외
+
+
+def test_terms_with_symbols():
+    index = GlossaryIndex(['C++', '%s km', 'R&D'])
+    assert index.find(['Written in C++.', '12%s kmh', 'R&D team']) == {'C++', 'R&D'}
+
+
+def test_add_and_remove_after_search():
+    index = GlossaryIndex(['Brake'])
+    assert index.find(['Brake Throttle']) == {'Brake'}
+    index.add('Throttle')
+    assert index.find(['Brake Throttle']) == {'Brake', 'Throttle'}
+    index.remove('Brake')
+    assert index.find(['Brake Throttle']) == {'Throttle'}
+    assert len(index) == 1
+
+
+def test_removing_one_spelling_keeps_the_other():
+    index = GlossaryIndex(['KERS', 'Kers'])
+    index.remove('KERS')
+    assert index.find(['kers boost']) == {'Kers'}
+
+
+def test_matches_naive_search():
+    rng = random.Random(7)
+    words = ['brake', 'pad', 'pit', 'lane', 'box', 'gear', 'ge', 'ar', 'tyre', 'wet']
+    terms = {' '.join(rng.sample(words, rng.randint(1, 2))).title() for _ in range(30)}
+    index = GlossaryIndex(terms)
+    for _ in range(200):
+        text = ' '.join(rng.choice(words + ['brakes', 'gears', 'x']) for _ in range(8))
+        expected = {term for term in terms
+                    if re.search(r'(?<!\w)' + re.escape(term.casefold()) + r'(?:s|es)?(?!\w)', text)}
+        assert index.find([text]) == expected, text
+
+
+def test_large_glossary_puts_only_batch_terms_in_prompt(tmp_path, monkeypatch):
+    monkeypatch.setattr(paratranz_api_translator, 'GLOSSARY_INLINE_MAX', 2)
+    translator = ParatranzAPITranslator.__new__(ParatranzAPITranslator)
+    translator.glossary_store = GlossaryStore(str(tmp_path / 'glossary.db'),
+                                              {'Brake': '브레이크', 'Throttle': '스로틀', 'Pit Lane': '피트 레인'})
+    translator._system_instruction = None
+    prompt = translator.build_batch_prompt(['Release the brakes'], ids=['1'])
+    assert '브레이크' in prompt and '스로틀' not in prompt and '피트 레인' not in prompt
+    version, system = translator.system_instruction()
+    assert version == 'filtered' and '브레이크' not in system
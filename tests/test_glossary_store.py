@@ -0,0 +1,95 @@
+"""공유 용어집 저장소 - 용어 단위 기록/버전, 변경 알림, 다른 프로세스 변경 반영(data_version), 처음 가져오기"""
+
+import json
+import subprocess
+import sys
+import threading
+
+from glossary_store import GlossaryStore, get_glossary_store
+
+
+def test_set_and_delete_bump_version(tmp_path):
+    store = GlossaryStore(str(tmp_path / 'glossary.db'))
+    assert store.version == 0 and len(store) == 0
+    assert store.set('Brake', '브레이크') == 1
+    assert store.set('Brake', '제동') == 2
+    assert store.get('Brake') == '제동'
+    assert store.delete('Brake') == 3
+    assert store.delete('Brake') is None  # 없는 용어는 버전 그대로
+    assert store.version == 3 and store.terms() == {}
+
+
+def test_listeners_get_each_change(tmp_path):
+    store = GlossaryStore(str(tmp_path / 'glossary.db'))
+    changes = []
+    store.subscribe(lambda *change: changes.append(change))
+    store.subscribe(lambda *change: 1 / 0)  # 알림 하나가 실패해도 나머지는 받음
+    store.set('Brake', '브레이크')
+    store.set('Brake', '제동')
+    store.delete('Brake')
+    store.delete('Brake')
+    assert changes == [(1, 'add', 'Brake', '브레이크'), (2, 'update', 'Brake', '제동'), (3, 'delete', 'Brake', None)]
+
+
+def test_other_connection_changes_are_reloaded(tmp_path):
+    path = str(tmp_path / 'glossary.db')
+    first, second = GlossaryStore(path), GlossaryStore(path)
+    first.set('Brake', '브레이크')
+    first.set('Throttle', '스로틀')
+    assert second.terms() == {'Brake': '브레이크', 'Throttle': '스로틀'}
+    assert second.version == 2
+    assert second.index.find(['brakes']) == {'Brake'}
+
+    first.delete('Brake')
+    assert 'Brake' not in second.terms()
+    assert second.index.find(['brakes']) == set()
+    assert second.set('Pit Lane', '피트 레인') == 4  # 버전은 DB에서 이어서 증가
+    assert first.terms() == {'Throttle': '스로틀', 'Pit Lane': '피트 레인'}
+
+
+def test_other_process_changes_are_reloaded(tmp_path):
+    path = str(tmp_path / 'glossary.db')
+    store = GlossaryStore(path)
+    assert store.terms() == {}
+    subprocess.run([sys.executable, '-c',
+                    "import sys; from glossary_store import GlossaryStore; "
+                    "GlossaryStore(sys.argv[1]).set('Brake', '브레이크')", path], check=True)
+    assert store.get('Brake') == '브레이크' and store.version == 1
+
+
+def test_legacy_file_or_seed_only_on_first_creation(tmp_path):
+    path = str(tmp_path / 'glossary.db')
+    legacy = tmp_path / 'glossary.json'
+    legacy.write_text(json.dumps({'Brake': '브레이크'}), encoding='utf-8')
+    store = GlossaryStore(path, seed={'Seed': '기본'}, legacy_file=str(legacy))
+    assert store.terms() == {'Brake': '브레이크'}
+    store.delete('Brake')
+    assert GlossaryStore(path, seed={'Seed': '기본'}, legacy_file=str(legacy)).terms() == {}
+
+    broken = tmp_path / 'broken.json'
+    broken.write_text('{', encoding='utf-8')
+    assert GlossaryStore(str(tmp_path / 'other.db'), seed={'Seed': '기본'},
+                         legacy_file=str(broken)).terms() == {'Seed': '기본'}
+
+
+def test_concurrent_sets_are_all_kept(tmp_path):
+    path = str(tmp_path / 'glossary.db')
+    stores = [GlossaryStore(path), GlossaryStore(path)]
+
+    def worker(n):
+        for i in range(25):
+            stores[n % 2].set(f"term {n}-{i}", f"용어 {n}-{i}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for store in stores:
+        assert len(store.terms()) == 100 and store.version == 100
+
+
+def test_stores_are_shared_by_path(tmp_path):
+    path = str(tmp_path / 'glossary.db')
+    assert get_glossary_store(path) is get_glossary_store(path)
+    assert get_glossary_store(str(tmp_path / 'other.db')) is not get_glossary_store(path)
@@ -0,0 +1,71 @@
+"""Paratranz 공유 HTTP 세션 - 키별 연결 풀 재사용과 5xx 자동 재시도 (모의 Paratranz 서버)"""
+
+import uuid
+
+import pytest
+
+import paratranz_api_translator
+from mock_servers import MockParatranz
+from paratranz_api_translator import ParatranzAPITranslator, get_http_session, put_translation
+
+
+class BusyParatranz(MockParatranz):
+    """처음 busy번의 저장 요청에는 503으로 답하는 모의 Paratranz"""
+
+    def __init__(self, busy: int, **kwargs):
+        super().__init__(**kwargs)
+        self.busy = busy
+
+    def route(self, handler, method, path, body):
+        if method == 'PUT' and self.busy > 0:
+            self.busy -= 1
+            self.count('busy')
+            handler.send_json(503, {'message': 'busy'})
+            return
+        super().route(handler, method, path, body)
+
+
+@pytest.fixture
+def paratranz(monkeypatch):
+    server = BusyParatranz(0, port=0, strings=5).start()
+    monkeypatch.setattr(paratranz_api_translator, 'PARATRANZ_BASE_URL', server.base_url)
+    yield server
+    server.stop()
+
+
+def new_key():
+    """테스트마다 새 키 (세션은 프로세스 전체가 공유)"""
+    return f"key-{uuid.uuid4().hex[:8]}"
+
+
+def pools(http):
+    """세션이 지금까지 연 연결 풀 (호스트별)"""
+    manager = http.get_adapter('http://').poolmanager
+    return [manager.pools[key] for key in manager.pools.keys()]
+
+
+def test_same_key_shares_one_session():
+    key = new_key()
+    assert get_http_session(key) is get_http_session(key)
+    assert get_http_session(new_key()) is not get_http_session(key)
+    assert get_http_session(key).headers['Authorization'] == f"Bearer {key}"
+
+
+def test_requests_reuse_one_connection(paratranz):
+    http = get_http_session(new_key())
+    translator = ParatranzAPITranslator.__new__(ParatranzAPITranslator)
+    translator.http = http
+    for string_id in range(1, 6):
+        assert translator.fetch_files()[0]['id'] == 1
+        assert put_translation(http, string_id, f'번역 {string_id}') == 200
+    assert paratranz.stats['files'] == 5 and paratranz.stats['save'] == 5
+    (pool,) = pools(http)
+    assert pool.num_connections == 1  # 10번 요청했지만 keep-alive 연결 하나
+
+
+def test_busy_response_is_retried(paratranz, monkeypatch):
+    monkeypatch.setattr(paratranz_api_translator, 'HTTP_BACKOFF', 0)
+    paratranz.busy = 2
+    assert put_translation(get_http_session(new_key()), 1, '번역', as_review=True) == 200
+    assert paratranz.stats['busy'] == 2
+    assert paratranz.saves == [(1, '번역', 5)]
@@ -0,0 +1,108 @@
+"""브라우저 항목 대기열 - /api/window로 미리 받고 저장/건너뛰기는 확인만 (서버 커서와 어긋나면 out_of_sync)"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import web_translator
+from glossary_index import GlossaryIndex
+from session_registry import SessionRegistry
+
+SESSION = 'queue-test'
+
+
+class FakeTranslator:
+    glossary = {}
+    glossary_index = GlossaryIndex()
+    daily_limit = 100
+
+    def __init__(self):
+        self.translation_count = 0
+
+    def usage_today(self):
+        return {'requests': 1, 'total_tokens': 10}
+
+    def parse_success_stats(self):
+        return {}
+
+    def items_per_request(self):
+        return 0
+
+
+class FakeSaveQueue:
+    def __init__(self):
+        self.saved = []
+        self.retried = []
+
+    def register_key(self, api_key):
+        pass
+
+    def enqueue(self, api_key, string_id, translation, as_review, session_id, **kwargs):
+        self.saved.append((string_id, translation, as_review))
+
+    def counts(self, session_id=None):
+        return {'pending': len(self.saved), 'failed': 0}
+
+    def retry_failed(self, session_id=None, string_id=None):
+        self.retried.append((session_id, string_id))
+        return 1
+
+
+@pytest.fixture
+def app(monkeypatch):
+    registry = SessionRegistry(web_translator.release_items)
+    saves = FakeSaveQueue()
+    monkeypatch.setattr(web_translator, '_sessions', registry)
+    monkeypatch.setattr(web_translator, '_save_queue', saves)
+    session = registry.get(SESSION)
+    session.translator = FakeTranslator()
+    session.translator_keys = ('paratranz-key', 'gemini-key', 'model')
+    ids = list(range(101, 106))
+    session.set_batch([{'id': i, 'original': f"text {i}"} for i in ids], [[f"a {i}", f"b {i}"] for i in ids])
+    yield SimpleNamespace(client=web_translator.app.test_client(), session=session, saves=saves)
+    registry.close_all()
+
+
+def call(app, method, path, **kwargs):
+    response = app.client.open(path, method=method, headers={'X-Session-ID': SESSION}, **kwargs)
+    return response.get_json()
+
+
+def test_window_lists_upcoming_items(app):
+    data = call(app, 'GET', '/api/window?count=3')
+    assert [item['id'] for item in data['items']] == [101, 102, 103]
+    assert data['items'][0]['translations'] == ['a 101', 'b 101']
+    assert not data['items'][0]['pending']
+    assert app.session.item_index == 0  # 미리 받기만 하고 커서는 그대로
+
+
+def test_window_is_capped(app, monkeypatch):
+    monkeypatch.setattr(web_translator, 'WINDOW_SIZE', 2)
+    assert len(call(app, 'GET', '/api/window?count=50')['items']) == 2
+
+
+def test_queued_save_and_skip_return_acks(app):
+    assert call(app, 'POST', '/api/save', json={'id': 101, 'translation': '저장', 'save_type': 2, 'queue': True}) \
+        == {'success': True, 'id': 101}
+    assert call(app, 'POST', '/api/select', json={'id': 102, 'choice': 5, 'queue': True}) == {'success': True, 'id': 102}
+    assert app.saves.saved == [(101, '저장', True)]
+    assert app.session.item_index == 2
+    assert [item['id'] for item in call(app, 'GET', '/api/window?count=2')['items']] == [103, 104]
+
+
+def test_mismatched_id_is_out_of_sync(app):
+    data = call(app, 'POST', '/api/save', json={'id': 103, 'translation': '저장', 'save_type': 1, 'queue': True})
+    assert data['out_of_sync'] and not data['success']
+    assert call(app, 'POST', '/api/select', json={'id': 999, 'choice': 5, 'queue': True})['out_of_sync']
+    assert app.session.item_index == 0 and app.saves.saved == []
+
+
+def test_unqueued_save_returns_next_item(app):
+    data = call(app, 'POST', '/api/save', json={'translation': '저장', 'save_type': 1})
+    assert data['success'] and data['data']['id'] == 102
+
+
+def test_retry_single_failed_save(app):
+    data = call(app, 'POST', '/api/save/retry', json={'id': 101})
+    assert data['retried'] == 1
+    assert app.saves.retried == [(SESSION, 101)]
@@ -0,0 +1,96 @@
+"""JSON 응답 형식 - 응답 스키마를 붙여 보내고 id로 항목을 연결 (모의 Gemini 서버)"""
+
+import json
+import threading
+import uuid
+from collections import deque
+
+import pytest
+
+import paratranz_api_translator
+from gemini_client import GeminiClient
+from gemini_dispatcher import GeminiDispatcher
+from glossary_store import GlossaryStore
+from mock_servers import MockGemini
+from paratranz_api_translator import ParatranzAPITranslator
+from token_budget import TokenBudget
+
+MODEL = 'gemini-test'
+TEXTS = ['Press "Start"', 'Line one\nLine two', 'Back\\slash, {0}%', '[Brake]']
+
+
+class RecordingGemini(MockGemini):
+    """받은 요청 본문을 기록하는 모의 Gemini"""
+
+    def __init__(self):
+        super().__init__(port=0)
+        self.bodies = []
+
+    def answer(self, body):
+        self.bodies.append(body)
+        return super().answer(body)
+
+
+@pytest.fixture(scope='module')
+def gemini():
+    server = RecordingGemini().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def translator(tmp_path, gemini, monkeypatch):
+    monkeypatch.setattr(paratranz_api_translator, 'OUTPUT_FORMAT', 'json')
+    gemini.bodies.clear()
+    translator = ParatranzAPITranslator.__new__(ParatranzAPITranslator)
+    translator.glossary_store = GlossaryStore(str(tmp_path / 'glossary.db'), {'Brake': '브레이크'})
+    translator._system_instruction = None
+    translator.session_requests = 0
+    translator.items_translated = 0
+    translator.parse_stats = {'batches': 0, 'items': 0, 'first_pass': 0, 'recovered': 0, 'failed': 0, 'followups': 0}
+    translator.recent_parse_rates = deque(maxlen=50)
+    translator._stats_lock = threading.Lock()
+    translator.token_budget = TokenBudget()
+    translator.gemini = GeminiDispatcher(GeminiClient(gemini.base_url), [f"key-{uuid.uuid4().hex[:8]}"], [MODEL])
+    translator.daily_limit = translator.gemini.daily_limit()
+    return translator
+
+
+def expected(texts):
+    return [[f"[번역1] {text}", f"[번역2] {text}"] for text in texts]
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_batch_round_trips_through_response_schema(translator, gemini, monkeypatch, stream):
+    monkeypatch.setattr(paratranz_api_translator, 'STREAM_RESPONSES', stream)
+    arrived = {}
+    result = translator.translate_batch_with_gemini(TEXTS, ids=[101, 102, 103, 104],
+                                                    on_item=lambda i, pair: arrived.setdefault(i, pair))
+    assert result == expected(TEXTS)
+    assert sorted(arrived) == [0, 1, 2, 3]
+
+    (body,) = gemini.bodies
+    config = body['generationConfig']
+    assert config['responseMimeType'] == 'application/json'
+    assert config['responseSchema']['type'] == 'ARRAY'
+    assert set(config['responseSchema']['items']['required']) == {'id', 't1', 't2'}
+    assert '브레이크' in body['systemInstruction']['parts'][0]['text']  # 작은 용어집은 고정 지침에
+
+
+def test_prompt_lists_one_json_object_per_text(translator):
+    prompt = translator.build_batch_prompt(TEXTS, ids=['a', 'b', 'c', 'd'])
+    items = [json.loads(line.rstrip(',')) for line in prompt.splitlines() if line.startswith('{')]
+    assert items == [{'id': key, 'text': text} for key, text in zip('abcd', TEXTS)]
+
+
+def test_duplicate_ids_fall_back_to_positions(translator, gemini):
+    assert translator.translate_batch_with_gemini(TEXTS[:2], ids=[7, 7]) == expected(TEXTS[:2])
+    prompt = gemini.bodies[0]['contents'][0]['parts'][0]['text']
+    assert '{"id": "1"' in prompt and '{"id": "2"' in prompt
+
+
+def test_lines_format_sends_no_schema(translator, monkeypatch):
+    monkeypatch.setattr(paratranz_api_translator, 'OUTPUT_FORMAT', 'lines')
+    system, prompt, options = translator._batch_request(TEXTS, None, ['1', '2', '3', '4'], None, 3)
+    assert 'generation_config' not in options
+    assert '4-2:' in prompt
@@ -0,0 +1,146 @@
+"""항목 잠금 관리자 - 잠금/연장/만료/해제와 변경 알림 (메모리/SQLite/Redis(fakeredis) 백엔드 공통)"""
+
+import time
+import uuid
+
+import pytest
+
+from coordination import RedisLockManager, SqliteLockManager
+from lock_manager import HEAP_SLACK, LockManager
+
+
+class Changes:
+    """on_change 호출 기록"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ids, locked, total):
+        self.calls.append((sorted(ids), locked, total))
+
+
+@pytest.fixture
+def changes():
+    return Changes()
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request):
+    return request.param
+
+
+@pytest.fixture
+def make_manager(backend, changes, tmp_path):
+    """같은 저장소를 쓰는 잠금 관리자 (sqlite/redis는 여러 개 만들면 프로세스 여러 개처럼 공유)"""
+    if backend == 'memory':
+        return lambda timeout=60: LockManager(timeout, changes)
+    if backend == 'sqlite':
+        return lambda timeout=60: SqliteLockManager(str(tmp_path / 'locks.db'), timeout, changes)
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')  # 스크립트(EVAL) 실행용
+    client, prefix = fakeredis.FakeRedis(), f"test-{uuid.uuid4().hex}"
+    return lambda timeout=60: RedisLockManager(client, timeout, changes, prefix=prefix)
+
+
+def test_acquire_skips_ids_held_by_others(make_manager):
+    manager = make_manager()
+    assert manager.acquire([1, 2, 3], 'a') == [1, 2, 3]
+    assert manager.acquire([2, 3, 4], 'b') == [4]
+    assert manager.owner(2) == 'a'
+    assert manager.owner(4) == 'b'
+    assert len(manager) == 4
+
+
+def test_reacquire_by_owner_is_allowed(make_manager, changes):
+    manager = make_manager()
+    manager.acquire([1], 'a')
+    assert manager.acquire([1], 'a') == [1]
+    assert changes.calls == [([1], True, 1)]  # 이미 잡고 있던 항목은 새로 잠근 것으로 알리지 않음
+
+
+def test_release_only_own(make_manager, changes):
+    manager = make_manager()
+    manager.acquire([1, 2], 'a')
+    assert manager.release([1, 2], 'b') == []
+    assert manager.release([1, 5], 'a') == [1]
+    assert manager.held('a') == {2}
+    assert changes.calls[-1] == ([1], False, 1)
+
+
+def test_release_session(make_manager):
+    manager = make_manager()
+    manager.acquire([1, 2, 3], 'a')
+    manager.acquire([4], 'b')
+    assert sorted(manager.release_session('a')) == [1, 2, 3]
+    assert manager.held('a') == set()
+    assert len(manager) == 1
+
+
+def test_expired_leases_are_freed_and_announced(make_manager, changes):
+    manager = make_manager(timeout=0.05)
+    manager.acquire([1, 2], 'a')
+    time.sleep(0.1)
+    assert manager.owner(1) is None
+    assert manager.acquire([1, 2], 'b') == [1, 2]
+    assert any(ids == [1, 2] and not locked for ids, locked, _ in changes.calls)
+    assert manager.held('a') == set()
+
+
+def test_renew_extends_only_own_leases(make_manager):
+    manager = make_manager(timeout=0.2)
+    manager.acquire([1, 2], 'a')
+    manager.acquire([3], 'b')
+    time.sleep(0.12)
+    assert manager.renew('a') == 2
+    assert manager.renew('a', [3]) == 0
+    time.sleep(0.12)
+    assert manager.owner(1) == 'a'
+    assert manager.owner(3) is None
+
+
+def test_shared_store_across_managers(backend, make_manager):
+    if backend == 'memory':
+        pytest.skip('메모리 잠금은 한 프로세스 안에서만 공유')
+    first, second = make_manager(), make_manager()
+    first.acquire([1, 2], 'a')
+    assert second.acquire([1, 2, 3], 'b') == [3]
+    assert second.owner(1) == 'a'
+    assert second.release([1], 'a') == [1]
+    assert first.owner(1) is None
+    assert len(first) == 2
+
+
+def test_heap_stays_bounded_under_renewals(backend, make_manager):
+    if backend != 'memory':
+        pytest.skip('만료 힙은 메모리 잠금에만 있음')
+    manager = make_manager()
+    manager.acquire(range(100), 'a')
+    for _ in range(50):
+        manager.renew('a')
+    assert len(manager._heap) <= 2 * 100 + HEAP_SLACK + 100
+
+
+def test_failing_listener_does_not_break_locking(make_manager):
+    def broken(ids, locked, total):
+        raise RuntimeError('listener')
+
+    manager = make_manager()
+    manager.on_change = broken
+    assert manager.acquire([1], 'a') == [1]
+    assert manager.release([1], 'a') == [1]
+
+
+def test_redis_scripts_touch_only_declared_keys(changes):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    client = fakeredis.FakeRedis()
+    manager = RedisLockManager(client, 0.05, changes, prefix='declared')
+    manager.acquire([1, 2], 'a')
+    manager.acquire([3], 'b')
+    assert manager.held('a') == {1, 2}
+    assert manager.renew('a') == 2
+    manager.release([1], 'a')
+    time.sleep(0.1)
+    assert len(manager) == 0
+    assert {key.decode() for key in client.keys('*')} <= set(manager._keys)
+    assert all(key.startswith('{declared:lock}:') for key in manager._keys)
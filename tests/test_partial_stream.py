@@ -0,0 +1,103 @@
+"""스트리밍 응답이 중간에 끊긴 배치 - 받은 항목은 유지하고 나머지만 다시 요청"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+
+import pytest
+
+import paratranz_api_translator
+from batch_prefetcher import PreparedBatch
+from paratranz_api_translator import ParatranzAPITranslator
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class BrokenStreamGemini:
+    """첫 요청은 앞쪽 항목 cut개만 보내고 연결이 끊기는 가짜 분배기 (요청한 id는 프롬프트로 전달)"""
+
+    def __init__(self, cut):
+        self.cut = cut
+        self.requests = []
+
+    def generate_content(self, prompt, stream=False, **options):
+        ids = json.loads(prompt)
+        self.requests.append(ids)
+        items = [{'id': key, 't1': f'번역1 {key}', 't2': f'번역2 {key}'} for key in ids]
+        first = len(self.requests) == 1
+
+        def chunks():
+            if first:
+                yield Chunk(json.dumps(items[:self.cut], ensure_ascii=False)[:-1] + ',')
+                raise ConnectionError('stream reset')
+            yield Chunk(json.dumps(items, ensure_ascii=False))
+
+        return chunks()
+
+    async def generate_content_async(self, client, prompt, stream=False, **options):
+        chunks = self.generate_content(prompt, stream, **options)
+
+        async def relay():
+            for chunk in chunks:
+                yield chunk
+
+        return relay()
+
+
+@pytest.fixture
+def translator(monkeypatch):
+    monkeypatch.setattr(paratranz_api_translator, 'OUTPUT_FORMAT', 'json')
+    monkeypatch.setattr(paratranz_api_translator, 'STREAM_RESPONSES', True)
+    translator = ParatranzAPITranslator.__new__(ParatranzAPITranslator)
+    translator.parse_stats = {'batches': 0, 'items': 0, 'first_pass': 0, 'recovered': 0, 'failed': 0, 'followups': 0}
+    translator.recent_parse_rates = deque(maxlen=50)
+    translator._stats_lock = threading.Lock()
+    translator._batch_request = lambda texts, examples, ids, on_wait, max_retries: (('v1', '지침'), json.dumps(ids), {})
+    translator._finish_request = lambda texts, system, prompt, response, parsed: parsed
+    return translator
+
+
+def test_broken_stream_keeps_received_items(translator):
+    translator.gemini = BrokenStreamGemini(cut=2)
+    arrived = {}
+    result = translator.translate_batch_with_gemini(
+        ['a', 'b', 'c', 'd'], ids=[11, 12, 13, 14], on_item=lambda i, pair: arrived.setdefault(i, pair)
+    )
+    assert translator.gemini.requests == [['11', '12', '13', '14'], ['13', '14']]
+    assert result == [[f'번역1 {key}', f'번역2 {key}'] for key in (11, 12, 13, 14)]
+    assert sorted(arrived) == [0, 1, 2, 3]
+
+
+def test_async_broken_stream_keeps_received_items(translator):
+    translator.gemini = BrokenStreamGemini(cut=2)
+    arrived = {}
+    result = asyncio.run(translator.translate_batch_async(
+        None, ['a', 'b', 'c', 'd'], ids=[11, 12, 13, 14], on_item=lambda i, pair: arrived.setdefault(i, pair)
+    ))
+    assert translator.gemini.requests == [['11', '12', '13', '14'], ['13', '14']]
+    assert result == [[f'번역1 {key}', f'번역2 {key}'] for key in (11, 12, 13, 14)]
+    assert sorted(arrived) == [0, 1, 2, 3]
+    assert translator.parse_stats['followups'] == 1
+
+
+def test_stream_broken_before_any_item_fails(translator):
+    translator.gemini = BrokenStreamGemini(cut=0)
+    assert translator.translate_batch_with_gemini(['a', 'b'], ids=[1, 2], on_item=lambda i, pair: None) is None
+
+
+def test_abandon_only_once():
+    batch = PreparedBatch('ok', [{'id': 1}], [None])
+    assert batch.abandon('cancelled')
+    assert not batch.abandon('cancelled')
+    assert not batch.abandon('failed')
+    assert batch.status == 'cancelled'
+
+
+def test_abandon_after_served():
+    batch = PreparedBatch('ok', [{'id': 1}], [None])
+    assert batch.mark_served()
+    assert not batch.abandon('cancelled')
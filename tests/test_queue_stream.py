@@ -0,0 +1,119 @@
+"""QueueStream / BatchPrefetcher 닫기 - 페이지 내려받기를 기다리는 중에도 바로 반환되는지"""
+
+import threading
+import time
+
+from batch_prefetcher import BatchPrefetcher
+from glossary_index import GlossaryIndex
+from token_budget import TokenBudget
+from work_queue import QueueStream, WorkQueue, WorkSource
+
+
+class GatedStream:
+    """gate가 열릴 때까지 next()가 막히는 스트림 (느린 페이지 내려받기 흉내)"""
+
+    def __init__(self, count: int):
+        self.gate = threading.Event()
+        self.items = [{'id': i, 'original': f"text {i}"} for i in range(1, count + 1)]
+
+    def next(self, timeout=None):
+        self.gate.wait()
+        return self.items.pop(0) if self.items else None
+
+
+class FakeTranslator:
+    glossary = {}
+    glossary_index = GlossaryIndex()
+
+    def __init__(self):
+        self.token_budget = TokenBudget()
+
+    def batch_prompt_overhead(self) -> int:
+        return 0
+
+    def translate_batch_with_gemini(self, texts, **kwargs):
+        return [[t, t] for t in texts]
+
+
+def test_close_does_not_wait_for_blocked_fetch():
+    queue = WorkQueue(timeout=60)
+    stream = GatedStream(5)
+    qs = QueueStream(WorkSource('1:0', stream, queue), 'a', chunk_size=5)
+    results = []
+    reader = threading.Thread(target=lambda: results.append(qs.next()))
+    reader.start()
+    time.sleep(0.1)  # reader가 스트림에서 막힐 때까지
+
+    started = time.monotonic()
+    qs.close()
+    assert time.monotonic() - started < 0.1
+
+    stream.gate.set()
+    reader.join(2)
+    assert results == [None]
+    assert queue.pending('1:0') == 5  # 닫힌 세션은 아무것도 임대하지 않음
+
+
+def test_leased_items_return_when_closed_after_lease():
+    queue = WorkQueue(timeout=60)
+    stream = GatedStream(3)
+    stream.gate.set()
+    qs = QueueStream(WorkSource('1:0', stream, queue), 'a', chunk_size=3)
+    assert qs.next()['id'] == 1
+    qs.close()
+    assert qs.next() is None
+    assert queue.lease('1:0', 'b', 3) == [2, 3]
+
+
+def test_prefetcher_close_does_not_wait_for_collecting_worker():
+    queue = WorkQueue(timeout=60)
+    stream = GatedStream(5)
+    qs = QueueStream(WorkSource('1:0', stream, queue), 'a', chunk_size=5)
+    released = []
+    prefetcher = BatchPrefetcher(
+        FakeTranslator(), qs, 'a', lock_fn=lambda ids, session: list(ids),
+        unlock_fn=lambda ids, session: released.extend(ids), depth=1
+    )
+    prefetcher.start()
+    time.sleep(0.1)  # 워커가 수집 중 (_cond 보유) 스트림에서 막힘
+
+    started = time.monotonic()
+    prefetcher.close()
+    assert time.monotonic() - started < 0.1
+
+    stream.gate.set()
+    time.sleep(0.2)  # 워커가 수집을 마치고 정리할 때까지
+    assert released == []  # 닫힌 뒤라 잠근 항목이 없음
+    assert queue.pending('1:0') == 5
+
+
+class SlowTailStream:
+    """앞쪽 ready개는 바로 나오고, 나머지는 gate가 열릴 때까지 막히는 스트림 (느린 다음 페이지)"""
+
+    def __init__(self, count: int, ready: int):
+        self.gate = threading.Event()
+        self.items = [{'id': i, 'original': f"text {i}"} for i in range(1, count + 1)]
+        self.ready = ready
+
+    def next(self, timeout=None):
+        if self.ready <= 0:
+            self.gate.wait()
+        self.ready -= 1
+        return self.items.pop(0) if self.items else None
+
+
+def test_source_lookup_is_not_blocked_by_slow_page():
+    stream = SlowTailStream(6, ready=3)
+    source = WorkSource('1:0', stream, WorkQueue(timeout=60))
+    filler = threading.Thread(target=source.fill, args=(6,))
+    filler.start()
+    time.sleep(0.1)  # filler가 앞쪽 3개를 받고 다음 페이지에서 막힘
+
+    started = time.monotonic()
+    assert source.get(2)['id'] == 2
+    assert time.monotonic() - started < 0.1
+
+    stream.gate.set()
+    filler.join(2)
+    assert source.get(6)['id'] == 6
+    assert source.get(99) is None and source.finished
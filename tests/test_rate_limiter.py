@@ -0,0 +1,68 @@
+"""rate_limiter 분당 한도 - 오래 보낼 때 처리량과 1분 구간 상한"""
+
+import pytest
+
+from rate_limiter import WINDOW, MinuteLimit, TokenBucket
+
+
+def send_for(limit, seconds, amount=1):
+    """쉬지 않고 예약 → 예약 시각에 보냄, 보낸 시각 목록"""
+    sent = []
+    now = 0.0
+    while True:
+        at = now + limit.reserve(amount, now)
+        if at >= seconds:
+            return sent
+        sent.append(at)
+        now = at
+
+
+def max_in_window(times):
+    best = 0
+    start = 0
+    for end, at in enumerate(times):
+        while times[start] <= at - WINDOW:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+@pytest.mark.parametrize('burst', [0.0, 0.5, 1.0])
+def test_sustained_rate_is_the_full_limit(burst):
+    sent = send_for(MinuteLimit(15, burst), 600)
+    assert len(sent) >= 15 * 10 - 1
+
+
+@pytest.mark.parametrize('burst', [0.0, 0.5, 1.0])
+def test_no_minute_exceeds_the_limit(burst):
+    sent = send_for(MinuteLimit(15, burst), 600)
+    assert max_in_window(sent) <= 15
+
+
+def test_burst_goes_out_at_once():
+    limit = MinuteLimit(10, 0.5)
+    waits = [limit.reserve(1, 0.0) for _ in range(6)]
+    assert waits[:5] == [0.0] * 5
+    assert waits[5] == pytest.approx(6.0)  # 1개 채우는 데 60/10초
+
+
+def test_bucket_refills_at_per_minute_rate():
+    bucket = TokenBucket(60, 0.5)
+    assert bucket.rate == pytest.approx(1.0)
+
+
+def test_refund_frees_window():
+    limit = MinuteLimit(1000, 1.0)
+    limit.reserve(1000, 0.0)
+    assert limit.delay(500, 1.0) > 0
+    limit.refund(600, 1.0)  # 예상보다 600 덜 씀
+    assert limit.delay(500, 1.0) == 0.0
+
+
+def test_shared_wait_records_later_send_time():
+    limit = MinuteLimit(2, 1.0)
+    assert limit.reserve(1, 0.0, wait=30.0) == 30.0
+    limit.reserve(1, 0.0)
+    # 두 번째는 30초에 보냈으므로 90초가 지나야 세 번째 여유가 생김
+    assert limit.delay(1, 0.0) == pytest.approx(90.0)
+    assert limit.delay(1, 61.0) == pytest.approx(29.0)
@@ -0,0 +1,123 @@
+"""save_queue 작업 가져오기 - 같은 저널을 여러 대기열(프로세스)이 함께 쓸 때"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import save_queue
+from save_queue import SaveQueue
+from usage_ledger import key_hash
+
+API_KEY = 'test-key'
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    """워커를 멈춘 대기열 (같은 저널 파일) - _claim을 직접 호출해 확인"""
+    queues = []
+
+    def make(**kwargs):
+        queue = SaveQueue(str(tmp_path / 'saves.db'), workers=1, **kwargs)
+        queue.stop(wait=2)
+        queue._keys[key_hash(API_KEY)] = API_KEY
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue._db.close()
+
+
+def add(queue, string_id):
+    return queue.enqueue(API_KEY, string_id, f'번역 {string_id}', False, 'session-a')
+
+
+def status(queue, row_id):
+    return queue._db.execute("SELECT status, owner FROM saves WHERE id = ?", (row_id,)).fetchone()
+
+
+def test_each_job_is_claimed_once_across_queues(make_queue):
+    first, second = make_queue(), make_queue()
+    for string_id in range(200):
+        add(first, string_id)
+
+    claimed = []
+
+    def worker(queue):
+        while True:
+            job = queue._claim()
+            if job is None:
+                return
+            claimed.append(job.id)
+
+    threads = [threading.Thread(target=worker, args=(q,)) for q in (first, second) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(set(claimed))
+    assert len(claimed) == 200
+
+
+def test_same_string_is_sent_in_order(make_queue):
+    queue = make_queue()
+    add(queue, 7)
+    add(queue, 7)
+    job = queue._claim()
+    assert queue._claim() is None  # 같은 문자열의 이전 저장이 전송 중
+    queue._db.execute("DELETE FROM saves WHERE id = ?", (job.id,))
+    queue._db.commit()
+    assert queue._claim() is not None
+
+
+def test_startup_keeps_live_leases_of_other_queues(make_queue):
+    first = make_queue()
+    live, stale = add(first, 1), add(first, 2)
+    assert first._claim().id == live
+    assert first._claim().id == stale
+    first._db.execute("UPDATE saves SET lease_expires = ? WHERE id = ?", (time.time() - 1, stale))
+    first._db.commit()
+
+    second = make_queue()  # 재시작한 다른 프로세스
+    assert status(second, live) == ('sending', first.owner)
+    assert status(second, stale) == ('pending', None)
+
+
+def test_expired_lease_is_reclaimed_and_late_result_ignored(make_queue, monkeypatch):
+    first, second = make_queue(lease=0.05), make_queue()
+    row_id = add(first, 1)
+    job = first._claim()
+    time.sleep(0.1)
+    again = second._claim()
+    assert again.id == row_id
+    assert status(second, row_id) == ('sending', second.owner)
+
+    # 늦게 끝난 첫 번째 전송의 실패는 기록하지 않음 (지금 보내는 쪽은 second)
+    monkeypatch.setattr(save_queue, 'get_http_session', lambda key: None)
+    monkeypatch.setattr(save_queue, 'put_translation', lambda *args: 500)
+    first._send(job)
+    assert status(second, row_id) == ('sending', second.owner)
+
+
+def test_legacy_journal_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.db')
+    db = sqlite3.connect(path)
+    db.execute("""
+        CREATE TABLE saves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, key_hash TEXT NOT NULL, string_id INTEGER NOT NULL,
+            payload TEXT NOT NULL, session_id TEXT, status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, created_at REAL NOT NULL,
+            next_attempt_at REAL NOT NULL
+        )
+    """)
+    db.execute("INSERT INTO saves (key_hash, string_id, payload, status, created_at, next_attempt_at) "
+               "VALUES ('h', 1, '{}', 'sending', 0, 0)")
+    db.commit()
+    db.close()
+
+    queue = SaveQueue(path, workers=1)
+    queue.stop(wait=2)
+    assert queue._db.execute("SELECT status FROM saves").fetchone() == ('pending',)
+    queue._db.close()
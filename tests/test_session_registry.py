@@ -0,0 +1,125 @@
+"""세션 레지스트리 - 유휴/한도 초과 세션이 요청 스레드 밖(정리 스레드)에서 정리되는지"""
+
+import threading
+import time
+
+import pytest
+
+from session_registry import SessionLimitError, SessionRegistry
+
+
+class Unlocks:
+    """unlock_fn 호출 기록 (gate가 닫혀 있으면 열릴 때까지 멈춤 - 느린 잠금 반납 흉내)"""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.called = threading.Event()
+
+    def __call__(self, ids, session_id):
+        self.called.set()
+        self.gate.wait(5)
+        self.calls.append((ids, session_id))
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def with_batch(session, ids):
+    session.set_batch([{'id': i} for i in ids], [None] * len(ids))
+    return session
+
+
+def test_lru_eviction_does_not_block_request():
+    unlocks = Unlocks()
+    unlocks.gate.clear()
+    registry = SessionRegistry(unlocks, max_sessions=1)
+    try:
+        registry.get('first')
+        start = time.perf_counter()
+        registry.get('second')
+        assert time.perf_counter() - start < 0.5  # 반납이 멈춰 있어도 요청은 바로 끝남
+        assert registry.find('first') is None
+        assert unlocks.called.wait(2)  # 정리 스레드가 반납 중
+        unlocks.gate.set()
+        assert wait_until(lambda: unlocks.calls == [([], 'first')])
+    finally:
+        unlocks.gate.set()
+        registry.close_all()
+
+
+def test_busy_sessions_are_not_evicted():
+    unlocks = Unlocks()
+    registry = SessionRegistry(unlocks, max_sessions=2)
+    try:
+        with_batch(registry.get('busy'), [1, 2])
+        registry.get('idle')
+        registry.get('new')  # 작업 중이 아닌 'idle'이 밀려남
+        assert registry.find('busy') is not None
+        assert registry.find('idle') is None
+
+        with_batch(registry.get('new'), [3])
+        with pytest.raises(SessionLimitError):
+            registry.get('late')
+        assert len(registry) == 2
+        assert wait_until(lambda: unlocks.calls == [([], 'idle')])
+    finally:
+        registry.close_all()
+
+
+def test_idle_sessions_are_swept_without_requests():
+    unlocks = Unlocks()
+    registry = SessionRegistry(unlocks, idle_timeout=0.05, sweep_interval=0.02)
+    try:
+        with_batch(registry.get('idle'), [7])
+        assert wait_until(lambda: len(registry) == 0)
+        assert wait_until(lambda: unlocks.calls == [([7], 'idle')])
+    finally:
+        registry.close_all()
+
+
+def test_active_session_is_kept():
+    registry = SessionRegistry(Unlocks(), idle_timeout=0.2, sweep_interval=0.02)
+    try:
+        for _ in range(15):
+            registry.get('busy')
+            time.sleep(0.02)
+        assert registry.find('busy') is not None
+    finally:
+        registry.close_all()
+
+
+def test_failing_close_keeps_sweeper_running():
+    calls = []
+
+    def unlock(ids, session_id):
+        calls.append(session_id)
+        if session_id == 'broken':
+            raise RuntimeError('unlock')
+
+    registry = SessionRegistry(unlock, max_sessions=1)
+    try:
+        registry.get('broken')
+        registry.get('next')
+        registry.get('last')
+        assert wait_until(lambda: calls == ['broken', 'next'])
+    finally:
+        registry.close_all()
+
+
+def test_close_all_closes_everything_and_stops_sweeper():
+    unlocks = Unlocks()
+    registry = SessionRegistry(unlocks, max_sessions=10)
+    with_batch(registry.get('a'), [1])
+    with_batch(registry.get('b'), [2])
+    assert registry.close_all() == 2
+    assert sorted(unlocks.calls) == [([1], 'a'), ([2], 'b')]
+    assert not registry._sweeper.is_alive()
+    assert len(registry) == 0
@@ -0,0 +1,79 @@
+"""로컬 문자열 캐시 - 변경 판단(시그니처)과 갱신 중 단계별 항목 넘겨받기"""
+
+import threading
+
+from string_cache import StringCache
+
+PAGE_SIZE = 10
+
+
+class FakeTranslator:
+    """파일 1개, 문자열 25개 (짝수 ID는 stage 1)"""
+
+    def __init__(self, gate=None):
+        self.file = {'id': 1, 'modifiedAt': 't1', 'total': 25, 'translated': 12}
+        self.strings = [{'id': i, 'original': f"text {i}", 'stage': 1 if i % 2 == 0 else 0} for i in range(1, 26)]
+        self.requests = []
+        self.gate = gate
+
+    def fetch_files(self):
+        return [dict(self.file)]
+
+    def fetch_strings_page(self, file_id, stage, page, page_size=PAGE_SIZE):
+        if self.gate:
+            self.gate.wait(2)
+        self.requests.append((stage, page))
+        rows = [s for s in self.strings if stage is None or s['stage'] == stage]
+        return {'rowCount': len(rows), 'pageCount': (len(rows) + PAGE_SIZE - 1) // PAGE_SIZE,
+                'results': rows[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]}
+
+
+def drain(stream):
+    items = []
+    while True:
+        item = stream.next(2)
+        if item is None:
+            return items
+        items.append(item)
+
+
+def make_cache(tmp_path):
+    return StringCache(str(tmp_path / 'cache.db'), project_id=1)
+
+
+def test_progress_counters_do_not_mark_file_stale(tmp_path):
+    cache, translator = make_cache(tmp_path), FakeTranslator()
+    cache.get_files(translator, max_age=0)
+    assert cache.refresh_file(translator, 1)
+    assert cache.is_fresh(1)
+
+    translator.file['translated'] = 13  # 우리 저장으로 진행 카운터만 바뀜
+    cache.get_files(translator, max_age=0)
+    assert cache.is_fresh(1)
+
+    translator.file['modifiedAt'] = 't2'  # 파일 내용이 바뀜
+    cache.get_files(translator, max_age=0)
+    assert not cache.is_fresh(1)
+
+
+def test_refresh_stream_relays_stage_items_from_one_download(tmp_path):
+    cache, translator = make_cache(tmp_path), FakeTranslator()
+    cache.get_files(translator, max_age=0)
+    stream = cache.refresh_stream(translator, 1, 1)
+    items = drain(stream)
+    assert [s['id'] for s in items] == list(range(2, 26, 2))
+    assert stream.total == 12 and not stream.failed
+    assert all(stage is None for stage, _ in translator.requests)  # 단계별로 따로 받지 않음
+    assert sorted(page for _, page in translator.requests) == [1, 2, 3]
+    assert cache.is_fresh(1)
+    assert len(cache.load_strings(1)) == 25
+
+
+def test_refresh_stream_is_refused_while_refreshing(tmp_path):
+    gate = threading.Event()
+    cache, translator = make_cache(tmp_path), FakeTranslator(gate)
+    cache.get_files(translator, max_age=0)
+    first = cache.refresh_stream(translator, 1, 0)  # 페이지 요청이 gate에서 막혀 갱신 중
+    assert cache.refresh_stream(translator, 1, 1) is None
+    gate.set()
+    assert len(drain(first)) == 13
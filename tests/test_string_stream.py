@@ -0,0 +1,120 @@
+"""파일 전체 문자열 스트림 - 병렬로 받은 페이지를 순서대로, 실패한 페이지에서 멈춤"""
+
+import threading
+import time
+
+import paratranz_api_translator
+from mock_servers import MockParatranz
+from paratranz_api_translator import ParatranzAPITranslator, get_http_session
+from string_stream import StringStream
+
+PAGE_SIZE = 10
+
+
+class FakeTranslator:
+    """문자열 count개를 PAGE_SIZE씩 나눠 주는 가짜 번역기
+
+    delays: page → 응답 전 대기 (초), broken: 실패(None)로 답할 페이지, legacy: pageCount 없이 목록만 (구버전 응답)
+    """
+
+    def __init__(self, count, delays=None, broken=(), legacy=False, gate=None):
+        self.strings = [{'id': i, 'original': f"text {i}"} for i in range(1, count + 1)]
+        self.delays = delays or {}
+        self.broken = set(broken)
+        self.legacy = legacy
+        self.gate = gate
+        self.requests = []
+
+    def fetch_strings_page(self, file_id, stage, page, page_size):
+        self.requests.append(page)
+        if self.gate and page > 1:
+            self.gate.wait(2)
+        time.sleep(self.delays.get(page, 0))
+        if page in self.broken:
+            return None
+        rows = self.strings[(page - 1) * page_size:page * page_size]
+        if self.legacy:
+            return {'results': rows, 'rowCount': None, 'pageCount': None}
+        return {'results': rows, 'rowCount': len(self.strings),
+                'pageCount': (len(self.strings) + page_size - 1) // page_size}
+
+
+def start(translator, workers=4):
+    stream = StringStream(translator, 1, 0, page_size=PAGE_SIZE, workers=workers)
+    stream.start()
+    return stream
+
+
+def drain(stream):
+    items = []
+    while True:
+        item = stream.next(2)
+        if item is None:
+            return [s['id'] for s in items]
+        items.append(item)
+
+
+def test_pages_are_served_in_order_when_they_finish_out_of_order():
+    translator = FakeTranslator(45, delays={2: 0.2, 3: 0.1})
+    stream = start(translator)
+    assert drain(stream) == list(range(1, 46))
+    assert stream.total == 45 and stream.page_count == 5 and not stream.failed
+    assert sorted(translator.requests) == [1, 2, 3, 4, 5]
+
+
+def test_first_page_is_served_before_the_rest_arrives():
+    gate = threading.Event()
+    stream = start(FakeTranslator(30, gate=gate))
+    try:
+        assert [stream.next(2)['id'] for _ in range(PAGE_SIZE)] == list(range(1, 11))
+        assert stream.next(0.05) is None  # 2페이지는 아직 받는 중
+    finally:
+        gate.set()
+    assert drain(stream) == list(range(11, 31))
+
+
+def test_failed_page_stops_the_stream():
+    stream = start(FakeTranslator(40, broken=[3]))
+    assert drain(stream) == list(range(1, 21))
+    assert stream.failed
+
+
+def test_failed_first_page():
+    stream = start(FakeTranslator(40, broken=[1]))
+    assert stream.next(2) is None
+    assert stream.failed and stream.page_count == 0
+
+
+def test_legacy_response_is_fetched_until_an_empty_page():
+    translator = FakeTranslator(25, legacy=True)
+    stream = start(translator)
+    assert drain(stream) == list(range(1, 26))
+    assert translator.requests == [1, 2, 3, 4]
+    assert stream.page_count == 4
+
+
+def test_close_stops_waiting_reader():
+    gate = threading.Event()
+    stream = start(FakeTranslator(30, gate=gate))
+    for _ in range(PAGE_SIZE):
+        stream.next(2)
+    threading.Timer(0.05, stream.close).start()
+    assert stream.next(2) is None
+    gate.set()
+
+
+def test_mock_paratranz_stage_filter(monkeypatch):
+    server = MockParatranz(port=0, strings=35).start()
+    try:
+        monkeypatch.setattr(paratranz_api_translator, 'PARATRANZ_BASE_URL', server.base_url)
+        for string_id in (3, 4, 20):
+            server.strings[string_id]['stage'] = 1
+        translator = ParatranzAPITranslator.__new__(ParatranzAPITranslator)
+        translator.http = get_http_session('stream-test')
+        stream = start(translator)
+        ids = drain(stream)
+        assert ids == [i for i in range(1, 36) if i not in (3, 4, 20)]
+        assert stream.total == 32 and stream.page_count == 4
+        assert server.stats['strings'] == 4
+    finally:
+        server.stop()
@@ -0,0 +1,67 @@
+"""토큰 예산 배치 크기 - 짧은 문자열은 많이, 긴 문자열은 적게, 관측값/잘림으로 보정"""
+
+import pytest
+
+from token_budget import DEFAULT_OUTPUT_PER_CHAR, SMOOTHING, TRUNCATION_PENALTY, TokenBudget
+
+
+def fill(budget, text, overhead=0):
+    """같은 text로 배치 하나를 채움 → 항목 수"""
+    plan = budget.plan(overhead)
+    while plan.add(text):
+        pass
+    return plan.count
+
+
+def test_short_strings_fill_to_max_batch_size():
+    budget = TokenBudget(max_batch_size=60, prompt_tokens=8000, output_tokens=4000)
+    assert fill(budget, 'Start') == 60
+
+
+def test_long_strings_make_smaller_batches():
+    budget = TokenBudget(max_batch_size=60, prompt_tokens=8000, output_tokens=4000)
+    count = fill(budget, 'x' * 400)
+    assert 1 < count < 60
+    plan = budget.plan()
+    for _ in range(count):
+        plan.add('x' * 400)
+    prompt, output = plan.estimate()
+    assert prompt <= budget.prompt_tokens and output <= budget.output_tokens
+
+
+def test_first_item_is_always_added():
+    budget = TokenBudget(output_tokens=100)
+    assert fill(budget, 'x' * 5000) == 1
+
+
+def test_overhead_counts_against_prompt_budget():
+    budget = TokenBudget(prompt_tokens=2000, output_tokens=10 ** 6)
+    assert fill(budget, 'x' * 100, overhead=5000) < fill(budget, 'x' * 100)
+
+
+def test_fixed_batch_size_when_not_adaptive():
+    budget = TokenBudget(adaptive=False, batch_size=20, max_batch_size=60, output_tokens=100)
+    assert fill(budget, 'x' * 400) == 20
+    assert budget.plan().max_items == 40  # 번역 메모리 적중 항목 포함 수집 한도
+
+
+def test_first_observation_replaces_defaults_then_smooths():
+    budget = TokenBudget()
+    budget.observe(prompt_chars=4000, source_chars=1000, items=10, prompt_tokens=2000, output_tokens=1080)
+    assert budget.chars_per_token == 2.0
+    assert budget.output_per_char == pytest.approx(1.0)
+
+    budget.observe(prompt_chars=4000, source_chars=1000, items=10, prompt_tokens=1000, output_tokens=580)
+    assert budget.chars_per_token == pytest.approx(2.0 * (1 - SMOOTHING) + 4.0 * SMOOTHING)
+    assert budget.output_per_char == pytest.approx(1.0 * (1 - SMOOTHING) + 0.5 * SMOOTHING)
+    assert budget.stats()['observations'] == 2
+
+
+def test_truncation_shrinks_next_batch():
+    budget = TokenBudget(max_batch_size=200)
+    before = fill(budget, 'x' * 100)
+    budget.observe(prompt_chars=3500, source_chars=3000, items=30, prompt_tokens=1000, output_tokens=4000,
+                   truncated=True)
+    assert budget.output_per_char == pytest.approx(DEFAULT_OUTPUT_PER_CHAR * TRUNCATION_PENALTY)
+    assert budget.truncations == 1
+    assert fill(budget, 'x' * 100) < before
@@ -0,0 +1,46 @@
+"""번역 메모리 키 - 원문에 실제로 등장하는 용어집 항목만 키에 반영되는지"""
+
+import pytest
+
+from glossary_index import GlossaryIndex
+from translation_memory import TranslationMemory, glossary_key
+
+GLOSSARY = {'Brake': '브레이크', 'Pass': '통행권', 'Gear': '기어'}
+
+
+@pytest.fixture
+def index():
+    return GlossaryIndex(GLOSSARY)
+
+
+def test_unrelated_terms_do_not_change_the_key(index):
+    before = glossary_key('Press Brake to stop', GLOSSARY, index)
+    changed = dict(GLOSSARY, Gear='변속기')
+    assert glossary_key('Press Brake to stop', changed, index) == before
+
+
+def test_used_term_change_changes_the_key(index):
+    before = glossary_key('Press Brake to stop', GLOSSARY, index)
+    changed = dict(GLOSSARY, Brake='제동')
+    assert glossary_key('Press Brake to stop', changed, index) != before
+
+
+def test_word_boundaries_match_the_prompt_glossary(index):
+    # "Pass"는 "Passenger"의 일부일 뿐 → 용어로 보지 않음, 복수형 "Brakes"는 인정
+    plain = glossary_key('nothing here', GLOSSARY, index)
+    assert glossary_key('Passenger seat', GLOSSARY, index) == plain
+    assert glossary_key('Check the brakes', GLOSSARY, index) == glossary_key('Brake', GLOSSARY, index)
+
+
+def test_removed_term_in_index_is_ignored(index):
+    with_gear = glossary_key('Shift Gear', GLOSSARY, index)
+    without = {en: ko for en, ko in GLOSSARY.items() if en != 'Gear'}
+    assert glossary_key('Shift Gear', without, index) != with_gear
+    assert glossary_key('Shift Gear', without, index) == glossary_key('nothing', without, index)
+
+
+def test_lookup_uses_the_same_key(tmp_path, index):
+    memory = TranslationMemory(str(tmp_path / 'memory.db'))
+    memory.record('Press  Brake', '브레이크를 누르세요', glossary_key('Press  Brake', GLOSSARY, index))
+    assert memory.lookup('press brake', GLOSSARY, index) == '브레이크를 누르세요'
+    assert memory.lookup('press brake', dict(GLOSSARY, Brake='제동'), index) is None
@@ -0,0 +1,116 @@
+"""사용량 장부 - SQLite/Redis(fakeredis) 장부가 같은 누적값을 돌려주는지, 재시작/다른 프로세스와 이어서 계산하는지"""
+
+import threading
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from coordination import RedisUsageLedger
+from gemini_client import QuotaExceeded
+from gemini_dispatcher import GeminiDispatcher
+from usage_ledger import UsageLedger, empty_usage
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def ledger(request, tmp_path):
+    if request.param == 'redis':
+        fakeredis = pytest.importorskip('fakeredis')
+        client = fakeredis.FakeRedis()
+        ledger = RedisUsageLedger(client, prefix=f"test-{uuid.uuid4().hex}")
+        ledger.client = client  # 저장된 키 확인용
+        yield ledger
+        return
+    ledger = UsageLedger(str(tmp_path / 'usage.db'))
+    yield ledger
+    ledger.close()
+
+
+def usage(prompt, output, cached=0):
+    return SimpleNamespace(prompt_token_count=prompt, candidates_token_count=output,
+                           cached_content_token_count=cached, total_token_count=prompt + output)
+
+
+class FakeClient:
+    def generate(self, api_key, model, prompt, generation_config=None, stream=False, on_done=None, **kwargs):
+        result = usage(10, 10)
+        on_done(result)
+        return SimpleNamespace(text='[]', usage_metadata=result)
+
+
+def test_record_accumulates(ledger):
+    ledger.record('key-a', 'model', usage(100, 20, 40), day='2026-01-01')
+    totals = ledger.record('key-a', 'model', usage(50, 10), day='2026-01-01')
+    assert totals == {
+        'requests': 2, 'prompt_tokens': 150, 'output_tokens': 30,
+        'cached_tokens': 40, 'total_tokens': 180, 'quota_errors': 0
+    }
+    assert ledger.get('key-a', 'model', '2026-01-01') == totals
+
+
+def test_days_keys_and_models_are_separate(ledger):
+    ledger.record('key-a', 'model', usage(10, 1), day='2026-01-01')
+    ledger.record('key-a', 'model', requests=0, quota_errors=1, day='2026-01-02')
+    ledger.record('key-b', 'model', usage(5, 5), day='2026-01-01')
+    assert ledger.get('key-a', 'model', '2026-01-02')['quota_errors'] == 1
+    assert ledger.get('key-a', 'model', '2026-01-02')['requests'] == 0
+    assert ledger.get('key-a', 'other', '2026-01-01') == empty_usage()
+    totals = ledger.totals([('key-a', 'model'), ('key-b', 'model')], '2026-01-01')
+    assert totals['requests'] == 2
+    assert totals['total_tokens'] == 21
+
+
+def test_concurrent_records_are_not_lost(ledger):
+    def worker():
+        for _ in range(25):
+            ledger.record('key-a', 'model', usage(1, 1), day='2026-01-01')
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert ledger.get('key-a', 'model', '2026-01-01')['requests'] == 200
+
+
+def test_raw_api_key_is_not_stored(ledger):
+    ledger.record('secret-api-key', 'model', usage(1, 1), day='2026-01-01')
+    if isinstance(ledger, RedisUsageLedger):
+        stored = b' '.join(ledger.client.keys('*'))
+    else:
+        stored = repr(ledger._db.execute("SELECT * FROM usage").fetchall()).encode()
+    assert b'secret-api-key' not in stored
+
+
+def test_usage_survives_restart_and_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'usage.db')
+    first = UsageLedger(path)
+    first.record('key-a', 'model', usage(10, 5), day='2026-01-01')
+    first.close()
+
+    restarted, other = UsageLedger(path), UsageLedger(path)  # 재시작한 서버 + 같은 파일을 쓰는 다른 서버
+    try:
+        other.record('key-a', 'model', usage(1, 1), day='2026-01-01')
+        assert restarted.get('key-a', 'model', '2026-01-01')['requests'] == 2
+        assert restarted.get('key-a', 'model', '2026-01-01')['total_tokens'] == 17
+    finally:
+        restarted.close()
+        other.close()
+
+
+def test_dispatcher_counts_usage_recorded_before_restart(tmp_path):
+    ledger = UsageLedger(str(tmp_path / 'usage.db'))
+    key = f"key-{uuid.uuid4().hex[:8]}"
+    try:
+        for _ in range(3):
+            ledger.record(key, 'gemini-test', usage(10, 10))
+        dispatcher = GeminiDispatcher(FakeClient(), [key], ['gemini-test'], ledger=ledger,
+                                      limits={'gemini-test': {'rpm': 100, 'rpd': 4, 'tpm': 10 ** 6}})
+        assert dispatcher.requests_today() == 3
+        dispatcher.generate_content('prompt')  # 오늘 한도의 마지막 요청
+        assert ledger.get(key, 'gemini-test')['requests'] == 4
+        assert dispatcher.usage_today()['total_tokens'] == 80
+        with pytest.raises(QuotaExceeded):
+            dispatcher.generate_content('prompt')
+    finally:
+        ledger.close()
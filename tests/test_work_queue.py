@@ -0,0 +1,114 @@
+"""작업 분배 대기열 - 메모리/SQLite/Redis(fakeredis) 백엔드가 같은 동작을 하는지"""
+
+import time
+import uuid
+
+import pytest
+
+from coordination import RedisWorkQueue, SqliteWorkQueue
+from work_queue import WorkQueue
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def queue(request, tmp_path):
+    if request.param == 'sqlite':
+        return SqliteWorkQueue(str(tmp_path / 'work.db'), timeout=60)
+    if request.param == 'redis':
+        fakeredis = pytest.importorskip('fakeredis')
+        pytest.importorskip('lupa')  # 스크립트(EVAL) 실행용
+        return RedisWorkQueue(fakeredis.FakeRedis(), timeout=60, prefix=f"test-{uuid.uuid4().hex}")
+    return WorkQueue(timeout=60)
+
+
+def ids(values):
+    """Redis는 ID를 문자열로 돌려줌 → 비교용으로 정수로"""
+    return [int(v) for v in values]
+
+
+def test_lease_hands_out_disjoint_chunks(queue):
+    queue.add('7:0', range(1, 11))
+    first = ids(queue.lease('7:0', 'a', 4))
+    second = ids(queue.lease('7:0', 'b', 4))
+    assert first == [1, 2, 3, 4]
+    assert second == [5, 6, 7, 8]
+    assert queue.pending('7:0') == 2
+
+
+def test_release_goes_to_the_back(queue):
+    queue.add('7:0', [1, 2, 3])
+    leased = queue.lease('7:0', 'a', 1)
+    assert ids(queue.release(leased, 'a')) == [1]
+    assert ids(queue.lease('7:0', 'b', 3)) == [2, 3, 1]
+
+
+def test_release_ignores_other_sessions(queue):
+    queue.add('7:0', [1])
+    leased = queue.lease('7:0', 'a', 1)
+    assert queue.release(leased, 'b') == []
+
+
+def test_completed_items_are_not_handed_out_again(queue):
+    queue.add('7:0', [1, 2, 3])
+    leased = queue.lease('7:0', 'a', 3)
+    queue.complete('7:0', leased)
+    queue.add('7:0', [1, 2, 3])
+    assert queue.lease('7:0', 'b', 3) == []
+    assert queue.pending('7:0') == 0
+
+
+def test_completion_is_scoped_to_the_queue_key(queue):
+    # 0단계에서 저장한 항목도 1단계(검토) 대기열에서는 분배되어야 함
+    queue.add('7:0', [1, 2, 3])
+    queue.complete('7:0', queue.lease('7:0', 'a', 3))
+    queue.add('7:1', [1, 2, 3])
+    assert ids(queue.lease('7:1', 'b', 3)) == [1, 2, 3]
+
+
+def test_complete_before_add(queue):
+    # 다른 프로세스가 나중에 목록을 받아 add해도 이미 저장된 항목은 분배하지 않음
+    queue.complete('7:0', [2])
+    queue.add('7:0', [1, 2, 3])
+    assert ids(queue.lease('7:0', 'a', 3)) == [1, 3]
+
+
+def test_reseed_clears_done_marks(queue):
+    queue.add('7:0', [1, 2, 3])
+    queue.complete('7:0', queue.lease('7:0', 'a', 2))
+    queue.reseed('7:0')
+    # 새 목록에 다시 나온 항목(저장이 되돌려짐 등)은 다시 분배
+    queue.add('7:0', [1, 3])
+    assert ids(queue.lease('7:0', 'b', 3)) == [3, 1]
+
+
+def test_expired_leases_return_to_the_front(queue):
+    queue.timeout = -1  # 임대하자마자 만료
+    queue.add('7:0', [1, 2, 3])
+    queue.lease('7:0', 'a', 2)
+    queue.timeout = 60
+    assert ids(queue.lease('7:0', 'b', 3)) == [1, 2, 3]
+
+
+def test_renew_keeps_leases(queue):
+    queue.add('7:0', [1, 2])
+    queue.lease('7:0', 'a', 2)
+    assert queue.renew('a') == 2
+    assert queue.lease('7:0', 'b', 2) == []
+
+
+def test_redis_scripts_touch_only_declared_keys():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    client = fakeredis.FakeRedis()
+    queue = RedisWorkQueue(client, timeout=0.05, prefix='declared')
+    queue.add('1:0', [1, 2, 3])
+    queue.add('1:0x', [4])  # 접두어가 같은 다른 대기열 키
+    assert ids(queue.lease('1:0', 'a', 2)) == [1, 2]
+    queue.complete('1:0', [1])
+    queue.renew('a')
+    queue.release([2], 'a')
+    queue.lease('1:0x', 'b', 1)
+    time.sleep(0.1)
+    assert queue.pending('1:0') == 2 and queue.pending('1:0x') == 1  # 만료된 임대는 대기로
+    queue.reseed('1:0')
+    assert {key.decode() for key in client.keys('*')} <= set(queue._keys)
+    assert all(key.startswith('{declared:work}:') for key in queue._keys)  # Cluster에서 같은 슬롯
@@ -0,0 +1,96 @@
+"""운영용 서버 실행 - 종료 신호 → 스트림 종료 → 저장 대기열 전송, gunicorn 워커 수, 스레드 지연 생성"""
+
+import signal
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import save_queue
+import web_translator
+import wsgi_server
+from save_queue import SaveQueue
+
+
+@pytest.fixture
+def stop_signals():
+    """테스트가 바꾼 SIGINT/SIGTERM 처리기를 되돌림"""
+    saved = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    yield
+    for signum, handler in saved.items():
+        signal.signal(signum, handler)
+
+
+class FakeAppModule:
+    """app/close_streams/shutdown 호출 순서를 기록하는 앱 모듈 (app.run은 SIGTERM을 받은 것처럼 동작)"""
+
+    def __init__(self):
+        self.calls = []
+        self.app = SimpleNamespace(run=self.run)
+
+    def run(self, **kwargs):
+        self.calls.append('run')
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+
+    def close_streams(self):
+        self.calls.append('close_streams')
+
+    def shutdown(self, drain_timeout):
+        self.calls.append(('shutdown', drain_timeout))
+
+
+def test_stop_signal_closes_streams_then_drains(monkeypatch, stop_signals):
+    exits = []
+    monkeypatch.setattr(wsgi_server, '_exit', lambda code=0: exits.append(code))
+    module = FakeAppModule()
+    wsgi_server.serve(module, 'dev', '127.0.0.1', 0, drain_timeout=7)
+    assert module.calls == ['run', 'close_streams', ('shutdown', 7)]
+    assert exits == [0]
+
+
+def test_gunicorn_rejects_multiple_workers():
+    with pytest.raises(ValueError):
+        wsgi_server.serve(FakeAppModule(), 'gunicorn', '127.0.0.1', 0, workers=2)
+
+
+def test_parse_args_rejects_multiple_workers():
+    assert web_translator.parse_args([]).workers == 1
+    with pytest.raises(SystemExit):
+        web_translator.parse_args(['--workers', '2'])
+
+
+def test_import_starts_no_background_threads():
+    """앱을 import만 하는 프로세스(gunicorn 마스터)는 세션 정리/저장 전송 스레드를 띄우지 않음"""
+    names = subprocess.run(
+        [sys.executable, '-c', "import threading, web_translator; "
+                               "print(' '.join(t.name for t in threading.enumerate()))"],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert not [name for name in names if name.startswith(('save-worker', 'session-sweeper'))]
+
+
+def test_shutdown_drains_save_queue(tmp_path, monkeypatch):
+    sent = []
+
+    def put_translation(http, string_id, translation, as_review):
+        time.sleep(0.05)
+        sent.append(string_id)
+        return 200
+
+    monkeypatch.setattr(save_queue, 'get_http_session', lambda key: None)
+    monkeypatch.setattr(save_queue, 'put_translation', put_translation)
+    queue = SaveQueue(str(tmp_path / 'saves.db'), workers=1)
+    for string_id in range(5):
+        queue.enqueue('key', string_id, f'번역 {string_id}', False, 'session-a')
+    monkeypatch.setattr(web_translator, '_save_queue', queue)
+    monkeypatch.setattr(web_translator, '_sessions', None)
+    monkeypatch.setattr(web_translator, '_shut_down', False)
+    try:
+        web_translator.shutdown(drain_timeout=5)
+        assert sorted(sent) == list(range(5))
+        assert queue.counts() == {'pending': 0, 'failed': 0}
+        web_translator.shutdown(drain_timeout=5)  # 두 번째 호출은 아무것도 하지 않음
+    finally:
+        queue._db.close()
@@ -0,0 +1,112 @@
+"""
+토큰 예산 기반 배치 크기 조정
+고정된 개수 대신 "입력/출력 토큰 예산"에 맞춰 배치를 채움
+
+- 짧은 문자열(메뉴 라벨 등)은 한 번에 많이 → API 호출 절약
+- 긴 문자열(튜토리얼 등)은 적게 → 출력이 잘려 [번역 실패] 나오는 것 방지
+- 실제 호출의 usage_metadata(입력/출력 토큰 수)로 글자당 토큰 비율을 계속 보정
+"""
+
+import threading
+
+# 처음 몇 번 호출 전까지 쓰는 추정치 (관측값으로 점차 대체)
+DEFAULT_CHARS_PER_TOKEN = 3.5  # 프롬프트 글자 수 / 입력 토큰
+DEFAULT_OUTPUT_PER_CHAR = 0.8  # 출력 토큰 / 원문 글자 (번역 2가지 포함)
+ITEM_OUTPUT_OVERHEAD = 8  # 항목당 형식 토큰 ("1-1: ", "1-2: ", 줄바꿈)
+SMOOTHING = 0.3  # 새 관측값 반영 비율 (지수 이동 평균)
+TRUNCATION_PENALTY = 1.3  # 출력이 잘렸을 때 출력 비율을 늘리는 배수
+
+
+class BatchPlan:
+    """배치 하나를 채우는 동안의 토큰 누적 계산"""
+
+    def __init__(self, budget: 'TokenBudget', overhead_chars: int):
+        self.budget = budget
+        self.count = 0
+        self.source_chars = 0
+        self.overhead_chars = overhead_chars  # 원문을 뺀 프롬프트 (지침 + 용어집)
+
+    @property
+    def max_items(self) -> int:
+        """번역 메모리 적중 항목까지 포함한 최대 수집 개수"""
+        return self.budget.max_batch_size * 2
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.budget.max_batch_size
+
+    def add(self, text: str) -> bool:
+        """text를 추가해도 예산 안이면 추가하고 True (첫 항목은 항상 추가)"""
+        if self.full:
+            return False
+        chars = len(text or '')
+        if self.budget.adaptive and self.count > 0:
+            prompt, output = self.budget.estimate(self.overhead_chars, self.source_chars + chars, self.count + 1)
+            if prompt > self.budget.prompt_tokens or output > self.budget.output_tokens:
+                return False
+        self.count += 1
+        self.source_chars += chars
+        return True
+
+    def estimate(self):
+        return self.budget.estimate(self.overhead_chars, self.source_chars, self.count)
+
+
+class TokenBudget:
+    """입력/출력 토큰 예산 + 관측 기반 비율 보정"""
+
+    def __init__(self, adaptive: bool = True, batch_size: int = 20, max_batch_size: int = 60,
+                 prompt_tokens: int = 8000, output_tokens: int = 4000):
+        self.adaptive = adaptive
+        # 자동 조정을 끄면 batch_size 고정
+        self.max_batch_size = max(1, max_batch_size if adaptive else batch_size)
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+
+        self.chars_per_token = DEFAULT_CHARS_PER_TOKEN
+        self.output_per_char = DEFAULT_OUTPUT_PER_CHAR
+        self.observations = 0
+        self.truncations = 0
+        self._lock = threading.Lock()
+
+    def plan(self, overhead_chars: int = 0) -> BatchPlan:
+        return BatchPlan(self, overhead_chars)
+
+    def estimate(self, overhead_chars: int, source_chars: int, items: int):
+        """예상 (입력 토큰, 출력 토큰)"""
+        with self._lock:
+            cpt = self.chars_per_token
+            opc = self.output_per_char
+        # 원문은 "원문 N: " 접두어가 붙음
+        prompt = (overhead_chars + source_chars + items * 8) / cpt
+        output = source_chars * opc + items * ITEM_OUTPUT_OVERHEAD
+        return int(prompt), int(output)
+
+    def observe(self, prompt_chars: int, source_chars: int, items: int,
+                prompt_tokens: int, output_tokens: int, truncated: bool = False):
+        """실제 호출 결과로 비율 보정"""
+        with self._lock:
+            if prompt_tokens > 0:
+                self._update('chars_per_token', prompt_chars / prompt_tokens)
+            if source_chars > 0 and output_tokens > 0 and not truncated:
+                per_char = max(0, output_tokens - items * ITEM_OUTPUT_OVERHEAD) / source_chars
+                self._update('output_per_char', per_char)
+            if truncated:
+                self.truncations += 1
+                self.output_per_char *= TRUNCATION_PENALTY
+            self.observations += 1
+
+    def _update(self, name: str, value: float):
+        if self.observations == 0:
+            setattr(self, name, value)
+        else:
+            setattr(self, name, getattr(self, name) * (1 - SMOOTHING) + value * SMOOTHING)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'chars_per_token': round(self.chars_per_token, 2),
+                'output_per_char': round(self.output_per_char, 2),
+                'observations': self.observations,
+                'truncations': self.truncations
+            }
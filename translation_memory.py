@@ -0,0 +1,123 @@
+"""
+번역 메모리 (SQLite)
+저장된 번역을 정규화한 원문 기준으로 기억해 두고,
+같은 문장이 다시 나오면 Gemini 호출 없이 바로 사용
+
+- 키: 정규화한 원문 + 그 원문에 등장하는 용어집 항목의 해시
+  (관련 없는 용어가 바뀌어도 기존 번역은 그대로 재사용)
+- 완전히 같은 문장이 없으면 비슷한 문장의 번역을 프롬프트 예시로 첨부
+  (유사 문장 검색은 n-gram 색인 사용 → 메모리가 커져도 항목당 수 ms)
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from fuzzy_index import NgramIndex
+from glossary_index import GlossaryIndex
+from paratranz_api_translator import config
+
+TM_CONFIG = config.get('translation_memory', {})
+TM_DB = TM_CONFIG.get('db_file', 'paratranz_memory.db')
+TM_FUZZY_LIMIT = TM_CONFIG.get('fuzzy_examples', 3)  # 원문당 첨부할 비슷한 번역 수
+TM_FUZZY_MIN_SCORE = TM_CONFIG.get('fuzzy_min_score', 0.6)  # 유사도 하한 (0~1)
+TM_MAX_EXAMPLES = TM_CONFIG.get('max_examples', 10)  # 배치 하나의 프롬프트에 넣을 예시 최대 수
+TM_INDEX_CANDIDATES = TM_CONFIG.get('index_candidates', 20)  # 유사도를 정밀 계산할 후보 수
+
+
+def normalize_text(text: str) -> str:
+    """비교용 정규화 (유니코드 정규화 + 공백 정리 + 대소문자 무시)"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+def glossary_key(text: str, glossary: Dict[str, str], index: GlossaryIndex) -> str:
+    """원문에 등장하는 용어집 항목만으로 만든 해시
+
+    등장 용어는 용어집 검색 색인으로 찾음 (원문을 한 번 훑음 - 용어 수와 무관, 프롬프트 용어 선택과 같은 단어 경계)
+    """
+    used = sorted((en, glossary[en]) for en in index.find([text]) if en in glossary)
+    return hashlib.sha1(json.dumps(used, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+
+class TranslationMemory:
+    """정규화 원문 → 저장된 번역"""
+
+    def __init__(self, db_path: str = TM_DB):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+
+        with self._db_lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS memory (
+                    norm_key TEXT NOT NULL,
+                    glossary_key TEXT NOT NULL,
+                    original TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    length INTEGER NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (norm_key, glossary_key)
+                )
+            """)
+            norms = [row[0] for row in self._db.execute("SELECT DISTINCT norm_key FROM memory")]
+
+        # 🔎 유사 문장 색인 (시작 시 DB에서 다시 구성)
+        self.index = NgramIndex(candidates=TM_INDEX_CANDIDATES)
+        self.index.add_all(norms)
+
+    def record(self, original: str, translation: str, gloss_key: str):
+        """저장된 번역 기록 (같은 원문이면 최신 번역으로 교체)"""
+        norm = normalize_text(original)
+        if not norm or not translation:
+            return
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT INTO memory (norm_key, glossary_key, original, translation, length, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (norm_key, glossary_key) DO UPDATE SET "
+                "original = excluded.original, translation = excluded.translation, updated_at = excluded.updated_at",
+                (norm, gloss_key, original, translation, len(norm), time.time())
+            )
+        self.index.add(norm)
+
+    def lookup(self, original: str, glossary: Dict[str, str], index: GlossaryIndex) -> Optional[str]:
+        """완전히 같은 원문의 번역 (없으면 None)"""
+        norm = normalize_text(original)
+        key = glossary_key(original, glossary, index)
+        with self._db_lock, self._db:
+            row = self._db.execute(
+                "SELECT translation FROM memory WHERE norm_key = ? AND glossary_key = ?", (norm, key)
+            ).fetchone()
+            if row:
+                self._db.execute(
+                    "UPDATE memory SET hits = hits + 1 WHERE norm_key = ? AND glossary_key = ?", (norm, key)
+                )
+        return row[0] if row else None
+
+    def similar(self, original: str, limit: int = TM_FUZZY_LIMIT,
+                min_score: float = TM_FUZZY_MIN_SCORE) -> List[Tuple[str, str, float]]:
+        """비슷한 원문의 번역 [(원문, 번역, 유사도)]"""
+        matches = self.index.search(normalize_text(original), limit, min_score)
+        if not matches:
+            return []
+        results = []
+        with self._db_lock:
+            for norm, score in matches:
+                row = self._db.execute(
+                    "SELECT original, translation FROM memory WHERE norm_key = ? ORDER BY updated_at DESC LIMIT 1",
+                    (norm,)
+                ).fetchone()
+                if row:
+                    results.append((row[0], row[1], score))
+        return results
+
+    def __len__(self):
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
@@ -0,0 +1,136 @@
+"""
+Gemini 사용량 장부 (SQLite)
+번역기 인스턴스마다 세던 호출/토큰 수는 번역기를 새로 만들거나 서버를 재시작하면 0이 되어
+하루 한도를 넘기기 쉬움 → (API 키, 모델, UTC 날짜)별로 디스크에 누적
+
+- 호출마다 입력/출력/캐시/전체 토큰을 한 번의 UPSERT로 더함 (여러 스레드/프로세스가 같은 파일을 써도 안전)
+- 하루 한도 확인과 화면 통계는 모두 이 장부를 읽음
+- API 키는 저장하지 않음 (키 해시만 기록)
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+class LedgerError(Exception):
+    """SQLite가 아닌 장부 저장소(Redis 등)의 오류"""
+
+
+USAGE_FIELDS = ('requests', 'prompt_tokens', 'output_tokens', 'cached_tokens', 'total_tokens', 'quota_errors')
+
+
+def key_hash(api_key: str) -> str:
+    """API 키 식별용 해시 (키 원문은 저장하지 않음)"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+def utc_day() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def empty_usage() -> Dict[str, int]:
+    return {field: 0 for field in USAGE_FIELDS}
+
+
+def usage_counts(usage=None, requests: int = 1, quota_errors: int = 0) -> Dict[str, int]:
+    """호출 한 번의 누적값 (usage: Gemini usage_metadata, 없으면 토큰 0)"""
+    return {
+        'requests': requests,
+        'prompt_tokens': getattr(usage, 'prompt_token_count', 0) or 0,
+        'output_tokens': getattr(usage, 'candidates_token_count', 0) or 0,
+        'cached_tokens': getattr(usage, 'cached_content_token_count', 0) or 0,
+        'total_tokens': getattr(usage, 'total_token_count', 0) or 0,
+        'quota_errors': quota_errors
+    }
+
+
+class UsageLedger:
+    """(키 해시, 모델, UTC 날짜)별 요청/토큰 누적"""
+
+    def __init__(self, db_path: str):
+        # timeout: 다른 프로세스가 쓰는 중이면 잠시 기다림
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._db_lock = threading.Lock()
+
+        with self._db_lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS usage (
+                    key_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    output_tokens INTEGER NOT NULL DEFAULT 0,
+                    cached_tokens INTEGER NOT NULL DEFAULT 0,
+                    total_tokens INTEGER NOT NULL DEFAULT 0,
+                    quota_errors INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (key_hash, model, day)
+                )
+            """)
+
+    def record(self, api_key: str, model: str, usage=None, requests: int = 1,
+               quota_errors: int = 0, day: Optional[str] = None) -> Dict[str, int]:
+        """호출 한 번 기록 → 기록 후 그 키/모델의 오늘 누적 (다른 프로세스가 기록한 것 포함)
+
+        usage: Gemini usage_metadata (없으면 토큰 0)
+        """
+        day = day or utc_day()
+        h = key_hash(api_key)
+        values = tuple(usage_counts(usage, requests, quota_errors)[field] for field in USAGE_FIELDS)
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT INTO usage (key_hash, model, day, requests, prompt_tokens, output_tokens, cached_tokens, "
+                "total_tokens, quota_errors, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key_hash, model, day) DO UPDATE SET "
+                "requests = requests + excluded.requests, "
+                "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                "output_tokens = output_tokens + excluded.output_tokens, "
+                "cached_tokens = cached_tokens + excluded.cached_tokens, "
+                "total_tokens = total_tokens + excluded.total_tokens, "
+                "quota_errors = quota_errors + excluded.quota_errors, "
+                "updated_at = excluded.updated_at",
+                (h, model, day, *values, time.time())
+            )
+            return self._select(h, model, day)
+
+    def get(self, api_key: str, model: str, day: Optional[str] = None) -> Dict[str, int]:
+        """키/모델 하나의 하루 누적"""
+        with self._db_lock:
+            return self._select(key_hash(api_key), model, day or utc_day())
+
+    def _select(self, h: str, model: str, day: str) -> Dict[str, int]:
+        row = self._db.execute(
+            f"SELECT {', '.join(USAGE_FIELDS)} FROM usage WHERE key_hash = ? AND model = ? AND day = ?",
+            (h, model, day)
+        ).fetchone()
+        return dict(zip(USAGE_FIELDS, row)) if row else empty_usage()
+
+    def totals(self, pairs: Iterable[tuple], day: Optional[str] = None) -> Dict[str, int]:
+        """여러 (API 키, 모델)의 하루 누적 합"""
+        totals = empty_usage()
+        for api_key, model in pairs:
+            for field, value in self.get(api_key, model, day).items():
+                totals[field] += value
+        return totals
+
+    def close(self):
+        with self._db_lock:
+            self._db.close()
+
+
+# db 경로 → 장부 - 모든 번역기가 공유
+_ledgers: Dict[str, UsageLedger] = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(db_path: str) -> UsageLedger:
+    with _ledgers_lock:
+        ledger = _ledgers.get(db_path)
+        if ledger is None:
+            ledger = _ledgers[db_path] = UsageLedger(db_path)
+        return ledger
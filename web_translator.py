@@ -3,13 +3,28 @@ Paratranz 웹 UI 번역기
 Flask 기반 웹 인터페이스 + 키보드 단축키 지원
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 import threading
 import webbrowser
 import time
 import os
+import sys
 import socket
-from paratranz_api_translator import ParatranzAPITranslator, config, BATCH_SIZE
+from paratranz_api_translator import (
+    ParatranzAPITranslator, config, BATCH_SIZE, GLOSSARY_DB, GLOSSARY_FILE, DEFAULT_GLOSSARY
+)
+from batch_prefetcher import BatchPrefetcher
+from string_stream import StringStream, ListStringStream
+from string_cache import START_CHECK_AGE, StringCache
+from translation_memory import TranslationMemory, glossary_key
+from session_registry import ReviewSession, SessionLimitError, SessionRegistry
+from save_queue import SaveQueue
+from event_hub import EventHub
+from glossary_store import get_glossary_store
+from lock_manager import DEFAULT_LOCK_TIMEOUT
+from coordination import create_lock_manager, create_work_queue
+from work_queue import QueueStream, DEFAULT_CHUNK_SIZE, get_work_source, set_work_source, work_key
+import wsgi_server
 
 # ngrok 지원 (선택사항)
 try:
@@ -28,78 +43,103 @@ else:
 
 app = Flask(__name__, template_folder=template_folder)
 
-# 전역 번역기 인스턴스
-translator = None
-current_batch_translations = []
-current_batch_data = []
-current_item_index = 0
-current_file_id = None
-current_stage = None
-current_page = 1
+# 👥 세션별 번역 상태 (번역기/커서/배치) - 유휴 세션 자동 정리
+server_config = config.get('server', {})
+ITEM_WAIT_TIMEOUT = server_config.get('item_wait_timeout', 20)  # 스트리밍 번역 한 항목 최대 대기 (초)
+WINDOW_SIZE = server_config.get('window_size', 10)  # 브라우저가 미리 받아 두는 항목 수
+WORK_CHUNK_SIZE = server_config.get('work_chunk_size', DEFAULT_CHUNK_SIZE)  # 세션에 한 번에 나눠 주는 항목 수
 
-# 🔒 세션별 잠금 시스템
-import time
-from threading import Lock
+def publish_lock(ids: list, locked: bool, total: int):
+    """📡 잠금 변경 알림 (작업자 정보는 보내지 않음)"""
+    events.broadcast('lock', {'ids': ids, 'locked': locked, 'total': total})
 
-# 잠금 데이터: {string_id: {'user': session_id, 'locked_at': timestamp}}
-locked_strings = {}
-lock_mutex = Lock()  # 스레드 안전성
+# 🔒 항목 잠금 (세션별 임대, 활동하면 연장 / 시간이 지나면 자동 해제)
+# coordination.backend가 sqlite/redis면 여러 서버 프로세스가 같은 잠금을 공유
+locks = create_lock_manager(
+    config.get('coordination', {}),
+    timeout=server_config.get('lock_timeout', DEFAULT_LOCK_TIMEOUT),
+    on_change=publish_lock
+)
 
-def lock_string(string_id: int, session_id: str) -> bool:
-    """문자열 잠금 시도"""
-    with lock_mutex:
-        current_time = time.time()
-        
-        # 기존 잠금 확인
-        if string_id in locked_strings:
-            lock_info = locked_strings[string_id]
-            
-            # 5분 타임아웃 (자동 해제)
-            if current_time - lock_info['locked_at'] > 300:
-                # 타임아웃 → 새로 잠금
-                locked_strings[string_id] = {
-                    'user': session_id,
-                    'locked_at': current_time
-                }
-                return True
-            
-            # 같은 사용자면 OK
-            if lock_info['user'] == session_id:
-                return True
-            
-            # 다른 사용자가 잠금 중
-            return False
-        
-        # 잠금 없음 → 새로 잠금
-        locked_strings[string_id] = {
-            'user': session_id,
-            'locked_at': current_time
-        }
-        return True
-
-def unlock_string(string_id: int, session_id: str):
-    """문자열 잠금 해제"""
-    with lock_mutex:
-        if string_id in locked_strings:
-            lock_info = locked_strings[string_id]
-            # 본인 것만 해제 가능
-            if lock_info['user'] == session_id:
-                del locked_strings[string_id]
-
-def get_locked_by(string_id: int) -> str:
-    """누가 잠금했는지 확인"""
-    with lock_mutex:
-        if string_id in locked_strings:
-            lock_info = locked_strings[string_id]
-            current_time = time.time()
-            
-            # 타임아웃 체크
-            if current_time - lock_info['locked_at'] > 300:
-                del locked_strings[string_id]
-                return None
-            
-            return lock_info['user']
-        return None
+# 📋 작업 분배 대기열 (파일/단계별 대기 항목을 세션마다 겹치지 않게 나눠 줌)
+work_queue = create_work_queue(
+    config.get('coordination', {}),
+    timeout=server_config.get('lock_timeout', DEFAULT_LOCK_TIMEOUT)
+)
+
+def release_items(ids: list, session_id: str):
+    """🔓 잠금 해제 + 분배 대기열로 반납 (건너뛰기/포기 - 다른 작업자가 가져갈 수 있음)"""
+    locks.release(ids, session_id)
+    work_queue.release(ids, session_id)
+
+# 📡 브라우저로 보내는 이벤트 (준비된 항목, 잠금 변경, 통계, 저장 결과)
+events = EventHub(heartbeat=server_config.get('event_heartbeat', 15))
+
+# 🧵 스레드를 띄우는 객체(세션 정리 스레드, 저장 전송 워커)는 처음 쓸 때 프로세스마다 만듦
+# (앱을 import만 하는 프로세스 - gunicorn 마스터 등 - 는 스레드/저널 연결을 열지 않음)
+_singletons_lock = threading.Lock()
+_sessions = None
+_save_queue = None
+
+def get_sessions() -> SessionRegistry:
+    """👥 세션별 번역 상태 (유휴 세션 자동 정리)"""
+    global _sessions
+    with _singletons_lock:
+        if _sessions is None:
+            _sessions = SessionRegistry(
+                release_items,
+                idle_timeout=server_config.get('session_idle_timeout', 1800),
+                max_sessions=server_config.get('max_sessions', 100)
+            )
+        return _sessions
+
+def on_save_result(job, success: bool):
+    """저장 대기열 전송 결과 처리"""
+    if success:
+        string_cache.update_string(job.string_id, job.translation, 5 if job.as_review else 1)
+        if job.original:
+            # 📚 다음에 같은 문장이 나오면 재사용
+            translation_memory.record(job.original, job.translation, job.glossary_key)
+        # 🔓 Paratranz 저장 확인 후 잠금 해제
+        locks.release([job.string_id], job.session_id)
+        if job.queue_key:
+            work_queue.complete(job.queue_key, [job.string_id])
+        print(f"🔓 항목 {job.string_id} 잠금 해제 (저장 완료)")
+    # 📡 저장 결과 알림 (실패하면 화면에서 다시 시도 가능)
+    events.publish(job.session_id, 'save', {
+        'id': job.string_id,
+        'success': success,
+        'error': job.error,
+        'saves': get_save_queue().counts(job.session_id)
+    })
+
+# 📚 번역 메모리 (저장된 번역 재사용)
+translation_memory = TranslationMemory()
+
+# 🗄️ 로컬 문자열 캐시 (바뀐 파일만 다시 받아옴)
+string_cache = StringCache()
+
+def get_save_queue() -> SaveQueue:
+    """💾 저장 대기열 (SQLite 저널 + 백그라운드 전송)"""
+    global _save_queue
+    with _singletons_lock:
+        if _save_queue is None:
+            _save_queue = SaveQueue(on_result=on_save_result)
+        return _save_queue
+
+# 📖 공유 용어집 (모든 세션의 번역기가 같은 저장소를 읽음)
+glossary_store = get_glossary_store(GLOSSARY_DB, DEFAULT_GLOSSARY, GLOSSARY_FILE)
+
+def on_glossary_change(version: int, action: str, en: str, ko):
+    """📡 용어집 변경 알림 (다른 작업자 화면의 용어집도 갱신)"""
+    events.broadcast('glossary', {'version': version, 'action': action, 'en': en, 'ko': ko})
+
+glossary_store.subscribe(on_glossary_change)
+
+@app.errorhandler(SessionLimitError)
+def session_limit(error):
+    """🚦 최대 세션 수 도달 (모든 세션이 작업 중) → 새 작업자는 잠시 뒤 다시 시도"""
+    return jsonify({'success': False, 'error': str(error)}), 503
 
 @app.route('/')
 def index():
@@ -113,260 +153,333 @@ def get_session():
     session_id = str(uuid.uuid4())
     return jsonify({'session_id': session_id})
 
-@app.route('/api/files')
-def get_files():
-    """파일 목록 가져오기"""
-    global translator
-    
-    # 사용자 API 키 받기
+def current_session() -> ReviewSession:
+    """요청 헤더의 세션 ID로 세션 상태 가져오기 (활동 중이므로 잡고 있는 잠금 연장)"""
+    session_id = request.headers.get('X-Session-ID', 'anonymous')
+    locks.renew(session_id)
+    work_queue.renew(session_id)
+    return get_sessions().get(session_id)
+
+def get_request_keys():
+    """요청 헤더에서 사용자 API 키 읽기"""
     paratranz_key = request.headers.get('X-Paratranz-Key')
     gemini_key = request.headers.get('X-Gemini-Key')
     gemini_model = request.headers.get('X-Gemini-Model', 'gemini-2.5-flash-lite')
+    if paratranz_key:
+        # 재시작 전에 쌓인 같은 키의 저장도 전송 재개
+        get_save_queue().register_key(paratranz_key)
+    return paratranz_key, gemini_key, gemini_model
+
+@app.route('/api/events')
+def event_stream():
+    """📡 서버 이벤트 스트림 (EventSource는 헤더를 못 보내므로 세션 ID는 쿼리로)"""
+    session_id = request.args.get('session_id', 'anonymous')
+    subscriber = events.subscribe(session_id)
+    return Response(
+        stream_with_context(events.stream(subscriber)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def push_item(session: ReviewSession, payload: dict):
+    """항목 응답을 이벤트로도 보내고 JSON 응답으로 반환 (seq로 중복 표시 방지)"""
+    payload['seq'] = session.next_seq()
+    events.publish(session.session_id, 'item', payload)
+    return jsonify(payload)
+
+def watch_batch(session: ReviewSession, batch):
+    """스트리밍 중인 배치의 번역이 도착할 때마다 알림"""
+    session_id = session.session_id
+    
+    def on_item(index, pair):
+        events.publish(session_id, 'translation', {'id': batch.data[index].get('id'), 'translations': pair})
+    
+    def on_finish():
+        if session.translator:
+            events.publish(session_id, 'stats', progress_stats(session))
+    
+    batch.watch(on_item, on_finish)
+
+def progress_stats(session: ReviewSession):
+    """진행 통계 (API 사용량, 저장 대기열, 파싱 성공률)"""
+    translator = session.translator
+    usage = translator.usage_today()  # 사용량 장부의 오늘 누적 (재시작/다른 작업자 포함)
+    return {
+        'translation_count': translator.translation_count,
+        'api_calls': usage['requests'],
+        'daily_limit': translator.daily_limit,
+        'remaining_calls': translator.daily_limit - usage['requests'],
+        'tokens': usage['total_tokens'],
+        'usage': usage,
+        'saves': get_save_queue().counts(session.session_id),
+        'parse': translator.parse_success_stats()
+    }
+
+@app.route('/api/files')
+def get_files():
+    """파일 목록 가져오기"""
+    paratranz_key, gemini_key, gemini_model = get_request_keys()
     
     if not paratranz_key or not gemini_key:
         return jsonify({'success': False, 'error': 'API 키가 필요합니다'})
     
-    # 새로운 번역기 인스턴스 생성 (사용자 키 사용)
-    translator = ParatranzAPITranslator(
-        paratranz_key=paratranz_key, 
-        gemini_key=gemini_key,
-        model_name=gemini_model
-    )
+    session = current_session()
+    with session.mutex:
+        # 키가 바뀌었을 때만 번역기 새로 생성
+        translator = session.get_translator(paratranz_key, gemini_key, gemini_model)
     
-    files = translator.fetch_files()
+    # 🗄️ 최근에 받아온 목록이면 캐시 사용
+    files = string_cache.get_files(translator)
     if files:
+        for file in files:
+            if string_cache.is_fresh(file.get('id')):
+                file['stage_counts'] = string_cache.stage_counts(file.get('id'))
         return jsonify({'success': True, 'files': files})
     return jsonify({'success': False, 'error': '파일 목록을 가져올 수 없습니다'})
 
 @app.route('/api/start', methods=['POST'])
 def start_translation():
     """번역 시작"""
-    global translator, current_batch_translations, current_batch_data, current_item_index
-    global current_file_id, current_stage, current_page
-    
-    # 사용자 API 키 받기
-    paratranz_key = request.headers.get('X-Paratranz-Key')
-    gemini_key = request.headers.get('X-Gemini-Key')
-    gemini_model = request.headers.get('X-Gemini-Model', 'gemini-2.5-flash-lite')
+    paratranz_key, gemini_key, gemini_model = get_request_keys()
     
     if not paratranz_key or not gemini_key:
         return jsonify({'success': False, 'error': 'API 키가 필요합니다'})
     
     data = request.json
-    current_file_id = data.get('file_id')
-    current_stage = data.get('stage')
-    current_page = 1
-    
-    # 사용자 키로 번역기 생성
-    translator = ParatranzAPITranslator(
-        paratranz_key=paratranz_key, 
-        gemini_key=gemini_key,
-        model_name=gemini_model
-    )
-    
-    # 문자열 가져오기 (결과는 translator.current_strings에 저장됨)
-    success = translator.fetch_strings(current_file_id, current_stage, page=current_page)
+    file_id = data.get('file_id')
+    stage = data.get('stage')
     
-    if not success or not translator.current_strings:
-        return jsonify({'success': False, 'error': '가져올 문자열이 없습니다'})
-    
-    translator.current_index = 0
-    
-    # 첫 배치 번역 시작
-    return next_batch()
+    session = current_session()
+    with session.mutex:
+        # 이전 작업 정리 (미리 잠근 항목 해제)
+        session.close(release_items)
+        
+        translator = session.get_translator(paratranz_key, gemini_key, gemini_model)
+        
+        # 🗄️ 파일 목록 1회 요청으로 변경 여부 확인 (방금 파일 목록 화면에서 받았으면 그대로)
+        string_cache.get_files(translator, max_age=START_CHECK_AGE)
+        key = work_key(file_id, stage)
+        source = get_work_source(key)
+        if source is None or source.failed or (source.finished and not string_cache.is_fresh(file_id)):
+            if string_cache.is_fresh(file_id):
+                # 바뀌지 않은 파일 → API 요청 없이 캐시에서 시작
+                stream = ListStringStream(string_cache.load_strings(file_id, stage))
+            else:
+                # 캐시 갱신(파일 전체 병렬 다운로드)에서 이 단계 항목을 받는 대로 넘겨받음
+                # (다른 단계가 이미 갱신 중이면 이 단계만 따로 받음)
+                stream = (string_cache.refresh_stream(translator, file_id, stage)
+                          or StringStream(translator, file_id, stage))
+            stream.start()
+            # 같은 파일/단계를 여는 다른 세션은 이 공급을 함께 씀 (다시 내려받지 않음)
+            source = set_work_source(key, stream, work_queue)
+        session.work_key = key
+        
+        # 백그라운드 프리페치 시작 (다음 배치들을 미리 번역, 항목은 대기열에서 나눠 받음)
+        session.prefetcher = BatchPrefetcher(
+            translator, QueueStream(source, session.session_id, WORK_CHUNK_SIZE), session.session_id,
+            locks.acquire, release_items, memory=translation_memory
+        )
+        session.prefetcher.start()
+        
+        # 첫 배치 번역 시작
+        return load_next_batch(session)
+
+def completed_response(session: ReviewSession):
+    """모든 항목 완료 응답"""
+    print("✅ 모든 항목 번역 완료!")
+    translator = session.translator
+    usage = translator.usage_today()
+    return push_item(session, {
+        'success': True,
+        'completed': True,
+        'stats': {
+            'translated': translator.translation_count,
+            'total': translator.translation_count,
+            'tokens': usage['total_tokens'],
+            'api_calls': usage['requests'],
+            'remaining': translator.daily_limit - usage['requests']
+        }
+    })
 
 @app.route('/api/next_batch')
 def next_batch():
-    """다음 배치 번역"""
-    global translator, current_batch_translations, current_batch_data, current_item_index
-    global current_file_id, current_stage, current_page  # current_page도 전역 변수
+    """다음 배치 (프리페치된 배치가 있으면 즉시 반환)"""
+    session = current_session()
+    with session.mutex:
+        return load_next_batch(session)
+
+def load_next_batch(session: ReviewSession):
+    """세션의 다음 배치로 전환 후 첫 항목 응답 (session.mutex 보유 상태에서 호출)"""
+    response = switch_batch(session)
+    if response is not None:
+        return response
     
+    # 첫 번째 항목 반환
+    return current_item_response(session)
+
+def switch_batch(session: ReviewSession):
+    """세션의 다음 배치로 전환 (전환했으면 None, 완료/오류면 그 응답)"""
     # 안전 체크
-    if not translator or not hasattr(translator, 'current_strings') or not isinstance(translator.current_strings, list):
+    if not session.translator or not session.prefetcher:
         return jsonify({'success': False, 'error': '번역기가 초기화되지 않았습니다'})
     
-    # 현재 페이지의 항목들을 모두 처리했으면 다음 페이지 로드
-    if translator.current_index >= len(translator.current_strings):
-        print(f"\n📄 현재 페이지({current_page}) 완료! 다음 페이지 로드 중...")
-        current_page += 1
-        
-        # 다음 페이지 가져오기
-        success = translator.fetch_strings(current_file_id, current_stage, page=current_page)
-        
-        if not success or not translator.current_strings or len(translator.current_strings) == 0:
-            # 더 이상 항목이 없으면 완료
-            print("✅ 모든 항목 번역 완료!")
-            return jsonify({
-                'success': True,
-                'completed': True,
-                'stats': {
-                    'translated': translator.translation_count,
-                    'total': translator.translation_count,
-                    'tokens': translator.total_tokens_used,
-                    'api_calls': translator.request_count,
-                    'remaining': translator.daily_limit - translator.request_count
-                }
-            })
-        
-        translator.current_index = 0
-        print(f"✅ 페이지 {current_page}: {len(translator.current_strings)}개 항목 로드됨")
+    batch = session.prefetcher.next_batch()
     
-    # 세션 ID 받기
-    session_id = request.headers.get('X-Session-ID', 'anonymous')
+    if batch.status == 'completed':
+        stream = session.prefetcher.stream
+        if stream.failed:
+            return jsonify({'success': False, 'error': '원문을 가져오지 못했습니다 (Paratranz 응답 오류)'})
+        if stream.total == 0:
+            return jsonify({'success': False, 'error': '가져올 문자열이 없습니다'})
+        return completed_response(session)
     
-    # 배치 데이터 수집 (잠금된 것 제외)
-    batch_data = []
-    batch_originals = []
-    skipped_count = 0
-    max_scan = 100  # 최대 100개까지 스캔
+    if batch.status == 'all_locked':
+        return jsonify({
+            'success': False, 
+            'error': '모든 항목이 다른 사용자가 작업 중입니다. 잠시 후 다시 시도하세요.'
+        })
     
-    while len(batch_data) < BATCH_SIZE and skipped_count < max_scan:
-        idx = translator.current_index + len(batch_data) + skipped_count
-        
-        # 현재 페이지 끝에 도달하면 다음 페이지 시도
-        if idx >= len(translator.current_strings):
-            print(f"\n📄 현재 페이지 끝 도달. 다음 페이지 시도 중...")
-            translator.current_index = len(translator.current_strings)  # 다음 페이지 준비
-            current_page_temp = current_page + 1
-            
-            # 다음 페이지 가져오기
-            success = translator.fetch_strings(current_file_id, current_stage, page=current_page_temp)
-            
-            if not success or not translator.current_strings or len(translator.current_strings) == 0:
-                # 더 이상 페이지 없음
-                print("📄 더 이상 가져올 항목이 없습니다")
-                break
-            
-            # 다음 페이지로 전환
-            current_page = current_page_temp
-            translator.current_index = 0
-            skipped_count = 0  # 카운트 리셋
-            continue
-        
-        string_data = translator.current_strings[idx]
-        string_id = string_data.get('id')
-        original = string_data.get('original', string_data.get('key', ''))
-        
-        if not original:
-            skipped_count += 1
-            continue
-        
-        # 🔒 잠금 시도
-        if lock_string(string_id, session_id):
-            # 잠금 성공 → 배치에 추가
-            batch_data.append(string_data)
-            batch_originals.append(original)
-        else:
-            # 다른 사용자가 작업 중 → 건너뜀
-            print(f"⏭️  항목 {string_id} 건너뜀 (다른 사용자 작업 중)")
-            skipped_count += 1
-    
-    # 배치 데이터 확인
-    if not batch_data:
-        # 모든 항목이 잠금되어 있거나 더 이상 항목이 없음
-        if skipped_count >= max_scan:
-            return jsonify({
-                'success': False, 
-                'error': '모든 항목이 다른 사용자가 작업 중입니다. 잠시 후 다시 시도하세요.'
-            })
-        else:
-            # 모든 항목 번역 완료
-            print("✅ 모든 항목 번역 완료!")
-            return jsonify({
-                'success': True,
-                'completed': True,
-                'stats': {
-                    'translated': translator.translation_count,
-                    'total': translator.translation_count,
-                    'tokens': translator.total_tokens_used,
-                    'api_calls': translator.request_count,
-                    'remaining': translator.daily_limit - translator.request_count
-                }
-            })
-    
-    # 인덱스 업데이트 (다음 번에는 건너뛴 항목 이후부터)
-    translator.current_index += len(batch_data) + skipped_count
-    
-    # 배치 번역 실행
-    batch_translations = translator.translate_batch_with_gemini(batch_originals)
-    
-    if not batch_translations:
+    if batch.status != 'ok':
         return jsonify({'success': False, 'error': '배치 번역 실패'})
     
-    # 전역 변수에 저장
-    current_batch_data = batch_data
-    current_batch_translations = batch_translations
-    current_item_index = 0
-    
-    # 첫 번째 항목 반환
-    return get_current_item()
+    session.set_batch(batch.data, batch.translations, batch.memory_hits, batch.similar, source=batch)
+    watch_batch(session, batch)
+    return None
 
 @app.route('/api/current')
 def get_current_item():
     """현재 번역 항목 가져오기"""
-    global current_batch_data, current_batch_translations, current_item_index
-    
-    if current_item_index >= len(current_batch_data):
+    session = current_session()
+    with session.mutex:
+        return current_item_response(session)
+
+def current_item_response(session: ReviewSession):
+    """세션의 현재 항목 응답 (session.mutex 보유 상태에서 호출)"""
+    string_data = session.current_item()
+    if string_data is None:
         # 배치 완료, 다음 배치로
-        return next_batch()
+        return load_next_batch(session)
     
-    string_data = current_batch_data[current_item_index]
-    translations = current_batch_translations[current_item_index]
-    original = string_data.get('original', string_data.get('key', ''))
-    context = string_data.get('context', '')
-    
-    # 진행률 계산: 완료된 개수 + 현재 배치 내 진행
-    current_progress = translator.translation_count + current_item_index + 1
-    
-    # 전체 개수는 대략적으로 표시 (정확한 전체 개수를 알 수 없으므로)
-    # 완료된 개수 + 현재 배치 + 예상 남은 개수
-    estimated_total = max(current_progress, translator.translation_count + len(current_batch_data))
+    # 📡 스트리밍 중이면 이 항목의 번역이 도착할 때까지만 대기 (배치 전체를 기다리지 않음)
+    # 이벤트 스트림에 연결된 브라우저는 기다리지 않고 원문부터 표시 → 번역은 'translation' 이벤트로 도착
+    # 분당 한도로 요청이 미뤄진 배치도 기다리지 않음 → 화면에 ETA 표시
+    wait_timeout = 0 if events.subscribed(session.session_id) else ITEM_WAIT_TIMEOUT
+    session.wait_translation(wait_timeout)
     
-    return jsonify({
+    return push_item(session, {
         'success': True,
         'data': {
-            'original': original,
-            'context': context,
-            'translations': translations,
-            'current': current_progress,
-            'total': estimated_total,
-            'batch_progress': f"{current_item_index + 1}/{len(current_batch_data)}",
-            'translation_count': translator.translation_count,
-            'api_calls': translator.request_count,
-            'remaining_calls': translator.daily_limit - translator.request_count,
-            'tokens': translator.total_tokens_used
+            **item_payload(session, session.item_index),
+            **progress_stats(session),
+            'memory': memory_stats(session)
         }
     })
 
+def item_payload(session: ReviewSession, item_index: int):
+    """배치의 항목 하나 (원문, 번역, 진행률, 비슷한 과거 번역)"""
+    string_data = session.batch_data[item_index]
+    translator = session.translator
+    batch_len = len(session.batch_data)
+    translations = session.batch_translations[item_index]
+    
+    # 진행률 계산: 완료된 개수 + 현재 배치 내 진행
+    current_progress = translator.translation_count + item_index + 1
+    
+    # 전체 개수는 대략적으로 표시 (정확한 전체 개수를 알 수 없으므로)
+    # 완료된 개수 + 현재 배치 + 예상 남은 개수
+    estimated_total = max(current_progress, translator.translation_count + batch_len)
+    
+    return {
+        'id': string_data.get('id'),
+        'original': string_data.get('original', string_data.get('key', '')),
+        'context': string_data.get('context', ''),
+        'translations': translations,
+        'pending': translations is None,  # True면 번역 도착 전 ('translation' 이벤트나 재요청으로 받음)
+        'eta': session.translation_eta() if translations is None else None,  # 분당 한도로 요청 대기 중이면 남은 초
+        'current': current_progress,
+        'total': estimated_total,
+        'batch_progress': f"{item_index + 1}/{batch_len}",
+        'memory_hit': session.batch_memory_hits[item_index],
+        'similar': [
+            {'original': src, 'translation': dst, 'score': round(score * 100)}
+            for src, dst, score in session.batch_similar[item_index]
+        ]
+    }
+
+@app.route('/api/window')
+def get_window():
+    """앞으로 작업할 항목 묶음 (브라우저가 미리 받아 두고 서버 응답 없이 바로 넘김)"""
+    count = max(1, min(request.args.get('count', WINDOW_SIZE, type=int), WINDOW_SIZE))
+    
+    session = current_session()
+    with session.mutex:
+        if session.current_item() is None:
+            # 배치 완료, 다음 배치로
+            response = switch_batch(session)
+            if response is not None:
+                return response
+        
+        start = session.item_index
+        end = min(start + count, len(session.batch_data))
+        return jsonify({
+            'success': True,
+            'items': [item_payload(session, i) for i in range(start, end)],
+            **progress_stats(session),
+            'memory': memory_stats(session)
+        })
+
+def memory_stats(session: ReviewSession):
+    """번역 메모리 적중률 (현재 배치 + 세션 누적)"""
+    batch_hits = sum(session.batch_memory_hits)
+    return {
+        'batch_hits': batch_hits,
+        'batch_size': len(session.batch_data),
+        'hits': session.memory_hits,
+        'items': session.items_served,
+        'hit_rate': round(session.memory_hits / session.items_served * 100, 1) if session.items_served else 0,
+        # 적중한 항목 수를 호출당 평균 항목 수로 환산한 절약 호출 수
+        'api_calls_saved': int(session.memory_hits / (session.translator.items_per_request() or BATCH_SIZE))
+    }
+
 @app.route('/api/select', methods=['POST'])
 def select_translation():
     """번역 선택"""
-    global current_item_index, current_batch_translations, current_batch_data
-    
     data = request.json
     choice = data.get('choice')  # 1, 2, 3(편집), 5(건너뛰기)
     edited_text = data.get('edited_text', '')
-    session_id = request.headers.get('X-Session-ID', 'anonymous')
     
-    if choice == 5:  # 건너뛰기
-        # 🔓 잠금 해제
-        string_data = current_batch_data[current_item_index]
-        string_id = string_data.get('id')
-        unlock_string(string_id, session_id)
-        print(f"🔓 항목 {string_id} 잠금 해제 (건너뛰기)")
+    session = current_session()
+    with session.mutex:
+        string_data = session.current_item()
+        if string_data is None:
+            return jsonify({'success': False, 'error': '배치 데이터가 없습니다'})
         
-        current_item_index += 1
-        return get_current_item()
-    
-    # 선택된 번역 결정
-    if choice == 1:
-        selected = current_batch_translations[current_item_index][0]
-    elif choice == 2:
-        selected = current_batch_translations[current_item_index][1]
-    elif choice == 3:  # 편집
-        selected = edited_text
-    else:
-        return jsonify({'success': False, 'error': '잘못된 선택입니다'})
+        if choice == 5:  # 건너뛰기
+            string_id = string_data.get('id')
+            if not same_item(data, string_id):
+                return out_of_sync_response()
+            # 🔓 잠금 해제
+            release_items([string_id], session.session_id)
+            print(f"🔓 항목 {string_id} 잠금 해제 (건너뛰기)")
+            
+            session.item_index += 1
+            return next_item_response(session, data, string_id)
+        
+        # 선택된 번역 결정
+        if choice in (1, 2):
+            translations = session.batch_translations[session.item_index]
+            if translations is None:
+                # 스트리밍 중 아직 도착하지 않은 항목 ('translation' 이벤트를 받은 뒤 다시 선택)
+                return jsonify({
+                    'success': False,
+                    'pending': True,
+                    'error': '번역이 아직 도착하지 않았습니다. 잠시 후 다시 선택하세요.'
+                })
+            selected = translations[choice - 1]
+        elif choice == 3:  # 편집
+            selected = edited_text
+        else:
+            return jsonify({'success': False, 'error': '잘못된 선택입니다'})
     
     return jsonify({
         'success': True,
@@ -377,71 +490,128 @@ def select_translation():
 @app.route('/api/save', methods=['POST'])
 def save_translation():
     """번역 저장"""
-    global current_item_index, current_batch_data
-    
     data = request.json
     translation = data.get('translation')
     save_type = data.get('save_type')  # 1=저장, 2=검토, 3=취소
-    session_id = request.headers.get('X-Session-ID', 'anonymous')
-    
-    string_data = current_batch_data[current_item_index]
-    string_id = string_data.get('id')
-    
-    if save_type == 3:  # 취소
-        # 취소는 잠금 해제 안 함 (계속 작업 중)
-        return jsonify({'success': True, 'cancelled': True})
-    
-    as_review = (save_type == 2)
-    success = translator.save_translation(string_data, translation, as_review)
     
-    if success:
-        translator.translation_count += 1
-        # 🔓 저장 성공 시 잠금 해제
-        unlock_string(string_id, session_id)
-        print(f"🔓 항목 {string_id} 잠금 해제 (저장 완료)")
-    
-    # 다음 항목으로
-    current_item_index += 1
-    
-    return get_current_item()
+    session = current_session()
+    with session.mutex:
+        string_data = session.current_item()
+        if string_data is None:
+            return jsonify({'success': False, 'error': '배치 데이터가 없습니다'})
+        string_id = string_data.get('id')
+        
+        if save_type == 3:  # 취소
+            # 취소는 잠금 해제 안 함 (계속 작업 중)
+            return jsonify({'success': True, 'cancelled': True})
+        
+        if not same_item(data, string_id):
+            return out_of_sync_response()
+        
+        # 💾 저장 대기열에 기록만 하고 바로 다음 항목으로 (전송은 백그라운드)
+        # 🔒 잠금은 Paratranz 저장이 확인된 뒤에 해제됨 (on_save_result)
+        paratranz_key = session.translator_keys[0]
+        as_review = (save_type == 2)
+        original = string_data.get('original', string_data.get('key', ''))
+        get_save_queue().enqueue(
+            paratranz_key, string_id, translation, as_review, session.session_id,
+            original=original,
+            glossary_key=glossary_key(original, session.translator.glossary, session.translator.glossary_index),
+            queue_key=session.work_key
+        )
+        session.translator.translation_count += 1
+        
+        # 다음 항목으로
+        session.item_index += 1
+        
+        return next_item_response(session, data, string_id)
+
+def same_item(data: dict, string_id) -> bool:
+    """브라우저가 보낸 항목 ID가 서버의 현재 항목과 같은지 (ID를 안 보냈으면 현재 항목으로 간주)"""
+    return data.get('id') is None or data.get('id') == string_id
+
+def out_of_sync_response():
+    return jsonify({
+        'success': False,
+        'out_of_sync': True,
+        'error': '화면의 항목과 서버의 현재 항목이 다릅니다. 목록을 다시 불러옵니다.'
+    })
+
+def next_item_response(session: ReviewSession, data: dict, string_id):
+    """처리 후 응답 - 미리 받은 항목으로 넘어가는 브라우저(queue)는 확인만, 아니면 다음 항목"""
+    if data.get('queue'):
+        return jsonify({'success': True, 'id': string_id})
+    return current_item_response(session)
+
+@app.route('/api/save/retry', methods=['POST'])
+def retry_failed_saves():
+    """실패한 저장 다시 시도 (id를 보내면 그 항목만)"""
+    session_id = request.headers.get('X-Session-ID', 'anonymous')
+    string_id = (request.get_json(silent=True) or {}).get('id')
+    count = get_save_queue().retry_failed(session_id, string_id)
+    return jsonify({'success': True, 'retried': count, 'saves': get_save_queue().counts(session_id)})
 
 @app.route('/api/glossary', methods=['GET', 'POST'])
 def manage_glossary():
-    """용어집 관리"""
+    """용어집 관리 (번역기 초기화 없이도 사용 가능)"""
     if request.method == 'GET':
         return jsonify({
             'success': True,
-            'glossary': translator.glossary
+            'glossary': glossary_store.terms(),
+            'version': glossary_store.version
         })
     
-    # POST - 용어집 업데이트
+    # POST - 용어 하나씩 바로 저장
     data = request.json
     action = data.get('action')  # add, delete, update
+    en = (data.get('en') or '').strip()
+    ko = (data.get('ko') or '').strip()
+    version = None
     
     if action == 'add':
-        en = data.get('en')
-        ko = data.get('ko')
         if en and ko:
-            translator.glossary[en] = ko
-            translator.save_glossary()
-            return jsonify({'success': True})
+            version = glossary_store.set(en, ko)
     
     elif action == 'delete':
-        en = data.get('en')
-        if en in translator.glossary:
-            del translator.glossary[en]
-            translator.save_glossary()
-            return jsonify({'success': True})
+        version = glossary_store.delete(en)
     
     elif action == 'update':
-        en = data.get('en')
-        ko = data.get('ko')
-        if en in translator.glossary and ko:
-            translator.glossary[en] = ko
-            translator.save_glossary()
-            return jsonify({'success': True})
+        if glossary_store.get(en) is not None and ko:
+            version = glossary_store.set(en, ko)
     
-    return jsonify({'success': False})
+    if version is None:
+        return jsonify({'success': False})
+    return jsonify({'success': True, 'version': version})
+
+_shutdown_lock = threading.Lock()
+_shut_down = False
+
+def close_streams():
+    """📡 이벤트 스트림 종료 (서버가 응답 중인 요청을 기다릴 때 스트림 연결이 끝나도록)"""
+    events.close()
+
+def shutdown(drain_timeout: float = wsgi_server.DEFAULT_DRAIN_TIMEOUT):
+    """⏹️ 종료 정리: 세션 정리(프리페치 중단, 잠금 반납) → 저장 대기열 전송 대기 (한 번만 실행)"""
+    global _shut_down
+    with _shutdown_lock:
+        if _shut_down:
+            return
+        _shut_down = True
+    
+    close_streams()
+    with _singletons_lock:
+        registry, queue = _sessions, _save_queue
+    closed = registry.close_all() if registry else 0
+    if queue is None:
+        print(f"⏹️  종료 중: 세션 {closed}개 정리 (저장 대기열 사용 안 함)")
+        return
+    print(f"⏹️  종료 중: 세션 {closed}개 정리, 저장 대기열 전송 대기 (최대 {drain_timeout}초)")
+    remaining = queue.drain(drain_timeout)
+    queue.stop(wait=5)
+    if remaining:
+        print(f"💾 보내지 못한 저장 {remaining}개는 저널에 남김 (재시작 후 같은 API 키로 접속하면 전송)")
+    else:
+        print("✅ 저장 대기열 전송 완료")
 
 def get_local_ip():
     """로컬 IP 주소 가져오기"""
@@ -455,12 +625,41 @@ def get_local_ip():
     except:
         return "IP 확인 실패"
 
-def open_browser():
+def open_browser(port: int = 5000):
     """브라우저 자동 열기"""
     time.sleep(1)
-    webbrowser.open('http://localhost:5000')
+    webbrowser.open(f'http://localhost:{port}')
+
+def parse_args(argv=None):
+    """실행 옵션 (기본값은 translator_config.json의 server)"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Paratranz 웹 UI 번역기')
+    parser.add_argument('--mode', choices=wsgi_server.SERVER_MODES, default=server_config.get('mode', 'waitress'),
+                        help='서버 실행 방식 (waitress: 기본, gunicorn: Linux/macOS, dev: Flask 개발 서버)')
+    parser.add_argument('--host', default=server_config.get('host', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=server_config.get('port', 5000))
+    parser.add_argument('--threads', type=int, default=server_config.get('threads', wsgi_server.DEFAULT_THREADS),
+                        help='동시 처리 요청 수 (이벤트 스트림 연결 포함)')
+    parser.add_argument('--workers', type=int, default=server_config.get('workers', wsgi_server.MAX_WORKERS),
+                        help='gunicorn 워커 프로세스 수 (1개만 지원)')
+    parser.add_argument('--timeout', type=float,
+                        default=server_config.get('request_timeout', wsgi_server.DEFAULT_REQUEST_TIMEOUT),
+                        help='요청/연결 시간 제한 (초)')
+    parser.add_argument('--drain-timeout', type=float,
+                        default=server_config.get('drain_timeout', wsgi_server.DEFAULT_DRAIN_TIMEOUT),
+                        help='종료 시 저장 대기열 전송 최대 대기 (초)')
+    parser.add_argument('--no-browser', action='store_true', help='브라우저 자동 열기 안 함')
+    args = parser.parse_args(argv)
+    try:
+        wsgi_server.check_workers(args.workers)
+    except ValueError as e:
+        parser.error(f"--workers: {e}")
+    return args
 
 if __name__ == '__main__':
+    args = parse_args()
+    mode = wsgi_server.resolve_mode(args.mode)
+    port = args.port
     local_ip = get_local_ip()
     use_ngrok = os.getenv('USE_NGROK', 'false').lower() == 'true'
     
@@ -478,7 +677,6 @@ if __name__ == '__main__':
             
             # Windows 인코딩 문제 해결
             import locale
-            import sys
             import subprocess
             
             if sys.platform == 'win32':
@@ -500,7 +698,7 @@ if __name__ == '__main__':
                     pass
             
             # ngrok 연결
-            public_url = ngrok.connect(5000, bind_tls=True)
+            public_url = ngrok.connect(port, bind_tls=True)
             print(f"✅ ngrok 터널 생성 완료!")
         except Exception as e:
             print(f"⚠️  ngrok 실패: {e}")
@@ -516,20 +714,26 @@ if __name__ == '__main__':
     print("   - 저장 단계: 1: 저장, 2: 검토, 3: 편집, 4: 취소")
     print()
     print("🔗 접속 주소:")
-    print(f"   💻 PC: http://localhost:5000")
-    print(f"   📱 같은 WiFi: http://{local_ip}:5000")
+    print(f"   💻 PC: http://localhost:{port}")
+    print(f"   📱 같은 WiFi: http://{local_ip}:{port}")
     
     if public_url:
         print(f"   🌍 외부 인터넷: {public_url}")
         print("      (어디서나 접속 가능!)")
     
     print()
-    print("⏹️  종료: Ctrl+C")
+    print(f"⚙️  서버: {wsgi_server.describe(mode, args.threads, args.timeout, args.drain_timeout)}")
+    print("⏹️  종료: Ctrl+C (보내지 못한 저장을 마저 전송한 뒤 종료)")
     print("="*60)
     
     # 브라우저 자동 열기
-    threading.Thread(target=open_browser, daemon=True).start()
-    
-    # Flask 서버 실행
-    app.run(debug=False, host='0.0.0.0', port=5000)
+    if not args.no_browser:
+        threading.Thread(target=open_browser, args=(port,), daemon=True).start()
+    
+    # 서버 실행 (종료 신호를 받으면 저장 대기열을 마저 전송한 뒤 프로세스 종료)
+    wsgi_server.serve(
+        sys.modules[__name__], mode, args.host, port,
+        threads=args.threads, workers=args.workers,
+        request_timeout=args.timeout, drain_timeout=args.drain_timeout
+    )
 
@@ -0,0 +1,319 @@
+"""
+작업 분배 대기열
+세션마다 파일 처음부터 훑으며 다른 사람이 잠근 항목을 건너뛰면, 작업자가 많을 때 모두 같은 앞쪽 항목에서 부딪혀
+건너뛰기 한도를 다 쓰고 "다른 사용자가 작업 중"으로 끝남 → 서버가 (파일, 단계)별 대기 항목 순서를 가지고
+겹치지 않는 묶음(chunk)을 세션에 임대
+
+- WorkQueue: 대기 ID 순서 + 임대 (기본 메모리 백엔드, SQLite/Redis 백엔드는 coordination.py)
+  - lease(): 앞에서부터 count개를 꺼내 임대 → 배치마다 O(count), 잠금 충돌 스캔 없음
+  - 만료된 임대는 대기 항목보다 앞으로 (분배 순서대로) 돌아가 다시 분배, release()(건너뛰기/포기)는 맨 뒤로
+  - complete(): 저장 완료 → 그 키(파일, 단계)에서는 다시 분배하지 않음 (다른 단계 대기열에는 영향 없음)
+  - reseed(): 새로 받은 목록으로 다시 채우기 전에 완료 표시를 비움 (목록에 다시 나온 항목은 다시 분배)
+- WorkSource: (파일, 단계)별 문자열 스트림을 프로세스 안의 모든 세션이 공유 (한 번만 내려받음)
+- QueueStream: 세션별 스트림 - 대기열에서 묶음을 임대해 StringStream처럼 하나씩 꺼냄
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from lock_manager import DEFAULT_LOCK_TIMEOUT
+
+DEFAULT_CHUNK_SIZE = 20  # 한 번에 임대하는 항목 수
+HEAP_SLACK = 1024  # 연장으로 남은 옛 힙 항목이 이만큼 + 임대 수보다 많아지면 힙 재구성
+
+
+def work_key(file_id, stage) -> str:
+    """대기열 구분 키 (파일, 단계)"""
+    return f"{file_id}:{stage}"
+
+
+class WorkQueue:
+    """(파일, 단계)별 대기 항목 순서 + 세션별 임대 (프로세스 메모리)"""
+
+    def __init__(self, timeout: float = DEFAULT_LOCK_TIMEOUT):
+        self.timeout = timeout
+        self._pending: Dict[str, deque] = {}  # 키 → 대기 ID (분배 순서)
+        self._order: Dict[str, Dict] = {}  # 키 → {ID: 분배 순서} (한 번이라도 추가된 ID, 반납하면 맨 뒤 순서)
+        self._seq: Dict[str, int] = {}  # 키 → 마지막 순서
+        self._leases: Dict[object, Tuple[str, str, float]] = {}  # ID → (키, 세션, 만료 시각)
+        self._sessions: Dict[str, Set] = {}  # 세션 → 임대 중인 ID
+        self._heap: List[Tuple[float, object]] = []  # (만료 시각, ID) - 연장 전 항목은 꺼낼 때 무시
+        self._done: Dict[str, Set] = {}  # 키 → 저장 완료된 ID
+        self._lock = threading.Lock()
+
+    def add(self, key: str, ids: Iterable) -> int:
+        """대기 항목 추가 (이미 추가된 ID는 무시) → 새로 추가한 수"""
+        added = 0
+        with self._lock:
+            order = self._order.setdefault(key, {})
+            pending = self._pending.setdefault(key, deque())
+            done = self._done.get(key, ())
+            for string_id in ids:
+                if string_id in order:
+                    continue
+                order[string_id] = self._next_seq(key)
+                if string_id not in done:
+                    pending.append(string_id)
+                    added += 1
+        return added
+
+    def _expire(self, now: float):
+        """만료된 임대를 대기열 앞으로 되돌림 (_lock 보유 상태에서 호출)"""
+        returned: Dict[str, List] = {}
+        while self._heap and self._heap[0][0] <= now:
+            expires, string_id = heapq.heappop(self._heap)
+            lease = self._leases.get(string_id)
+            if lease is None or lease[2] != expires:
+                continue  # 이미 끝났거나 연장된 임대의 옛 항목
+            key, session_id, _ = lease
+            self._drop(string_id, session_id)
+            returned.setdefault(key, []).append(string_id)
+        for key, ids in returned.items():
+            # 대기 중인 항목보다 먼저, 분배 순서대로
+            ids.sort(key=self._order[key].__getitem__)
+            self._pending[key].extendleft(reversed(ids))
+
+    def _next_seq(self, key: str) -> int:
+        self._seq[key] = self._seq.get(key, 0) + 1
+        return self._seq[key]
+
+    def _drop(self, string_id, session_id: str):
+        del self._leases[string_id]
+        held = self._sessions.get(session_id)
+        if held is not None:
+            held.discard(string_id)
+            if not held:
+                del self._sessions[session_id]
+
+    def _grant(self, key: str, string_id, session_id: str, expires: float):
+        self._leases[string_id] = (key, session_id, expires)
+        self._sessions.setdefault(session_id, set()).add(string_id)
+        heapq.heappush(self._heap, (expires, string_id))
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._leases) + HEAP_SLACK:
+            self._heap = [(expires, string_id) for string_id, (_, _, expires) in self._leases.items()]
+            heapq.heapify(self._heap)
+
+    def lease(self, key: str, session_id: str, count: int) -> List:
+        """대기열 앞에서 count개 임대 → 임대한 ID (남은 항목이 없으면 빈 목록)"""
+        now = time.time()
+        expires = now + self.timeout
+        leased = []
+        with self._lock:
+            self._expire(now)
+            pending = self._pending.get(key)
+            done = self._done.get(key, ())
+            while pending and len(leased) < count:
+                string_id = pending.popleft()
+                if string_id in done or string_id in self._leases:
+                    continue
+                self._grant(key, string_id, session_id, expires)
+                leased.append(string_id)
+        return leased
+
+    def release(self, ids: Iterable, session_id: str) -> List:
+        """임대 반납 (건너뛰기/포기) → 대기열 맨 뒤로 (본인 임대만)"""
+        released = []
+        with self._lock:
+            for string_id in ids:
+                lease = self._leases.get(string_id)
+                if lease is None or lease[1] != session_id:
+                    continue
+                self._drop(string_id, session_id)
+                self._order[lease[0]][string_id] = self._next_seq(lease[0])
+                self._pending[lease[0]].append(string_id)
+                released.append(string_id)
+        return released
+
+    def complete(self, key: str, ids: Iterable):
+        """저장 완료 → 이 키에서는 다시 분배하지 않음"""
+        with self._lock:
+            done = self._done.setdefault(key, set())
+            for string_id in ids:
+                done.add(string_id)
+                lease = self._leases.get(string_id)
+                if lease is not None and lease[0] == key:
+                    self._drop(string_id, lease[1])
+
+    def reseed(self, key: str):
+        """새 목록으로 다시 채우기 전에 완료 표시 초기화 (다시 add되는 완료 항목은 새 항목으로 분배)"""
+        with self._lock:
+            order = self._order.get(key, {})
+            for string_id in self._done.pop(key, ()):
+                order.pop(string_id, None)
+
+    def renew(self, session_id: str) -> int:
+        """활동 중인 세션의 임대 연장 → 연장한 수"""
+        now = time.time()
+        expires = now + self.timeout
+        with self._lock:
+            self._expire(now)
+            held = list(self._sessions.get(session_id, ()))
+            for string_id in held:
+                self._grant(self._leases[string_id][0], string_id, session_id, expires)
+            self._compact()
+        return len(held)
+
+    def pending(self, key: str) -> int:
+        """분배를 기다리는 항목 수 (만료된 임대 포함)"""
+        with self._lock:
+            self._expire(time.time())
+            done = self._done.get(key, ())
+            return sum(1 for string_id in self._pending.get(key, ()) if string_id not in done)
+
+
+class WorkSource:
+    """(파일, 단계) 하나의 문자열 공급 - 스트림에서 받은 항목을 보관하고 ID를 대기열에 추가
+
+    스트림(페이지 내려받기)은 잠금 없이 기다림 → 한 세션이 느린 페이지를 기다려도
+    이미 받은 항목을 찾는 다른 세션은 막히지 않음 (_cond는 보관 목록을 바꿀 때만 잡음)
+    """
+
+    def __init__(self, key: str, stream, queue: WorkQueue):
+        self.key = key
+        self.stream = stream
+        self.queue = queue
+        self.items: Dict[object, dict] = {}  # ID → 문자열 데이터
+        self.finished = False  # 스트림 끝까지 받음
+        self._pulling = 0  # 스트림에서 꺼내는 중인 스레드 수 (꺼낸 항목을 아직 보관하지 않았을 수 있음)
+        self._cond = threading.Condition()
+
+    @property
+    def failed(self) -> bool:
+        return bool(getattr(self.stream, 'failed', False))
+
+    def _pull(self) -> Optional[dict]:
+        """스트림에서 하나 꺼내 보관 (잠금 없이 기다림, 끝이면 None)"""
+        with self._cond:
+            self._pulling += 1
+        string_data, ended = None, False
+        try:
+            string_data = self.stream.next()
+            ended = string_data is None
+        finally:
+            with self._cond:
+                self._pulling -= 1
+                if ended:
+                    self.finished = True
+                elif string_data is not None:
+                    self.items[string_data.get('id')] = string_data
+                self._cond.notify_all()
+        return string_data
+
+    def fill(self, count: int) -> int:
+        """스트림에서 최대 count개를 더 받아 대기열에 추가 → 추가한 수 (원문 없는 항목은 제외)"""
+        ids = []
+        while len(ids) < count and not self.finished:
+            string_data = self._pull()
+            if string_data and string_data.get('original', string_data.get('key', '')):
+                ids.append(string_data.get('id'))
+        return self.queue.add(self.key, ids) if ids else 0
+
+    def get(self, string_id) -> Optional[dict]:
+        """ID의 문자열 데이터 (다른 프로세스가 먼저 추가한 ID면 스트림에서 나올 때까지 받음)"""
+        while True:
+            with self._cond:
+                # 스트림이 끝났어도 다른 스레드가 꺼낸 마지막 항목을 보관할 때까지 기다림
+                self._cond.wait_for(lambda: string_id in self.items or not (self.finished and self._pulling))
+                if string_id in self.items or self.finished:
+                    return self.items.get(string_id)
+            string_data = self._pull()
+            if string_data and string_data.get('original', string_data.get('key', '')):
+                self.queue.add(self.key, [string_data.get('id')])
+
+
+class QueueStream:
+    """세션별 스트림 - 대기열에서 겹치지 않는 묶음을 임대해 하나씩 꺼냄 (StringStream과 같은 메서드)
+
+    next()는 아직 받지 못한 페이지를 기다릴 수 있음 → 잠금 없이 기다리고, close()도 잠금 없이 바로 반환
+    (임대 목록은 deque의 원자적 append/popleft로만 다룸, 닫힌 뒤 꺼낸 항목은 next()가 직접 반납)
+    """
+
+    def __init__(self, source: WorkSource, session_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.source = source
+        self.queue = source.queue
+        self.session_id = session_id
+        self.chunk_size = max(1, chunk_size)
+        self._leased = deque()  # 임대했지만 아직 꺼내지 않은 ID
+        self._closed = threading.Event()
+
+    @property
+    def total(self):
+        return getattr(self.source.stream, 'total', None)
+
+    @property
+    def failed(self) -> bool:
+        return self.source.failed
+
+    def start(self):
+        pass
+
+    def next(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """다음 문자열 (대기열이 비었고 스트림도 끝났으면 None, 닫혔으면 None)"""
+        while not self._closed.is_set():
+            string_id = self._pop()
+            if string_id is not _EMPTY:
+                string_data = self.source.get(string_id)  # 스트림에서 아직 안 나온 ID면 페이지 도착까지 대기
+                if self._closed.is_set():
+                    self.queue.release([string_id], self.session_id)
+                    return None
+                if string_data is None:
+                    # 이 프로세스가 받은 목록에 없는 항목 (파일이 바뀜) → 분배 대상에서 제외
+                    self.queue.complete(self.source.key, [string_id])
+                    continue
+                return string_data
+            leased = self.queue.lease(self.source.key, self.session_id, self.chunk_size)
+            if leased:
+                self._leased.extend(leased)
+                if self._closed.is_set():
+                    self._return_leased()  # 임대하는 사이에 닫힘
+                continue
+            if self.source.finished:
+                return None
+            self.source.fill(self.chunk_size)  # 대기열이 비었으면 스트림에서 더 받음
+        return None
+
+    def _pop(self):
+        try:
+            return self._leased.popleft()
+        except IndexError:
+            return _EMPTY
+
+    def _return_leased(self):
+        leased = []
+        string_id = self._pop()
+        while string_id is not _EMPTY:
+            leased.append(string_id)
+            string_id = self._pop()
+        if leased:
+            self.queue.release(leased, self.session_id)
+
+    def close(self):
+        """임대했지만 꺼내지 않은 항목 반납 (next()가 기다리는 중이어도 바로 반환)"""
+        self._closed.set()
+        self._return_leased()
+
+
+_EMPTY = object()  # 임대 목록이 비었음 (ID로 None이 올 수도 있어 따로 표시)
+
+
+# 키 → 공유 문자열 공급 - 같은 파일/단계를 여는 모든 세션이 공유
+_sources: Dict[str, WorkSource] = {}
+_sources_lock = threading.Lock()
+
+
+def get_work_source(key: str) -> Optional[WorkSource]:
+    with _sources_lock:
+        return _sources.get(key)
+
+
+def set_work_source(key: str, stream, queue: WorkQueue) -> WorkSource:
+    """새 스트림으로 공급 교체 (대기/임대 상태는 유지, 완료 표시는 새 목록 기준으로 다시)"""
+    queue.reseed(key)
+    with _sources_lock:
+        source = _sources[key] = WorkSource(key, stream, queue)
+        return source
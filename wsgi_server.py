@@ -0,0 +1,159 @@
+"""
+운영용 서버 실행
+Flask 개발 서버(app.run)는 운영용이 아니고 (스레드 수 제한/요청 시간 제한 없음),
+Ctrl+C/SIGTERM으로 끄면 저장 대기열을 기다리지 않고 바로 종료됨 → 실행 방식을 골라 실행 + 종료 시 정리
+
+- waitress (기본, Windows 포함): 프로세스 1개 + 스레드 풀 (threads개 요청 동시 처리)
+- gunicorn (Linux/macOS): gthread 워커 프로세스 (워커마다 threads개 스레드)
+- dev: Flask 개발 서버 (디버깅용)
+- 이벤트 스트림(/api/events) 연결 하나가 스레드 하나를 계속 차지 → threads는 동시 작업자(탭) 수보다 넉넉히
+- 종료 신호: 이벤트 스트림을 먼저 닫아 (응답 중인 요청이 끝날 수 있게) → 서버 종료 → 앱의 shutdown() (저장 대기열 전송)
+
+앱 모듈은 app(WSGI 앱), close_streams(), shutdown(drain_timeout)을 제공해야 함
+"""
+
+import importlib
+import os
+import signal
+import sys
+
+# waitress 지원 (선택사항)
+try:
+    from waitress.server import create_server
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+# gunicorn 지원 (선택사항, Windows 미지원)
+try:
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    GUNICORN_AVAILABLE = False
+
+SERVER_MODES = ('waitress', 'gunicorn', 'dev')
+DEFAULT_THREADS = 64  # 동시 처리 요청 수 (이벤트 스트림 연결 포함, 작업자당 2~3개)
+DEFAULT_REQUEST_TIMEOUT = 120  # 요청/연결 시간 제한 (초)
+DEFAULT_DRAIN_TIMEOUT = 30  # 종료 시 저장 대기열 전송 최대 대기 (초)
+MAX_WORKERS = 1  # gunicorn 워커 수 (세션 상태가 프로세스 메모리에 있음)
+
+
+def resolve_mode(mode: str) -> str:
+    """설치된 서버로 실행 방식 결정 (없으면 다음 방식으로)"""
+    if mode == 'gunicorn' and not GUNICORN_AVAILABLE:
+        print("⚠️  gunicorn 미설치 (Linux/macOS: pip install gunicorn) → waitress로 실행")
+        mode = 'waitress'
+    if mode == 'waitress' and not WAITRESS_AVAILABLE:
+        print("⚠️  waitress 미설치: pip install waitress → Flask 개발 서버로 실행")
+        mode = 'dev'
+    return mode
+
+
+def check_workers(workers: int):
+    """gunicorn 워커 수 확인 (1개만 허용)
+
+    세션 상태(번역기/배치)는 프로세스 메모리에 있음 → 같은 브라우저의 요청이 다른 워커로 가면 세션이 끊김
+    gunicorn은 워커를 고정해 주지 않으므로 워커는 1개 (여러 프로세스는 포트를 나눠 실행하고 프록시에서 고정 라우팅)
+    """
+    if workers != MAX_WORKERS:
+        raise ValueError(f"workers={workers}: 세션이 워커마다 따로라 {MAX_WORKERS}개만 지원 "
+                         "(README '여러 서버 프로세스' 참고)")
+
+
+def _install_stop_signals(app_module):
+    """Ctrl+C/SIGTERM → 이벤트 스트림을 닫고 KeyboardInterrupt로 서버 루프 종료"""
+    def stop(signum, frame):
+        app_module.close_streams()
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+
+def serve(app_module, mode: str, host: str, port: int, threads: int = DEFAULT_THREADS, workers: int = 1,
+          request_timeout: float = DEFAULT_REQUEST_TIMEOUT, drain_timeout: float = DEFAULT_DRAIN_TIMEOUT):
+    """서버 실행 (종료 신호를 받으면 정리 후 프로세스 종료)"""
+    if mode == 'gunicorn':
+        serve_gunicorn(app_module, host, port, threads, workers, request_timeout, drain_timeout)
+        return
+
+    _install_stop_signals(app_module)
+    try:
+        if mode == 'waitress':
+            server = create_server(
+                app_module.app, host=host, port=port, threads=threads,
+                channel_timeout=request_timeout, ident='paratranz'
+            )
+            server.run()  # KeyboardInterrupt를 받으면 연결을 닫고 반환
+        else:
+            app_module.app.run(debug=False, host=host, port=port, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app_module.shutdown(drain_timeout)
+    _exit()
+
+
+def _exit(code: int = 0):
+    """정리가 끝난 뒤 프로세스 종료 - 한도 대기 중인 프리페치 스레드(이미 정리된 세션의 번역)는 기다리지 않음"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
+
+
+if GUNICORN_AVAILABLE:
+    class GunicornServer(BaseApplication):
+        """gunicorn 내장 실행 - 워커가 앱 모듈을 새로 불러옴 (마스터의 스레드/DB 연결은 fork 후 쓰지 않음)"""
+
+        def __init__(self, module_name: str, options: dict):
+            self.module_name = module_name
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return importlib.import_module(self.module_name).app
+
+
+def serve_gunicorn(app_module, host: str, port: int, threads: int, workers: int,
+                   request_timeout: float, drain_timeout: float):
+    """gunicorn gthread 워커로 실행"""
+    check_workers(workers)
+    module_name = os.path.splitext(os.path.basename(app_module.__file__))[0]
+
+    def post_worker_init(worker):
+        # 종료 신호를 받으면 이벤트 스트림부터 닫음 (열린 연결이 있으면 graceful_timeout까지 기다리므로)
+        module = importlib.import_module(module_name)
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def stop(signum, frame):
+            module.close_streams()
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(signal.SIGTERM, stop)
+
+    def worker_exit(server, worker):
+        importlib.import_module(module_name).shutdown(drain_timeout)
+        _exit()
+
+    GunicornServer(module_name, {
+        'bind': f"{host}:{port}",
+        'worker_class': 'gthread',
+        'workers': workers,
+        'threads': threads,
+        'timeout': request_timeout,
+        'graceful_timeout': drain_timeout + 10,  # 저장 대기열 전송 시간 + 여유
+        'post_worker_init': post_worker_init,
+        'worker_exit': worker_exit,
+    }).run()
+
+
+def describe(mode: str, threads: int, request_timeout: float, drain_timeout: float) -> str:
+    """시작 화면에 표시할 실행 방식 설명"""
+    if mode == 'dev':
+        return "Flask 개발 서버 (운영에는 waitress/gunicorn 권장)"
+    return f"{mode} (스레드 {threads}개, 요청 제한 {request_timeout}초, 종료 시 저장 대기 최대 {drain_timeout}초)"